@@ -1,24 +1,310 @@
 #!/usr/bin/env python3
 """
 DuckDB Excel Import Script
-Uses pandas to read Excel and DuckDB for fast analytics
+Streams the worksheet in row batches (openpyxl read-only mode) into DuckDB
+and upserts into a persistent table keyed by Property ID, so daily imports
+are incremental and use bounded memory.
+
+The column types inferred on the first import are pinned in
+excel_import_schema and reused afterwards. A cell that does not fit its
+pinned type widens the column (to DOUBLE or VARCHAR) rather than being
+lost; every run is recorded in excel_import_log.
 """
 
 import sys
 import os
-import pandas as pd
+import time
 import duckdb
 from pathlib import Path
-from datetime import datetime
+from datetime import date, datetime
+from openpyxl import load_workbook
+
+try:
+    import pyarrow as pa
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
 
 # Configuration
 DB_PATH = Path(__file__).parent.parent / "data" / "onemap.duckdb"
 DB_PATH.parent.mkdir(exist_ok=True)
 
+TABLE_NAME = "excel_import"
+STAGING_TABLE = "excel_import_staging"
+SCHEMA_TABLE = "excel_import_schema"
+LOG_TABLE = "excel_import_log"
+KEY_COLUMN = "Property_ID"
+
+BATCH_SIZE = 10000
+
+if HAS_PYARROW:
+    ARROW_TYPES = {
+        'VARCHAR': pa.string(),
+        'BIGINT': pa.int64(),
+        'DOUBLE': pa.float64(),
+        'TIMESTAMP': pa.timestamp('us'),
+        'BOOLEAN': pa.bool_(),
+    }
+
+def clean_column_name(name, position):
+    """Same cleaning as the original importer (spaces, ':' and '-')"""
+    if name is None or str(name).strip() == '':
+        return f"column_{position + 1}"
+    return str(name).replace(' ', '_').replace(':', '').replace('-', '_')
+
+def clean_header(header):
+    """Clean header names and make duplicates unique"""
+    seen = {}
+    columns = []
+    for position, name in enumerate(header):
+        column = clean_column_name(name, position)
+        if column in seen:
+            seen[column] += 1
+            column = f"{column}__{seen[column]}"
+        else:
+            seen[column] = 1
+        columns.append(column)
+    return columns
+
+def infer_type(values):
+    """DuckDB type for a sample of cell values (VARCHAR when mixed)"""
+    kinds = set()
+    for value in values:
+        if value is None or (isinstance(value, str) and not value.strip()):
+            continue
+        if isinstance(value, bool):
+            kinds.add('BOOLEAN')
+        elif isinstance(value, int):
+            kinds.add('BIGINT')
+        elif isinstance(value, float):
+            kinds.add('BIGINT' if value.is_integer() else 'DOUBLE')
+        elif isinstance(value, (datetime, date)):
+            kinds.add('TIMESTAMP')
+        else:
+            return 'VARCHAR'
+    
+    if not kinds:
+        return 'VARCHAR'
+    if len(kinds) == 1:
+        return kinds.pop()
+    if kinds == {'BIGINT', 'DOUBLE'}:
+        return 'DOUBLE'
+    return 'VARCHAR'
+
+def convert_value(value, column_type):
+    """
+    Convert a cell to the pinned column type
+    
+    Returns (value, coerced) where coerced is True when a non-empty cell
+    cannot be represented in column_type (the column must be widened).
+    """
+    if value is None or (isinstance(value, str) and not value.strip()):
+        return None, False
+    
+    try:
+        if column_type == 'VARCHAR':
+            if isinstance(value, float) and value.is_integer():
+                return str(int(value)), False
+            if isinstance(value, (datetime, date)):
+                return value.isoformat(), False
+            return str(value), False
+        if column_type == 'BIGINT':
+            if isinstance(value, float) and not value.is_integer():
+                return None, True
+            return int(value), False
+        if column_type == 'DOUBLE':
+            return float(value), False
+        if column_type == 'TIMESTAMP':
+            if isinstance(value, datetime):
+                return value, False
+            if isinstance(value, date):
+                return datetime(value.year, value.month, value.day), False
+            return datetime.fromisoformat(str(value).strip()), False
+        if column_type == 'BOOLEAN':
+            if isinstance(value, bool):
+                return value, False
+            text = str(value).strip().lower()
+            if text in ('true', 'yes', '1'):
+                return True, False
+            if text in ('false', 'no', '0'):
+                return False, False
+            return None, True
+    except (TypeError, ValueError):
+        return None, True
+    return None, True
+
+def widen_type(column_type, value):
+    """Type holding both column_type values and value: DOUBLE for a fraction in a BIGINT column, else VARCHAR"""
+    if column_type == 'BIGINT' and isinstance(value, float):
+        return 'DOUBLE'
+    return 'VARCHAR'
+
+def widen_expression(name, column_type, new_type):
+    """ALTER ... USING expression rendering stored values the way convert_value would"""
+    column = f'"{name}"'
+    if new_type == 'VARCHAR':
+        if column_type == 'DOUBLE':
+            return (f"CASE WHEN {column} = trunc({column}) AND abs({column}) < 1e18 "
+                    f"THEN CAST(CAST({column} AS BIGINT) AS VARCHAR) ELSE CAST({column} AS VARCHAR) END")
+        if column_type == 'TIMESTAMP':
+            return f"strftime({column}, '%Y-%m-%dT%H:%M:%S')"
+        if column_type == 'BOOLEAN':
+            return f"CASE WHEN {column} THEN 'True' WHEN NOT {column} THEN 'False' END"
+    return f"CAST({column} AS {new_type})"
+
+def ensure_tables(con):
+    """Create the schema and log tables if needed"""
+    con.execute(f"""
+        CREATE TABLE IF NOT EXISTS {SCHEMA_TABLE} (
+            column_name VARCHAR PRIMARY KEY,
+            position INTEGER,
+            column_type VARCHAR,
+            source_name VARCHAR,
+            added_at TIMESTAMP
+        )
+    """)
+    con.execute(f"""
+        CREATE TABLE IF NOT EXISTS {LOG_TABLE} (
+            import_id INTEGER PRIMARY KEY,
+            file_name VARCHAR,
+            sheet_name VARCHAR,
+            started_at TIMESTAMP,
+            finished_at TIMESTAMP,
+            rows_read BIGINT,
+            rows_without_key BIGINT,
+            duplicate_keys BIGINT,
+            inserted BIGINT,
+            updated BIGINT,
+            new_columns VARCHAR,
+            widened_columns VARCHAR,
+            duration_ms BIGINT,
+            status VARCHAR,
+            error VARCHAR
+        )
+    """)
+    # Logs created before columns could be widened
+    con.execute(f"ALTER TABLE {LOG_TABLE} ADD COLUMN IF NOT EXISTS widened_columns VARCHAR")
+
+def load_pinned_schema(con):
+    """Return [(column_name, column_type)] in table order, or [] on first import"""
+    return con.execute(
+        f"SELECT column_name, column_type FROM {SCHEMA_TABLE} ORDER BY position"
+    ).fetchall()
+
+def pin_schema(con, columns, header, sample_rows):
+    """Infer types from the first batch, pin them and create the target table"""
+    if con.execute(
+        "SELECT COUNT(*) FROM information_schema.tables WHERE table_name = ?", [TABLE_NAME]
+    ).fetchone()[0]:
+        raise RuntimeError(
+            f"Table {TABLE_NAME} was created by the old DROP/CREATE importer. "
+            f"Rename or drop it before the first incremental import."
+        )
+    
+    schema = []
+    for position, column in enumerate(columns):
+        # The key is always text: Excel may hand back IDs as numbers
+        if column == KEY_COLUMN:
+            column_type = 'VARCHAR'
+        else:
+            column_type = infer_type(row[position] if position < len(row) else None for row in sample_rows)
+        schema.append((column, column_type))
+        con.execute(
+            f"INSERT INTO {SCHEMA_TABLE} VALUES (?, ?, ?, ?, ?)",
+            [column, position, column_type, str(header[position]), datetime.now()]
+        )
+    
+    column_sql = ', '.join(
+        f'"{name}" {column_type}' + (' PRIMARY KEY' if name == KEY_COLUMN else '')
+        for name, column_type in schema
+    )
+    con.execute(f'CREATE TABLE {TABLE_NAME} ({column_sql}, "_import_id" INTEGER)')
+    return schema
+
+def extend_schema(con, schema, columns, header):
+    """Add columns that appeared in the sheet since the schema was pinned (as VARCHAR)"""
+    known = {name for name, _ in schema}
+    added = []
+    for position, column in enumerate(columns):
+        if column in known:
+            continue
+        con.execute(f'ALTER TABLE {TABLE_NAME} ADD COLUMN "{column}" VARCHAR')
+        con.execute(
+            f"INSERT INTO {SCHEMA_TABLE} VALUES (?, ?, ?, ?, ?)",
+            [column, len(schema), 'VARCHAR', str(header[position]), datetime.now()]
+        )
+        schema.append((column, 'VARCHAR'))
+        added.append(column)
+    return added
+
+class BatchAppender:
+    """Appends converted row batches to the staging table, widening columns a cell does not fit"""
+    
+    def __init__(self, con, schema, import_id):
+        self.con = con
+        self.schema = schema
+        self.import_id = import_id
+        self.widened = []
+        
+        column_sql = ', '.join(f'"{name}" {column_type}' for name, column_type in schema)
+        con.execute(f"DROP TABLE IF EXISTS {STAGING_TABLE}")
+        con.execute(f'CREATE TABLE {STAGING_TABLE} ("_row" BIGINT, {column_sql}, "_import_id" INTEGER)')
+    
+    def widen(self, i, value):
+        """Change column i (staging, target table and pinned schema) to a type that holds value"""
+        name, column_type = self.schema[i]
+        new_type = widen_type(column_type, value)
+        using = widen_expression(name, column_type, new_type)
+        for table in (STAGING_TABLE, TABLE_NAME):
+            self.con.execute(f'ALTER TABLE {table} ALTER COLUMN "{name}" TYPE {new_type} USING {using}')
+        self.con.execute(f"UPDATE {SCHEMA_TABLE} SET column_type = ? WHERE column_name = ?", [new_type, name])
+        self.schema[i] = (name, new_type)
+        self.widened.append(f"{name} {column_type}->{new_type}")
+        print(f"↔️  Widened {name} from {column_type} to {new_type} (value {value!r})")
+    
+    def append(self, rows, positions, first_row):
+        """
+        Convert and append one batch
+        
+        positions maps each schema column to its index in the sheet row
+        (None when the sheet no longer has that column).
+        """
+        columns = []
+        for i, position in enumerate(positions):
+            cells = [row[position] if position is not None and position < len(row) else None for row in rows]
+            while True:
+                converted = [convert_value(cell, self.schema[i][1]) for cell in cells]
+                misfit = next((cell for cell, (_, coerced) in zip(cells, converted) if coerced), None)
+                if misfit is None:
+                    break
+                self.widen(i, misfit)
+            columns.append([value for value, _ in converted])
+        
+        row_numbers = list(range(first_row, first_row + len(rows)))
+        import_ids = [self.import_id] * len(rows)
+        
+        if HAS_PYARROW:
+            # Columnar append: one INSERT per batch
+            arrays = [pa.array(row_numbers, pa.int64())]
+            arrays += [pa.array(values, ARROW_TYPES[column_type])
+                       for values, (_, column_type) in zip(columns, self.schema)]
+            arrays.append(pa.array(import_ids, pa.int32()))
+            names = ['_row'] + [name for name, _ in self.schema] + ['_import_id']
+            excel_batch = pa.Table.from_arrays(arrays, names=names)
+            self.con.register('excel_batch', excel_batch)
+            self.con.execute(f"INSERT INTO {STAGING_TABLE} SELECT * FROM excel_batch")
+            self.con.unregister('excel_batch')
+        else:
+            placeholders = ', '.join('?' * (len(self.schema) + 2))
+            self.con.executemany(
+                f"INSERT INTO {STAGING_TABLE} VALUES ({placeholders})",
+                [[n, *values, import_id] for n, values, import_id in zip(row_numbers, zip(*columns), import_ids)]
+            )
+
 def import_excel_to_duckdb(excel_path, sheet_name='Sheet1'):
-    """Import Excel file to DuckDB using pandas"""
+    """Stream an Excel sheet into DuckDB and upsert by Property ID"""
     
-    print(f"🦆 DuckDB Excel Import (Python)")
+    print(f"🦆 DuckDB Excel Import (Python, streaming)")
     print(f"📄 File: {excel_path}")
     print(f"📋 Sheet: {sheet_name}")
     
@@ -31,58 +317,141 @@ def import_excel_to_duckdb(excel_path, sheet_name='Sheet1'):
     file_size_mb = os.path.getsize(excel_path) / (1024 * 1024)
     print(f"📊 File size: {file_size_mb:.2f} MB")
     
+    print(f"\n🦆 Connecting to DuckDB: {DB_PATH}")
+    con = duckdb.connect(str(DB_PATH))
+    ensure_tables(con)
+    
+    import_id = con.execute(f"SELECT COALESCE(MAX(import_id), 0) + 1 FROM {LOG_TABLE}").fetchone()[0]
+    started_at = datetime.now()
+    start = time.perf_counter()
+    con.execute(
+        f"INSERT INTO {LOG_TABLE} (import_id, file_name, sheet_name, started_at, status) VALUES (?, ?, ?, ?, 'running')",
+        [import_id, os.path.basename(excel_path), sheet_name, started_at]
+    )
+    
+    workbook = None
     try:
-        # Read Excel file with pandas
-        print("\n📥 Reading Excel file...")
-        df = pd.read_excel(excel_path, sheet_name=sheet_name)
-        print(f"✅ Loaded {len(df)} rows, {len(df.columns)} columns")
+        print("\n📥 Streaming Excel file...")
+        workbook = load_workbook(excel_path, read_only=True, data_only=True)
+        rows = workbook[sheet_name].iter_rows(values_only=True)
+        header = list(next(rows, None) or [])
+        columns = clean_header(header)
+        if KEY_COLUMN not in columns:
+            raise ValueError(f"Sheet has no 'Property ID' column (found: {', '.join(columns[:10])}...)")
+        
+        first_batch = []
+        for row in rows:
+            first_batch.append(row)
+            if len(first_batch) >= BATCH_SIZE:
+                break
         
-        # Clean column names (remove special characters)
-        df.columns = [col.replace(' ', '_').replace(':', '').replace('-', '_') for col in df.columns]
+        con.execute("BEGIN TRANSACTION")
+        schema = load_pinned_schema(con)
+        new_columns = []
+        if not schema:
+            schema = pin_schema(con, columns, header, first_batch)
+            print(f"📌 Pinned schema for {len(schema)} columns")
+        else:
+            new_columns = extend_schema(con, schema, columns, header)
+            if new_columns:
+                print(f"➕ New columns (added as VARCHAR): {', '.join(new_columns)}")
         
         # Show column info
-        print("\n📋 Columns found:")
-        for i, col in enumerate(df.columns):
-            print(f"   {i+1}. {col} ({df[col].dtype})")
+        print("\n📋 Columns:")
+        for i, (name, column_type) in enumerate(schema):
+            print(f"   {i+1}. {name} ({column_type})")
+        
+        sheet_positions = {name: position for position, name in enumerate(columns)}
+        positions = [sheet_positions.get(name) for name, _ in schema]
+        appender = BatchAppender(con, schema, import_id)
+        
+        rows_read = 0
+        batch = first_batch
+        while batch:
+            appender.append(batch, positions, rows_read)
+            rows_read += len(batch)
+            print(f"   ... {rows_read} rows staged")
+            batch = []
+            for row in rows:
+                batch.append(row)
+                if len(batch) >= BATCH_SIZE:
+                    break
         
-        # Create DuckDB connection
-        print(f"\n🦆 Connecting to DuckDB: {DB_PATH}")
-        con = duckdb.connect(str(DB_PATH))
+        # Upsert: last row wins for a Property ID repeated in the sheet
+        rows_without_key = con.execute(
+            f'SELECT COUNT(*) FROM {STAGING_TABLE} WHERE "{KEY_COLUMN}" IS NULL'
+        ).fetchone()[0]
+        distinct_keys = con.execute(
+            f'SELECT COUNT(DISTINCT "{KEY_COLUMN}") FROM {STAGING_TABLE}'
+        ).fetchone()[0]
+        duplicate_keys = rows_read - rows_without_key - distinct_keys
+        updated = con.execute(
+            f'SELECT COUNT(DISTINCT s."{KEY_COLUMN}") FROM {STAGING_TABLE} s '
+            f'JOIN {TABLE_NAME} t ON s."{KEY_COLUMN}" = t."{KEY_COLUMN}"'
+        ).fetchone()[0]
+        inserted = distinct_keys - updated
         
-        # Create table from DataFrame
-        table_name = "excel_import"
-        print(f"\n📥 Importing to table: {table_name}")
-        con.execute(f"DROP TABLE IF EXISTS {table_name}")
-        con.execute(f"CREATE TABLE {table_name} AS SELECT * FROM df")
+        column_list = ', '.join(f'"{name}"' for name, _ in schema) + ', "_import_id"'
+        con.execute(f"""
+            INSERT OR REPLACE INTO {TABLE_NAME} ({column_list})
+            SELECT {column_list}
+            FROM {STAGING_TABLE}
+            WHERE "{KEY_COLUMN}" IS NOT NULL
+            QUALIFY ROW_NUMBER() OVER (PARTITION BY "{KEY_COLUMN}" ORDER BY "_row" DESC) = 1
+        """)
+        con.execute(f"DROP TABLE {STAGING_TABLE}")
+        
+        con.execute(f"""
+            UPDATE {LOG_TABLE} SET finished_at = ?, rows_read = ?, rows_without_key = ?, duplicate_keys = ?,
+                inserted = ?, updated = ?, new_columns = ?, widened_columns = ?, duration_ms = ?, status = 'success'
+            WHERE import_id = ?
+        """, [datetime.now(), rows_read, rows_without_key, duplicate_keys, inserted, updated,
+              ', '.join(new_columns), ', '.join(appender.widened), int((time.perf_counter() - start) * 1000), import_id])
+        con.execute("COMMIT")
+        
+        print(f"\n✅ Import {import_id}: {rows_read} rows read, {inserted} inserted, {updated} updated")
+        if rows_without_key or duplicate_keys:
+            print(f"⚠️  Rows without Property ID: {rows_without_key}, repeated Property IDs: {duplicate_keys}")
+        if appender.widened:
+            print(f"⚠️  Columns widened to fit new values: {', '.join(appender.widened)}")
         
-        # Get import statistics
-        row_count = con.execute(f"SELECT COUNT(*) FROM {table_name}").fetchone()[0]
-        print(f"✅ Successfully imported {row_count} rows")
+        row_count = con.execute(f"SELECT COUNT(*) FROM {TABLE_NAME}").fetchone()[0]
+        print(f"✅ {TABLE_NAME} now holds {row_count} properties")
         
         # Show sample data
         print("\n📄 Sample data (first 5 rows):")
-        sample = con.execute(f"SELECT * FROM {table_name} LIMIT 5").df()
-        print(sample)
+        con.sql(f"SELECT * FROM {TABLE_NAME} LIMIT 5").show()
         
         # Analyze the data
-        analyze_data(con, table_name, df.columns)
+        analyze_data(con, TABLE_NAME, [name for name, _ in schema])
         
         # Create useful views
-        create_views(con, df.columns)
-        
-        # Close connection
-        con.close()
+        create_views(con, [name for name, _ in schema])
         
         print("\n✅ Import complete!")
         print("\n💡 To query the data:")
         print(f"   duckdb {DB_PATH}")
-        print(f"   SELECT * FROM {table_name} LIMIT 10;")
+        print(f"   SELECT * FROM {TABLE_NAME} LIMIT 10;")
+        print(f"   SELECT * FROM {LOG_TABLE} ORDER BY import_id DESC;")
         
         return True
-        
+    
     except Exception as e:
         print(f"\n❌ Error: {e}")
+        try:
+            con.execute("ROLLBACK")
+        except duckdb.Error:
+            pass
+        con.execute(
+            f"UPDATE {LOG_TABLE} SET finished_at = ?, status = 'failed', error = ? WHERE import_id = ?",
+            [datetime.now(), str(e), import_id]
+        )
         return False
+    
+    finally:
+        if workbook is not None:
+            workbook.close()
+        con.close()
 
 def analyze_data(con, table_name, columns):
     """Analyze the imported data"""
@@ -93,15 +462,14 @@ def analyze_data(con, table_name, columns):
     if status_cols:
         for col in status_cols:
             print(f"\n📈 Distribution of '{col}':")
-            result = con.execute(f"""
+            con.sql(f"""
                 SELECT "{col}", COUNT(*) as count
                 FROM {table_name}
                 WHERE "{col}" IS NOT NULL
                 GROUP BY "{col}"
                 ORDER BY count DESC
                 LIMIT 10
-            """).df()
-            print(result)
+            """).show()
     
     # Look for date columns
     date_cols = [col for col in columns if 'date' in col.lower()]
@@ -128,15 +496,14 @@ def analyze_data(con, table_name, columns):
     if agent_cols:
         col = agent_cols[0]
         print(f"\n👥 Top 10 by '{col}':")
-        result = con.execute(f"""
+        con.sql(f"""
             SELECT "{col}", COUNT(*) as count
             FROM {table_name}
             WHERE "{col}" IS NOT NULL
             GROUP BY "{col}"
             ORDER BY count DESC
             LIMIT 10
-        """).df()
-        print(result)
+        """).show()
     
     if pole_cols:
         col = pole_cols[0]
@@ -159,7 +526,7 @@ def create_views(con, columns):
         con.execute(f"""
             CREATE OR REPLACE VIEW status_summary AS
             SELECT 
-                DATE_TRUNC('month', "{date_col}") as month,
+                DATE_TRUNC('month', TRY_CAST("{date_col}" AS TIMESTAMP)) as month,
                 "{status_col}" as status,
                 COUNT(*) as count
             FROM excel_import
@@ -0,0 +1,417 @@
+#!/usr/bin/env python3
+"""
+DuckDB Status History (SCD2)
+Appends each daily OneMap snapshot to a slowly-changing `status_history`
+table: one row per Property ID and status period, with valid_from /
+valid_to set from the snapshot dates. Changes are found with set-based
+joins against the open rows, so loading a snapshot costs a few SQL
+statements regardless of how many properties it holds.
+
+Usage:
+    python status_history_duckdb.py load <export.csv|.xlsx> [more files...] [--date YYYY-MM-DD]
+    python status_history_duckdb.py backwards [--since YYYY-MM-DD] [--export file.csv]
+    python status_history_duckdb.py time-in-status [--export file.csv]
+    python status_history_duckdb.py transitions [--since YYYY-MM-DD] [--until YYYY-MM-DD] [--export file.csv]
+
+    --db PATH  use another database (default: ../data/onemap.duckdb)
+
+The snapshot date is taken from --date or from the file name
+(Lawley_01082025.xlsx or 2025-08-01_export.csv). Snapshots must be
+loaded in date order.
+"""
+
+import csv
+import re
+import sys
+import time
+import duckdb
+from pathlib import Path
+from datetime import date, datetime
+
+# Configuration
+DB_PATH = Path(__file__).parent.parent / "data" / "onemap.duckdb"
+
+HISTORY_TABLE = "status_history"
+SNAPSHOT_TABLE = "status_snapshots"
+ORDER_TABLE = "status_order"
+
+BATCH_SIZE = 10000
+
+# Snapshot fields -> source columns (first non-empty wins); names are
+# matched ignoring case and '_' vs ' ' so cleaned Excel headers work too
+SNAPSHOT_COLUMNS = {
+    'property_id': ['Property ID'],
+    'status': ['Status'],
+    'pole_number': ['Pole Number'],
+    'drop_number': ['Drop Number'],
+    'agent': ['Field Agent Name (pole permission)', 'Field Agent Name (Home Sign Ups)', 'Installer Name'],
+    'address': ['Location Address'],
+}
+
+# Workflow step of each status (same order as track-backwards-progressions.js)
+STATUS_ORDER = {
+    'Pole Permission: Pending': 1,
+    'Pole Permission: Approved': 2,
+    'Pole Permission: Declined': 2,
+    'Home Sign Ups: Pending': 3,
+    'Home Sign Ups: Declined': 4,
+    'Home Sign Ups: Approved': 4,
+    'Home Sign Ups: Approved & Installation Scheduled': 5,
+    'Home Sign Ups: Approved & Installation Re-scheduled': 5,
+    'Home Installation: In Progress': 6,
+    'Home Installation: Installed': 7,
+    'Home Installation: Declined': 6
+}
+
+def normalize_name(name):
+    return str(name or '').replace('_', ' ').strip().lower()
+
+def snapshot_date_from_name(path):
+    """Date in a file name like Lawley_01082025 (DDMMYYYY) or 2025-08-01, else None"""
+    name = Path(path).stem
+    match = re.search(r'(\d{4})-(\d{2})-(\d{2})', name)
+    if match:
+        year, month, day = match.groups()
+    else:
+        match = re.search(r'(?<!\d)(\d{2})(\d{2})(\d{4})(?!\d)', name)
+        if not match:
+            return None
+        day, month, year = match.groups()
+    try:
+        return date(int(year), int(month), int(day))
+    except ValueError:
+        return None
+
+def ensure_tables(con):
+    """Create the history tables and views if needed"""
+    con.execute(f"""
+        CREATE TABLE IF NOT EXISTS {HISTORY_TABLE} (
+            property_id VARCHAR NOT NULL,
+            status VARCHAR,
+            pole_number VARCHAR,
+            drop_number VARCHAR,
+            agent VARCHAR,
+            address VARCHAR,
+            valid_from DATE NOT NULL,
+            valid_to DATE,
+            snapshot_id INTEGER
+        )
+    """)
+    con.execute(f"""
+        CREATE TABLE IF NOT EXISTS {SNAPSHOT_TABLE} (
+            snapshot_id INTEGER PRIMARY KEY,
+            snapshot_date DATE UNIQUE,
+            file_name VARCHAR,
+            rows_read BIGINT,
+            properties BIGINT,
+            new_properties BIGINT,
+            changed_properties BIGINT,
+            removed_properties BIGINT,
+            duration_ms BIGINT,
+            loaded_at TIMESTAMP
+        )
+    """)
+    con.execute(f"CREATE OR REPLACE TABLE {ORDER_TABLE} (status VARCHAR PRIMARY KEY, step INTEGER)")
+    con.executemany(f"INSERT INTO {ORDER_TABLE} VALUES (?, ?)", list(STATUS_ORDER.items()))
+
+    # Open rows are the current state of every property still in the export
+    con.execute(f"""
+        CREATE OR REPLACE VIEW status_current AS
+        SELECT * FROM {HISTORY_TABLE} WHERE valid_to IS NULL
+    """)
+    # One row per status change: the previous period next to the new one.
+    # Only back-to-back periods pair up; a property removed from the export
+    # and re-added later leaves a gap, which is not a status change.
+    con.execute(f"""
+        CREATE OR REPLACE VIEW status_transitions AS
+        SELECT *
+        FROM (
+            SELECT property_id,
+                   lag(status) OVER w AS old_status,
+                   status AS new_status,
+                   lag(valid_from) OVER w AS old_since,
+                   lag(valid_to) OVER w AS old_until,
+                   valid_from AS changed_on,
+                   pole_number,
+                   drop_number,
+                   agent
+            FROM {HISTORY_TABLE}
+            WINDOW w AS (PARTITION BY property_id ORDER BY valid_from)
+        )
+        WHERE old_until = changed_on AND old_status IS DISTINCT FROM new_status
+    """)
+
+def read_header(csv_path):
+    with open(csv_path, 'r', encoding='utf-8-sig', newline='') as f:
+        return next(csv.reader(f), [])
+
+def source_expressions(header):
+    """SELECT list mapping source columns onto the snapshot fields"""
+    positions = {}
+    for name in header:
+        positions.setdefault(normalize_name(name), name)
+
+    if normalize_name('Property ID') not in positions:
+        raise ValueError(f"Snapshot has no 'Property ID' column (found: {', '.join(map(str, header[:10]))}...)")
+
+    select = []
+    for field, candidates in SNAPSHOT_COLUMNS.items():
+        sources = [positions[normalize_name(c)] for c in candidates if normalize_name(c) in positions]
+        values = [f"""nullif(trim(CAST("{str(s).replace('"', '""')}" AS VARCHAR)), '')""" for s in sources]
+        if not values:
+            select.append(f"NULL::VARCHAR AS {field}")
+        elif len(values) == 1:
+            select.append(f"{values[0]} AS {field}")
+        else:
+            select.append(f"coalesce({', '.join(values)}) AS {field}")
+    return ', '.join(select)
+
+def stage_csv(con, csv_path):
+    """Load the snapshot fields of a CSV export into the snapshot_rows temp table"""
+    source = "'" + str(csv_path).replace("'", "''") + "'"
+    con.execute(f"""
+        CREATE OR REPLACE TEMP TABLE snapshot_rows AS
+        SELECT {source_expressions(read_header(csv_path))}
+        FROM read_csv({source}, header = true, all_varchar = true)
+    """)
+
+def stage_excel(con, excel_path, sheet_name=None):
+    """Stream the snapshot fields of an Excel export into the snapshot_rows temp table"""
+    from openpyxl import load_workbook
+    from import_excel_duckdb import clean_header, convert_value
+
+    workbook = load_workbook(excel_path, read_only=True, data_only=True)
+    try:
+        sheet = workbook[sheet_name] if sheet_name else workbook.worksheets[0]
+        rows = sheet.iter_rows(values_only=True)
+        header = clean_header(list(next(rows, None) or []))
+
+        column_sql = ', '.join(f'"{name}" VARCHAR' for name in header)
+        con.execute(f"CREATE OR REPLACE TEMP TABLE snapshot_sheet ({column_sql})")
+        placeholders = ', '.join('?' * len(header))
+
+        batch = []
+        for row in rows:
+            row = list(row[:len(header)]) + [None] * (len(header) - len(row))
+            batch.append([convert_value(value, 'VARCHAR')[0] for value in row])
+            if len(batch) >= BATCH_SIZE:
+                con.executemany(f"INSERT INTO snapshot_sheet VALUES ({placeholders})", batch)
+                batch = []
+        if batch:
+            con.executemany(f"INSERT INTO snapshot_sheet VALUES ({placeholders})", batch)
+    finally:
+        workbook.close()
+
+    con.execute(f"""
+        CREATE OR REPLACE TEMP TABLE snapshot_rows AS
+        SELECT {source_expressions(header)} FROM snapshot_sheet
+    """)
+    con.execute("DROP TABLE snapshot_sheet")
+
+def load_snapshot(con, path, snapshot_date):
+    """Apply one snapshot to status_history; returns the change counts"""
+    start = time.perf_counter()
+
+    latest = con.execute(f"SELECT max(snapshot_date) FROM {SNAPSHOT_TABLE}").fetchone()[0]
+    if latest is not None and snapshot_date <= latest:
+        raise ValueError(f"{snapshot_date} is not after the latest loaded snapshot ({latest})")
+
+    if Path(path).suffix.lower() in ('.xlsx', '.xlsm'):
+        stage_excel(con, path)
+    else:
+        stage_csv(con, path)
+    rows_read = con.execute("SELECT count(*) FROM snapshot_rows").fetchone()[0]
+
+    con.execute("BEGIN TRANSACTION")
+    try:
+        snapshot_id = con.execute(f"SELECT coalesce(max(snapshot_id), 0) + 1 FROM {SNAPSHOT_TABLE}").fetchone()[0]
+
+        # Last row wins for a Property ID repeated in the export
+        con.execute("""
+            CREATE OR REPLACE TEMP TABLE snapshot_status AS
+            SELECT * FROM snapshot_rows
+            WHERE property_id IS NOT NULL
+            QUALIFY row_number() OVER (PARTITION BY property_id ORDER BY rowid DESC) = 1
+        """)
+
+        # Every property whose open row must close, open, or both
+        con.execute(f"""
+            CREATE OR REPLACE TEMP TABLE snapshot_changes AS
+            SELECT coalesce(s.property_id, h.property_id) AS property_id,
+                   CASE
+                       WHEN h.property_id IS NULL THEN 'new'
+                       WHEN s.property_id IS NULL THEN 'removed'
+                       ELSE 'changed'
+                   END AS change
+            FROM snapshot_status s
+            FULL OUTER JOIN (SELECT property_id, status FROM {HISTORY_TABLE} WHERE valid_to IS NULL) h
+                ON s.property_id = h.property_id
+            WHERE h.property_id IS NULL
+               OR s.property_id IS NULL
+               OR s.status IS DISTINCT FROM h.status
+        """)
+
+        con.execute(f"""
+            UPDATE {HISTORY_TABLE} SET valid_to = $snapshot_date
+            WHERE valid_to IS NULL
+              AND property_id IN (SELECT property_id FROM snapshot_changes WHERE change <> 'new')
+        """, {'snapshot_date': snapshot_date})
+        con.execute(f"""
+            INSERT INTO {HISTORY_TABLE}
+            SELECT s.property_id, s.status, s.pole_number, s.drop_number, s.agent, s.address,
+                   $snapshot_date, NULL, $snapshot_id
+            FROM snapshot_status s
+            JOIN snapshot_changes c ON c.property_id = s.property_id
+        """, {'snapshot_date': snapshot_date, 'snapshot_id': snapshot_id})
+
+        counts = dict(con.execute("SELECT change, count(*) FROM snapshot_changes GROUP BY change").fetchall())
+        properties = con.execute("SELECT count(*) FROM snapshot_status").fetchone()[0]
+        con.execute(f"INSERT INTO {SNAPSHOT_TABLE} VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", [
+            snapshot_id, snapshot_date, Path(path).name, rows_read, properties,
+            counts.get('new', 0), counts.get('changed', 0), counts.get('removed', 0),
+            int((time.perf_counter() - start) * 1000), datetime.now()
+        ])
+        con.execute("COMMIT")
+    except Exception:
+        con.execute("ROLLBACK")
+        raise
+    finally:
+        con.execute("DROP TABLE IF EXISTS snapshot_rows")
+        con.execute("DROP TABLE IF EXISTS snapshot_status")
+        con.execute("DROP TABLE IF EXISTS snapshot_changes")
+
+    counts['properties'] = properties
+    return counts
+
+def load_snapshots(con, paths, snapshot_date=None):
+    """Load snapshots in date order"""
+    if snapshot_date and len(paths) > 1:
+        raise ValueError("--date applies to a single file")
+
+    dated = []
+    for path in paths:
+        day = snapshot_date or snapshot_date_from_name(path)
+        if day is None:
+            raise ValueError(f"No date in file name {Path(path).name}; pass --date YYYY-MM-DD")
+        dated.append((day, path))
+
+    for day, path in sorted(dated):
+        print(f"\n📥 {Path(path).name} ({day})")
+        counts = load_snapshot(con, path, day)
+        print(f"   ✅ {counts['properties']} properties: {counts.get('new', 0)} new, "
+              f"{counts.get('changed', 0)} status changes, {counts.get('removed', 0)} removed")
+
+def backwards_progressions(con, since=None):
+    """Status changes that moved a property to an earlier workflow step"""
+    return con.sql(f"""
+        SELECT t.property_id, t.pole_number, t.drop_number,
+               t.old_status, t.new_status, old.step AS old_step, new.step AS new_step,
+               t.agent, t.old_since, t.changed_on
+        FROM status_transitions t
+        JOIN {ORDER_TABLE} old ON old.status = t.old_status
+        JOIN {ORDER_TABLE} new ON new.status = t.new_status
+        WHERE new.step < old.step
+          AND ($since IS NULL OR t.changed_on >= $since)
+        ORDER BY t.changed_on, t.property_id
+    """, params={'since': since})
+
+def time_in_status(con):
+    """
+    Days spent per status period
+    Open periods run to the latest snapshot, so their durations are lower bounds.
+    """
+    return con.sql(f"""
+        WITH periods AS (
+            SELECT status,
+                   valid_to IS NULL AS is_open,
+                   date_diff('day', valid_from,
+                             coalesce(valid_to, (SELECT max(snapshot_date) FROM {SNAPSHOT_TABLE}))) AS days
+            FROM {HISTORY_TABLE}
+        )
+        SELECT status,
+               count(*) AS periods,
+               count(*) FILTER (WHERE is_open) AS open_periods,
+               round(avg(days), 1) AS avg_days,
+               median(days) AS median_days,
+               max(days) AS max_days
+        FROM periods
+        GROUP BY status
+        ORDER BY avg_days DESC
+    """)
+
+def daily_transitions(con, since=None, until=None):
+    """Count of each old -> new status change per snapshot day"""
+    return con.sql("""
+        SELECT changed_on, old_status, new_status, count(*) AS properties
+        FROM status_transitions
+        WHERE ($since IS NULL OR changed_on >= $since)
+          AND ($until IS NULL OR changed_on <= $until)
+        GROUP BY changed_on, old_status, new_status
+        ORDER BY changed_on, properties DESC, old_status, new_status
+    """, params={'since': since, 'until': until})
+
+def pop_option(args, name):
+    if name not in args:
+        return None
+    position = args.index(name)
+    value = args[position + 1] if position + 1 < len(args) else None
+    del args[position:position + 2]
+    return value
+
+def parse_date(value):
+    return date.fromisoformat(value) if value else None
+
+def main():
+    args = sys.argv[1:]
+    db_path = pop_option(args, '--db') or DB_PATH
+    export_path = pop_option(args, '--export')
+    snapshot_date = parse_date(pop_option(args, '--date'))
+    since = parse_date(pop_option(args, '--since'))
+    until = parse_date(pop_option(args, '--until'))
+
+    if not args or args[0] not in ('load', 'backwards', 'time-in-status', 'transitions'):
+        print(__doc__)
+        sys.exit(1)
+    command, paths = args[0], args[1:]
+
+    Path(db_path).parent.mkdir(exist_ok=True)
+    con = duckdb.connect(str(db_path))
+    try:
+        ensure_tables(con)
+
+        if command == 'load':
+            if not paths:
+                print("❌ No snapshot files given")
+                sys.exit(1)
+            load_snapshots(con, paths, snapshot_date)
+            summary = con.execute(f"""
+                SELECT count(*), count(*) FILTER (WHERE valid_to IS NULL), count(DISTINCT property_id)
+                FROM {HISTORY_TABLE}
+            """).fetchone()
+            print(f"\n✅ {HISTORY_TABLE}: {summary[0]} periods, {summary[1]} open, {summary[2]} properties")
+            return
+
+        if command == 'backwards':
+            print("🔄 Backwards status progressions")
+            result = backwards_progressions(con, since)
+        elif command == 'time-in-status':
+            print("⏱️  Time in status (days)")
+            result = time_in_status(con)
+        else:
+            print("📅 Daily status transitions")
+            result = daily_transitions(con, since, until)
+
+        result.show(max_rows=50)
+        if export_path:
+            result.write_csv(export_path)
+            print(f"✓ Saved: {export_path}")
+
+    except (ValueError, duckdb.Error) as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+
+    finally:
+        con.close()
+
+if __name__ == "__main__":
+    main()
@@ -7,21 +7,94 @@ Processes filtered CSV chunks and generates detailed reports
 import csv
 import json
 import os
-from collections import defaultdict
+import sys
+from collections import defaultdict, namedtuple
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from functools import reduce
 from pathlib import Path
 
+from onemap_lib.addresses import AddressIndex
+
+ChunkRecord = namedtuple('ChunkRecord', ['property_id', 'status', 'pole_number', 'chunk'])
+
+
+class PartialIndex:
+    """
+    Address index for one or more consecutive chunks
+    
+    Partials are merged left to right in chunk order, so insertion order of
+    addresses and property IDs (and therefore the report) matches a
+    sequential run exactly. merge() is associative.
+    """
+    
+    def __init__(self):
+        self.total_records = 0
+        self.property_ids = {}      # ordered set: property ID -> None
+        self.addresses = {}         # address -> [ChunkRecord fields as tuples]
+        self.chunk_totals = []      # (filename, records in chunk)
+    
+    def merge(self, other):
+        """Append a partial covering the chunks after this one"""
+        self.total_records += other.total_records
+        self.property_ids.update(other.property_ids)
+        for address, records in other.addresses.items():
+            existing = self.addresses.get(address)
+            if existing is None:
+                self.addresses[address] = records
+            else:
+                existing.extend(records)
+        self.chunk_totals.extend(other.chunk_totals)
+        return self
+
+
+def build_partial_index(filepath):
+    """Index a single chunk file (runs in a worker process)"""
+    filepath = Path(filepath)
+    filename = filepath.name
+    partial = PartialIndex()
+    property_ids = partial.property_ids
+    addresses = partial.addresses
+    
+    with open(filepath, 'r', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            partial.total_records += 1
+            
+            # Extract key fields
+            prop_id = row.get('Property ID', '').strip()
+            address = row.get('Location Address', '').strip()
+            status = row.get('Status', '').strip()
+            pole = row.get('Pole Number', '').strip()
+            
+            if prop_id:
+                property_ids[prop_id] = None
+            
+            if address:
+                # Plain tuples in ChunkRecord field order: cheap to build and pickle
+                records = addresses.get(address)
+                if records is None:
+                    records = addresses[address] = []
+                records.append((prop_id, status, pole, filename))
+    
+    partial.chunk_totals.append((filename, partial.total_records))
+    return partial
+
+
 class ChunkAnalyzer:
-    def __init__(self, chunk_dir='split_data'):
+    def __init__(self, chunk_dir='split_data', workers=None):
         self.chunk_dir = Path(chunk_dir)
+        self.workers = workers or os.cpu_count() or 1
         self.global_index = {}
         self.duplicates = defaultdict(list)
+        self.address_clusters = []
         self.stats = {
             'total_records': 0,
             'unique_addresses': 0,
             'duplicate_addresses': 0,
             'unique_property_ids': set(),
             'max_duplicates_single_address': 0,
+            'unique_places': 0,
+            'respelled_places': 0,
             'processing_time': 0
         }
         
@@ -33,14 +106,32 @@ class ChunkAnalyzer:
         with open(self.chunk_dir / 'split_metadata.json', 'r') as f:
             metadata = json.load(f)
         
-        print(f"Processing {metadata['total_chunks']} chunks...")
+        paths = [str(self.chunk_dir / chunk_info['filename']) for chunk_info in metadata['chunks']]
+        workers = min(self.workers, len(paths)) or 1
+        print(f"Processing {metadata['total_chunks']} chunks with {workers} worker(s)...")
+        
+        # Index chunks in parallel; map() returns partials in chunk order
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                partials = list(pool.map(build_partial_index, paths))
+        else:
+            partials = [build_partial_index(path) for path in paths]
         
-        # Process each chunk
-        for chunk_info in metadata['chunks']:
-            self._process_chunk(chunk_info['filename'])
+        merged = reduce(PartialIndex.merge, partials, PartialIndex())
+        self.global_index = merged.addresses
+        self.stats['total_records'] = merged.total_records
+        # Add one at a time: set.update(dict) presizes the table, which would
+        # change the set's iteration order in the JSON output
+        unique_property_ids = self.stats['unique_property_ids']
+        for prop_id in merged.property_ids:
+            unique_property_ids.add(prop_id)
+        
+        running_total = 0
+        for filename, count in merged.chunk_totals:
+            running_total += count
+            print(f"  Processed {filename}: {running_total} total records")
         
         # Calculate final stats
-        self.stats['processing_time'] = (datetime.now() - start_time).total_seconds()
         self.stats['unique_addresses'] = len(self.global_index)
         self.stats['duplicate_addresses'] = len([a for a, records in self.global_index.items() if len(records) > 1])
         
@@ -50,40 +141,19 @@ class ChunkAnalyzer:
             self.stats['max_duplicates_single_address'] = len(max_addr[1])
             self.stats['worst_duplicate_address'] = max_addr[0]
         
-        print(f"\nAnalysis complete in {self.stats['processing_time']:.2f} seconds")
-        
-    def _process_chunk(self, filename):
-        """Process a single chunk file"""
-        filepath = self.chunk_dir / filename
-        
-        with open(filepath, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            
-            for row in reader:
-                self.stats['total_records'] += 1
-                
-                # Extract key fields
-                prop_id = row.get('Property ID', '').strip()
-                address = row.get('Location Address', '').strip()
-                status = row.get('Status', '').strip()
-                pole = row.get('Pole Number', '').strip()
-                
-                if prop_id:
-                    self.stats['unique_property_ids'].add(prop_id)
-                
-                if address:
-                    # Add to global index
-                    if address not in self.global_index:
-                        self.global_index[address] = []
-                    
-                    self.global_index[address].append({
-                        'property_id': prop_id,
-                        'status': status,
-                        'pole_number': pole,
-                        'chunk': filename
-                    })
+        # Addresses that are spellings of the same place ("12 Mousebird St",
+        # "12 MOUSEBIRD STREET, Lawley"); exact-string stats above are unchanged
+        index = AddressIndex(self.global_index)
+        self.address_clusters = sorted(
+            index.clusters(),
+            key=lambda spellings: sum(len(self.global_index[a]) for a in spellings),
+            reverse=True
+        )
+        self.stats['respelled_places'] = len(self.address_clusters)
+        self.stats['unique_places'] = len(self.global_index) - sum(len(c) - 1 for c in self.address_clusters)
         
-        print(f"  Processed {filename}: {self.stats['total_records']} total records")
+        self.stats['processing_time'] = (datetime.now() - start_time).total_seconds()
+        print(f"\nAnalysis complete in {self.stats['processing_time']:.2f} seconds")
     
     def generate_duplicate_report(self):
         """Generate comprehensive duplicate analysis report"""
@@ -99,6 +169,8 @@ class ChunkAnalyzer:
         report.append(f"- Unique Addresses: {self.stats['unique_addresses']:,}")
         report.append(f"- Addresses with Duplicates: {self.stats['duplicate_addresses']:,}")
         report.append(f"- Duplicate Rate: {self.stats['duplicate_addresses']/self.stats['unique_addresses']*100:.1f}%")
+        report.append(f"- Unique Places (spellings merged): {self.stats['unique_places']:,}")
+        report.append(f"- Places Written Several Ways: {self.stats['respelled_places']:,}")
         
         # Top duplicates
         report.append("\n## Top 20 Duplicate Addresses")
@@ -115,16 +187,25 @@ class ChunkAnalyzer:
             # Group by status
             by_status = defaultdict(int)
             unique_poles = set()
-            for r in records:
-                by_status[r['status'] or 'No Status'] += 1
-                if r['pole_number']:
-                    unique_poles.add(r['pole_number'])
+            for r in map(ChunkRecord._make, records):
+                by_status[r.status or 'No Status'] += 1
+                if r.pole_number:
+                    unique_poles.add(r.pole_number)
             
             report.append(f"- Unique Poles: {len(unique_poles)}")
             report.append("- Status Distribution:")
             for status, count in sorted(by_status.items(), key=lambda x: x[1], reverse=True):
                 report.append(f"  - {status}: {count}")
         
+        # Near-duplicate spellings of one address
+        report.append("\n## Top 20 Addresses Written Several Ways")
+        for spellings in self.address_clusters[:20]:
+            total = sum(len(self.global_index[a]) for a in spellings)
+            report.append(f"\n### {spellings[0]}")
+            report.append(f"**{len(spellings)} spellings, {total} records**")
+            for address in spellings[:5]:
+                report.append(f"- {address} ({len(self.global_index[address])})")
+        
         # Analysis insights
         report.append("\n## Key Insights")
         report.append(f"1. **Worst Case**: {self.stats['worst_duplicate_address'][:50]}... has {self.stats['max_duplicates_single_address']} entries")
@@ -141,9 +222,10 @@ class ChunkAnalyzer:
         json_data = {
             'stats': self.stats,
             'duplicate_addresses': {
-                addr: records for addr, records in self.global_index.items() 
+                addr: [ChunkRecord._make(r)._asdict() for r in records] for addr, records in self.global_index.items() 
                 if len(records) > 1
-            }
+            },
+            'near_duplicate_addresses': self.address_clusters
         }
         
         with open('duplicate_analysis_results.json', 'w') as f:
@@ -297,7 +379,11 @@ ORDER BY survey_date;
 
 def main():
     # Run chunk analysis
-    analyzer = ChunkAnalyzer()
+    workers = None
+    if '--workers' in sys.argv:
+        workers = int(sys.argv[sys.argv.index('--workers') + 1])
+    
+    analyzer = ChunkAnalyzer(workers=workers)
     analyzer.analyze_all_chunks()
     analyzer.generate_duplicate_report()
     
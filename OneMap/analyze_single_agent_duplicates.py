@@ -8,22 +8,30 @@ import csv
 from collections import defaultdict
 from datetime import datetime
 
-def analyze_single_agent_duplicates():
-    """Find poles where same agent submitted multiple times"""
+CONFLICTS_REPORT = 'reports/2025-07-10_payment_conflicts_detailed.csv'
+
+def read_conflicts(path=CONFLICTS_REPORT):
+    with open(path, 'r', encoding='utf-8') as f:
+        yield from csv.DictReader(f)
+
+def analyze_single_agent_duplicates(conflict_rows=None):
+    """
+    Find poles where same agent submitted multiple times
+    conflict_rows are the payment conflicts report rows when already in
+    memory; otherwise the report CSV is read.
+    """
     
     # Read the detailed payment conflicts data
     pole_submissions = defaultdict(list)
     
-    with open('reports/2025-07-10_payment_conflicts_detailed.csv', 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            pole_num = row['Pole Number']
-            pole_submissions[pole_num].append({
-                'agent': row['Agent Name'],
-                'date': row['Permission Date'],
-                'property_id': row['Property ID'],
-                'address': row['Address Sample']
-            })
+    for row in read_conflicts() if conflict_rows is None else conflict_rows:
+        pole_num = row['Pole Number']
+        pole_submissions[pole_num].append({
+            'agent': row['Agent Name'],
+            'date': row['Permission Date'],
+            'property_id': row['Property ID'],
+            'address': row['Address Sample']
+        })
     
     # Find single-agent duplicates
     single_agent_duplicates = []
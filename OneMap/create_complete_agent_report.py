@@ -11,35 +11,43 @@ import csv
 from datetime import datetime
 from collections import defaultdict
 
-def create_complete_agent_report():
-    """Create comprehensive report with all agents shown and date-sorted"""
+CONTACT_LIST = 'reports/2025-07-10_agent_contact_list.csv'
+CONFLICTS_REPORT = 'reports/2025-07-10_payment_conflicts_detailed.csv'
+
+def read_report(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        yield from csv.DictReader(f)
+
+def create_complete_agent_report(conflict_rows=None, contact_rows=None):
+    """
+    Create comprehensive report with all agents shown and date-sorted
+    conflict_rows / contact_rows are the payment conflicts and agent contact
+    list rows ({column: value}) when already in memory; otherwise the
+    report CSVs are read.
+    """
     
     # First, load agent contact information
     agent_contacts = {}
     try:
-        with open('reports/2025-07-10_agent_contact_list.csv', 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                if row['Agent Name']:
-                    agent_contacts[row['Agent Name'].lower()] = row['Contact Number']
+        for row in read_report(CONTACT_LIST) if contact_rows is None else contact_rows:
+            if row['Agent Name']:
+                agent_contacts[row['Agent Name'].lower()] = row['Contact Number']
     except:
         print("Warning: Could not load agent contact list")
     
     # Read the detailed payment conflicts data
     conflicts = defaultdict(list)
     
-    with open('reports/2025-07-10_payment_conflicts_detailed.csv', 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            pole_num = row['Pole Number']
-            conflicts[pole_num].append({
-                'agent': row['Agent Name'],
-                'date': row['Permission Date'],
-                'property_id': row['Property ID'],
-                'latitude': row['Latitude'],
-                'longitude': row['Longitude'],
-                'address': row['Address Sample']
-            })
+    for row in read_report(CONFLICTS_REPORT) if conflict_rows is None else conflict_rows:
+        pole_num = row['Pole Number']
+        conflicts[pole_num].append({
+            'agent': row['Agent Name'],
+            'date': row['Permission Date'],
+            'property_id': row['Property ID'],
+            'latitude': row['Latitude'],
+            'longitude': row['Longitude'],
+            'address': row['Address Sample']
+        })
     
     # Create the complete agent report
     output_file = f'reports/{datetime.now().strftime("%Y-%m-%d")}_complete_agent_followup.csv'
@@ -10,15 +10,41 @@ import json
 from collections import defaultdict
 from datetime import datetime
 import os
+import sys
+from onemap_lib.snapshot import iter_rows
+from onemap_lib.duckdb_backend import OneMapTable, backend_from_args
+
+CONFLICT_COLUMNS = [
+    'Pole Number', 'Location Address', 'Property ID', 'Status', 'Survey Date',
+    'Field Agent Name (pole permission)', 'Latitude', 'Longitude', 'Flow Name Groups'
+]
 
 def load_data(csv_path):
     """Load CSV data and return list of records"""
-    records = []
-    with open(csv_path, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            records.append(row)
-    return records
+    return list(iter_rows(csv_path, CONFLICT_COLUMNS))
+
+def load_conflict_records_duckdb(csv_path):
+    """Select the records of poles at more than one address in DuckDB"""
+    with OneMapTable(csv_path, CONFLICT_COLUMNS) as table:
+        # File order is kept so identify_pole_conflicts() sees the same sequence
+        return table.dict_rows("""
+            WITH located AS (
+                SELECT rowid AS row_number, *,
+                       py_strip("Pole Number") AS pole,
+                       py_strip("Location Address") AS address
+                FROM onemap
+            )
+            SELECT located.* EXCLUDE (row_number, pole, address)
+            FROM located
+            WHERE pole IN (
+                SELECT pole
+                FROM located
+                WHERE pole <> '' AND address <> ''
+                GROUP BY pole
+                HAVING count(DISTINCT address) > 1
+            )
+            ORDER BY row_number
+        """)
 
 def identify_pole_conflicts(records):
     """Find poles that appear at multiple physical locations"""
@@ -276,17 +302,25 @@ def generate_summary_report(conflicts):
 def main():
     """Main execution function"""
     
+    args = sys.argv[1:]
+    backend = backend_from_args(args)
+    
     # Check for data file
-    csv_path = "Lawley_Essential.csv"
-    if not os.path.exists(csv_path):
+    csv_path = args[0] if args else "Lawley_Essential.csv"
+    if not args and not os.path.exists(csv_path):
         csv_path = "Lawley_Project_Louis.csv"
-        if not os.path.exists(csv_path):
-            print("❌ Error: No data file found. Please ensure Lawley_Essential.csv or Lawley_Project_Louis.csv exists.")
-            return
+    if not os.path.exists(csv_path):
+        print(f"❌ Error: {csv_path} not found. Please ensure Lawley_Essential.csv or Lawley_Project_Louis.csv exists.")
+        return
     
-    print(f"Loading data from {csv_path}...")
-    records = load_data(csv_path)
-    print(f"✓ Loaded {len(records)} records")
+    if backend == 'duckdb':
+        print(f"Selecting conflicted poles from {csv_path} in DuckDB...")
+        records = load_conflict_records_duckdb(csv_path)
+        print(f"✓ Selected {len(records)} records of conflicted poles")
+    else:
+        print(f"Loading data from {csv_path}...")
+        records = load_data(csv_path)
+        print(f"✓ Loaded {len(records)} records")
     
     # Identify conflicts
     print("\nIdentifying pole location conflicts...")
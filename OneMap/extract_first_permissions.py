@@ -8,12 +8,13 @@ This gives us the true count of poles with permissions
 import csv
 from datetime import datetime
 from collections import defaultdict
+from onemap_lib.first_permissions import FirstPermissionTracker
 
 def extract_first_permissions():
     """Extract only the first/oldest permission for each pole"""
     
-    # Read all pole permission data
-    pole_data = defaultdict(list)
+    # Keep only the earliest permission per pole while reading
+    tracker = FirstPermissionTracker()
     
     # Read from the original filtered data
     with open('Lawley_Essential.csv', 'r', encoding='utf-8') as f:
@@ -23,8 +24,9 @@ def extract_first_permissions():
             if 'Pole Permission' in row.get('Flow Name Groups', ''):
                 pole_num = row.get('Pole Number', '').strip()
                 if pole_num:
-                    pole_data[pole_num].append({
-                        'date': row.get('Last Modified Pole Permissions Date', ''),
+                    date = row.get('Last Modified Pole Permissions Date', '')
+                    tracker.add(pole_num, date, {
+                        'date': date,
                         'agent': row.get('Field Agent Name (pole permission)', '').strip(),
                         'property_id': row.get('Property ID', ''),
                         'latitude': row.get('Latitude', ''),
@@ -34,13 +36,9 @@ def extract_first_permissions():
                         'contact': row.get('Contact Number', '') if 'Contact Number' in row else ''
                     })
     
-    # Find the first (oldest) permission for each pole
-    first_permissions = {}
-    
-    for pole_num, permissions in pole_data.items():
-        # Sort by date and take the first one
-        sorted_perms = sorted(permissions, key=lambda x: x['date'])
-        first_permissions[pole_num] = sorted_perms[0]
+    # The first (oldest) permission for each pole; undated claims only
+    # count for poles without a dated one
+    first_permissions = tracker.first()
     
     # Save the first permissions only
     output_file = f'reports/{datetime.now().strftime("%Y-%m-%d")}_first_pole_permissions.csv'
@@ -83,7 +81,8 @@ def extract_first_permissions():
         f.write("POLE PERMISSION SUMMARY (First Permissions Only)\n")
         f.write("=" * 60 + "\n\n")
         
-        f.write(f"Total unique poles with permissions: {len(first_permissions)}\n\n")
+        f.write(f"Total unique poles with permissions: {len(first_permissions)}\n")
+        f.write(f"Later claims superseded by a first permission: {tracker.superseded()}\n\n")
         
         # Count by status
         status_counts = defaultdict(int)
@@ -109,7 +108,8 @@ def extract_first_permissions():
         month_counts = defaultdict(int)
         for perm in first_permissions.values():
             if perm['date']:
-                month = perm['date'][:7]  # YYYY-MM
+                parsed = tracker.parser.parse(perm['date'])
+                month = parsed.strftime('%Y-%m') if parsed else perm['date'][:7]  # YYYY-MM
                 month_counts[month] += 1
         
         f.write("\n\nPermissions by Month:\n")
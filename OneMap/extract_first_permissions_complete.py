@@ -6,50 +6,141 @@ Uses the original CSV with all fields including contact numbers
 """
 
 import csv
+import sys
+from contextlib import ExitStack
 from datetime import datetime
 from collections import defaultdict
+from onemap_lib.dates import SAMPLE_SIZE, DateParser
+from onemap_lib.first_permissions import FirstPermissionTracker
+from onemap_lib.snapshot import iter_rows
+from onemap_lib.duckdb_backend import OneMapTable, backend_from_args, quote
 
-def extract_first_permissions():
+PERMISSION_COLUMNS = [
+    'Flow Name Groups', 'Pole Number', 'Last Modified Pole Permissions Date',
+    'Survey Date', 'Date', 'Field Agent Name (pole permission)', 'Property ID',
+    'Latitude', 'Longitude', 'Location Address', 'Status',
+    'Contact Number (e.g.0123456789)', 'Contact Person: Name',
+    'Contact Person: Surname', 'Stand Number'
+]
+
+def permission_record(row):
+    """(pole, date, record) for a Pole Permission row, or None"""
+    # Only process Pole Permission records
+    if 'Pole Permission' in row.get('Flow Name Groups', ''):
+        pole_num = row.get('Pole Number', '').strip()
+        if pole_num:
+            # Try to get a valid date
+            date = row.get('Last Modified Pole Permissions Date', '') or row.get('Survey Date', '') or row.get('Date', '')
+            
+            return pole_num, date, {
+                'date': date,
+                'agent': row.get('Field Agent Name (pole permission)', '').strip(),
+                'property_id': row.get('Property ID', ''),
+                'latitude': row.get('Latitude', ''),
+                'longitude': row.get('Longitude', ''),
+                'address': row.get('Location Address', ''),
+                'status': row.get('Status', ''),
+                'contact': row.get('Contact Number (e.g.0123456789)', ''),
+                'contact_name': row.get('Contact Person: Name', '') + ' ' + row.get('Contact Person: Surname', ''),
+                'stand_number': row.get('Stand Number', '')
+            }
+    return None
+
+def collect_permission(row, tracker):
+    """Offer a CSV row to the first-permission tracker if it is a Pole Permission record"""
+    permission = permission_record(row)
+    if permission:
+        tracker.add(*permission)
+
+def extract_first_permissions(csv_paths=('Lawley_Project_Louis.csv',)):
     """Extract only the first/oldest permission for each pole"""
     
-    # Read all pole permission data from original CSV
-    pole_data = defaultdict(list)
-    
-    # Read from the original data with all fields
-    with open('Lawley_Project_Louis.csv', 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            # Only process Pole Permission records
-            if 'Pole Permission' in row.get('Flow Name Groups', ''):
-                pole_num = row.get('Pole Number', '').strip()
-                if pole_num:
-                    # Try to get a valid date
-                    date = row.get('Last Modified Pole Permissions Date', '') or row.get('Survey Date', '') or row.get('Date', '')
-                    
-                    pole_data[pole_num].append({
-                        'date': date,
-                        'agent': row.get('Field Agent Name (pole permission)', '').strip(),
-                        'property_id': row.get('Property ID', ''),
-                        'latitude': row.get('Latitude', ''),
-                        'longitude': row.get('Longitude', ''),
-                        'address': row.get('Location Address', ''),
-                        'status': row.get('Status', ''),
-                        'contact': row.get('Contact Number (e.g.0123456789)', ''),
-                        'contact_name': row.get('Contact Person: Name', '') + ' ' + row.get('Contact Person: Surname', ''),
-                        'stand_number': row.get('Stand Number', '')
-                    })
-    
-    # Find the first (oldest) permission for each pole
-    first_permissions = {}
-    
-    for pole_num, permissions in pole_data.items():
-        # Remove entries without dates
-        valid_perms = [p for p in permissions if p['date']]
+    # Only the earliest record per pole is kept while the exports stream past;
+    # several exports are read in the order given, as one chronological pass
+    tracker = FirstPermissionTracker()
+    
+    for csv_path in csv_paths:
+        for row in iter_rows(csv_path, PERMISSION_COLUMNS):
+            collect_permission(row, tracker)
+    
+    write_first_permission_reports(tracker)
+
+# Pole Permission rows with the same date fallback as permission_record
+PERMISSION_CANDIDATES_SQL = """
+    SELECT rowid AS row_number, py_strip("Pole Number") AS pole,
+           coalesce(nullif("Last Modified Pole Permissions Date", ''),
+                    nullif("Survey Date", ''),
+                    nullif("Date", ''), '') AS permission_date
+    FROM onemap
+    WHERE contains("Flow Name Groups", 'Pole Permission') AND py_strip("Pole Number") <> ''
+"""
+
+def extract_first_permissions_duckdb(csv_paths=('Lawley_Project_Louis.csv',)):
+    """Extract the first permission per pole, ranking the claims in DuckDB"""
+    
+    with ExitStack() as stack:
+        tables = [stack.enter_context(OneMapTable(csv_path, PERMISSION_COLUMNS)) for csv_path in csv_paths]
+        
+        # Detect the date format from the first dated claims, as the tracker does
+        sample = []
+        for table in tables:
+            sample += [date for (date,) in table.execute(f"""
+                SELECT permission_date FROM ({PERMISSION_CANDIDATES_SQL})
+                WHERE permission_date <> '' ORDER BY row_number LIMIT ?
+            """, [SAMPLE_SIZE - len(sample)]).fetchall()]
+            if len(sample) >= SAMPLE_SIZE:
+                break
+        parser = DateParser(sample=sample)
+        tracker = FirstPermissionTracker(parser)
         
-        if valid_perms:
-            # Sort by date and take the first one
-            sorted_perms = sorted(valid_perms, key=lambda x: x['date'])
-            first_permissions[pole_num] = sorted_perms[0]
+        # Earliest claim per pole in each file: parsed dates in time order
+        # (formats tried in the parser's order), then unparseable dates as
+        # text, then undated claims; ties go to the earlier row. Files are
+        # merged by the tracker, earlier files winning ties.
+        for index, table in enumerate(tables):
+            winners = table.execute(f"""
+                SELECT pole, row_number, permission_date, claims FROM (
+                    SELECT pole, row_number, permission_date,
+                           count(*) OVER (PARTITION BY pole) AS claims,
+                           row_number() OVER (
+                               PARTITION BY pole
+                               ORDER BY parsed IS NULL, permission_date = '', parsed, permission_date, row_number
+                           ) AS rank
+                    FROM (
+                        SELECT *, try_strptime(py_strip(permission_date), ?::VARCHAR[]) AS parsed
+                        FROM ({PERMISSION_CANDIDATES_SQL})
+                    )
+                )
+                WHERE rank = 1
+                ORDER BY row_number
+            """, [parser.formats]).fetchall()
+            for pole, row_number, date, claims in winners:
+                tracker.add(pole, date, (index, row_number), claims)
+        
+        # Fetch the full rows of the winning records only
+        first = tracker.first()
+        columns = ', '.join(quote(name) for name in PERMISSION_COLUMNS)
+        for index, table in enumerate(tables):
+            row_numbers = [row for file_index, row in first.values() if file_index == index]
+            rows = table.dict_rows(
+                f"SELECT rowid AS row_number, {columns} FROM onemap WHERE rowid IN (SELECT unnest(?::BIGINT[]))",
+                [row_numbers]
+            )
+            by_row = {int(row['row_number']): row for row in rows}
+            for pole, (file_index, row_number) in first.items():
+                if file_index == index:
+                    tracker.replace(pole, permission_record(by_row[row_number])[2])
+    
+    write_first_permission_reports(tracker)
+
+def write_first_permission_reports(tracker):
+    """Write the first-permission CSV and summary for a FirstPermissionTracker"""
+    
+    # The tracker kept the first (oldest) permission for each pole;
+    # poles whose claims all lack a date are left out
+    first_permissions = {pole: perm for pole, perm in tracker.first().items() if perm['date']}
+    superseded_claims = sum(tracker.superseded(pole) for pole in first_permissions)
+    parser = tracker.parser
     
     # Save the first permissions only
     output_file = f'reports/{datetime.now().strftime("%Y-%m-%d")}_first_pole_permissions_complete.csv'
@@ -96,7 +187,8 @@ def extract_first_permissions():
         f.write("POLE PERMISSION SUMMARY (First Permissions Only)\n")
         f.write("=" * 60 + "\n\n")
         
-        f.write(f"Total unique poles with permissions: {len(first_permissions)}\n\n")
+        f.write(f"Total unique poles with permissions: {len(first_permissions)}\n")
+        f.write(f"Later claims superseded by a first permission: {superseded_claims}\n\n")
         
         # Count by status
         status_counts = defaultdict(int)
@@ -128,7 +220,8 @@ def extract_first_permissions():
         month_counts = defaultdict(int)
         for perm in first_permissions.values():
             if perm['date']:
-                month = perm['date'][:7]  # YYYY-MM
+                parsed = parser.parse(perm['date'])
+                month = parsed.strftime('%Y-%m') if parsed else perm['date'][:7]  # YYYY-MM
                 month_counts[month] += 1
         
         f.write("\n\nPermissions by Month:\n")
@@ -172,4 +265,12 @@ def extract_first_permissions():
         print(f"  Conflict rate: {duplicates_count/len(first_permissions)*100:.1f}%")
 
 if __name__ == "__main__":
-    extract_first_permissions()
\ No newline at end of file
+    args = sys.argv[1:]
+    backend = backend_from_args(args)
+    # Several exports are read in the order given (oldest first)
+    csv_paths = args or ['Lawley_Project_Louis.csv']
+    
+    if backend == 'duckdb':
+        extract_first_permissions_duckdb(csv_paths)
+    else:
+        extract_first_permissions(csv_paths)
\ No newline at end of file
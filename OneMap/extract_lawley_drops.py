@@ -6,9 +6,13 @@ Date: 2025-01-16
 Purpose: Extract only required fields from Lawley Drops CSV file
 Input: /home/ldp/Downloads/Lawley Drops (CSV).csv
 Output: 
-  - output/lawley-drops-extracted.json
+  - output/lawley-drops-extracted.ndjson.gz
+    or output/lawley-drops-extracted.json with --json
   - output/lawley-drops-extracted.csv
 
+Usage:
+    python3 extract_lawley_drops.py [--json | --format ndjson.gz|ndjson|json]
+
 Required fields:
   - label (Drop ID)
   - strtfeat (Pole reference)
@@ -27,18 +31,34 @@ Transformations:
 """
 
 import csv
-import json
 import os
 import re
+import sys
 from datetime import datetime
 from pathlib import Path
 
+from onemap_lib.dates import DateParser
+from onemap_lib.records import DEFAULT_FORMAT, RecordWriter, output_format, output_path
+
 # Configuration
 INPUT_FILE = '/home/ldp/Downloads/Lawley Drops (CSV).csv'
 OUTPUT_DIR = Path(__file__).parent / 'output'
-OUTPUT_JSON = OUTPUT_DIR / 'lawley-drops-extracted.json'
+OUTPUT_STEM = OUTPUT_DIR / 'lawley-drops-extracted'
 OUTPUT_CSV = OUTPUT_DIR / 'lawley-drops-extracted.csv'
 
+# Formats tried by parse_date, in order
+DATE_FORMATS = [
+    '%Y-%m-%dT%H:%M:%S.%f',
+    '%Y-%m-%dT%H:%M:%S',
+    '%Y-%m-%d %H:%M:%S',
+    '%Y-%m-%d',
+    '%d/%m/%Y',
+    '%m/%d/%Y'
+]
+
+# Drops share a handful of creation dates, so each string is parsed once
+DATE_PARSER = DateParser(DATE_FORMATS)
+
 # Ensure output directory exists
 OUTPUT_DIR.mkdir(exist_ok=True)
 
@@ -80,22 +100,9 @@ def parse_date(date_str):
     if not date_str:
         return None
     
-    # Try common date formats
-    date_formats = [
-        '%Y-%m-%dT%H:%M:%S.%f',
-        '%Y-%m-%dT%H:%M:%S',
-        '%Y-%m-%d %H:%M:%S',
-        '%Y-%m-%d',
-        '%d/%m/%Y',
-        '%m/%d/%Y'
-    ]
-    
-    for fmt in date_formats:
-        try:
-            dt = datetime.strptime(date_str.strip(), fmt)
-            return dt.isoformat()
-        except ValueError:
-            continue
+    dt = DATE_PARSER.parse(date_str)
+    if dt is not None:
+        return dt.isoformat()
     
     # Return original if no format matches
     return date_str
@@ -117,8 +124,25 @@ def parse_coordinate(coord):
         return None
 
 
-def extract_drop_data():
-    """Main extraction function"""
+# Columns of the CSV output
+CSV_HEADERS = [
+    'dropId',
+    'poleReference',
+    'ontReference',
+    'cableLength',
+    'cableLengthNumeric',
+    'ponNumber',
+    'zoneNumber',
+    'latitude',
+    'longitude',
+    'dateCreated',
+    'createdBy',
+    'isSpare'
+]
+
+
+def extract_drop_data(fmt=DEFAULT_FORMAT):
+    """Main extraction function; drops are streamed to the outputs as they are read"""
     print('Starting Lawley Drops extraction...')
     print(f'Date: {datetime.now().isoformat()}')
     print(f'Input file: {INPUT_FILE}')
@@ -127,7 +151,7 @@ def extract_drop_data():
     if not os.path.exists(INPUT_FILE):
         raise FileNotFoundError(f'Input file not found: {INPUT_FILE}')
     
-    drops = []
+    output_file = output_path(OUTPUT_STEM, fmt)
     errors = []
     stats = {
         'total': 0,
@@ -140,8 +164,13 @@ def extract_drop_data():
         'uniquePoles': set()
     }
     
-    # Read CSV file
-    with open(INPUT_FILE, 'r', encoding='utf-8') as csvfile:
+    # Read CSV file, writing each drop to the record file and CSV output
+    with open(INPUT_FILE, 'r', encoding='utf-8') as csvfile, \
+            RecordWriter(output_file, 'drops') as records, \
+            open(OUTPUT_CSV, 'w', newline='', encoding='utf-8') as csv_out:
+        csv_writer = csv.DictWriter(csv_out, fieldnames=CSV_HEADERS, extrasaction='ignore')
+        csv_writer.writeheader()
+        
         # Try to detect delimiter
         sample = csvfile.read(1024)
         csvfile.seek(0)
@@ -209,7 +238,11 @@ def extract_drop_data():
                 'isSpare': is_spare
             }
             
-            drops.append(drop)
+            records.write(drop)
+            # Convert None values to empty strings and booleans to strings for CSV
+            csv_drop = {k: (v if v is not None else '') for k, v in drop.items()}
+            csv_drop['isSpare'] = 'TRUE' if is_spare else 'FALSE'
+            csv_writer.writerow(csv_drop)
             stats['valid'] += 1
             
             # Update statistics
@@ -225,52 +258,20 @@ def extract_drop_data():
             
             # Track unique poles
             stats['uniquePoles'].add(strtfeat)
-    
-    # Convert set to count for JSON serialization
-    unique_pole_count = len(stats['uniquePoles'])
-    stats['uniquePoles'] = unique_pole_count
-    
-    # Write JSON output
-    json_output = {
-        'extractionDate': datetime.now().isoformat(),
-        'sourceFile': INPUT_FILE,
-        'statistics': stats,
-        'drops': drops,
-        'errors': errors
-    }
-    
-    with open(OUTPUT_JSON, 'w', encoding='utf-8') as f:
-        json.dump(json_output, f, indent=2, ensure_ascii=False)
-    
-    print(f'\nJSON output written to: {OUTPUT_JSON}')
-    
-    # Write CSV output
-    csv_headers = [
-        'dropId',
-        'poleReference',
-        'ontReference',
-        'cableLength',
-        'cableLengthNumeric',
-        'ponNumber',
-        'zoneNumber',
-        'latitude',
-        'longitude',
-        'dateCreated',
-        'createdBy',
-        'isSpare'
-    ]
-    
-    with open(OUTPUT_CSV, 'w', newline='', encoding='utf-8') as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=csv_headers, extrasaction='ignore')
-        writer.writeheader()
         
-        for drop in drops:
-            # Convert None values to empty strings for CSV
-            csv_drop = {k: (v if v is not None else '') for k, v in drop.items()}
-            # Convert boolean to string for CSV
-            csv_drop['isSpare'] = 'TRUE' if drop['isSpare'] else 'FALSE'
-            writer.writerow(csv_drop)
+        # Convert set to count for JSON serialization
+        unique_pole_count = len(stats['uniquePoles'])
+        stats['uniquePoles'] = unique_pole_count
+        
+        # Header record
+        records.header.update({
+            'extractionDate': datetime.now().isoformat(),
+            'sourceFile': INPUT_FILE,
+            'statistics': stats,
+            'errors': errors
+        })
     
+    print(f'\nDrop data written to: {output_file}')
     print(f'CSV output written to: {OUTPUT_CSV}')
     
     # Print summary
@@ -295,12 +296,12 @@ def extract_drop_data():
             print(f'... and {len(errors) - 10} more errors')
     
     print('\nExtraction completed successfully!')
-    return json_output
+    return records.header
 
 
 if __name__ == '__main__':
     try:
-        extract_drop_data()
+        extract_drop_data(output_format(sys.argv[1:]))
     except Exception as e:
         print(f'Error: {e}')
         exit(1)
\ No newline at end of file
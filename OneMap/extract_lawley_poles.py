@@ -6,9 +6,13 @@ Date: 2025-01-16
 Purpose: Extract only required fields from Lawley Pole CSV file
 Input: /home/ldp/Downloads/Lawley Pole (CSV).csv
 Output: 
-  - output/lawley-poles-extracted.json
+  - output/lawley-poles-extracted.ndjson.gz (+ .idx poleId index)
+    or output/lawley-poles-extracted.json with --json
   - output/lawley-poles-extracted.csv
 
+Usage:
+    python3 extract_lawley_poles.py [--json | --format ndjson.gz|ndjson|json]
+
 Required fields:
   - label_1 (Pole ID)
   - dim1 (Height)
@@ -25,15 +29,17 @@ Transformations:
 """
 
 import csv
-import json
 import os
+import sys
 from datetime import datetime
 from pathlib import Path
 
+from onemap_lib.records import DEFAULT_FORMAT, RecordWriter, output_format, output_path
+
 # Configuration
 INPUT_FILE = '/home/ldp/Downloads/Lawley Pole (CSV).csv'
 OUTPUT_DIR = Path(__file__).parent / 'output'
-OUTPUT_JSON = OUTPUT_DIR / 'lawley-poles-extracted.json'
+OUTPUT_STEM = OUTPUT_DIR / 'lawley-poles-extracted'
 OUTPUT_CSV = OUTPUT_DIR / 'lawley-poles-extracted.csv'
 
 # Ensure output directory exists
@@ -94,8 +100,24 @@ def parse_coordinate(coord):
         return None
 
 
-def extract_pole_data():
-    """Main extraction function"""
+# Columns of the CSV output
+CSV_HEADERS = [
+    'poleId',
+    'height',
+    'heightNumeric',
+    'diameter',
+    'poleType',
+    'status',
+    'latitude',
+    'longitude',
+    'ponNumber',
+    'zoneNumber',
+    'dropCount'
+]
+
+
+def extract_pole_data(fmt=DEFAULT_FORMAT):
+    """Main extraction function; poles are streamed to the outputs as they are read"""
     print('Starting Lawley Poles extraction...')
     print(f'Date: {datetime.now().isoformat()}')
     print(f'Input file: {INPUT_FILE}')
@@ -104,7 +126,7 @@ def extract_pole_data():
     if not os.path.exists(INPUT_FILE):
         raise FileNotFoundError(f'Input file not found: {INPUT_FILE}')
     
-    poles = []
+    output_file = output_path(OUTPUT_STEM, fmt)
     errors = []
     stats = {
         'total': 0,
@@ -117,8 +139,13 @@ def extract_pole_data():
         'withoutGPS': 0
     }
     
-    # Read CSV file
-    with open(INPUT_FILE, 'r', encoding='utf-8') as csvfile:
+    # Read CSV file, writing each pole to the record file and CSV output
+    with open(INPUT_FILE, 'r', encoding='utf-8') as csvfile, \
+            RecordWriter(output_file, 'poles', key='poleId') as records, \
+            open(OUTPUT_CSV, 'w', newline='', encoding='utf-8') as csv_out:
+        csv_writer = csv.DictWriter(csv_out, fieldnames=CSV_HEADERS, extrasaction='ignore')
+        csv_writer.writeheader()
+        
         # Try to detect delimiter
         sample = csvfile.read(1024)
         csvfile.seek(0)
@@ -179,7 +206,9 @@ def extract_pole_data():
                 'dropCount': 0
             }
             
-            poles.append(pole)
+            records.write(pole)
+            # Convert None values to empty strings for CSV
+            csv_writer.writerow({k: (v if v is not None else '') for k, v in pole.items()})
             stats['valid'] += 1
             
             # Update statistics
@@ -194,45 +223,16 @@ def extract_pole_data():
                 stats['withGPS'] += 1
             else:
                 stats['withoutGPS'] += 1
-    
-    # Write JSON output
-    json_output = {
-        'extractionDate': datetime.now().isoformat(),
-        'sourceFile': INPUT_FILE,
-        'statistics': stats,
-        'poles': poles,
-        'errors': errors
-    }
-    
-    with open(OUTPUT_JSON, 'w', encoding='utf-8') as f:
-        json.dump(json_output, f, indent=2, ensure_ascii=False)
-    
-    print(f'\nJSON output written to: {OUTPUT_JSON}')
-    
-    # Write CSV output
-    csv_headers = [
-        'poleId',
-        'height',
-        'heightNumeric',
-        'diameter',
-        'poleType',
-        'status',
-        'latitude',
-        'longitude',
-        'ponNumber',
-        'zoneNumber',
-        'dropCount'
-    ]
-    
-    with open(OUTPUT_CSV, 'w', newline='', encoding='utf-8') as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=csv_headers, extrasaction='ignore')
-        writer.writeheader()
         
-        for pole in poles:
-            # Convert None values to empty strings for CSV
-            csv_pole = {k: (v if v is not None else '') for k, v in pole.items()}
-            writer.writerow(csv_pole)
+        # Header record
+        records.header.update({
+            'extractionDate': datetime.now().isoformat(),
+            'sourceFile': INPUT_FILE,
+            'statistics': stats,
+            'errors': errors
+        })
     
+    print(f'\nPole data written to: {output_file}')
     print(f'CSV output written to: {OUTPUT_CSV}')
     
     # Print summary
@@ -256,12 +256,12 @@ def extract_pole_data():
             print(f'... and {len(errors) - 10} more errors')
     
     print('\nExtraction completed successfully!')
-    return json_output
+    return records.header
 
 
 if __name__ == '__main__':
     try:
-        extract_pole_data()
+        extract_pole_data(output_format(sys.argv[1:]))
     except Exception as e:
         print(f'Error: {e}')
         exit(1)
\ No newline at end of file
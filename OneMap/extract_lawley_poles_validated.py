@@ -5,22 +5,38 @@ Date: 2025-01-16
 
 This version includes self-validation to prevent hallucinations.
 Every claim made by this script is verified against the actual data.
+
+Usage:
+    python3 extract_lawley_poles_validated.py [--json | --format ndjson.gz|ndjson|json]
 """
 
 import csv
 import json
 import os
 import re
+import sys
 from datetime import datetime
 from pathlib import Path
 
+from onemap_lib.assertions import MAX_FAILURES, AssertionLog
+from onemap_lib.records import DEFAULT_FORMAT, RecordWriter, output_format, output_path
+
 # Configuration
 INPUT_FILE = '/home/ldp/Downloads/Lawley Pole (CSV).csv'
 OUTPUT_DIR = Path(__file__).parent / 'output'
-OUTPUT_JSON = OUTPUT_DIR / 'lawley-poles-extracted-validated.json'
+OUTPUT_STEM = OUTPUT_DIR / 'lawley-poles-extracted-validated'
 OUTPUT_CSV = OUTPUT_DIR / 'lawley-poles-extracted-validated.csv'
 VALIDATION_JSON = OUTPUT_DIR / 'lawley-poles-self-validation.json'
 
+# Columns of the CSV output
+CSV_HEADERS = [
+    'poleId', 'height', 'heightNumeric', 'diameter', 'poleType',
+    'status', 'latitude', 'longitude', 'ponNumber', 'zoneNumber', 'dropCount'
+]
+
+# Distinct PON / zone values kept as evidence
+EVIDENCE_VALUES = 5
+
 # Ensure output directory exists
 OUTPUT_DIR.mkdir(exist_ok=True)
 
@@ -31,8 +47,7 @@ class ValidatedPoleExtractor:
     def __init__(self):
         self.validations = {}
         self.evidence = {}
-        self.assertions_passed = []
-        self.assertions_failed = []
+        self.assertions = AssertionLog()
         
     def classify_pole_type(self, diameter):
         """Determine pole type based on diameter"""
@@ -85,10 +100,8 @@ class ValidatedPoleExtractor:
             value = float(coord)
             
             # Assertion: Valid coordinate ranges
-            if -90 <= value <= 90 or -180 <= value <= 180:
-                self.assertions_passed.append(f"Valid coordinate: {value}")
-            else:
-                self.assertions_failed.append(f"Invalid coordinate: {value}")
+            self.assertions.check('valid_coordinate', -90 <= value <= 90 or -180 <= value <= 180,
+                                  value, f"Invalid coordinate: {value}")
                 
             return value
         except ValueError:
@@ -99,15 +112,12 @@ class ValidatedPoleExtractor:
         is_valid = pole_id and pole_id.startswith('LAW.P.')
         
         # Assertion: Pole ID must match pattern
-        if is_valid:
-            self.assertions_passed.append(f"Valid pole ID format: {pole_id[:10]}...")
-        else:
-            self.assertions_failed.append(f"Invalid pole ID: {pole_id}")
+        self.assertions.check('pole_id_format', is_valid, pole_id, f"Invalid pole ID: {pole_id}")
             
         return is_valid
 
-    def extract_pole_data(self):
-        """Main extraction function with validation"""
+    def extract_pole_data(self, fmt=DEFAULT_FORMAT):
+        """Main extraction function with validation; poles are streamed to the outputs"""
         print('Starting Validated Lawley Poles extraction...')
         print(f'Date: {datetime.now().isoformat()}')
         print(f'Input file: {INPUT_FILE}')
@@ -122,8 +132,10 @@ class ValidatedPoleExtractor:
         if not self.validations['input_file']['exists']:
             raise FileNotFoundError(f'Input file not found: {INPUT_FILE}')
         
-        poles = []
+        output_file = output_path(OUTPUT_STEM, fmt)
+        # Row errors: the first MAX_FAILURES messages, and a count of the rest
         errors = []
+        errors_not_listed = 0
         stats = {
             'total': 0,
             'valid': 0,
@@ -138,9 +150,17 @@ class ValidatedPoleExtractor:
         # Track for cross-validation
         csv_line_count = 0
         pole_ids_seen = set()
+        sample_poles = []
+        pon_values = []
+        zone_values = []
         
-        # Read CSV file
-        with open(INPUT_FILE, 'r', encoding='utf-8') as csvfile:
+        # Read CSV file, writing each pole to the record file and CSV output
+        with open(INPUT_FILE, 'r', encoding='utf-8') as csvfile, \
+                RecordWriter(output_file, 'poles', key='poleId') as records, \
+                open(OUTPUT_CSV, 'w', newline='', encoding='utf-8') as csv_out:
+            csv_writer = csv.DictWriter(csv_out, fieldnames=CSV_HEADERS, extrasaction='ignore')
+            csv_writer.writeheader()
+            
             sample = csvfile.read(1024)
             csvfile.seek(0)
             dialect = csv.Sniffer().sniff(sample)
@@ -169,7 +189,10 @@ class ValidatedPoleExtractor:
                 stats['total'] += 1
                 
                 if len(row) < 82:
-                    errors.append(f'Row {row_num}: Insufficient columns ({len(row)})')
+                    if len(errors) < MAX_FAILURES:
+                        errors.append(f'Row {row_num}: Insufficient columns ({len(row)})')
+                    else:
+                        errors_not_listed += 1
                     stats['invalid'] += 1
                     continue
                 
@@ -185,13 +208,16 @@ class ValidatedPoleExtractor:
                 
                 # Validate pole ID
                 if not self.validate_pole_id(pole_id):
-                    errors.append(f'Row {row_num}: Invalid or missing pole ID: {pole_id}')
+                    if len(errors) < MAX_FAILURES:
+                        errors.append(f'Row {row_num}: Invalid or missing pole ID: {pole_id}')
+                    else:
+                        errors_not_listed += 1
                     stats['invalid'] += 1
                     continue
                 
                 # Check for duplicates
                 if pole_id in pole_ids_seen:
-                    self.assertions_failed.append(f"Duplicate pole ID: {pole_id}")
+                    self.assertions.failed('unique_pole_id', f"Duplicate pole ID: {pole_id}")
                 else:
                     pole_ids_seen.add(pole_id)
                 
@@ -217,9 +243,18 @@ class ValidatedPoleExtractor:
                     'dropCount': 0
                 }
                 
-                poles.append(pole)
+                records.write(pole)
+                csv_writer.writerow({k: (v if v is not None else '') for k, v in pole.items()})
                 stats['valid'] += 1
                 
+                # Bounded evidence: first poles and first distinct PON / zone values
+                if len(sample_poles) < 3:
+                    sample_poles.append(pole)
+                if pon_no and pon_no not in pon_values and len(pon_values) < EVIDENCE_VALUES:
+                    pon_values.append(pon_no)
+                if zone_no and zone_no not in zone_values and len(zone_values) < EVIDENCE_VALUES:
+                    zone_values.append(zone_no)
+                
                 # Update statistics
                 if pole_type == 'feeder':
                     stats['feederPoles'] += 1
@@ -232,72 +267,70 @@ class ValidatedPoleExtractor:
                     stats['withGPS'] += 1
                 else:
                     stats['withoutGPS'] += 1
-        
-        # SELF-VALIDATION: Verify statistics match actual data
-        self.validations['statistics'] = {
-            'csv_lines': {
-                'total_lines': csv_line_count,
-                'header_lines': 1,
-                'data_lines': csv_line_count - 1,
-                'matches_total': (csv_line_count - 1) == stats['total']
-            },
-            'pole_counts': {
-                'valid_plus_invalid': stats['valid'] + stats['invalid'],
-                'equals_total': (stats['valid'] + stats['invalid']) == stats['total'],
-                'actual_poles_in_list': len(poles),
-                'matches_valid_count': len(poles) == stats['valid']
-            },
-            'pole_types': {
-                'sum_of_types': stats['feederPoles'] + stats['distributionPoles'] + stats['unknownType'],
-                'equals_valid': (stats['feederPoles'] + stats['distributionPoles'] + stats['unknownType']) == stats['valid']
-            },
-            'gps_coverage': {
-                'with_plus_without': stats['withGPS'] + stats['withoutGPS'],
-                'equals_valid': (stats['withGPS'] + stats['withoutGPS']) == stats['valid']
-            },
-            'unique_poles': {
-                'unique_ids': len(pole_ids_seen),
-                'equals_valid': len(pole_ids_seen) == stats['valid']
-            }
-        }
-        
-        # Store sample data as evidence
-        self.evidence['sample_poles'] = poles[:3] if poles else []
-        self.evidence['sample_errors'] = errors[:3] if errors else []
-        self.evidence['unique_pon_values'] = list(set(p['ponNumber'] for p in poles if p['ponNumber']))[:5]
-        self.evidence['unique_zone_values'] = list(set(p['zoneNumber'] for p in poles if p['zoneNumber']))[:5]
-        
-        # Cross-validation checks
-        all_validations_passed = all([
-            self.validations['statistics']['csv_lines']['matches_total'],
-            self.validations['statistics']['pole_counts']['equals_total'],
-            self.validations['statistics']['pole_counts']['matches_valid_count'],
-            self.validations['statistics']['pole_types']['equals_valid'],
-            self.validations['statistics']['gps_coverage']['equals_valid']
-        ])
-        
-        # Create output with embedded validation
-        json_output = {
-            'extractionDate': datetime.now().isoformat(),
-            'sourceFile': INPUT_FILE,
-            'statistics': stats,
-            'poles': poles,
-            'errors': errors,
-            '_validations': self.validations,
-            '_evidence': self.evidence,
-            '_validation_summary': {
-                'all_checks_passed': all_validations_passed,
-                'assertions_passed': len(self.assertions_passed),
-                'assertions_failed': len(self.assertions_failed),
-                'confidence_score': (len(self.assertions_passed) / (len(self.assertions_passed) + len(self.assertions_failed)) * 100) if self.assertions_passed else 100
+            
+            # SELF-VALIDATION: Verify statistics match actual data
+            self.validations['statistics'] = {
+                'csv_lines': {
+                    'total_lines': csv_line_count,
+                    'header_lines': 1,
+                    'data_lines': csv_line_count - 1,
+                    'matches_total': (csv_line_count - 1) == stats['total']
+                },
+                'pole_counts': {
+                    'valid_plus_invalid': stats['valid'] + stats['invalid'],
+                    'equals_total': (stats['valid'] + stats['invalid']) == stats['total'],
+                    'actual_poles_in_list': records.count,
+                    'matches_valid_count': records.count == stats['valid']
+                },
+                'pole_types': {
+                    'sum_of_types': stats['feederPoles'] + stats['distributionPoles'] + stats['unknownType'],
+                    'equals_valid': (stats['feederPoles'] + stats['distributionPoles'] + stats['unknownType']) == stats['valid']
+                },
+                'gps_coverage': {
+                    'with_plus_without': stats['withGPS'] + stats['withoutGPS'],
+                    'equals_valid': (stats['withGPS'] + stats['withoutGPS']) == stats['valid']
+                },
+                'unique_poles': {
+                    'unique_ids': len(pole_ids_seen),
+                    'equals_valid': len(pole_ids_seen) == stats['valid']
+                }
             }
-        }
-        
-        # Write main output
-        with open(OUTPUT_JSON, 'w', encoding='utf-8') as f:
-            json.dump(json_output, f, indent=2, ensure_ascii=False)
+            
+            # Store sample data as evidence
+            self.evidence['sample_poles'] = sample_poles
+            self.evidence['sample_errors'] = errors[:3] if errors else []
+            self.evidence['unique_pon_values'] = pon_values
+            self.evidence['unique_zone_values'] = zone_values
+            
+            # Cross-validation checks
+            all_validations_passed = all([
+                self.validations['statistics']['csv_lines']['matches_total'],
+                self.validations['statistics']['pole_counts']['equals_total'],
+                self.validations['statistics']['pole_counts']['matches_valid_count'],
+                self.validations['statistics']['pole_types']['equals_valid'],
+                self.validations['statistics']['gps_coverage']['equals_valid']
+            ])
+            confidence_score = self.assertions.confidence_score()
+            
+            # Header record with embedded validation
+            records.header.update({
+                'extractionDate': datetime.now().isoformat(),
+                'sourceFile': INPUT_FILE,
+                'statistics': stats,
+                'errors': errors,
+                'errors_not_listed': errors_not_listed,
+                '_validations': self.validations,
+                '_evidence': self.evidence,
+                '_validation_summary': {
+                    'all_checks_passed': all_validations_passed,
+                    'assertions_passed': self.assertions.total_passed,
+                    'assertions_failed': self.assertions.total_failed,
+                    'confidence_score': confidence_score
+                }
+            })
         
-        print(f'\nJSON output written to: {OUTPUT_JSON}')
+        print(f'\nPole data written to: {output_file}')
+        print(f'CSV output written to: {OUTPUT_CSV}')
         
         # Write separate validation report
         validation_report = {
@@ -305,15 +338,10 @@ class ValidatedPoleExtractor:
             'source_file': INPUT_FILE,
             'validations': self.validations,
             'evidence': self.evidence,
-            'assertions': {
-                'passed': self.assertions_passed[:10],  # First 10
-                'failed': self.assertions_failed[:10],  # First 10
-                'total_passed': len(self.assertions_passed),
-                'total_failed': len(self.assertions_failed)
-            },
+            'assertions': self.assertions.summary(),
             'summary': {
                 'all_internal_checks_passed': all_validations_passed,
-                'confidence_percentage': json_output['_validation_summary']['confidence_score']
+                'confidence_percentage': confidence_score
             }
         }
         
@@ -322,21 +350,6 @@ class ValidatedPoleExtractor:
         
         print(f'Validation report written to: {VALIDATION_JSON}')
         
-        # Write CSV output
-        csv_headers = [
-            'poleId', 'height', 'heightNumeric', 'diameter', 'poleType',
-            'status', 'latitude', 'longitude', 'ponNumber', 'zoneNumber', 'dropCount'
-        ]
-        
-        with open(OUTPUT_CSV, 'w', newline='', encoding='utf-8') as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=csv_headers, extrasaction='ignore')
-            writer.writeheader()
-            for pole in poles:
-                csv_pole = {k: (v if v is not None else '') for k, v in pole.items()}
-                writer.writerow(csv_pole)
-        
-        print(f'CSV output written to: {OUTPUT_CSV}')
-        
         # Print summary with validation status
         print('\n=== EXTRACTION SUMMARY ===')
         print(f'Total records processed: {stats["total"]}')
@@ -344,15 +357,16 @@ class ValidatedPoleExtractor:
         print(f'Invalid records: {stats["invalid"]}')
         print(f'\n=== VALIDATION STATUS ===')
         print(f'Internal checks passed: {"YES" if all_validations_passed else "NO"}')
-        print(f'Confidence score: {json_output["_validation_summary"]["confidence_score"]:.1f}%')
+        print(f'Confidence score: {confidence_score:.1f}%')
+        print(f'Assertions: {self.assertions.total_passed} passed, {self.assertions.total_failed} failed')
         
-        return json_output
+        return records.header
 
 
 if __name__ == '__main__':
     try:
         extractor = ValidatedPoleExtractor()
-        extractor.extract_pole_data()
+        extractor.extract_pole_data(output_format(sys.argv[1:]))
         print('\nExtraction completed with built-in validation!')
     except Exception as e:
         print(f'Error: {e}')
@@ -5,106 +5,208 @@ To use this script:
 1. Install firebase-admin: pip install firebase-admin
 2. Set up service account credentials
 3. Update PROJECT_ID and CREDENTIALS_PATH
-4. Run the script
+4. Run the script (add --resume to continue an import that failed)
+
+Options:
+  --resume            skip records committed by an earlier, failed import
+  --sync              write only documents whose content changed since the
+                      last sync (creates, updates, deletes)
+  --dry-run           with --sync: write the diff report, change nothing
+  --refresh-manifest  with --sync: re-read the stored content hashes of this
+                      project's synced documents from Firestore first
+                      (after changes made outside the sync)
+
+Batches are committed concurrently (MAX_IN_FLIGHT at a time) with retries
+and adaptive batch sizes. To try an import offline, start the emulator
+(firebase emulators:start --only firestore) and set
+FIRESTORE_EMULATOR_HOST=localhost:8080 - no credentials are needed.
+
+Document IDs come from poleId/dropId, so re-importing overwrites documents
+instead of duplicating them. Each committed batch is journaled under
+output/import-checkpoints/; with --resume, records already committed by an
+earlier run of the same input are skipped.
+
+--sync hashes each document's content and compares it with the manifest of
+the last sync (output/sync-manifests/), so a daily re-import only writes
+what really changed. See onemap_lib/firestore_sync.py.
 """
 
 import json
-import firebase_admin
-from firebase_admin import credentials, firestore
+import sys
 from datetime import datetime
 from pathlib import Path
 
+from google.cloud import firestore
+
+from onemap_lib.checkpoints import CheckpointJournal
+from onemap_lib.firestore_sync import SyncManifest, sync_collection
+from onemap_lib.firestore_writer import ConcurrentBatchWriter, connect, document_id
+from onemap_lib.records import RecordFile, find_output
+
 # CONFIGURATION - UPDATE THESE
 PROJECT_ID = 'fibreflow-73daf'
 CREDENTIALS_PATH = 'path/to/serviceAccountKey.json'
 PROJECT_CODE = 'Law-001'  # Lawley project code
+MAX_IN_FLIGHT = 8  # batch commits running at once
+CHECKPOINT_DIR = Path('output') / 'import-checkpoints'
+SYNC_DIR = Path('output') / 'sync-manifests'
+RESUME = '--resume' in sys.argv
+DRY_RUN = '--dry-run' in sys.argv
+SYNC = '--sync' in sys.argv or DRY_RUN
+REFRESH_MANIFEST = '--refresh-manifest' in sys.argv
 
-# Initialize Firebase
-cred = credentials.Certificate(CREDENTIALS_PATH)
-firebase_admin.initialize_app(cred, {
-    'projectId': PROJECT_ID
-})
-db = firestore.client()
+# Server timestamps, added on write and left out of the content hash
+CREATED_FIELDS = {
+    'importedAt': firestore.SERVER_TIMESTAMP,
+    'createdAt': firestore.SERVER_TIMESTAMP,
+    'lastModified': firestore.SERVER_TIMESTAMP
+}
+UPDATED_FIELDS = {
+    'importedAt': firestore.SERVER_TIMESTAMP,
+    'lastModified': firestore.SERVER_TIMESTAMP
+}
 
-def import_poles(batch_size=500):
-    """Import poles to Firebase"""
-    print("Importing poles...")
-    
-    # Load pole data
-    with open('output/poles-with-drops.json', 'r') as f:
-        data = json.load(f)
-    poles = data['poles']
-    
-    # Get or create project reference
+# Initialize Firebase (the emulator when FIRESTORE_EMULATOR_HOST is set)
+db = connect(PROJECT_ID, CREDENTIALS_PATH)
+
+def find_project_id():
+    """Firestore ID of the project with PROJECT_CODE"""
     project_ref = db.collection('projects').where('projectCode', '==', PROJECT_CODE).limit(1).get()
     if not project_ref:
         print(f"Project {PROJECT_CODE} not found!")
-        return
+        return None
     
-    project_id = project_ref[0].id
-    print(f"Found project: {project_id}")
-    
-    # Batch import poles
-    batch = db.batch()
-    count = 0
+    print(f"Found project: {project_ref[0].id}")
+    return project_ref[0].id
+
+def print_stats(stats):
+    print(f"   {stats['docs_per_second']:,.0f} docs/s, {stats['batches']} batches, "
+          f"{stats['retries']} retries, final batch size {stats['final_batch_size']}")
+
+def open_journal(collection, source):
+    journal = CheckpointJournal(CHECKPOINT_DIR / f'{PROJECT_ID}-{collection}.jsonl', source, resume=RESUME)
+    if journal.resumed:
+        print(f"Resuming: {journal.resumed} records already imported")
+    return journal
+
+def pole_document(pole, project_id):
+    """Firestore document for a pole, without the server timestamps"""
+    return {
+        'id': document_id(pole['poleId']),
+        'projectId': project_id,
+        'poleNumber': pole['poleId'],
+        'poleType': pole['poleType'],
+        'height': pole['height'],
+        'diameter': pole['diameter'],
+        'status': pole['status'],
+        'location': {
+            'latitude': pole['latitude'],
+            'longitude': pole['longitude']
+        },
+        'ponNumber': pole['ponNumber'],
+        'zoneNumber': pole['zoneNumber'],
+        'connectedDrops': pole['connectedDrops'],
+        'dropCount': pole['dropCount'],
+        'importedBy': 'import-script'
+    }
+
+def drop_document(drop, project_id):
+    """Firestore document for a drop, without the server timestamps"""
+    return {
+        'id': document_id(drop['dropId']),
+        'projectId': project_id,
+        'dropNumber': drop['dropId'],
+        'poleNumber': drop['poleReference'],
+        'ontReference': drop['ontReference'],
+        'cableLength': drop['cableLength'],
+        'status': 'spare' if drop['isSpare'] else 'active',
+        'location': {
+            'latitude': drop['latitude'],
+            'longitude': drop['longitude']
+        },
+        'ponNumber': drop['ponNumber'],
+        'zoneNumber': drop['zoneNumber'],
+        'importedBy': 'import-script'
+    }
+
+# Firestore collection, extraction output, record collection, key field, document builder
+IMPORTS = {
+    'poles': ('planned-poles', 'poles-with-drops', 'poles', 'poleId', pole_document),
+    'drops': ('drops', 'lawley-drops-extracted', 'drops', 'dropId', drop_document),
+}
+
+def import_records(name, project_id, batch_size=500):
+    """Import poles or drops to Firebase"""
+    collection, stem, record_collection, key, make_document = IMPORTS[name]
+    print(f"\nImporting {name}...")
     
-    for pole in poles:
-        # Create pole document
-        pole_ref = db.collection('planned-poles').document()
-        pole_data = {
-            'id': pole_ref.id,
-            'projectId': project_id,
-            'poleNumber': pole['poleId'],
-            'poleType': pole['poleType'],
-            'height': pole['height'],
-            'diameter': pole['diameter'],
-            'status': pole['status'],
-            'location': {
-                'latitude': pole['latitude'],
-                'longitude': pole['longitude']
-            },
-            'ponNumber': pole['ponNumber'],
-            'zoneNumber': pole['zoneNumber'],
-            'connectedDrops': pole['connectedDrops'],
-            'dropCount': pole['dropCount'],
-            'importedAt': firestore.SERVER_TIMESTAMP,
-            'importedBy': 'import-script',
-            'createdAt': firestore.SERVER_TIMESTAMP,
-            'lastModified': firestore.SERVER_TIMESTAMP
-        }
-        
-        batch.set(pole_ref, pole_data)
-        count += 1
-        
-        # Commit batch when full
-        if count % batch_size == 0:
-            batch.commit()
-            print(f"Imported {count} poles...")
-            batch = db.batch()
+    # Stream the records (NDJSON or JSON, whichever was written)
+    records_file = find_output(Path('output') / stem)
+    records = RecordFile(records_file, record_collection)
     
-    # Commit remaining
-    if count % batch_size != 0:
-        batch.commit()
+    with open_journal(collection, records_file) as journal, \
+            ConcurrentBatchWriter(db, max_in_flight=MAX_IN_FLIGHT, batch_size=batch_size,
+                                  on_commit=journal.record) as writer:
+        for position, record in enumerate(records):
+            if journal.committed(position):
+                continue
+            doc_ref = db.collection(collection).document(document_id(record[key]))
+            writer.set(doc_ref, {**make_document(record, project_id), **CREATED_FIELDS}, tag=position)
     
-    print(f"✅ Imported {count} poles successfully!")
-    return count
+    stats = writer.stats()
+    print(f"✅ Imported {stats['documents']} {name} successfully!")
+    print_stats(stats)
+    return stats['documents'] + journal.resumed
 
-def import_drops(batch_size=500):
-    """Import drops to Firebase"""
-    print("\nImporting drops...")
+def sync_records(name, project_id, batch_size=500):
+    """Write only the poles or drops that changed since the last sync"""
+    collection, stem, record_collection, key, make_document = IMPORTS[name]
+    print(f"\n{'Diffing' if DRY_RUN else 'Syncing'} {name}...")
     
-    # Similar implementation for drops
-    # ... (code continues)
+    records = RecordFile(find_output(Path('output') / stem), record_collection)
+    manifest = SyncManifest(SYNC_DIR / f'{PROJECT_ID}-{project_id}-{collection}.json', project_id)
+    if REFRESH_MANIFEST:
+        manifest.refresh(db.collection(collection))
+    elif not manifest.hashes:
+        print("   No manifest for this project yet: every document counts as new "
+              "(add --refresh-manifest to adopt what an earlier sync wrote)")
+    
+    documents = ((document_id(r[key]), make_document(r, project_id)) for r in records)
+    report = sync_collection(db, collection, documents, manifest, dry_run=DRY_RUN,
+                             created_fields=CREATED_FIELDS, updated_fields=UPDATED_FIELDS,
+                             max_in_flight=MAX_IN_FLIGHT, batch_size=batch_size)
+    
+    SYNC_DIR.mkdir(parents=True, exist_ok=True)
+    report_path = SYNC_DIR / f'sync-report-{collection}.json'
+    with open(report_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    
+    counts = report['counts']
+    print(f"{'Would write' if DRY_RUN else '✅ Wrote'}: {counts['create']} creates, "
+          f"{counts['update']} updates, {counts['delete']} deletes ({counts['unchanged']} unchanged)")
+    if counts['not_owned']:
+        print(f"   {counts['not_owned']} documents not written by this project's sync were left in place")
+    if counts['repeated']:
+        print(f"⚠️  {counts['repeated']} repeated document IDs; the last record of each was used")
+    if 'writer' in report:
+        print_stats(report['writer'])
+    print(f"   Diff report: {report_path}")
+    return counts['create'] + counts['update'] + counts['unchanged']
 
 if __name__ == '__main__':
     print("=== LAWLEY DATA FIREBASE IMPORT ===")
     print(f"Project: {PROJECT_ID}")
     print(f"Project Code: {PROJECT_CODE}")
+    print(f"Mode: {'sync (dry run)' if DRY_RUN else 'sync' if SYNC else 'import'}")
+    print(f"Started: {datetime.now().isoformat()}")
     
-    # Import data
-    pole_count = import_poles()
-    drop_count = import_drops()
-    
-    print(f"\n✅ Import complete!")
-    print(f"   - Poles: {pole_count}")
-    print(f"   - Drops: {drop_count}")
+    project_id = find_project_id()
+    if project_id:
+        # Import data
+        run = sync_records if SYNC else import_records
+        pole_count = run('poles', project_id)
+        drop_count = run('drops', project_id)
+        
+        print(f"\n✅ {'Dry run' if DRY_RUN else 'Import'} complete!")
+        print(f"   - Poles: {pole_count}")
+        print(f"   - Drops: {drop_count}")
@@ -7,6 +7,33 @@ One pole = One location (regardless of status)
 import csv
 from collections import defaultdict
 from datetime import datetime
+from onemap_lib.addresses import distinct_places
+from onemap_lib.snapshot import iter_rows
+
+TRUE_DUPLICATE_COLUMNS = ['Pole Number', 'Location Address', 'Status', 'Flow Name Groups', 'Survey Date']
+
+def collect_row(row, pole_locations, pole_address_history):
+    """
+    Add one CSV row to the pole location and history maps
+    pole_locations may be None when a shared pole -> addresses index is used
+    """
+    pole = row.get('Pole Number', '').strip()
+    address = row.get('Location Address', '').strip()
+    status = row.get('Status', '').strip()
+    flow_history = row.get('Flow Name Groups', '').strip()
+    date = row.get('Survey Date', '').strip()
+    
+    if pole and address:
+        # Track unique locations per pole
+        if pole_locations is not None:
+            pole_locations[pole].add(address)
+        
+        # Track history at each pole-address combination
+        pole_address_history[(pole, address)].append({
+            'status': status,
+            'flow_history': flow_history,
+            'date': date
+        })
 
 def find_true_duplicates(csv_path):
     """
@@ -22,32 +49,19 @@ def find_true_duplicates(csv_path):
     pole_address_history = defaultdict(list)
     
     print("Reading data...")
-    with open(csv_path, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        
-        for row in reader:
-            pole = row.get('Pole Number', '').strip()
-            address = row.get('Location Address', '').strip()
-            status = row.get('Status', '').strip()
-            flow_history = row.get('Flow Name Groups', '').strip()
-            date = row.get('Survey Date', '').strip()
-            
-            if pole and address:
-                # Track unique locations per pole
-                pole_locations[pole].add(address)
-                
-                # Track history at each pole-address combination
-                pole_address_history[(pole, address)].append({
-                    'status': status,
-                    'flow_history': flow_history,
-                    'date': date
-                })
+    for row in iter_rows(csv_path, TRUE_DUPLICATE_COLUMNS):
+        collect_row(row, pole_locations, pole_address_history)
+    
+    report_true_duplicates(pole_locations, pole_address_history)
+
+def report_true_duplicates(pole_locations, pole_address_history):
+    """Print findings and export true_duplicate_poles.csv"""
     
     # Analyze results
     print("\n=== ANALYSIS RESULTS ===\n")
     
     # 1. Find poles at multiple locations (TRUE DUPLICATES)
-    true_duplicates = {pole: locs for pole, locs in pole_locations.items() if len(locs) > 1}
+    true_duplicates, respelled = distinct_places(pole_locations)
     
     print(f"1. TRUE DUPLICATE POLES (at multiple locations): {len(true_duplicates)}")
     print("   These poles appear at different physical addresses - this is the real problem!\n")
@@ -80,6 +94,7 @@ def find_true_duplicates(csv_path):
     print("\n=== SUMMARY ===")
     print(f"Total poles analyzed: {len(pole_locations)}")
     print(f"Poles with location conflicts: {len(true_duplicates)} ← THESE NEED FIXING")
+    print(f"Poles with one address spelled several ways: {respelled} (counted as one location)")
     print(f"Poles with normal workflow updates: {len(pole_locations) - len(true_duplicates)}")
     
     # Export true duplicates
@@ -105,5 +120,9 @@ def find_true_duplicates(csv_path):
 if __name__ == "__main__":
     # Use filtered data if available
     import os
-    csv_path = "Lawley_Essential.csv" if os.path.exists("Lawley_Essential.csv") else "Lawley_Project_Louis.csv"
+    import sys
+    if len(sys.argv) > 1:
+        csv_path = sys.argv[1]
+    else:
+        csv_path = "Lawley_Essential.csv" if os.path.exists("Lawley_Essential.csv") else "Lawley_Project_Louis.csv"
     find_true_duplicates(csv_path)
\ No newline at end of file
@@ -11,11 +11,11 @@
  * 4. Links everything to the Lawley project
  */
 
-const fs = require('fs');
 const path = require('path');
 const { initializeApp } = require('firebase-admin/app');
 const { getFirestore, Timestamp } = require('firebase-admin/firestore');
 const { credential } = require('firebase-admin');
+const { findOutput, readDocument } = require('./onemap_lib/records');
 
 // Initialize Firebase Admin
 const app = initializeApp({
@@ -25,9 +25,9 @@ const app = initializeApp({
 
 const db = getFirestore(app);
 
-// File paths
-const POLES_JSON = path.join(__dirname, 'output', 'poles-with-drops.json');
-const DROPS_JSON = path.join(__dirname, 'output', 'lawley-drops-extracted.json');
+// Extraction outputs (.ndjson.gz, .ndjson or .json, whichever was written)
+const POLES_OUTPUT = path.join(__dirname, 'output', 'poles-with-drops');
+const DROPS_OUTPUT = path.join(__dirname, 'output', 'lawley-drops-extracted');
 
 async function findOrCreateLawleyProject() {
   console.log('Looking for Lawley project...');
@@ -64,7 +64,7 @@ async function importPoles(projectId) {
   console.log('\n=== IMPORTING POLES ===');
   
   // Load pole data
-  const poleData = JSON.parse(fs.readFileSync(POLES_JSON, 'utf8'));
+  const poleData = readDocument(POLES_OUTPUT, 'poles');
   const poles = poleData.poles;
   
   console.log(`Found ${poles.length} poles to import`);
@@ -150,7 +150,7 @@ async function importDrops(projectId) {
   console.log('\n=== IMPORTING DROPS ===');
   
   // Load drop data
-  const dropData = JSON.parse(fs.readFileSync(DROPS_JSON, 'utf8'));
+  const dropData = readDocument(DROPS_OUTPUT, 'drops');
   const drops = dropData.drops;
   
   console.log(`Found ${drops.length} drops to import`);
@@ -271,10 +271,10 @@ async function main() {
   
   try {
     // Check if data files exist
-    if (!fs.existsSync(POLES_JSON)) {
+    if (!findOutput(POLES_OUTPUT)) {
       throw new Error('Poles data not found. Run extract_lawley_poles.py first.');
     }
-    if (!fs.existsSync(DROPS_JSON)) {
+    if (!findOutput(DROPS_OUTPUT)) {
       throw new Error('Drops data not found. Run extract_lawley_drops.py first.');
     }
     
@@ -6,11 +6,11 @@
  * Date: 2025-01-16
  */
 
-const fs = require('fs');
 const path = require('path');
 const { initializeApp } = require('firebase-admin/app');
 const { getFirestore, Timestamp } = require('firebase-admin/firestore');
 const { credential } = require('firebase-admin');
+const { findOutput, readDocument } = require('./onemap_lib/records');
 
 // Initialize Firebase Admin
 const app = initializeApp({
@@ -20,9 +20,9 @@ const app = initializeApp({
 
 const db = getFirestore(app);
 
-// File paths
-const POLES_JSON = path.join(__dirname, 'output', 'poles-with-drops.json');
-const DROPS_JSON = path.join(__dirname, 'output', 'lawley-drops-extracted.json');
+// Extraction outputs (.ndjson.gz, .ndjson or .json, whichever was written)
+const POLES_OUTPUT = path.join(__dirname, 'output', 'poles-with-drops');
+const DROPS_OUTPUT = path.join(__dirname, 'output', 'lawley-drops-extracted');
 
 async function getExistingData(projectId) {
   console.log('Checking existing data...');
@@ -59,7 +59,7 @@ async function importRemainingPoles(projectId, existingPoles) {
   console.log('\n=== IMPORTING REMAINING POLES ===');
   
   // Load pole data
-  const poleData = JSON.parse(fs.readFileSync(POLES_JSON, 'utf8'));
+  const poleData = readDocument(POLES_OUTPUT, 'poles');
   const allPoles = poleData.poles;
   
   // Filter out existing poles
@@ -135,7 +135,7 @@ async function importRemainingDrops(projectId, existingDrops) {
   console.log('\n=== IMPORTING REMAINING DROPS ===');
   
   // Load drop data
-  const dropData = JSON.parse(fs.readFileSync(DROPS_JSON, 'utf8'));
+  const dropData = readDocument(DROPS_OUTPUT, 'drops');
   const allDrops = dropData.drops;
   
   // Filter out existing drops
@@ -213,7 +213,7 @@ async function main() {
   
   try {
     // Check if data files exist
-    if (!fs.existsSync(POLES_JSON) || !fs.existsSync(DROPS_JSON)) {
+    if (!findOutput(POLES_OUTPUT) || !findOutput(DROPS_OUTPUT)) {
       throw new Error('Data files not found. Run extraction scripts first.');
     }
     
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Address normalization and near-duplicate address clustering
+OneMap addresses for the same place are typed many ways ("12 Mousebird St",
+"12 MOUSEBIRD STREET, Lawley", "12 Mousebird Street LAWLEY ESTATE LENASIA
+1824 GT 79800121 JHB"), so keying on the exact Location Address string
+counts one place several times. normalize_address() reduces an address to
+house number, street name and street type: tokens are upper-cased,
+abbreviations expanded (ST -> STREET) and the suburb, postal code and
+municipal codes after the street dropped.
+
+AddressIndex clusters near-duplicate spellings without comparing all pairs:
+addresses are blocked on house number, street token prefix and any
+numbered street tokens (4TH, 2), candidate pairs come only from shared blocks, and each pair is scored by the bigram
+(Dice) similarity of the street names - so typos like MOUSBIRD still match.
+
+Usage:
+    from onemap_lib.addresses import AddressIndex, normalize_address
+
+    normalize_address('12 Mousebird St, Lawley')    # '12 MOUSEBIRD STREET'
+
+    index = AddressIndex(addresses)                 # raw strings, repeats are fine
+    index.canonical('12 Mousebird St')              # same key for every spelling of the place
+    index.clusters()                                # [[raw spellings of one place], ...]
+
+    multi_place, respelled = distinct_places(pole_locations)   # {pole: [address per place]}
+"""
+
+import re
+from collections import defaultdict, namedtuple
+
+ABBREVIATIONS = {
+    'ST': 'STREET', 'STR': 'STREET', 'STRT': 'STREET',
+    'RD': 'ROAD', 'AVE': 'AVENUE', 'AV': 'AVENUE',
+    'DR': 'DRIVE', 'DRV': 'DRIVE', 'CRES': 'CRESCENT', 'CRS': 'CRESCENT',
+    'CL': 'CLOSE', 'LN': 'LANE', 'PL': 'PLACE', 'CT': 'COURT', 'CRT': 'COURT',
+    'BLVD': 'BOULEVARD', 'HWY': 'HIGHWAY', 'EXT': 'EXTENSION',
+}
+
+STREET_TYPES = {
+    'STREET', 'ROAD', 'AVENUE', 'DRIVE', 'CRESCENT', 'CLOSE', 'LANE', 'PLACE', 'COURT',
+    'BOULEVARD', 'HIGHWAY', 'WAY', 'SQUARE',
+}
+
+# Suburb, city and province words that follow the street in exports; only
+# dropped after the street type or as a trailing suffix ("12 South Street"
+# keeps SOUTH)
+LOCALITY_TOKENS = {
+    'LAWLEY', 'ESTATE', 'EXTENSION', 'LENASIA', 'SOUTH', 'GT', 'GAUTENG', 'JHB', 'JOHANNESBURG',
+    'SA', 'RSA',
+}
+
+# Two spellings of one street name: bigram similarity at least this
+# (MOUSEBIRD/MOUSBIRD 0.84, NALEDI/NALEI 0.77; SHILOWA/SHILOH 0.67 do not match)
+SIMILARITY_THRESHOLD = 0.75
+
+# Street-name prefix used as blocking key; typos after it still block together
+BLOCK_PREFIX = 4
+
+# Blocks larger than this are skipped (a shared prefix of a huge complex);
+# their exact normalized matches are still clustered
+MAX_BLOCK_SIZE = 500
+
+ParsedAddress = namedtuple('ParsedAddress', ['number', 'street', 'street_type'])
+
+_TOKEN = re.compile(r'[A-Z0-9]+')
+
+
+def tokenize(address):
+    """Upper-cased alphanumeric tokens with abbreviations expanded"""
+    return [ABBREVIATIONS.get(token, token) for token in _TOKEN.findall(address.upper())]
+
+
+def _locality_suffix(tokens):
+    """Position where a trailing run of locality words and numeric codes starts (len(tokens) if none)"""
+    for position in range(1, len(tokens)):
+        if tokens[position] in LOCALITY_TOKENS and all(
+                t in LOCALITY_TOKENS or t.isdigit() for t in tokens[position:]):
+            return position
+    return len(tokens)
+
+
+def parse_address(address):
+    """
+    Split an address into (house number, street name tokens, street type)
+    Everything after the street type is locality and is dropped. Without a
+    street type only a trailing suffix of locality words and codes is
+    dropped ("Stand 1234 Lawley" keeps STAND 1234). An address with no street
+    tokens left keeps all its tokens and no house number, so it only matches
+    exactly.
+    """
+    all_tokens = tokenize(address)
+    tokens = list(all_tokens)
+    number = ''
+    if tokens and tokens[0][0].isdigit():
+        number = tokens.pop(0)
+
+    street_type = ''
+    for position, token in enumerate(tokens):
+        if token in STREET_TYPES and position > 0:
+            street_type = token
+            tokens = tokens[:position]
+            break
+    else:
+        tokens = tokens[:_locality_suffix(tokens)]
+
+    if not tokens:
+        return ParsedAddress('', tuple(all_tokens), '')
+    return ParsedAddress(number, tuple(tokens), street_type)
+
+
+def _text(parsed):
+    return ' '.join(filter(None, [parsed.number, ' '.join(parsed.street), parsed.street_type]))
+
+
+def normalize_address(address):
+    """Canonical text of an address: '12 MOUSEBIRD STREET'"""
+    return _text(parse_address(address))
+
+
+def bigrams(text):
+    padded = f' {text} '
+    return frozenset(padded[i:i + 2] for i in range(len(padded) - 1))
+
+
+def similarity(a, b):
+    """Dice coefficient of two bigram sets (1.0 = same bigrams)"""
+    if not a or not b:
+        return 0.0
+    return 2 * len(a & b) / (len(a) + len(b))
+
+
+class AddressIndex:
+    """Clusters of raw address strings that normalize to, or nearly to, the same place"""
+
+    def __init__(self, addresses, threshold=SIMILARITY_THRESHOLD, max_block_size=MAX_BLOCK_SIZE):
+        self.threshold = threshold
+        self._key = {}          # raw address -> normalized key id
+        keys = {}               # normalized text -> key id
+        parsed = []
+        for address in addresses:
+            if address in self._key:
+                continue
+            address_parsed = parse_address(address)
+            text = _text(address_parsed)
+            key = keys.get(text)
+            if key is None:
+                key = keys[text] = len(parsed)
+                parsed.append(address_parsed)
+            self._key[address] = key
+        self._texts = list(keys)
+        self._parent = list(range(len(parsed)))
+
+        blocks = defaultdict(list)
+        for key, address_parsed in enumerate(parsed):
+            # Addresses without a house number only match exactly
+            if not address_parsed.number:
+                continue
+            # Numbered tokens must agree exactly: "3RD AVENUE" and "4TH AVENUE"
+            # are one character apart but different streets
+            numbered = tuple(sorted(t for t in address_parsed.street if not t.isalpha()))
+            for prefix in {t[:BLOCK_PREFIX] for t in address_parsed.street if t.isalpha()}:
+                blocks[(address_parsed.number, numbered, prefix)].append(key)
+
+        names = [bigrams(' '.join(p.street)) for p in parsed]
+        compared = set()
+        self.stats = {
+            'addresses': len(self._key),
+            'normalized': len(parsed),
+            'blocks': len(blocks),
+            'oversized_blocks': 0,
+            'candidate_pairs': 0,
+            'matched_pairs': 0,
+        }
+        for members in blocks.values():
+            if len(members) > max_block_size:
+                self.stats['oversized_blocks'] += 1
+                continue
+            for i, a in enumerate(members):
+                for b in members[i + 1:]:
+                    pair = (a, b) if a < b else (b, a)
+                    if pair in compared:
+                        continue
+                    compared.add(pair)
+                    if self._matches(parsed[a], parsed[b], names[a], names[b]):
+                        self.stats['matched_pairs'] += 1
+                        self._union(a, b)
+        self.stats['candidate_pairs'] = len(compared)
+
+    def _matches(self, a, b, a_name, b_name):
+        # "Mousebird Street" and "Mousebird Crescent" are different places
+        if a.street_type and b.street_type and a.street_type != b.street_type:
+            return False
+        return similarity(a_name, b_name) >= self.threshold
+
+    def _find(self, key):
+        parent = self._parent
+        while parent[key] != key:
+            parent[key] = parent[parent[key]]
+            key = parent[key]
+        return key
+
+    def _union(self, a, b):
+        a, b = self._find(a), self._find(b)
+        if a != b:
+            # The lower key (first seen) stays the representative
+            if b < a:
+                a, b = b, a
+            self._parent[b] = a
+
+    def canonical(self, address):
+        """Normalized text of the cluster's representative; the same for every spelling of a place"""
+        key = self._key.get(address)
+        if key is None:
+            return normalize_address(address)
+        return self._texts[self._find(key)]
+
+    def clusters(self):
+        """Lists of raw spellings (in first-seen order) of places written more than one way"""
+        groups = defaultdict(list)
+        for address, key in self._key.items():
+            groups[self._find(key)].append(address)
+        return [spellings for spellings in groups.values() if len(spellings) > 1]
+
+
+def distinct_places(key_addresses):
+    """
+    {key: one address per distinct place} for keys (e.g. poles) at more than one place
+    key_addresses maps each key to the raw addresses it appears at; spellings
+    of one place count once. Also returns how many keys have several
+    addresses that are all spellings of one place.
+    """
+    index = AddressIndex(address for addresses in key_addresses.values() for address in addresses)
+    multi_place = {}
+    respelled = 0
+    for key, addresses in key_addresses.items():
+        if len(addresses) < 2:
+            continue
+        places = {}
+        for address in addresses:
+            places.setdefault(index.canonical(address), address)
+        if len(places) > 1:
+            multi_place[key] = list(places.values())
+        else:
+            respelled += 1
+    return multi_place, respelled
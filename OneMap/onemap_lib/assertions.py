@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Bounded assertion log for self-validating extractors
+Counts passed and failed checks per assertion type instead of keeping a
+message for every row. Each type keeps a fixed-size reservoir sample of the
+values that passed, as evidence, and failure messages go to a capped list
+with a count of those left out - so memory and report size do not grow
+with the input, while the totals (and the confidence score) stay exact.
+
+Usage:
+    from onemap_lib.assertions import AssertionLog
+
+    assertions = AssertionLog()
+    assertions.check('valid_coordinate', -90 <= lat <= 90, lat, f"Invalid coordinate: {lat}")
+    assertions.total_passed, assertions.total_failed
+    assertions.confidence_score()
+    assertions.summary()      # JSON-ready counts, samples and failures
+"""
+
+import random
+
+SAMPLE_SIZE = 5
+MAX_FAILURES = 100
+
+
+class AssertionLog:
+    """Per-type pass/fail counters with reservoir-sampled examples"""
+
+    def __init__(self, sample_size=SAMPLE_SIZE, max_failures=MAX_FAILURES, seed=0):
+        self.sample_size = sample_size
+        self.max_failures = max_failures
+        self.types = {}  # type -> {'passed', 'failed', 'examples'}
+        self.failures = []
+        self.failures_not_listed = 0
+        self.total_passed = 0
+        self.total_failed = 0
+        # Seeded so the evidence sampled from the same input is the same
+        self._random = random.Random(seed)
+
+    def _type(self, kind):
+        counts = self.types.get(kind)
+        if counts is None:
+            counts = self.types[kind] = {'passed': 0, 'failed': 0, 'examples': []}
+        return counts
+
+    def passed(self, kind, example=None):
+        counts = self._type(kind)
+        counts['passed'] += 1
+        self.total_passed += 1
+        # Reservoir sampling (Algorithm R): every passing value is equally
+        # likely to be among the examples, whatever the input size
+        examples = counts['examples']
+        if len(examples) < self.sample_size:
+            examples.append(example)
+        else:
+            slot = self._random.randrange(counts['passed'])
+            if slot < self.sample_size:
+                examples[slot] = example
+
+    def failed(self, kind, message):
+        self._type(kind)['failed'] += 1
+        self.total_failed += 1
+        if len(self.failures) < self.max_failures:
+            self.failures.append(message)
+        else:
+            self.failures_not_listed += 1
+
+    def check(self, kind, condition, example, message):
+        """Record one outcome of assertion `kind`; returns condition"""
+        if condition:
+            self.passed(kind, example)
+        else:
+            self.failed(kind, message)
+        return condition
+
+    def confidence_score(self):
+        """Percentage of assertions that passed (100 when none were made)"""
+        total = self.total_passed + self.total_failed
+        return self.total_passed / total * 100 if total else 100
+
+    def summary(self):
+        return {
+            'total_passed': self.total_passed,
+            'total_failed': self.total_failed,
+            'by_type': self.types,
+            'failed': self.failures,
+            'failed_not_listed': self.failures_not_listed
+        }
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Checkpoint journal for resumable imports
+Records which input records (by position in the record file) have been
+committed, as ranges appended to a local JSON-lines journal after every
+batch. A resumed import skips the committed ranges, so restarting after a
+failure only costs the remaining work. Batches commit out of order, so the
+journal holds ranges rather than a high-water mark.
+
+The first journal line identifies the input (path, size, modification time);
+a journal written for another input - or an older extraction - is not reused.
+
+Usage:
+    from onemap_lib.checkpoints import CheckpointJournal
+
+    journal = CheckpointJournal('output/import-checkpoints/planned-poles.jsonl', poles_file, resume=True)
+    with ConcurrentBatchWriter(db, on_commit=journal.record) as writer:
+        for position, pole in enumerate(RecordFile(poles_file)):
+            if journal.committed(position):
+                continue
+            writer.set(ref, data, tag=position)
+    journal.close()
+"""
+
+import bisect
+import json
+import os
+import threading
+from pathlib import Path
+
+
+def source_identity(path):
+    """What a journal is valid for: this version of the input file"""
+    stat = os.stat(path)
+    return {
+        'source': os.fspath(Path(path).resolve()),
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+    }
+
+
+def merge_ranges(ranges):
+    """Sorted, non-overlapping [start, end) ranges covering the same positions"""
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+def to_ranges(positions):
+    """Contiguous [start, end) ranges of a set of positions"""
+    ranges = []
+    for position in sorted(positions):
+        if ranges and position == ranges[-1][1]:
+            ranges[-1][1] += 1
+        else:
+            ranges.append([position, position + 1])
+    return ranges
+
+
+class CheckpointJournal:
+    """Append-only journal of committed record ranges for one import target"""
+
+    def __init__(self, path, source, resume=False):
+        self.path = Path(path)
+        self.identity = source_identity(source)
+        self.ranges = []
+        self.resumed = 0
+        self._lock = threading.Lock()
+
+        if resume and self.path.exists():
+            self.ranges, stale = self._read()
+            if stale:
+                print(f"⚠️  Checkpoint {self.path} is for another input - starting from the beginning")
+            self.resumed = sum(end - start for start, end in self.ranges)
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Rewrite the journal compacted (identity, then the merged ranges)
+        # and swap it in whole, so a crash here cannot lose the old one
+        partial = self.path.with_name(self.path.name + '.part')
+        with open(partial, 'w', encoding='utf-8') as f:
+            for entry in [self.identity] + self.ranges:
+                f.write(json.dumps(entry) + '\n')
+        os.replace(partial, self.path)
+        self._file = open(self.path, 'a', encoding='utf-8')
+        self._starts = [start for start, _ in self.ranges]
+
+    def _read(self):
+        ranges = []
+        with open(self.path, 'r', encoding='utf-8') as f:
+            lines = iter(f)
+            first = next(lines, None)
+            if first is None:
+                return [], False
+            try:
+                identity = json.loads(first)
+            except json.JSONDecodeError:
+                return [], True
+            if identity != self.identity:
+                return [], True
+            for line in lines:
+                try:
+                    start, end = json.loads(line)
+                except ValueError:
+                    break  # torn last line from a crash mid-write
+                ranges.append((start, end))
+        return merge_ranges(ranges), False
+
+    def _append(self, entry):
+        self._file.write(json.dumps(entry) + '\n')
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def committed(self, position):
+        """True if the record at position was committed by an earlier run"""
+        i = bisect.bisect_right(self._starts, position) - 1
+        return i >= 0 and position < self.ranges[i][1]
+
+    def record(self, positions):
+        """Journal a committed batch (ConcurrentBatchWriter on_commit callback)"""
+        with self._lock:
+            for start, end in to_ranges(positions):
+                self._append([start, end])
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
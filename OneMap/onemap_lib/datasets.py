@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Dataset registry for the antiHall validators
+Each input file (CSV export, report CSV or JSON output) is read once per
+run: the bytes are hashed while they are parsed, and the content hash and
+row count are kept as evidence for the validation reports. Validators ask
+the registry for a file instead of opening it, so several validators - or
+several checks in one validator - share one parse, and read typed column
+views instead of re-walking rows.
+
+Usage:
+    from onemap_lib.datasets import DatasetRegistry, run_parallel
+
+    registry = DatasetRegistry()
+    conflicts = registry.csv('reports/2025-07-10_payment_conflicts_detailed.csv')
+    poles = conflicts.column('Pole Number')
+    counts = conflicts.column('Number of Conflicts', int)   # None where not an int
+    registry.evidence()   # {path: {'sha256', 'bytes', 'rows', ...}}
+
+    # Independent validators, each writing its own reports
+    results = run_parallel(registry, {'payment': run_payment_validation, ...})
+"""
+
+import contextlib
+import csv
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import threading
+import traceback
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from onemap_lib.records import read_document
+
+CHUNK_SIZE = 1 << 20
+
+
+class _HashingReader(io.RawIOBase):
+    """Binary file wrapper that hashes every byte read through it"""
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.digest = hashlib.sha256()
+        self.size = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        count = self.raw.readinto(buffer)
+        if count:
+            self.digest.update(memoryview(buffer)[:count])
+            self.size += count
+        return count
+
+    def finish(self):
+        """Hash any bytes the parser did not consume"""
+        for block in iter(lambda: self.raw.read(CHUNK_SIZE), b''):
+            self.digest.update(block)
+            self.size += len(block)
+
+
+class Dataset:
+    """One input file: evidence (hash, size, rows) plus its parsed contents"""
+
+    def __init__(self, path, kind, sha256, size, header=None, columns=None, rows=0, data=None):
+        self.path = path
+        self.kind = kind
+        self.sha256 = sha256
+        self.size = size
+        self.header = header or []
+        self.rows = rows
+        self.data = data
+        self._columns = columns or {}
+        self._views = {}
+
+    def column(self, name, convert=None):
+        """
+        Values of one CSV column ('' where missing), cached per conversion
+        convert is applied to each value (e.g. int, float, str.strip);
+        values it rejects with ValueError become None.
+        """
+        key = (name, convert)
+        view = self._views.get(key)
+        if view is None:
+            values = self._columns.get(name) or [''] * self.rows
+            if convert is not None:
+                values = [_convert(convert, value) for value in values]
+            view = self._views[key] = values
+        return view
+
+    def has_column(self, name):
+        return name in self._columns
+
+    def records(self, names=None):
+        """Rows as dicts of the given columns (all columns by default)"""
+        names = list(names or self.header)
+        columns = [self.column(name) for name in names]
+        for values in zip(*columns):
+            yield dict(zip(names, values))
+
+    def evidence(self):
+        evidence = {'sha256': self.sha256, 'bytes': self.size}
+        if self.kind == 'csv':
+            evidence['rows'] = self.rows
+            evidence['columns'] = len(self.header)
+        return evidence
+
+
+def _convert(convert, value):
+    try:
+        return convert(value)
+    except ValueError:
+        return None
+
+
+def read_csv_dataset(path):
+    """Parse a CSV into columns while hashing it, in one read"""
+    with open(path, 'rb') as f:
+        hashing = _HashingReader(f)
+        text = io.TextIOWrapper(io.BufferedReader(hashing, CHUNK_SIZE), encoding='utf-8', newline='')
+        reader = csv.reader(text)
+        header = next(reader, [])
+        # Duplicate header names keep the last column, like csv.DictReader
+        positions = {name: i for i, name in enumerate(header)}
+        lists = [[] for _ in header]
+        rows = 0
+        for row in reader:
+            if not row:
+                continue
+            if len(row) < len(header):
+                row = row + [''] * (len(header) - len(row))
+            for values, value in zip(lists, row):
+                values.append(value)
+            rows += 1
+        hashing.finish()
+    columns = {name: lists[i] for name, i in positions.items()}
+    return Dataset(path, 'csv', hashing.digest.hexdigest(), hashing.size, header, columns, rows)
+
+
+def read_json_dataset(path):
+    with open(path, 'rb') as f:
+        content = f.read()
+    return Dataset(path, 'json', hashlib.sha256(content).hexdigest(), len(content),
+                   data=json.loads(content.decode('utf-8')))
+
+
+def read_records_dataset(path):
+    """Extraction record file (onemap_lib.records) as its single-document layout"""
+    if path.endswith('.json'):
+        return read_json_dataset(path)
+    with open(path, 'rb') as f:
+        hashing = _HashingReader(f)
+        data = read_document(io.BufferedReader(hashing, CHUNK_SIZE), path.endswith('.gz'))
+        hashing.finish()
+    return Dataset(path, 'json', hashing.digest.hexdigest(), hashing.size, data=data)
+
+
+READERS = {'csv': read_csv_dataset, 'json': read_json_dataset, 'records': read_records_dataset}
+
+
+class DatasetRegistry:
+    """Loads each input file once per run and serves it to every validator"""
+
+    def __init__(self):
+        self.datasets = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(path):
+        return os.path.abspath(os.fspath(path))
+
+    def load(self, path, kind=None):
+        """Dataset for path, read on first use (thread-safe)"""
+        key = self.key(path)
+        dataset = self.datasets.get(key)
+        if dataset is not None:
+            return dataset
+        if kind is None:
+            kind = 'json' if key.endswith('.json') else 'records' if '.ndjson' in key else 'csv'
+        with self._lock:
+            lock = self._locks.setdefault(key, threading.Lock())
+        with lock:
+            dataset = self.datasets.get(key)
+            if dataset is None:
+                dataset = self.datasets[key] = READERS[kind](key)
+        return dataset
+
+    def csv(self, path):
+        return self.load(path, 'csv')
+
+    def json(self, path):
+        return self.load(path, 'json').data
+
+    def records(self, path):
+        """Extraction output in any record format, as its single-document layout"""
+        return self.load(path, 'records').data
+
+    def preload(self, paths, workers=4):
+        """Read the existing files among paths concurrently; missing ones are skipped"""
+        paths = [p for p in dict.fromkeys(self.key(p) for p in paths) if os.path.exists(p)]
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(paths) or 1))) as pool:
+            list(pool.map(self.load, paths))
+
+    def evidence(self, paths=None):
+        """{path: hash, size and row count} for loaded files (optionally only these paths)"""
+        keys = self.datasets if paths is None else [self.key(p) for p in paths]
+        return {key: self.datasets[key].evidence() for key in keys if key in self.datasets}
+
+
+# Registry inherited by forked workers in run_parallel
+_WORKER_REGISTRY = None
+
+
+def _run_captured(job):
+    name, func = job
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        try:
+            func(_WORKER_REGISTRY)
+            error = None
+        except Exception:
+            error = traceback.format_exc()
+    return name, output.getvalue(), error
+
+
+def run_parallel(registry, jobs, workers=None):
+    """
+    Run independent jobs {name: func(registry)} in worker processes
+
+    Workers are forked after the registry is loaded, so every file is read
+    once in this process and shared with all workers. Each job's printed
+    output is captured and returned with any traceback, in job order:
+    [(name, output, error)]. Runs in-process where fork is unavailable.
+    """
+    global _WORKER_REGISTRY
+    workers = workers or os.cpu_count() or 1
+    _WORKER_REGISTRY = registry
+    jobs = list(jobs.items())
+    if workers == 1 or len(jobs) <= 1 or 'fork' not in multiprocessing.get_all_start_methods():
+        return [_run_captured(job) for job in jobs]
+    context = multiprocessing.get_context('fork')
+    with ProcessPoolExecutor(max_workers=min(workers, len(jobs)), mp_context=context) as pool:
+        return list(pool.map(_run_captured, jobs))
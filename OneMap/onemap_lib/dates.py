@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Date parsing for OneMap export columns
+Exports mix layouts ("2025/05/26 15:15:54.933", ISO, dd/mm/yyyy), so text
+comparison of date strings does not give time order. DateParser picks the
+dominant format of a column from a sample, tries it first, and caches the
+result for every distinct string - exports repeat the same dates thousands
+of times. to_epoch() converts a whole column to integer microseconds since
+1970 for sorting and windowing; fixed-width values are decoded with NumPy
+digit arithmetic and only the rest go through the cached parser.
+
+Usage:
+    from onemap_lib.dates import DateParser, to_epoch, MISSING
+
+    parser = DateParser(sample=dates)            # detect the column's format
+    parser.parse('26/05/2025')                   # datetime or None
+    sorted(dates, key=parser.sort_key)           # time order, unparseable last
+
+    epochs = to_epoch(dates)                     # int64 array, MISSING where blank
+    epochs.view('datetime64[us]')                # NaT where MISSING
+"""
+
+from datetime import datetime, timedelta
+
+import numpy as np
+
+# Known layouts; ties in detection go to the earlier format (dd/mm before mm/dd)
+DATE_FORMATS = [
+    '%Y/%m/%d %H:%M:%S.%f',
+    '%Y/%m/%d %H:%M:%S',
+    '%Y-%m-%dT%H:%M:%S.%f',
+    '%Y-%m-%dT%H:%M:%S',
+    '%Y-%m-%d %H:%M:%S.%f',
+    '%Y-%m-%d %H:%M:%S',
+    '%Y/%m/%d',
+    '%Y-%m-%d',
+    '%d/%m/%Y',
+    '%m/%d/%Y',
+]
+
+SAMPLE_SIZE = 1000
+
+# Epoch value of blank or unparseable dates (the integer behind NaT)
+MISSING = np.iinfo(np.int64).min
+
+EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+
+# Directives with a fixed number of digits, decodable by to_epoch
+FIXED_WIDTH = {'Y': 4, 'm': 2, 'd': 2, 'H': 2, 'M': 2, 'S': 2}
+
+
+class DateParser:
+    """Multi-format date parser with the column's dominant format first and a per-string cache"""
+
+    def __init__(self, formats=DATE_FORMATS, sample=None, sample_size=SAMPLE_SIZE):
+        self.formats = list(formats)
+        self._cache = {}
+        if sample is not None:
+            self.detect(sample, sample_size)
+
+    def detect(self, values, sample_size=SAMPLE_SIZE):
+        """
+        Move the format that parses the most of the first sample_size
+        non-blank values to the front, and return it (None if none parse)
+        """
+        sample = []
+        for value in values:
+            value = (value or '').strip()
+            if value:
+                sample.append(value)
+                if len(sample) == sample_size:
+                    break
+
+        counts = {fmt: 0 for fmt in self.formats}
+        for value in set(sample):
+            for fmt in self.formats:
+                try:
+                    datetime.strptime(value, fmt)
+                except ValueError:
+                    continue
+                counts[fmt] += 1
+
+        dominant = max(self.formats, key=lambda fmt: counts[fmt])
+        if not counts[dominant]:
+            return None
+        self.formats.remove(dominant)
+        self.formats.insert(0, dominant)
+        self._cache.clear()
+        return dominant
+
+    def parse(self, text):
+        """datetime for a date string (None if blank or in no known format)"""
+        try:
+            return self._cache[text]
+        except KeyError:
+            pass
+        parsed = None
+        value = (text or '').strip()
+        if value:
+            for fmt in self.formats:
+                try:
+                    parsed = datetime.strptime(value, fmt)
+                    break
+                except ValueError:
+                    continue
+        self._cache[text] = parsed
+        return parsed
+
+    def epoch(self, text):
+        """Microseconds since 1970 (None if the date does not parse)"""
+        parsed = self.parse(text)
+        return None if parsed is None else (parsed - EPOCH) // MICROSECOND
+
+    def sort_key(self, text):
+        """Key that orders dates in time, with unparseable text after them"""
+        parsed = self.parse(text)
+        return (0, parsed, '') if parsed is not None else (1, EPOCH, text or '')
+
+    def to_epoch(self, values):
+        """
+        int64 array of microseconds since 1970 for a column of date strings
+        Values in the dominant format are decoded in bulk; others fall back
+        to parse(). Blank or unparseable values are MISSING.
+        """
+        values = ['' if v is None else v for v in values]
+        epochs = np.full(len(values), MISSING, dtype=np.int64)
+        if not values:
+            return epochs
+
+        text = np.asarray(values, dtype=str)
+        decoded = _decode_fixed_width(text, self.formats[0])
+        if decoded is not None:
+            ok, fast = decoded
+            epochs[ok] = fast[ok]
+            remaining = np.flatnonzero(~ok & (np.char.str_len(text) > 0))
+        else:
+            remaining = range(len(values))
+
+        for i in remaining:
+            epoch = self.epoch(values[i])
+            if epoch is not None:
+                epochs[i] = epoch
+        return epochs
+
+
+def to_epoch(values, parser=None):
+    """Column of date strings to epoch microseconds, detecting the format from the column itself"""
+    values = list(values)
+    if parser is None:
+        parser = DateParser(sample=values)
+    return parser.to_epoch(values)
+
+
+def chronological_order(values, parser=None):
+    """
+    Indices that sort values in time, like sorted(range(n), key=sort_key)
+    Unparseable values follow the dated ones in text order; ties keep
+    their input order.
+    """
+    values = ['' if v is None else v for v in values]
+    epochs = to_epoch(values, parser)
+    missing = epochs == MISSING
+    _, text_rank = np.unique(np.where(missing, np.asarray(values, dtype=str), ''), return_inverse=True)
+    return np.lexsort((text_rank, np.where(missing, np.iinfo(np.int64).max, epochs), missing))
+
+
+def _layout(fmt):
+    """[(directive or literal, start, width)] for a fixed-width format, or None"""
+    fields = []
+    position = 0
+    i = 0
+    while i < len(fmt):
+        if fmt[i] == '%':
+            directive = fmt[i + 1:i + 2]
+            if directive == 'f' and i + 2 == len(fmt):
+                fields.append(('f', position, 6))  # 1-6 digits, only at the end
+                return fields
+            if directive not in FIXED_WIDTH:
+                return None
+            fields.append((directive, position, FIXED_WIDTH[directive]))
+            position += FIXED_WIDTH[directive]
+            i += 2
+        else:
+            fields.append((fmt[i], position, 1))
+            position += 1
+            i += 1
+    return fields
+
+
+def _decode_fixed_width(text, fmt):
+    """
+    (ok, epochs) for a unicode array in a fixed-width format, decoded as digit
+    arithmetic over the code points; None if fmt is not fixed-width
+    """
+    fields = _layout(fmt)
+    if fields is None:
+        return None
+
+    n = len(text)
+    width = text.dtype.itemsize // 4
+    last = fields[-1]
+    fraction = last[0] == 'f'
+    prefix = last[1] if fraction else last[1] + last[2]
+    if width < prefix:
+        return np.zeros(n, dtype=bool), np.zeros(n, dtype=np.int64)
+
+    # One row of UCS-4 code points per value (a view, no copy); columns
+    # are read one at a time to keep memory at a few arrays of n
+    points = text.view(np.uint32).reshape(n, width)
+    lengths = np.char.str_len(text)
+
+    def digit(column):
+        value = points[:, column].astype(np.int64) - ord('0')
+        return value, (value >= 0) & (value <= 9)
+
+    if fraction:
+        ok = (lengths > prefix) & (lengths <= prefix + 6)
+    else:
+        ok = lengths == prefix
+    parts = {'Y': 1970, 'm': 1, 'd': 1, 'H': 0, 'M': 0, 'S': 0}
+    micro = np.zeros(n, dtype=np.int64)
+    for name, start, size in fields:
+        if name == 'f':
+            # Fraction of a second: 1-6 digits after the prefix, read as
+            # six digits with the missing ones as trailing zeros
+            for column in range(start, start + size):
+                if column >= width:
+                    micro *= 10
+                    continue
+                present = column < lengths
+                value, is_digit = digit(column)
+                ok &= ~present | is_digit
+                micro = micro * 10 + np.where(present, value, 0)
+        elif name in FIXED_WIDTH:
+            value = np.zeros(n, dtype=np.int64)
+            for column in range(start, start + size):
+                digits, is_digit = digit(column)
+                ok &= is_digit
+                value = value * 10 + digits
+            parts[name] = value
+        else:
+            ok &= points[:, start] == ord(name)
+
+    year, month, day = (np.broadcast_to(parts[k], (n,)) for k in 'Ymd')
+    hour, minute, second = (np.broadcast_to(parts[k], (n,)) for k in 'HMS')
+    leap = ((year % 4 == 0) & (year % 100 != 0)) | (year % 400 == 0)
+    month_days = np.array([31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31])
+    valid_month = (month >= 1) & (month <= 12)
+    days_in_month = month_days[np.where(valid_month, month, 1) - 1] + (leap & (month == 2))
+    ok &= (year >= 1) & valid_month & (day >= 1) & (day <= days_in_month)
+    ok &= (hour <= 23) & (minute <= 59) & (second <= 59)
+
+    seconds = _days_from_civil(year, month, day) * 86400 + hour * 3600 + minute * 60 + second
+    return ok, seconds * 1_000_000 + micro
+
+
+def _days_from_civil(year, month, day):
+    """Days since 1970-01-01 for proleptic Gregorian dates (vectorized)"""
+    year = year - (month <= 2)
+    era = np.floor_divide(year, 400)
+    year_of_era = year - era * 400
+    day_of_year = (153 * (month + np.where(month > 2, -3, 9)) + 2) // 5 + day - 1
+    day_of_era = year_of_era * 365 + year_of_era // 4 - year_of_era // 100 + day_of_year
+    return era * 146097 + day_of_era - 719468
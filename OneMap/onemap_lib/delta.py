@@ -0,0 +1,450 @@
+#!/usr/bin/env python3
+"""
+Incremental daily-delta state for OneMap exports
+Each daily export is a full snapshot. The state store keeps the last seen
+row hash per Property ID in SQLite, so a new export is classified as
+new / changed / unchanged / removed by streaming hash comparison, and the
+persisted analysis results (pole locations, first permissions, payment
+conflicts) are recomputed only for the poles the delta touches.
+
+Usage:
+    from onemap_lib.delta import DeltaStore
+
+    with DeltaStore() as store:
+        result = store.apply_export('Lawley_Project_Louis.csv')
+"""
+
+import hashlib
+import itertools
+import json
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+
+from onemap_lib.dates import SAMPLE_SIZE, DateParser
+from onemap_lib.snapshot import file_hash, iter_rows
+
+DEFAULT_DB_PATH = Path(__file__).resolve().parent.parent / 'cache' / 'onemap_state.db'
+
+# Fields kept per property for the first-permission report
+PERMISSION_RECORD_FIELDS = {
+    'agent': 'Field Agent Name (pole permission)',
+    'latitude': 'Latitude',
+    'longitude': 'Longitude',
+    'address': 'Location Address',
+    'status': 'Status',
+    'contact': 'Contact Number (e.g.0123456789)',
+    'stand_number': 'Stand Number',
+}
+
+WRITE_BATCH_SIZE = 5000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS properties (
+    property_id     TEXT PRIMARY KEY,
+    row_hash        TEXT NOT NULL,
+    pole            TEXT NOT NULL DEFAULT '',
+    address         TEXT NOT NULL DEFAULT '',
+    agent           TEXT NOT NULL DEFAULT '',
+    is_approved     INTEGER NOT NULL DEFAULT 0,
+    is_permission   INTEGER NOT NULL DEFAULT 0,
+    permission_date TEXT NOT NULL DEFAULT '',
+    permission_epoch INTEGER,  -- microseconds since 1970, NULL if the date does not parse
+    record          TEXT NOT NULL DEFAULT '{}',
+    first_seen_run  INTEGER,
+    changed_run     INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_properties_pole ON properties(pole);
+
+CREATE TABLE IF NOT EXISTS pole_locations (
+    pole          TEXT PRIMARY KEY,
+    address_count INTEGER NOT NULL,
+    addresses     TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS first_permissions (
+    pole            TEXT PRIMARY KEY,
+    property_id     TEXT NOT NULL,
+    permission_date TEXT NOT NULL,
+    record          TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS pole_conflicts (
+    pole             TEXT PRIMARY KEY,
+    permission_count INTEGER NOT NULL,
+    agent_count      INTEGER NOT NULL,
+    agents           TEXT NOT NULL,
+    risk             TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS runs (
+    run_id        INTEGER PRIMARY KEY AUTOINCREMENT,
+    source_file   TEXT NOT NULL,
+    source_sha256 TEXT NOT NULL,
+    processed_at  TEXT NOT NULL,
+    new_count     INTEGER NOT NULL,
+    changed_count INTEGER NOT NULL,
+    unchanged_count INTEGER NOT NULL,
+    removed_count INTEGER NOT NULL
+);
+"""
+
+
+def row_hash(row):
+    """
+    Stable hash of a CSV row
+
+    Built from sorted non-empty (column, value) pairs, so a column added to
+    the export that is still blank does not mark every row as changed.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for name in sorted(row):
+        value = row[name]
+        if value:
+            digest.update(name.encode('utf-8'))
+            digest.update(b'\x1f')
+            digest.update(value.encode('utf-8'))
+            digest.update(b'\x1e')
+    return digest.hexdigest()
+
+
+def permission_date(row):
+    """Date of a row's pole permission (extract_first_permissions_complete.py fallback chain)"""
+    return (row.get('Last Modified Pole Permissions Date', '') or
+            row.get('Survey Date', '') or row.get('Date', '')).strip()
+
+
+def project_row(row, dates):
+    """Reduce a CSV row to the fields the persisted analyses use (dates: a DateParser)"""
+    # Same rules as the standalone scripts:
+    #   identify_true_duplicates.py - any status, pole and address present
+    #   extract_first_permissions_complete.py - 'Pole Permission' flow, date fallback chain
+    #   analyze_gps_duplicates.py - 'Pole Permission: Approved' status
+    record = {key: row.get(column, '').strip() for key, column in PERMISSION_RECORD_FIELDS.items()}
+    record['contact_name'] = (row.get('Contact Person: Name', '') + ' ' +
+                              row.get('Contact Person: Surname', '')).strip()
+
+    date = permission_date(row)
+
+    return {
+        'pole': row.get('Pole Number', '').strip(),
+        'address': row.get('Location Address', '').strip(),
+        'agent': record['agent'],
+        'is_approved': int('Pole Permission: Approved' in row.get('Status', '')),
+        'is_permission': int('Pole Permission' in row.get('Flow Name Groups', '')),
+        'permission_date': date,
+        'permission_epoch': dates.epoch(date),
+        'record': json.dumps(record, sort_keys=True),
+    }
+
+
+def conflict_risk(permission_count, agents):
+    """Risk level for a pole with several approved permissions (see analyze_gps_duplicates.py)"""
+    if len(set(agents)) > 1:
+        return 'HIGH'
+    if len(set(agents)) == 1 and permission_count > 2:
+        return 'MEDIUM'
+    if not agents:
+        return 'NO_AGENT'
+    return 'LOW'
+
+
+class DeltaResult:
+    """Outcome of applying one export to the state store"""
+
+    def __init__(self, source_file):
+        self.source_file = str(source_file)
+        self.run_id = None
+        self.skipped = False
+        self.counts = {'new': 0, 'changed': 0, 'unchanged': 0, 'removed': 0,
+                       'missing_property_id': 0, 'repeated_property_id': 0}
+        self.changes = []           # (property_id, change, pole)
+        self.affected_poles = set()
+        self.result_changes = {}
+
+    def summary(self):
+        return {
+            'source_file': self.source_file,
+            'run_id': self.run_id,
+            'skipped': self.skipped,
+            'counts': self.counts,
+            'affected_poles': len(self.affected_poles),
+            'result_changes': self.result_changes,
+        }
+
+
+class DeltaStore:
+    """SQLite-backed Property ID state and incrementally maintained results"""
+
+    def __init__(self, db_path=None):
+        self.db_path = Path(db_path) if db_path else DEFAULT_DB_PATH
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(self.db_path)
+        self.conn.executescript(SCHEMA)
+        self._migrate()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.conn.close()
+
+    def _migrate(self):
+        """Add permission_epoch to stores created before it and re-pick their first permissions"""
+        columns = {name for _, name, *_ in self.conn.execute("PRAGMA table_info(properties)")}
+        if 'permission_epoch' in columns:
+            return
+        with self.conn:
+            self.conn.execute("ALTER TABLE properties ADD COLUMN permission_epoch INTEGER")
+            stored = self.conn.execute("SELECT property_id, permission_date FROM properties").fetchall()
+            dates = DateParser(sample=(date for _, date in stored))
+            self.conn.executemany(
+                "UPDATE properties SET permission_epoch = ? WHERE property_id = ?",
+                [(dates.epoch(date), property_id) for property_id, date in stored]
+            )
+            poles = {pole for (pole,) in self.conn.execute("SELECT pole FROM first_permissions")}
+            poles.update(pole for (pole,) in self.conn.execute("SELECT DISTINCT pole FROM properties"))
+            poles.discard('')
+            self._refresh_results(poles)
+
+    def last_run(self):
+        cursor = self.conn.execute(
+            "SELECT run_id, source_file, source_sha256, processed_at FROM runs ORDER BY run_id DESC LIMIT 1"
+        )
+        return cursor.fetchone()
+
+    def apply_export(self, csv_path, force=False, dry_run=False):
+        """
+        Classify an export against the stored state and update the results
+
+        The whole update runs in one transaction: an interrupted run leaves
+        the previous state intact. With dry_run the changes are rolled back.
+        """
+        result = DeltaResult(csv_path)
+        source_sha256 = file_hash(csv_path)
+
+        last = self.last_run()
+        if last and last[2] == source_sha256 and not force:
+            print(f"✓ {csv_path} already processed in run {last[0]} ({last[3]})")
+            result.skipped = True
+            result.run_id = last[0]
+            return result
+
+        known = dict(self.conn.execute("SELECT property_id, row_hash FROM properties"))
+        old_poles = {}
+        seen = set()
+        pending = {}
+
+        print(f"Comparing {csv_path} with {len(known)} stored properties...")
+        with self.conn:
+            run_id = self.conn.execute(
+                "INSERT INTO runs (source_file, source_sha256, processed_at, new_count, changed_count, "
+                "unchanged_count, removed_count) VALUES (?, ?, ?, 0, 0, 0, 0)",
+                (str(csv_path), source_sha256, datetime.now().isoformat())
+            ).lastrowid
+            result.run_id = run_id
+
+            # Permission dates are parsed in the export's dominant format
+            rows = iter_rows(csv_path)
+            head = list(itertools.islice(rows, SAMPLE_SIZE))
+            dates = DateParser(sample=(permission_date(row) for row in head))
+
+            for row in itertools.chain(head, rows):
+                property_id = row.get('Property ID', '').strip()
+                if not property_id:
+                    result.counts['missing_property_id'] += 1
+                    continue
+                if property_id in seen:
+                    # Keep the first row for a property, count the repeats
+                    result.counts['repeated_property_id'] += 1
+                    continue
+                seen.add(property_id)
+
+                digest = row_hash(row)
+                if known.get(property_id) == digest:
+                    result.counts['unchanged'] += 1
+                    continue
+
+                pending[property_id] = (digest, project_row(row, dates))
+                if len(pending) >= WRITE_BATCH_SIZE:
+                    self._write_batch(pending, known, old_poles, result, run_id)
+                    pending = {}
+
+            self._write_batch(pending, known, old_poles, result, run_id)
+
+            removed = [pid for pid in known if pid not in seen]
+            self._remove(removed, result)
+
+            result.affected_poles.discard('')
+            result.result_changes = self._refresh_results(result.affected_poles)
+
+            self.conn.execute(
+                "UPDATE runs SET new_count = ?, changed_count = ?, unchanged_count = ?, removed_count = ? "
+                "WHERE run_id = ?",
+                (result.counts['new'], result.counts['changed'], result.counts['unchanged'],
+                 result.counts['removed'], run_id)
+            )
+
+            if dry_run:
+                self.conn.rollback()
+
+        return result
+
+    def _write_batch(self, pending, known, old_poles, result, run_id):
+        """Upsert new and changed properties, remembering the poles they touch"""
+        if not pending:
+            return
+
+        ids = list(pending)
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            placeholders = ','.join('?' * len(chunk))
+            for property_id, pole in self.conn.execute(
+                f"SELECT property_id, pole FROM properties WHERE property_id IN ({placeholders})", chunk
+            ):
+                old_poles[property_id] = pole
+
+        rows = []
+        for property_id, (digest, fields) in pending.items():
+            change = 'changed' if property_id in known else 'new'
+            result.counts[change] += 1
+            result.changes.append((property_id, change, fields['pole']))
+
+            result.affected_poles.add(fields['pole'])
+            result.affected_poles.add(old_poles.get(property_id, ''))
+            rows.append((
+                property_id, digest, fields['pole'], fields['address'], fields['agent'],
+                fields['is_approved'], fields['is_permission'], fields['permission_date'],
+                fields['permission_epoch'], fields['record'], run_id, run_id
+            ))
+
+        self.conn.executemany(
+            "INSERT INTO properties (property_id, row_hash, pole, address, agent, is_approved, "
+            "is_permission, permission_date, permission_epoch, record, first_seen_run, changed_run) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(property_id) DO UPDATE SET row_hash = excluded.row_hash, pole = excluded.pole, "
+            "address = excluded.address, agent = excluded.agent, is_approved = excluded.is_approved, "
+            "is_permission = excluded.is_permission, permission_date = excluded.permission_date, "
+            "permission_epoch = excluded.permission_epoch, record = excluded.record, changed_run = excluded.changed_run",
+            rows
+        )
+
+    def _remove(self, property_ids, result):
+        """Drop properties that are no longer in the export"""
+        for start in range(0, len(property_ids), 500):
+            chunk = property_ids[start:start + 500]
+            placeholders = ','.join('?' * len(chunk))
+            for property_id, pole in self.conn.execute(
+                f"SELECT property_id, pole FROM properties WHERE property_id IN ({placeholders})", chunk
+            ):
+                result.affected_poles.add(pole)
+                result.changes.append((property_id, 'removed', pole))
+            self.conn.execute(f"DELETE FROM properties WHERE property_id IN ({placeholders})", chunk)
+        result.counts['removed'] = len(property_ids)
+
+    def _refresh_results(self, poles):
+        """Recompute pole locations, first permissions and conflicts for the given poles"""
+        changes = {
+            'new_multi_address_poles': [],
+            'resolved_multi_address_poles': [],
+            'new_high_risk_poles': [],
+            'resolved_high_risk_poles': [],
+            'first_permission_changes': [],
+        }
+
+        for pole in sorted(poles):
+            # Pole locations (multi-address = true duplicate)
+            before = self.conn.execute(
+                "SELECT address_count FROM pole_locations WHERE pole = ?", (pole,)
+            ).fetchone()
+            addresses = [a for (a,) in self.conn.execute(
+                "SELECT DISTINCT address FROM properties WHERE pole = ? AND address != '' ORDER BY address",
+                (pole,)
+            )]
+            if addresses:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO pole_locations (pole, address_count, addresses) VALUES (?, ?, ?)",
+                    (pole, len(addresses), json.dumps(addresses))
+                )
+            else:
+                self.conn.execute("DELETE FROM pole_locations WHERE pole = ?", (pole,))
+            was_multi = bool(before and before[0] > 1)
+            if len(addresses) > 1 and not was_multi:
+                changes['new_multi_address_poles'].append(pole)
+            elif was_multi and len(addresses) <= 1:
+                changes['resolved_multi_address_poles'].append(pole)
+
+            # First (oldest) pole permission; dates that do not parse sort after the rest
+            before = self.conn.execute(
+                "SELECT property_id, permission_date FROM first_permissions WHERE pole = ?", (pole,)
+            ).fetchone()
+            first = self.conn.execute(
+                "SELECT property_id, permission_date, record FROM properties "
+                "WHERE pole = ? AND is_permission = 1 AND permission_date != '' "
+                "ORDER BY permission_epoch IS NULL, permission_epoch, permission_date, property_id LIMIT 1",
+                (pole,)
+            ).fetchone()
+            if first:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO first_permissions (pole, property_id, permission_date, record) "
+                    "VALUES (?, ?, ?, ?)", (pole, *first)
+                )
+            else:
+                self.conn.execute("DELETE FROM first_permissions WHERE pole = ?", (pole,))
+            if before != (first[:2] if first else None):
+                changes['first_permission_changes'].append({
+                    'pole': pole,
+                    'before': before[0] if before else None,
+                    'after': first[0] if first else None,
+                })
+
+            # Payment conflicts (several approved permissions on one pole)
+            before = self.conn.execute(
+                "SELECT risk FROM pole_conflicts WHERE pole = ?", (pole,)
+            ).fetchone()
+            agents = [a for (a,) in self.conn.execute(
+                "SELECT agent FROM properties WHERE pole = ? AND is_approved = 1", (pole,)
+            )]
+            named = [a for a in agents if a]
+            risk = None
+            if len(agents) > 1:
+                risk = conflict_risk(len(agents), named)
+                unique_agents = sorted(set(named))
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO pole_conflicts (pole, permission_count, agent_count, agents, risk) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (pole, len(agents), len(unique_agents), json.dumps(unique_agents), risk)
+                )
+            else:
+                self.conn.execute("DELETE FROM pole_conflicts WHERE pole = ?", (pole,))
+            was_high = bool(before and before[0] == 'HIGH')
+            if risk == 'HIGH' and not was_high:
+                changes['new_high_risk_poles'].append(pole)
+            elif was_high and risk != 'HIGH':
+                changes['resolved_high_risk_poles'].append(pole)
+
+        return changes
+
+    def multi_address_poles(self):
+        cursor = self.conn.execute(
+            "SELECT pole, address_count, addresses FROM pole_locations "
+            "WHERE address_count > 1 ORDER BY address_count DESC, pole"
+        )
+        return [(pole, count, json.loads(addresses)) for pole, count, addresses in cursor]
+
+    def first_permissions(self):
+        cursor = self.conn.execute(
+            "SELECT pole, property_id, permission_date, record FROM first_permissions ORDER BY pole"
+        )
+        return [(pole, pid, date, json.loads(record)) for pole, pid, date, record in cursor]
+
+    def pole_conflicts(self):
+        cursor = self.conn.execute(
+            "SELECT pole, permission_count, agent_count, agents, risk FROM pole_conflicts "
+            "ORDER BY risk = 'HIGH' DESC, agent_count DESC, permission_count DESC, pole"
+        )
+        return [(pole, count, agent_count, json.loads(agents), risk)
+                for pole, count, agent_count, agents, risk in cursor]
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+DuckDB execution backend for the OneMap analyzers
+Loads the columns an analysis needs from an export into a DuckDB table, so
+grouping, first-permission windows and GPS proximity joins run as SQL.
+Query results are handed to the analyzers' existing report writers, so the
+Python and DuckDB backends write the same report files.
+
+Usage:
+    from onemap_lib.duckdb_backend import OneMapTable
+
+    with OneMapTable('Lawley_Project_Louis.csv', ['Pole Number', 'Status']) as table:
+        rows = table.dict_rows('SELECT * FROM onemap WHERE contains("Status", ?)', ['Approved'])
+
+The table is named `onemap`; its rowid is the row's position in the export.
+Columns hold the export text with '' for missing values, like csv.DictReader.
+"""
+
+try:
+    import duckdb
+    HAS_DUCKDB = True
+except ImportError:
+    HAS_DUCKDB = False
+
+from onemap_lib.snapshot import HAS_PYARROW, build_snapshot, _to_text
+
+BACKENDS = ('python', 'duckdb')
+
+TABLE_NAME = 'onemap'
+
+# Characters removed by str.strip(), so SQL trimming matches the Python backend
+PY_WHITESPACE = ''.join(chr(c) for c in range(0x110000) if chr(c).isspace())
+
+
+def quote(name):
+    """Quote a column name for SQL"""
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _literal(value):
+    return "'" + value.replace("'", "''") + "'"
+
+
+def backend_from_args(args):
+    """Remove '--backend NAME' from args and return NAME (default 'python')"""
+    if '--backend' not in args:
+        return 'python'
+    position = args.index('--backend')
+    backend = args[position + 1] if position + 1 < len(args) else ''
+    del args[position:position + 2]
+    if backend not in BACKENDS:
+        raise SystemExit(f"Unknown backend '{backend}' (choose from: {', '.join(BACKENDS)})")
+    return backend
+
+
+class OneMapTable:
+    """An export loaded into an in-memory DuckDB table named `onemap`"""
+
+    def __init__(self, csv_path, columns, database=':memory:'):
+        if not HAS_DUCKDB:
+            raise RuntimeError("duckdb is required for --backend duckdb: pip install duckdb")
+
+        self.con = duckdb.connect(database)
+        self.con.execute(f"CREATE MACRO py_strip(s) AS trim(s, {_literal(PY_WHITESPACE)})")
+        self.con.execute("""
+            CREATE MACRO haversine_m(lat1, lon1, lat2, lon2) AS
+            2 * 6371000 * asin(sqrt(least(greatest(
+                pow(sin((radians(lat2) - radians(lat1)) / 2), 2)
+                + cos(radians(lat1)) * cos(radians(lat2)) * pow(sin(radians(lon2 - lon1) / 2), 2),
+            0.0), 1.0)))
+        """)
+
+        # The snapshot is the same parse the Python backend reads
+        if HAS_PYARROW:
+            source = f"read_parquet({_literal(str(build_snapshot(csv_path)))})"
+        else:
+            source = f"read_csv({_literal(str(csv_path))}, header = true, all_varchar = true)"
+
+        available = {row[0] for row in self.con.execute(f"SELECT column_name FROM (DESCRIBE SELECT * FROM {source})").fetchall()}
+        select = []
+        for name in columns:
+            if name not in available:
+                select.append(f"'' AS {quote(name)}")
+            else:
+                select.append(f"coalesce(CAST({quote(name)} AS VARCHAR), '') AS {quote(name)}")
+
+        # CREATE TABLE AS keeps the source order, so rowid is the export row
+        self.con.execute(f"CREATE TABLE {TABLE_NAME} AS SELECT {', '.join(select)} FROM {source}")
+
+    def has_value(self, column):
+        """SQL that is true when column is non-blank (row[column].strip() in Python)"""
+        return f"(py_strip({quote(column)}) <> '')"
+
+    def number(self, column):
+        """SQL for column as DOUBLE (NULL when blank or unparseable)"""
+        return f"TRY_CAST(py_strip({quote(column)}) AS DOUBLE)"
+
+    def execute(self, sql, params=None):
+        return self.con.execute(sql, params or [])
+
+    def dict_rows(self, sql, params=None):
+        """Query results as {column: str} dicts, formatted like snapshot.iter_rows"""
+        cursor = self.con.execute(sql, params or [])
+        names = [d[0] for d in cursor.description]
+        return [
+            {name: _to_text(value) for name, value in zip(names, row)}
+            for row in cursor.fetchall()
+        ]
+
+    def close(self):
+        self.con.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
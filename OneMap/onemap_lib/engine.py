@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Single-pass analysis engine for OneMap CSV exports
+Reads each row once and dispatches it to every registered analyzer visitor.
+Indexes that several analyzers need (pole -> addresses, property -> rows,
+agent -> permissions, same-timestamp buckets) are built once and shared.
+"""
+
+import time
+from collections import defaultdict
+
+from onemap_lib.snapshot import iter_rows
+
+# Columns the shared indexes read
+SHARED_COLUMNS = [
+    'Property ID',
+    'Pole Number',
+    'Location Address',
+    'Status',
+    'Survey Date',
+    'Field Agent Name (pole permission)',
+]
+
+
+class SharedIndexes:
+    """Derived structures built once per pass and handed to every visitor"""
+
+    def __init__(self):
+        self.row_count = 0
+        self.pole_addresses = defaultdict(set)      # pole -> non-empty addresses
+        self.property_rows = defaultdict(int)       # property ID -> row count
+        self.agent_permissions = defaultdict(int)   # agent -> approved pole permissions
+        self.timestamp_buckets = defaultdict(int)   # exact Survey Date -> row count
+
+    def add(self, row):
+        self.row_count += 1
+
+        pole = row.get('Pole Number', '').strip()
+        address = row.get('Location Address', '').strip()
+        property_id = row.get('Property ID', '').strip()
+        survey_date = row.get('Survey Date', '').strip()
+
+        if pole and address:
+            self.pole_addresses[pole].add(address)
+        if property_id:
+            self.property_rows[property_id] += 1
+        if survey_date:
+            self.timestamp_buckets[survey_date] += 1
+
+        if 'Pole Permission: Approved' in row.get('Status', ''):
+            agent = row.get('Field Agent Name (pole permission)', '').strip()
+            if agent:
+                self.agent_permissions[agent] += 1
+
+
+class AnalyzerVisitor:
+    """
+    Base class for analyzers driven by SinglePassEngine
+
+    visit() sees each row once, with the shared indexes covering the rows
+    seen so far; finish() runs after the last row, when they are complete.
+    """
+
+    name = 'analyzer'
+    columns = []
+
+    def visit(self, row, shared):
+        raise NotImplementedError
+
+    def finish(self, shared):
+        raise NotImplementedError
+
+
+class SinglePassEngine:
+    """Streams a OneMap export once through all registered visitors"""
+
+    def __init__(self, csv_path):
+        self.csv_path = csv_path
+        self.visitors = []
+        self.shared = SharedIndexes()
+        self.timings = {}
+
+    def register(self, visitor):
+        self.visitors.append(visitor)
+        return visitor
+
+    def columns(self):
+        """Union of the columns needed by the shared indexes and all visitors"""
+        needed = list(SHARED_COLUMNS)
+        for visitor in self.visitors:
+            needed.extend(c for c in visitor.columns if c not in needed)
+        return needed
+
+    def run(self):
+        """Read the export once, then let each visitor write its reports"""
+        print(f"Single pass over {self.csv_path} with {len(self.visitors)} analyzers...")
+
+        start = time.perf_counter()
+        visit_time = defaultdict(float)
+        for row in iter_rows(self.csv_path, self.columns()):
+            self.shared.add(row)
+            for visitor in self.visitors:
+                t0 = time.perf_counter()
+                visitor.visit(row, self.shared)
+                visit_time[visitor.name] += time.perf_counter() - t0
+        self.timings['read'] = time.perf_counter() - start - sum(visit_time.values())
+        print(f"✓ Read {self.shared.row_count} rows")
+
+        for visitor in self.visitors:
+            print(f"\n>>> {visitor.name}")
+            t0 = time.perf_counter()
+            visitor.finish(self.shared)
+            self.timings[visitor.name] = visit_time[visitor.name] + time.perf_counter() - t0
+
+        self.timings['total'] = time.perf_counter() - start
+        return self.timings
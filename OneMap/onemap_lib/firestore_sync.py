@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Content-hash diff sync to Firestore
+Writes only the documents that changed since the last sync. Each document
+gets a stable content hash (SHA-256 of its canonical JSON, without the
+server timestamps), kept in a local manifest of {document ID: hash} per
+project and collection and in the document itself (contentHash). A sync
+compares the extracted records against the manifest and emits:
+  - creates  documents not in the manifest
+  - updates  documents whose hash changed (merged, so createdAt survives)
+  - deletes  manifest documents missing from the records
+Unchanged documents cost nothing, so a daily re-import costs in proportion
+to the real changes. A document ID given more than once is synced with its
+last record, as a plain import would leave it, and reported as repeated.
+A dry run writes the same diff report without writing.
+
+The collections are shared with the pole tracker app and other projects,
+so a sync only ever deletes documents it wrote itself: the manifest lists
+those as owned, and deletes of anything else are skipped and reported.
+
+The manifest is updated as batches commit and saved even if a sync fails,
+so a failed sync re-run picks up where it stopped. If Firestore was changed
+outside the sync, rebuild the manifest from the stored hashes
+(SyncManifest.refresh, one bulk read of the contentHash field of this
+project's documents).
+
+Usage:
+    from onemap_lib.firestore_sync import SyncManifest, sync_collection
+
+    manifest = SyncManifest('output/sync-manifests/fibreflow-73daf-<projectId>-planned-poles.json', project_id)
+    report = sync_collection(db, 'planned-poles', ((document_id(p['poleId']), pole_document(p)) for p in poles),
+                             manifest, dry_run=True)
+    report['counts']    # {'create': ..., 'update': ..., 'delete': ..., 'unchanged': ..., 'repeated': ...}
+"""
+
+import hashlib
+import json
+import os
+from contextlib import nullcontext
+from datetime import datetime
+from pathlib import Path
+
+from onemap_lib.firestore_writer import ConcurrentBatchWriter
+
+HASH_FIELD = 'contentHash'
+# Document IDs listed per action in the diff report; the counts are exact
+MAX_REPORT_IDS = 1000
+
+
+def content_hash(data):
+    """Stable hash of a document's content: key order and formatting do not matter"""
+    canonical = json.dumps(data, sort_keys=True, ensure_ascii=False, separators=(',', ':'), default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class SyncManifest:
+    """Local {document ID: content hash} of what one project's sync wrote to a collection"""
+
+    def __init__(self, path, project_id):
+        self.path = Path(path)
+        self.project_id = project_id
+        self.hashes = {}
+        self.owned = set()  # documents this project's syncs wrote; only these may be deleted
+        if self.path.exists():
+            with open(self.path, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+            if saved.get('projectId') != project_id:
+                raise ValueError(f"{self.path} is the manifest of project {saved.get('projectId')!r}, "
+                                 f"not {project_id!r}")
+            self.hashes = saved['documents']
+            self.owned = set(saved['owned'])
+
+    def refresh(self, collection_ref):
+        """
+        Replace the manifest with the hashes stored in Firestore (one bulk read)
+        Only this project's documents that carry a contentHash - written by
+        a sync - are read; documents of other projects or written by the app
+        are never adopted, so never deleted.
+        """
+        self.hashes = {}
+        query = collection_ref.where('projectId', '==', self.project_id).select([HASH_FIELD])
+        for doc in query.stream():
+            digest = (doc.to_dict() or {}).get(HASH_FIELD)
+            if digest:
+                self.hashes[doc.id] = digest
+        self.owned = set(self.hashes)
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        partial = self.path.with_name(self.path.name + '.part')
+        with open(partial, 'w', encoding='utf-8') as f:
+            json.dump({'savedAt': datetime.now().isoformat(), 'projectId': self.project_id,
+                       'documents': self.hashes, 'owned': sorted(self.owned)}, f)
+        os.replace(partial, self.path)
+
+
+def _report(collection, dry_run):
+    return {
+        'collection': collection,
+        'syncDate': datetime.now().isoformat(),
+        'dryRun': dry_run,
+        'counts': {'create': 0, 'update': 0, 'delete': 0, 'unchanged': 0, 'repeated': 0, 'not_owned': 0},
+        'documents': {'create': [], 'update': [], 'delete': [], 'repeated': [], 'not_owned': []},
+    }
+
+
+def _note(report, action, doc_id):
+    report['counts'][action] += 1
+    if action != 'unchanged' and len(report['documents'][action]) < MAX_REPORT_IDS:
+        report['documents'][action].append(doc_id)
+
+
+def sync_collection(db, collection, documents, manifest, dry_run=False, delete=True,
+                    created_fields=None, updated_fields=None, **writer_options):
+    """
+    Diff (document ID, data) pairs against the manifest and write only the changes
+    created_fields / updated_fields (e.g. SERVER_TIMESTAMPs) are added to
+    created / updated documents without being part of the hash. Returns the
+    diff report; writer_options go to ConcurrentBatchWriter.
+    """
+    report = _report(collection, dry_run)
+    collection_ref = db.collection(collection) if db is not None else None
+    # A copy: committed batches update the manifest while the diff runs
+    previous = dict(manifest.hashes)
+
+    # One write per document: the last record for an ID wins
+    latest = {}
+    for doc_id, data in documents:
+        if doc_id in latest:
+            _note(report, 'repeated', doc_id)
+        latest[doc_id] = data
+
+    def committed(tags):
+        for doc_id, digest in tags:
+            if digest is None:
+                manifest.hashes.pop(doc_id, None)
+                manifest.owned.discard(doc_id)
+            else:
+                manifest.hashes[doc_id] = digest
+                manifest.owned.add(doc_id)
+
+    writer = None if dry_run else ConcurrentBatchWriter(db, on_commit=committed, **writer_options)
+    try:
+        with writer or nullcontext():
+            for doc_id, data in latest.items():
+                digest = content_hash(data)
+                if previous.get(doc_id) == digest:
+                    _note(report, 'unchanged', doc_id)
+                    continue
+                action = 'update' if doc_id in previous else 'create'
+                _note(report, action, doc_id)
+                if writer is not None:
+                    extra = created_fields if action == 'create' else updated_fields
+                    writer.set(collection_ref.document(doc_id), {**data, **(extra or {}), HASH_FIELD: digest},
+                               tag=(doc_id, digest), merge=action == 'update')
+
+            if delete:
+                owned = set(manifest.owned)
+                for doc_id in sorted(set(previous) - set(latest)):
+                    if doc_id not in owned:
+                        # Not written by this project's sync: leave it alone
+                        _note(report, 'not_owned', doc_id)
+                        continue
+                    _note(report, 'delete', doc_id)
+                    if writer is not None:
+                        writer.delete(collection_ref.document(doc_id), tag=(doc_id, None))
+    finally:
+        # Whatever committed is in the manifest, even if the sync failed
+        if writer is not None:
+            manifest.save()
+
+    if writer is not None:
+        report['writer'] = writer.stats()
+    return report
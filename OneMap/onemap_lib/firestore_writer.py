@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Concurrent batch writer for Firestore imports
+Commits several write batches at once, up to an in-flight limit: once the
+limit is reached, set() blocks until a batch finishes, so a fast producer
+cannot queue up the whole import in memory. Transient errors (aborted,
+unavailable, deadline exceeded, resource exhausted) are retried with
+jittered exponential backoff. The batch size adapts to commit latency -
+growing while commits are fast, shrinking when they slow down or fail - and
+throughput is reported in documents per second.
+
+Set FIRESTORE_EMULATOR_HOST (e.g. localhost:8080) to write to the local
+Firestore emulator instead of a live project - no credentials are needed.
+
+Usage:
+    from onemap_lib.firestore_writer import ConcurrentBatchWriter, connect
+
+    db = connect('fibreflow-73daf', 'path/to/serviceAccountKey.json')
+    with ConcurrentBatchWriter(db, max_in_flight=8) as writer:
+        for pole in poles:
+            ref = db.collection('planned-poles').document(document_id(pole['poleId']))
+            writer.set(ref, pole)
+    print(writer.stats())    # documents, batches, retries, docs_per_second, ...
+
+Document IDs from document_id() are derived from the natural key, so
+writing a record again overwrites it instead of adding a duplicate.
+
+Requires google-cloud-firestore (installed with firebase-admin).
+"""
+
+import hashlib
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from google.cloud import firestore
+    HAS_FIRESTORE = True
+except ImportError:
+    HAS_FIRESTORE = False
+
+EMULATOR_ENV = 'FIRESTORE_EMULATOR_HOST'
+
+# Firestore accepts at most 500 writes per batch
+MAX_BATCH_SIZE = 500
+MIN_BATCH_SIZE = 20
+
+# Error types worth retrying (google.api_core.exceptions names, matched
+# through the class hierarchy so the module imports without the library)
+TRANSIENT_ERRORS = {
+    'Aborted', 'DeadlineExceeded', 'ServiceUnavailable', 'ResourceExhausted',
+    'InternalServerError', 'TooManyRequests', 'GatewayTimeout',
+    'ConnectionError', 'TimeoutError',
+}
+
+
+def connect(project_id, credentials_path=None):
+    """Firestore client for project_id; the emulator when FIRESTORE_EMULATOR_HOST is set"""
+    if not HAS_FIRESTORE:
+        raise RuntimeError('google-cloud-firestore is required: pip install firebase-admin')
+    if os.environ.get(EMULATOR_ENV):
+        from google.auth.credentials import AnonymousCredentials
+        return firestore.Client(project=project_id, credentials=AnonymousCredentials())
+
+    import firebase_admin
+    from firebase_admin import credentials, firestore as admin_firestore
+    try:
+        firebase_admin.get_app()
+    except ValueError:
+        firebase_admin.initialize_app(credentials.Certificate(credentials_path), {'projectId': project_id})
+    return admin_firestore.client()
+
+
+def document_id(key):
+    """Firestore document ID for a natural key (poleId, dropId), the same on every import"""
+    doc_id = str(key).strip()
+    # Keys Firestore cannot use as IDs are replaced by their hash
+    if (not doc_id or '/' in doc_id or doc_id in ('.', '..')
+            or (doc_id.startswith('__') and doc_id.endswith('__')) or len(doc_id.encode('utf-8')) > 1500):
+        doc_id = hashlib.sha1(str(key).encode('utf-8')).hexdigest()
+    return doc_id
+
+
+def is_transient(error):
+    return any(cls.__name__ in TRANSIENT_ERRORS for cls in type(error).__mro__)
+
+
+class ConcurrentBatchWriter:
+    """
+    Buffers set()/delete() writes into batches and commits them concurrently
+    on_commit, if given, is called with the tags of each committed batch
+    (from a worker thread) - e.g. to journal import progress.
+    """
+
+    def __init__(self, db, max_in_flight=8, batch_size=MAX_BATCH_SIZE, adaptive=True,
+                 target_latency=1.0, max_retries=5, base_delay=0.25, max_delay=8.0,
+                 report_every=5.0, progress=print, on_commit=None):
+        self.db = db
+        self.max_in_flight = max_in_flight
+        self.batch_size = min(batch_size, MAX_BATCH_SIZE)
+        self.adaptive = adaptive
+        self.target_latency = target_latency
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.report_every = report_every
+        self.progress = progress
+        self.on_commit = on_commit
+
+        self._pending = []
+        self._futures = []
+        self._errors = []  # seen by done-callbacks, to stop queuing after a failure
+        self._failed_batches = 0
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+        self._pool = ThreadPoolExecutor(max_workers=max_in_flight)
+        self._lock = threading.Lock()
+        self._random = random.Random()
+
+        self.documents = 0
+        self.batches = 0
+        self.retries = 0
+        self.in_flight = 0
+        self._latency_total = 0.0
+        self._started = time.monotonic()
+        self._last_report = self._started
+
+    def set(self, ref, data, tag=None, merge=False):
+        """Queue one document write; blocks while max_in_flight batches are committing"""
+        self._queue(('merge' if merge else 'set', ref, data, tag))
+
+    def delete(self, ref, tag=None):
+        """Queue one document delete"""
+        self._queue(('delete', ref, None, tag))
+
+    def _queue(self, write):
+        if self._errors:
+            raise RuntimeError('A batch failed; import stopped') from self._errors[0]
+        self._pending.append(write)
+        if len(self._pending) >= self.batch_size:
+            self._submit()
+
+    def _submit(self):
+        writes, self._pending = self._pending, []
+        if not writes:
+            return
+        self._slots.acquire()  # backpressure: wait for a free slot
+        with self._lock:
+            self.in_flight += 1
+        future = self._pool.submit(self._commit, writes)
+        future.add_done_callback(self._release)
+        self._futures.append(future)
+
+    def _release(self, future):
+        with self._lock:
+            self.in_flight -= 1
+        error = future.exception()
+        if error is not None:
+            self._errors.append(error)
+        self._slots.release()
+
+    def _commit(self, writes):
+        for attempt in range(self.max_retries + 1):
+            batch = self.db.batch()
+            for action, ref, data, _ in writes:
+                if action == 'delete':
+                    batch.delete(ref)
+                else:
+                    batch.set(ref, data, merge=action == 'merge')
+            start = time.monotonic()
+            try:
+                batch.commit()
+            except Exception as error:
+                if not is_transient(error) or attempt == self.max_retries:
+                    raise
+                self._adapt(None)
+                with self._lock:
+                    self.retries += 1
+                # Full jitter: a random wait up to the exponential backoff cap
+                time.sleep(self._random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt)))
+                continue
+            self._record(len(writes), time.monotonic() - start)
+            if self.on_commit is not None:
+                self.on_commit([tag for _, _, _, tag in writes])
+            return
+
+    def _adapt(self, latency):
+        """Grow the batch size while commits are fast; shrink it when they are slow or fail"""
+        if not self.adaptive:
+            return
+        with self._lock:
+            if latency is None:
+                self.batch_size = max(MIN_BATCH_SIZE, self.batch_size // 2)
+            elif latency > self.target_latency:
+                self.batch_size = max(MIN_BATCH_SIZE, int(self.batch_size * 0.75))
+            elif latency < self.target_latency / 2:
+                self.batch_size = min(MAX_BATCH_SIZE, self.batch_size + MIN_BATCH_SIZE)
+
+    def _record(self, count, latency):
+        self._adapt(latency)
+        with self._lock:
+            self.documents += count
+            self.batches += 1
+            self._latency_total += latency
+            now = time.monotonic()
+            report = self.progress and now - self._last_report >= self.report_every
+            if report:
+                self._last_report = now
+                rate = self.documents / (now - self._started)
+                message = (f'  {self.documents:,} documents, {rate:,.0f} docs/s, '
+                           f'batch size {self.batch_size}, {self.in_flight} in flight')
+        if report:
+            self.progress(message)
+
+    def flush(self):
+        """Commit buffered writes and wait for every batch; raises if any batch failed"""
+        if not self._errors:
+            self._submit()
+        futures, self._futures = self._futures, []
+        errors = [error for error in (future.exception() for future in futures) if error is not None]
+        if errors:
+            self._failed_batches += len(errors)
+            raise RuntimeError(f'{len(errors)} batch(es) failed') from errors[0]
+
+    def close(self):
+        try:
+            self.flush()
+        finally:
+            self._pool.shutdown(wait=True)
+
+    def stats(self):
+        elapsed = time.monotonic() - self._started
+        return {
+            'documents': self.documents,
+            'batches': self.batches,
+            'retries': self.retries,
+            'failed_batches': self._failed_batches,
+            'elapsed_seconds': round(elapsed, 3),
+            'docs_per_second': round(self.documents / elapsed, 1) if elapsed else 0.0,
+            'mean_commit_seconds': round(self._latency_total / self.batches, 3) if self.batches else 0.0,
+            'final_batch_size': self.batch_size,
+        }
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self._pool.shutdown(wait=True)
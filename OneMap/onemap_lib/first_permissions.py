@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Streaming earliest-permission tracker
+Keeps only the current earliest Pole Permission record per pole while rows
+stream past, so memory grows with the number of poles rather than rows.
+Dates are compared as parsed times (onemap_lib.dates); records without a
+date only win for poles that have no dated record. On equal dates the
+record seen first is kept, and merge() gives the same result as streaming
+the merged trackers' rows one after the other, so per-file or per-chunk
+trackers can be combined in export order (give them the same DateParser so
+their dates are read alike).
+
+Usage:
+    from onemap_lib.first_permissions import FirstPermissionTracker
+
+    tracker = FirstPermissionTracker()
+    for row in rows:
+        tracker.add(row['Pole Number'], row['Last Modified Pole Permissions Date'], row)
+    tracker.merge(other_file_tracker)
+    for pole, record in tracker.first().items():
+        print(pole, record, tracker.superseded(pole))
+"""
+
+from onemap_lib.dates import SAMPLE_SIZE, DateParser
+
+# Sort key of records without a date: after every dated record
+UNDATED = (2,)
+
+
+class FirstPermissionTracker:
+    """Earliest record per pole, with the number of claims each pole received"""
+
+    def __init__(self, parser=None, sample_size=SAMPLE_SIZE):
+        # Without a parser, the first sample_size dated rows are held back
+        # until the column's date format has been detected from them
+        self.parser = parser
+        self.sample_size = sample_size
+        self.poles = {}  # pole -> [sort key, record, claims]
+        self._pending = []
+        self._pending_dates = 0
+
+    def add(self, pole, date, record, claims=1):
+        """
+        Offer a claim on pole; record is kept if its date is the earliest so far
+        claims > 1 offers the earliest of several claims ranked elsewhere (e.g. in SQL)
+        """
+        if self.parser is None:
+            self._pending.append((pole, date, record, claims))
+            if date:
+                self._pending_dates += 1
+                if self._pending_dates >= self.sample_size:
+                    self._flush()
+            return
+        self._offer(pole, self._key(date), record, claims)
+
+    def _key(self, date):
+        return self.parser.sort_key(date) if date else UNDATED
+
+    def _offer(self, pole, key, record, claims):
+        entry = self.poles.get(pole)
+        if entry is None:
+            self.poles[pole] = [key, record, claims]
+            return
+        entry[2] += claims
+        if key < entry[0]:
+            entry[0] = key
+            entry[1] = record
+
+    def _flush(self):
+        if self.parser is None:
+            self.parser = DateParser(sample=(date for _, date, _, _ in self._pending), sample_size=self.sample_size)
+        pending, self._pending = self._pending, []
+        self._pending_dates = 0
+        for pole, date, record, claims in pending:
+            self._offer(pole, self._key(date), record, claims)
+
+    def merge(self, other):
+        """Fold in a tracker of later rows (e.g. the next file or chunk)"""
+        self._flush()
+        other._flush()
+        for pole, (key, record, claims) in other.poles.items():
+            self._offer(pole, key, record, claims)
+        return self
+
+    def first(self):
+        """{pole: earliest record}, poles in order of first claim"""
+        self._flush()
+        return {pole: entry[1] for pole, entry in self.poles.items()}
+
+    def replace(self, pole, record):
+        """Swap the kept record for pole (e.g. a row id for the full row)"""
+        self.poles[pole][1] = record
+
+    def claims(self, pole):
+        self._flush()
+        return self.poles[pole][2]
+
+    def superseded(self, pole=None):
+        """Claims that lost to an earlier one, for one pole or all poles"""
+        self._flush()
+        if pole is not None:
+            return self.poles[pole][2] - 1
+        return sum(entry[2] - 1 for entry in self.poles.values())
+
+    def __len__(self):
+        self._flush()
+        return len(self.poles)
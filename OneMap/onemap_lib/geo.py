@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Vectorized GPS distance and proximity search for OneMap analyses
+Distances are computed with NumPy over whole coordinate arrays, and a uniform
+grid index finds every pair of points within N metres without comparing all
+pairs, so proximity checks stay fast at 100k+ permissions.
+"""
+
+import math
+
+import numpy as np
+
+EARTH_RADIUS_M = 6371000
+# On the same sphere as haversine_m, so grid cells match its distances
+METERS_PER_DEGREE_LAT = EARTH_RADIUS_M * math.pi / 180
+
+# Grid cells are this much wider than the radius, so floating-point rounding
+# (and a great circle being shorter than the parallel) cannot put a pair at
+# exactly the radius two cells apart
+CELL_PADDING = 1e-6
+
+# Upper bound on candidate pairs materialised at once
+MAX_PAIRS_PER_BLOCK = 2_000_000
+
+
+def parse_coordinates(values):
+    """Convert coordinate strings to a float array (NaN where blank/invalid)"""
+    out = np.full(len(values), np.nan)
+    for i, value in enumerate(values):
+        try:
+            out[i] = float(value)
+        except (TypeError, ValueError):
+            pass
+    return out
+
+
+def haversine_m(lat1, lon1, lat2, lon2):
+    """Great-circle distance in metres; arguments broadcast like NumPy arrays"""
+    phi1 = np.radians(lat1)
+    phi2 = np.radians(lat2)
+    delta_phi = phi2 - phi1
+    delta_lambda = np.radians(np.asarray(lon2) - np.asarray(lon1))
+
+    a = np.sin(delta_phi / 2) ** 2 + np.cos(phi1) * np.cos(phi2) * np.sin(delta_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def max_pairwise_distance(lats, lons):
+    """Largest distance between any two valid points (0 for fewer than two)"""
+    lats = np.asarray(lats, dtype=float)
+    lons = np.asarray(lons, dtype=float)
+    valid = ~(np.isnan(lats) | np.isnan(lons))
+    lats, lons = lats[valid], lons[valid]
+    if len(lats) < 2:
+        return 0.0
+    distances = haversine_m(lats[:, None], lons[:, None], lats[None, :], lons[None, :])
+    return float(distances.max())
+
+
+class GridIndex:
+    """
+    Uniform lat/lon grid with cells at least radius_m wide
+
+    Any two points within radius_m of each other fall in the same or an
+    adjacent cell, so only those cell pairs are compared.
+    """
+
+    # Half of the 8-neighbourhood plus the cell itself: every adjacent
+    # cell pair is visited exactly once
+    NEIGHBOUR_OFFSETS = [(0, 0), (0, 1), (1, -1), (1, 0), (1, 1)]
+
+    def __init__(self, lats, lons, radius_m):
+        lats = np.asarray(lats, dtype=float)
+        lons = np.asarray(lons, dtype=float)
+        self.radius_m = radius_m
+
+        valid = ~(np.isnan(lats) | np.isnan(lons))
+        self.point_ids = np.flatnonzero(valid)
+        self.lats = lats[valid]
+        self.lons = lons[valid]
+
+        if len(self.lats) == 0:
+            self.keys = np.empty(0, dtype=np.int64)
+            self.width = 1
+            return
+
+        # Size longitude cells for the latitude where degrees are narrowest
+        max_abs_lat = min(float(np.max(np.abs(self.lats))), 89.0)
+        cell_m = radius_m * (1 + CELL_PADDING)
+        cell_lat = cell_m / METERS_PER_DEGREE_LAT
+        cell_lon = cell_m / (METERS_PER_DEGREE_LAT * np.cos(np.radians(max_abs_lat)))
+
+        ix = np.floor(self.lats / cell_lat).astype(np.int64)
+        iy = np.floor(self.lons / cell_lon).astype(np.int64)
+        ix -= ix.min()
+        iy -= iy.min() - 1  # columns 0 and width-1 stay empty so +-1 never wraps
+        self.width = int(iy.max()) + 2
+
+        keys = ix * self.width + iy
+        order = np.argsort(keys, kind='stable')
+        self.point_ids = self.point_ids[order]
+        self.lats = self.lats[order]
+        self.lons = self.lons[order]
+        self.keys = keys[order]
+
+    def pairs_within(self, radius_m=None):
+        """
+        Return (i, j, distance_m) arrays for all point pairs within radius_m
+
+        i and j are indexes into the arrays the index was built from, i < j.
+        """
+        radius_m = self.radius_m if radius_m is None else radius_m
+        if radius_m > self.radius_m:
+            raise ValueError(f"Index was built for {self.radius_m}m; rebuild for {radius_m}m")
+
+        found_i, found_j, found_d = [], [], []
+        n = len(self.keys)
+        positions = np.arange(n)
+
+        for dx, dy in self.NEIGHBOUR_OFFSETS:
+            target = self.keys + dx * self.width + dy
+            start = np.searchsorted(self.keys, target, side='left')
+            end = np.searchsorted(self.keys, target, side='right')
+            if dx == 0 and dy == 0:
+                start = np.maximum(start, positions + 1)  # same cell: j > i only
+            counts = np.maximum(end - start, 0)
+
+            for lo, hi in self._blocks(counts):
+                block_counts = counts[lo:hi]
+                total = int(block_counts.sum())
+                if total == 0:
+                    continue
+                left = np.repeat(positions[lo:hi], block_counts)
+                first = np.cumsum(block_counts) - block_counts
+                right = np.repeat(start[lo:hi] - first, block_counts) + np.arange(total)
+
+                distances = haversine_m(self.lats[left], self.lons[left],
+                                        self.lats[right], self.lons[right])
+                close = distances <= radius_m
+                found_i.append(self.point_ids[left[close]])
+                found_j.append(self.point_ids[right[close]])
+                found_d.append(distances[close])
+
+        if not found_i:
+            empty = np.empty(0, dtype=np.int64)
+            return empty, empty, np.empty(0)
+
+        i = np.concatenate(found_i)
+        j = np.concatenate(found_j)
+        d = np.concatenate(found_d)
+        swap = i > j
+        i[swap], j[swap] = j[swap], i[swap]
+        return i, j, d
+
+    @staticmethod
+    def _blocks(counts):
+        """Split point ranges so each block yields at most MAX_PAIRS_PER_BLOCK pairs"""
+        cumulative = np.cumsum(counts)
+        lo = 0
+        n = len(counts)
+        while lo < n:
+            base = cumulative[lo - 1] if lo > 0 else 0
+            hi = int(np.searchsorted(cumulative, base + MAX_PAIRS_PER_BLOCK, side='right'))
+            hi = max(hi, lo + 1)
+            yield lo, min(hi, n)
+            lo = hi
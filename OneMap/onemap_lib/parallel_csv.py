@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Parallel byte-range reading of large CSV files
+The file is memory-mapped and cut at record boundaries, then each byte range
+is parsed in its own process. Boundaries are quote-aware: OneMap addresses
+contain newlines inside quoted fields, so a newline only ends a record when
+an even number of quote characters precede it.
+
+Usage:
+    from onemap_lib.parallel_csv import map_ranges
+
+    def count_poles(csv_range):
+        return sum(1 for row in csv_range.dict_rows() if row.get('Pole Number'))
+
+    total = sum(map_ranges('Lawley_Project_Louis.csv', count_poles))
+
+func must be a module-level function (it is pickled to the workers).
+Assumes well-formed CSV quoting, where escaped quotes come in pairs.
+"""
+
+import csv
+import io
+import mmap
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+# Bytes copied out of the map at once when counting quotes
+SCAN_BLOCK_SIZE = 16 * 1024 * 1024
+
+# Ranges per worker: smaller ranges balance load and bound per-worker memory
+RANGES_PER_WORKER = 4
+
+
+def _count_quotes(mm, start, end):
+    """Number of '"' bytes in mm[start:end]"""
+    total = 0
+    for block_start in range(start, end, SCAN_BLOCK_SIZE):
+        total += mm[block_start:min(block_start + SCAN_BLOCK_SIZE, end)].count(b'"')
+    return total
+
+
+def _next_record_start(mm, pos, quotes):
+    """
+    First offset at or after the newline following pos that starts a record
+
+    quotes is the number of quote bytes before pos. Returns (offset, quotes
+    before offset); offset is len(mm) when no further record starts.
+    """
+    size = len(mm)
+    while True:
+        newline = mm.find(b'\n', pos)
+        if newline == -1:
+            return size, quotes + _count_quotes(mm, pos, size)
+        quotes += _count_quotes(mm, pos, newline)
+        pos = newline + 1
+        if quotes % 2 == 0:
+            return pos, quotes
+
+
+def read_header(mm):
+    """Return (header fields, offset of the first data record)"""
+    data_start, _ = _next_record_start(mm, 0, 0)
+    text = mm[:data_start].decode('utf-8')
+    header = next(csv.reader(io.StringIO(text, newline='')), [])
+    return header, data_start
+
+
+def record_boundaries(csv_path, parts):
+    """
+    Split the data section of csv_path into about `parts` byte ranges
+
+    Returns (header, offsets) where consecutive offsets delimit ranges that
+    each start at a record boundary; the last offset is the file size.
+    """
+    with open(csv_path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return [], [0, 0]
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            header, data_start = read_header(mm)
+            size = len(mm)
+            offsets = [data_start]
+            pos, quotes = data_start, 0
+
+            parts = max(1, parts)
+            for k in range(1, parts):
+                target = data_start + (size - data_start) * k // parts
+                if target <= pos:
+                    continue
+                quotes += _count_quotes(mm, pos, target)
+                pos, quotes = _next_record_start(mm, target, quotes)
+                if pos >= size:
+                    break
+                offsets.append(pos)
+
+            offsets.append(size)
+            return header, offsets
+
+
+class CSVRange:
+    """One byte range of a CSV file, parsed inside a worker"""
+
+    def __init__(self, csv_path, index, start, end, header):
+        self.csv_path = str(csv_path)
+        self.index = index
+        self.start = start
+        self.end = end
+        self.header = header
+
+    def text(self):
+        with open(self.csv_path, 'rb') as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return mm[self.start:self.end].decode('utf-8')
+
+    def rows(self):
+        """Rows as lists of strings"""
+        return csv.reader(io.StringIO(self.text(), newline=''))
+
+    def dict_rows(self):
+        """Rows as {column: value} dicts, like csv.DictReader"""
+        return csv.DictReader(io.StringIO(self.text(), newline=''), fieldnames=self.header)
+
+
+def plan_ranges(csv_path, parts):
+    """CSVRange objects covering the data rows of csv_path, in file order"""
+    header, offsets = record_boundaries(csv_path, parts)
+    return [
+        CSVRange(csv_path, index, start, end, header)
+        for index, (start, end) in enumerate(zip(offsets, offsets[1:]))
+        if end > start
+    ]
+
+
+def map_ranges(csv_path, func, workers=None, parts=None):
+    """
+    Run func(CSVRange) over the file's byte ranges in a process pool
+
+    Results come back in file order, so partial results can be merged
+    exactly as a sequential pass would have produced them.
+    """
+    workers = workers or os.cpu_count() or 1
+    ranges = plan_ranges(csv_path, parts or workers * RANGES_PER_WORKER)
+    if workers == 1 or len(ranges) <= 1:
+        return [func(csv_range) for csv_range in ranges]
+    with ProcessPoolExecutor(max_workers=min(workers, len(ranges))) as pool:
+        return list(pool.map(func, ranges))
+
+
+def _range_rows(csv_range):
+    return list(csv_range.dict_rows())
+
+
+def iter_rows_parallel(csv_path, workers=None, parts=None):
+    """
+    Yield rows as dicts in file order, parsed in worker processes
+
+    Rows are pickled back to this process, so this only pays off when
+    parsing dominates; prefer map_ranges() with a reducing func.
+    """
+    workers = workers or os.cpu_count() or 1
+    ranges = plan_ranges(csv_path, parts or workers * RANGES_PER_WORKER)
+    if workers == 1 or len(ranges) <= 1:
+        for csv_range in ranges:
+            yield from csv_range.dict_rows()
+        return
+    with ProcessPoolExecutor(max_workers=min(workers, len(ranges))) as pool:
+        for rows in pool.map(_range_rows, ranges):
+            yield from rows
@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+In-process stage graph with cached intermediate artifacts
+A pipeline is a list of Stage declarations: a function, the stages whose
+outputs it takes, and the dated reports it writes. Stages run in one
+process and hand each other their outputs in memory - {name: pyarrow Table
+or JSON-ready value} - so no stage re-reads the export or another stage's
+CSV. Stages whose inputs are all done run concurrently.
+
+Each stage's outputs and reports are persisted under cache/pipeline/, keyed
+by a hash of its inputs: the source file hash (for the first stage), the
+keys of the stages it depends on, its parameters, the source files of the
+code it runs and of every onemap_lib module that code imports. A stage
+whose key is unchanged is not run: its outputs are loaded from the cache
+and its reports copied back to reports/ under today's date, with the
+generation timestamps of JSON reports set to now and the run that produced
+them noted under "cached_result". A timing summary is printed at the end.
+
+Usage:
+    from onemap_lib.pipeline import Pipeline, Stage
+
+    pipeline = Pipeline([
+        Stage('export', load_export, params={'csv_path': csv_path}, source=csv_path, cache=False),
+        Stage('gps_duplicates', gps_stage, inputs=['export'], reports=['payment_conflicts_detailed.csv']),
+    ])
+    outputs = pipeline.run(workers=4)   # {stage: {name: value}}; None if a stage failed
+
+Requires pyarrow.
+"""
+
+import contextlib
+import hashlib
+import inspect
+import io
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+from pathlib import Path
+
+from onemap_lib.snapshot import HAS_PYARROW, file_hash
+
+if HAS_PYARROW:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+CACHE_DIR = Path(__file__).resolve().parent.parent / 'cache' / 'pipeline'
+REPORTS_DIR = Path('reports')
+STAGE_FILE = 'stage.json'
+LIBRARY = __name__.rpartition('.')[0]
+
+# Top-level fields of JSON reports holding the time they were generated
+DATED_FIELDS = ('timestamp', 'report_date', 'generated', 'generated_at')
+
+
+class Stage:
+    """
+    One node of the pipeline
+    func(**inputs, **params) returns {name: value}; inputs are passed by
+    stage name, each the output dict of that stage. reports are the report
+    names the stage writes to reports/<date>_<name>. source (a file) is
+    hashed into the key of a stage with no inputs. code lists further
+    functions, classes or modules the stage calls, whose source files are
+    hashed with func's (onemap_lib modules they import are found and hashed
+    automatically). cache=False always runs the stage (e.g. loading the
+    export, which the snapshot cache covers).
+    """
+
+    def __init__(self, name, func, inputs=(), params=None, reports=(), source=None, code=(), cache=True):
+        self.name = name
+        self.func = func
+        self.inputs = list(inputs)
+        self.params = dict(params or {})
+        self.reports = list(reports)
+        self.source = source
+        self.code = [func] + list(code)
+        self.cache = cache
+
+
+def _code_hash(obj):
+    """Hash of the source file defining obj, so editing a stage invalidates its cache"""
+    try:
+        return file_hash(inspect.getsourcefile(obj))
+    except (TypeError, OSError):
+        return getattr(obj, '__qualname__', repr(obj))
+
+
+def _library_modules(objs):
+    """{name: source file} of the onemap_lib modules the modules defining objs import, directly or not"""
+    found = {}
+    pending = [obj if inspect.ismodule(obj) else sys.modules.get(getattr(obj, '__module__', None))
+               for obj in objs]
+    while pending:
+        module = pending.pop()
+        if module is None:
+            continue
+        for value in list(vars(module).values()):
+            name = value.__name__ if inspect.ismodule(value) else getattr(value, '__module__', None)
+            if not isinstance(name, str) or name in found or not name.startswith(LIBRARY + '.'):
+                continue
+            dependency = sys.modules.get(name)
+            if dependency is not None and getattr(dependency, '__file__', None):
+                found[name] = dependency.__file__
+                pending.append(dependency)
+    return found
+
+
+class _ThreadOutput(io.TextIOBase):
+    """stdout that collects each stage's prints separately, so parallel stages do not interleave"""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.local = threading.local()
+
+    def write(self, text):
+        buffer = getattr(self.local, 'buffer', None)
+        return (buffer or self.stream).write(text)
+
+    def flush(self):
+        self.stream.flush()
+
+    @contextlib.contextmanager
+    def capture(self):
+        self.local.buffer = io.StringIO()
+        try:
+            yield self.local.buffer
+        finally:
+            self.local.buffer = None
+
+
+def save_outputs(outputs, directory):
+    for name, value in outputs.items():
+        if HAS_PYARROW and isinstance(value, pa.Table):
+            pq.write_table(value, directory / f'{name}.parquet', compression='zstd')
+        else:
+            with open(directory / f'{name}.json', 'w', encoding='utf-8') as f:
+                json.dump(value, f, ensure_ascii=False)
+
+
+def load_outputs(directory, names):
+    outputs = {}
+    for name in names:
+        path = directory / f'{name}.parquet'
+        if path.exists():
+            outputs[name] = pq.read_table(path)
+        else:
+            with open(directory / f'{name}.json', 'r', encoding='utf-8') as f:
+                outputs[name] = json.load(f)
+    return outputs
+
+
+class Pipeline:
+    """Runs a list of Stages in dependency order, skipping stages with a cached result"""
+
+    def __init__(self, stages, cache_dir=None, reports_dir=None, force=False):
+        if not HAS_PYARROW:
+            raise RuntimeError("pyarrow is required for the pipeline: pip install pyarrow")
+        self.stages = {stage.name: stage for stage in stages}
+        self.cache_dir = Path(cache_dir) if cache_dir else CACHE_DIR
+        self.reports_dir = Path(reports_dir) if reports_dir else REPORTS_DIR
+        self.force = force
+        self.report_date = datetime.now().strftime('%Y-%m-%d')
+        self.keys = {}
+        self.outputs = {}
+        self.timings = {}  # stage -> (status, seconds)
+
+        for stage in stages:
+            missing = [name for name in stage.inputs if name not in self.stages]
+            if missing:
+                raise ValueError(f"Stage {stage.name} depends on unknown stage(s): {', '.join(missing)}")
+        self._check_acyclic()
+
+    def _check_acyclic(self):
+        state = {}
+
+        def visit(name, path):
+            if state.get(name) == 'done':
+                return
+            if state.get(name) == 'visiting':
+                raise ValueError(f"Pipeline has a cycle: {' -> '.join(path + [name])}")
+            state[name] = 'visiting'
+            for upstream in self.stages[name].inputs:
+                visit(upstream, path + [name])
+            state[name] = 'done'
+
+        for name in self.stages:
+            visit(name, [])
+
+    def stage_key(self, stage):
+        """Hash of everything the stage's result depends on"""
+        key = {
+            'stage': stage.name,
+            'code': [_code_hash(obj) for obj in stage.code],
+            'library': {name: file_hash(path) for name, path in sorted(_library_modules(stage.code).items())},
+            'params': stage.params,
+            'inputs': {name: self.keys[name] for name in stage.inputs},
+            'source': file_hash(stage.source) if stage.source else None,
+        }
+        return hashlib.sha256(json.dumps(key, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+    def _entry(self, stage, key):
+        return self.cache_dir / f'{stage.name}_{key[:16]}'
+
+    def _report_path(self, name):
+        return self.reports_dir / f'{self.report_date}_{name}'
+
+    def _load_cached(self, stage, key):
+        entry = self._entry(stage, key)
+        if self.force or not stage.cache or not (entry / STAGE_FILE).exists():
+            return None
+        with open(entry / STAGE_FILE, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        self.reports_dir.mkdir(parents=True, exist_ok=True)
+        for name in stage.reports:
+            self._restore_report(entry / 'reports' / name, self._report_path(name), meta)
+        return load_outputs(entry, meta['outputs'])
+
+    @staticmethod
+    def _restore_report(cached, path, meta):
+        """Copy a cached report to today's name; JSON reports get today's timestamps and a note of their source run"""
+        if cached.suffix != '.json':
+            shutil.copyfile(cached, path)
+            return
+        with open(cached, 'r', encoding='utf-8') as f:
+            report = json.load(f)
+        if not isinstance(report, dict):
+            shutil.copyfile(cached, path)
+            return
+        now = datetime.now().isoformat()
+        for field in DATED_FIELDS:
+            if field in report:
+                report[field] = now
+        report['cached_result'] = {'stage': meta['stage'], 'computed': meta['created']}
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+    def _store(self, stage, key, outputs, seconds):
+        entry = self._entry(stage, key)
+        partial = entry.with_name(entry.name + '.part')
+        shutil.rmtree(partial, ignore_errors=True)
+        (partial / 'reports').mkdir(parents=True)
+        save_outputs(outputs, partial)
+        for name in stage.reports:
+            shutil.copyfile(self._report_path(name), partial / 'reports' / name)
+        with open(partial / STAGE_FILE, 'w', encoding='utf-8') as f:
+            json.dump({'stage': stage.name, 'key': key, 'created': datetime.now().isoformat(),
+                       'seconds': round(seconds, 3), 'outputs': list(outputs)}, f, indent=2)
+        shutil.rmtree(entry, ignore_errors=True)
+        os.replace(partial, entry)
+
+        # Results of the same stage for older inputs are stale now
+        for old in self.cache_dir.glob(f'{stage.name}_*'):
+            if old != entry and old.is_dir() and not old.name.endswith('.part'):
+                shutil.rmtree(old, ignore_errors=True)
+
+    def _run_stage(self, stage, output):
+        """Run or load one stage; returns (status, outputs, printed text, error)"""
+        start = time.perf_counter()
+        with output.capture() as printed:
+            try:
+                key = self.stage_key(stage)
+                self.keys[stage.name] = key
+                outputs = self._load_cached(stage, key)
+                status = 'cached'
+                if outputs is None:
+                    inputs = {name: self.outputs[name] for name in stage.inputs}
+                    outputs = stage.func(**inputs, **stage.params) or {}
+                    status = 'ran'
+                    if stage.cache:
+                        self._store(stage, key, outputs, time.perf_counter() - start)
+                error = None
+            except Exception:
+                status, outputs, error = 'failed', None, traceback.format_exc()
+        return status, outputs, printed.getvalue(), error, time.perf_counter() - start
+
+    def run(self, workers=4):
+        """Run every stage; returns {stage: outputs}, or None if a stage failed"""
+        output = _ThreadOutput(sys.stdout)
+        pending = dict(self.stages)
+        running = {}
+        failed = False
+        total_start = time.perf_counter()
+
+        with contextlib.redirect_stdout(output), ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            while pending or running:
+                ready = [s for s in pending.values() if all(n in self.outputs for n in s.inputs)]
+                if not failed:
+                    for stage in ready:
+                        del pending[stage.name]
+                        running[pool.submit(self._run_stage, stage, output)] = stage
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage = running.pop(future)
+                    status, outputs, printed, error, seconds = future.result()
+                    self.timings[stage.name] = (status, seconds)
+                    label = '(cached)' if status == 'cached' else ''
+                    output.stream.write(f"\n▶ {stage.name} {label}\n{'-' * 50}\n{printed}")
+                    if error:
+                        output.stream.write(f"❌ Stage {stage.name} failed:\n{error}")
+                        failed = True
+                    else:
+                        self.outputs[stage.name] = outputs
+
+        for name in pending:
+            self.timings[name] = ('skipped', 0.0)
+        self.total_seconds = time.perf_counter() - total_start
+        return None if failed else self.outputs
+
+    def print_timings(self):
+        print("\n=== STAGE TIMINGS ===")
+        print(f"{'Stage':<28} {'Status':<8} {'Seconds':>8}")
+        for name in self.stages:
+            status, seconds = self.timings.get(name, ('skipped', 0.0))
+            print(f"{name:<28} {status:<8} {seconds:>8.2f}")
+        busy = sum(seconds for _, seconds in self.timings.values())
+        print(f"{'Total (wall clock)':<28} {'':<8} {self.total_seconds:>8.2f}   (stage time {busy:.2f}s)")
@@ -0,0 +1,68 @@
+/**
+ * Reader for the extraction record files written by onemap_lib/records.py
+ *
+ * Outputs are written as <stem>.ndjson.gz by default, <stem>.ndjson with
+ * --format ndjson, or the original <stem>.json document with --json. Only
+ * one of them exists at a time; this returns whichever is there in the
+ * original single-document layout, so importers do not care which it is.
+ *
+ * Usage:
+ *   const { findOutput, readDocument } = require('./onemap_lib/records');
+ *   const POLES = path.join(__dirname, 'output', 'poles-with-drops');
+ *   if (!findOutput(POLES)) ...
+ *   const poleData = readDocument(POLES, 'poles');   // { ..., statistics, poles: [...] }
+ */
+
+const fs = require('fs');
+const zlib = require('zlib');
+
+const FORMATS = ['ndjson.gz', 'ndjson', 'json'];
+
+// Header fields describing the file itself rather than the extraction
+const HEADER_FIELDS = new Set(['format', 'collection', 'key', 'count']);
+
+function findOutput(stem) {
+  for (const fmt of FORMATS) {
+    const file = `${stem}.${fmt}`;
+    if (fs.existsSync(file)) {
+      return file;
+    }
+  }
+  return null;
+}
+
+function readDocument(stem, collection) {
+  const file = findOutput(stem);
+  if (!file) {
+    throw new Error(`No output found for ${stem} (${FORMATS.map(f => '.' + f).join(', ')})`);
+  }
+  if (file.endsWith('.json')) {
+    return JSON.parse(fs.readFileSync(file, 'utf8'));
+  }
+
+  // gzip outputs are a series of members; gunzip reads them all
+  let data = fs.readFileSync(file);
+  if (file.endsWith('.gz')) {
+    data = zlib.gunzipSync(data);
+  }
+  const lines = data.toString('utf8').split('\n').filter(line => line.trim());
+  const header = JSON.parse(lines[0]);
+  const records = lines.slice(1).map(line => JSON.parse(line));
+  collection = collection || header.collection;
+
+  // Same layout as the --json output: header fields, records after 'statistics'
+  const document = {};
+  for (const [name, value] of Object.entries(header)) {
+    if (HEADER_FIELDS.has(name)) continue;
+    document[name] = value;
+    if (name === 'statistics') {
+      document[collection] = records;
+    }
+  }
+  if (!(collection in document)) {
+    document[collection] = records;
+  }
+  return document;
+}
+
+module.exports = { FORMATS, findOutput, readDocument };
@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""
+Record files for the extraction outputs (poles, drops, poles-with-drops)
+NDJSON with one compact record per line after a small header record that
+holds the extraction date, source file and statistics. Records are streamed
+in and out, so pole and drop sets never have to be held in memory whole.
+
+  - <stem>.ndjson.gz  gzip, written as independent members of BLOCK_RECORDS
+                      records so one record can be read without inflating
+                      the whole file (default)
+  - <stem>.ndjson     plain NDJSON
+  - <stem>.json       the original single document, indent=2 (--json)
+
+A sidecar index (<file>.idx, one "key<TAB>block offset<TAB>line offset"
+line per record) gives random access by poleId/dropId.
+
+Usage:
+    from onemap_lib.records import RecordFile, RecordWriter, find_output
+
+    with RecordWriter('output/lawley-poles-extracted.ndjson.gz', 'poles', key='poleId') as out:
+        for pole in poles:
+            out.write(pole)
+        out.header.update(extractionDate=..., statistics=stats)
+
+    poles = RecordFile(find_output('output/lawley-poles-extracted'), 'poles')
+    poles.header['statistics']
+    for pole in poles:               # streamed
+        ...
+    poles.get('LAW.P.A002')          # via the index
+"""
+
+import gzip
+import json
+import os
+import shutil
+import zlib
+from pathlib import Path
+
+FORMATS = ['ndjson.gz', 'ndjson', 'json']
+DEFAULT_FORMAT = 'ndjson.gz'
+
+# Records per gzip member: the unit inflated for one random read
+BLOCK_RECORDS = 256
+INDEX_SUFFIX = '.idx'
+HEADER_FORMAT = 'onemap-records'
+# Header fields describing the file itself rather than the extraction
+HEADER_FIELDS = ('format', 'collection', 'key', 'count')
+
+
+def output_format(args):
+    """Output format from command line options (--json, --format FORMAT)"""
+    if '--json' in args:
+        return 'json'
+    if '--format' in args:
+        fmt = args[args.index('--format') + 1]
+        if fmt not in FORMATS:
+            raise ValueError(f'Unknown output format {fmt} (expected one of {", ".join(FORMATS)})')
+        return fmt
+    return DEFAULT_FORMAT
+
+
+def output_path(stem, fmt=DEFAULT_FORMAT):
+    return Path(f'{stem}.{fmt}')
+
+
+def find_output(stem):
+    """Existing output for stem, preferring NDJSON; the default path if there is none"""
+    for fmt in FORMATS:
+        path = output_path(stem, fmt)
+        if path.exists():
+            return path
+    return output_path(stem)
+
+
+def file_format(path):
+    name = os.fspath(path)
+    for fmt in FORMATS:
+        if name.endswith('.' + fmt):
+            return fmt
+    raise ValueError(f'Not a record file: {name}')
+
+
+def _dumps(value):
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+
+
+class RecordWriter:
+    """
+    Streams records to a record file; header fields can be added until close
+    The body is spooled to a temporary file so the header (with statistics
+    known only at the end) can still be written first.
+    """
+
+    def __init__(self, path, collection, key=None, header=None):
+        self.path = Path(path)
+        self.format = file_format(self.path)
+        self.collection = collection
+        self.key = key
+        self.header = dict(header or {})
+        self.count = 0
+        self._records = []
+        self._index = {}
+        self._block = []
+        self._body = None
+        if self.format != 'json':
+            self._body_path = self.path.with_name(self.path.name + '.body')
+            self._body = open(self._body_path, 'wb')
+
+    def write(self, record):
+        self.count += 1
+        if self.format == 'json':
+            self._records.append(record)
+            return
+        line = (_dumps(record) + '\n').encode('utf-8')
+        if self.format == 'ndjson':
+            self._add_to_index(record, self._body.tell(), 0)
+            self._body.write(line)
+            return
+        self._add_to_index(record, self._body.tell(), sum(len(l) for l in self._block))
+        self._block.append(line)
+        if len(self._block) == BLOCK_RECORDS:
+            self._flush_block()
+
+    def _add_to_index(self, record, block, offset):
+        if self.key is None:
+            return
+        value = record.get(self.key)
+        # The first record of a repeated key is the one a scan finds first;
+        # records without a key cannot be looked up
+        if value is not None and value not in self._index:
+            self._index[value] = (block, offset)
+
+    def _flush_block(self):
+        if self._block:
+            self._body.write(gzip.compress(b''.join(self._block), mtime=0))
+            self._block = []
+
+    def close(self):
+        self._remove_other_formats()
+        if self.format == 'json':
+            self._write_json()
+            return
+        self._flush_block()
+        self._body.close()
+
+        header = {'format': HEADER_FORMAT, 'collection': self.collection,
+                  'key': self.key, 'count': self.count, **self.header}
+        header_line = (_dumps(header) + '\n').encode('utf-8')
+        if self.format == 'ndjson.gz':
+            header_line = gzip.compress(header_line, mtime=0)
+
+        partial = self.path.with_name(self.path.name + '.part')
+        with open(partial, 'wb') as out, open(self._body_path, 'rb') as body:
+            out.write(header_line)
+            shutil.copyfileobj(body, out)
+        os.remove(self._body_path)
+        os.replace(partial, self.path)
+
+        index_path = Path(f'{self.path}{INDEX_SUFFIX}')
+        if self.key is None:
+            if index_path.exists():
+                os.remove(index_path)
+            return
+        base = len(header_line)
+        with open(index_path, 'w', encoding='utf-8') as f:
+            for key, (block, offset) in self._index.items():
+                f.write(f'{key}\t{base + block}\t{offset}\n')
+
+    def _remove_other_formats(self):
+        # find_output prefers NDJSON, so an older output of the same stem in
+        # another format must not outlive this one
+        stem = os.fspath(self.path)[:-len(self.format) - 1]
+        for fmt in FORMATS:
+            if fmt != self.format:
+                for stale in (output_path(stem, fmt), Path(f'{output_path(stem, fmt)}{INDEX_SUFFIX}')):
+                    if stale.exists():
+                        os.remove(stale)
+
+    def _write_json(self):
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump(_document(self.header, self.collection, self._records), f, indent=2, ensure_ascii=False)
+
+    def abort(self):
+        """Discard a partly written file"""
+        if self._body is not None:
+            self._body.close()
+            os.remove(self._body_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def _document(header, collection, records):
+    """The original single-document layout: header fields with the records after 'statistics'"""
+    document = {}
+    for name, value in header.items():
+        if name in HEADER_FIELDS:
+            continue
+        document[name] = value
+        if name == 'statistics':
+            document[collection] = records
+    document.setdefault(collection, records)
+    return document
+
+
+def read_document(stream, compressed, collection=None):
+    """Whole NDJSON record file from a binary stream, in the single-document layout"""
+    if compressed:
+        stream = gzip.GzipFile(fileobj=stream)
+    lines = iter(stream)
+    header = json.loads(next(lines))
+    records = [json.loads(line) for line in lines if line.strip()]
+    return _document(header, collection or header['collection'], records)
+
+
+class RecordFile:
+    """Streaming reader for a record file in any of FORMATS"""
+
+    def __init__(self, path, collection=None, key=None):
+        self.path = Path(path)
+        self.format = file_format(self.path)
+        self.collection = collection
+        self.key = key
+        self._header = None
+        self._document = None
+        self._index = None
+
+    def _open(self):
+        if self.format == 'ndjson.gz':
+            return gzip.open(self.path, 'rb')
+        return open(self.path, 'rb')
+
+    def _load_json(self):
+        if self._document is None:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self._document = json.load(f)
+        return self._document
+
+    @property
+    def header(self):
+        """Everything but the records: extractionDate, sourceFile, statistics, ..."""
+        if self._header is None:
+            if self.format == 'json':
+                self._header = {k: v for k, v in self._load_json().items() if k != self.collection}
+            else:
+                with self._open() as f:
+                    self._header = json.loads(f.readline())
+                self.collection = self.collection or self._header['collection']
+        return self._header
+
+    def __iter__(self):
+        if self.format == 'json':
+            yield from self._load_json()[self.collection]
+            return
+        with self._open() as f:
+            f.readline()
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    def __len__(self):
+        if self.format == 'json':
+            return len(self._load_json()[self.collection])
+        return self.header['count']
+
+    def _load_index(self):
+        if self._index is None:
+            self._index = {}
+            with open(f'{self.path}{INDEX_SUFFIX}', 'r', encoding='utf-8') as f:
+                for line in f:
+                    key, block, offset = line.rstrip('\n').split('\t')
+                    self._index.setdefault(key, (int(block), int(offset)))
+        return self._index
+
+    def has_index(self):
+        return self.format != 'json' and os.path.exists(f'{self.path}{INDEX_SUFFIX}')
+
+    def keys(self):
+        return self._load_index().keys()
+
+    def get(self, key, default=None):
+        """Record by key; read through the index where there is one, else by scanning"""
+        if not self.has_index():
+            field = self.key or self.header.get('key')
+            return next((r for r in self if field and r.get(field) == key), default)
+        location = self._load_index().get(key)
+        if location is None:
+            return default
+        block, offset = location
+        with open(self.path, 'rb') as f:
+            f.seek(block)
+            if self.format == 'ndjson':
+                return json.loads(f.readline())
+            data = _inflate_member(f)
+        return json.loads(data[offset:data.index(b'\n', offset)])
+
+    def document(self):
+        """The whole file in the original single-document layout"""
+        if self.format == 'json':
+            return self._load_json()
+        with open(self.path, 'rb') as f:
+            return read_document(f, self.format == 'ndjson.gz', self.collection)
+
+
+def _inflate_member(f):
+    """Decompress the single gzip member starting at the file position"""
+    inflater = zlib.decompressobj(wbits=31)
+    parts = []
+    while not inflater.eof:
+        chunk = f.read(64 * 1024)
+        if not chunk:
+            break
+        parts.append(inflater.decompress(chunk))
+    return b''.join(parts)
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Columnar snapshot cache for OneMap CSV exports
+Parses a 100+ column export once into a Parquet file keyed by the source
+file's path and content hash, so analysis scripts only load the columns they
+use. Every column is kept as the CSV text (low-cardinality ones
+dictionary-encoded), so rows read back exactly as csv.DictReader gives them.
+
+Usage:
+    from onemap_lib.snapshot import iter_rows
+
+    for row in iter_rows('Lawley_Project_Louis.csv', ['Pole Number', 'Status']):
+        ...
+
+Falls back to streaming csv.DictReader when pyarrow is not installed.
+"""
+
+import csv
+import glob
+import hashlib
+import re
+import sys
+from pathlib import Path
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.parquet as pq
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+CACHE_DIR = Path(__file__).resolve().parent.parent / 'cache' / 'snapshots'
+
+# Low-cardinality columns stored dictionary-encoded
+CATEGORICAL_COLUMNS = [
+    'Status',
+    'Flow Name Groups',
+    'Sections',
+    'PONs',
+    'Field Agent Name (pole permission)',
+    'Last Modified Pole Permissions By',
+    'Last Modified Home Sign Ups By',
+]
+
+BATCH_SIZE = 65536
+
+
+def file_hash(path, chunk_size=1 << 20):
+    """SHA-256 of the file contents"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(chunk_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def read_header(csv_path):
+    """
+    Return the CSV header with duplicate names made unique
+    As in csv.DictReader the last column of a repeated name keeps the name;
+    earlier ones become name__1, name__2, ...
+    """
+    with open(csv_path, 'r', encoding='utf-8', newline='') as f:
+        header = next(csv.reader(f), [])
+
+    remaining = {}
+    for name in header:
+        remaining[name] = remaining.get(name, 0) + 1
+    seen = {}
+    columns = []
+    for name in header:
+        seen[name] = seen.get(name, 0) + 1
+        columns.append(name if seen[name] == remaining[name] else f"{name}__{seen[name]}")
+    return columns
+
+
+def _path_key(csv_path):
+    """Short hash of the resolved source path, so same-named exports in different directories do not share a cache slot"""
+    return hashlib.sha256(str(Path(csv_path).resolve()).encode('utf-8')).hexdigest()[:8]
+
+
+def snapshot_path(csv_path, cache_dir=None, source_hash=None):
+    """Location of the snapshot for the current contents of csv_path"""
+    cache_dir = Path(cache_dir) if cache_dir else CACHE_DIR
+    source_hash = source_hash or file_hash(csv_path)
+    return cache_dir / f"{Path(csv_path).stem}_{_path_key(csv_path)}_{source_hash[:16]}.parquet"
+
+
+def _stale_snapshots(csv_path, target):
+    """Other snapshots of this export (and ones named before path keys were added)"""
+    stem = Path(csv_path).stem
+    pattern = re.compile(re.escape(stem) + f"_(?:{_path_key(csv_path)}_)?[0-9a-f]{{16}}\\.parquet")
+    for old in target.parent.glob(f"{glob.escape(stem)}_*.parquet"):
+        if old != target and pattern.fullmatch(old.name):
+            yield old
+
+
+def _encoded_table(table):
+    """Dictionary-encode the categorical columns"""
+    for name in table.column_names:
+        if name in CATEGORICAL_COLUMNS:
+            column = table.column(name).dictionary_encode()
+            table = table.set_column(table.schema.get_field_index(name), name, column)
+    return table
+
+
+def build_snapshot(csv_path, cache_dir=None, force=False):
+    """Convert csv_path into a Parquet snapshot (no-op if one already exists)"""
+    if not HAS_PYARROW:
+        raise RuntimeError("pyarrow is required to build snapshots: pip install pyarrow")
+
+    source_hash = file_hash(csv_path)
+    target = snapshot_path(csv_path, cache_dir, source_hash)
+    if target.exists() and not force:
+        return target
+
+    print(f"Building columnar snapshot of {csv_path}...")
+    target.parent.mkdir(parents=True, exist_ok=True)
+
+    columns = read_header(csv_path)
+    table = pa_csv.read_csv(
+        csv_path,
+        read_options=pa_csv.ReadOptions(column_names=columns, skip_rows=1),
+        # OneMap addresses contain embedded newlines inside quoted fields
+        parse_options=pa_csv.ParseOptions(newlines_in_values=True),
+        convert_options=pa_csv.ConvertOptions(
+            column_types={name: pa.string() for name in columns},
+            strings_can_be_null=True,
+            null_values=['']
+        )
+    )
+    table = _encoded_table(table)
+    table = table.replace_schema_metadata({
+        'source_file': str(csv_path),
+        'source_sha256': source_hash,
+    })
+
+    tmp_path = target.with_suffix('.parquet.tmp')
+    pq.write_table(table, tmp_path, compression='zstd')
+    tmp_path.replace(target)
+
+    # Older snapshots of the same export are stale now
+    for old in _stale_snapshots(csv_path, target):
+        old.unlink()
+
+    print(f"✓ Snapshot saved: {target} ({table.num_rows} rows, {table.num_columns} columns)")
+    return target
+
+
+def load_table(csv_path, columns=None, cache_dir=None):
+    """Load the requested columns of csv_path as a pyarrow Table"""
+    path = build_snapshot(csv_path, cache_dir)
+    if columns is not None:
+        available = set(pq.read_schema(path).names)
+        columns = [c for c in columns if c in available]
+    return pq.read_table(path, columns=columns)
+
+
+def _to_text(value):
+    if value is None:
+        return ''
+    if isinstance(value, float):
+        # Only computed (SQL) values; snapshot columns are all text
+        return repr(value)
+    return value
+
+
+def iter_rows(csv_path, columns=None, cache_dir=None):
+    """
+    Yield rows as {column: str} dicts, like csv.DictReader
+
+    Only the requested columns are loaded; missing values come back as ''.
+    Requested columns absent from the file are left out of the dict, so
+    row.get(name, '') keeps working as before.
+    """
+    if not HAS_PYARROW:
+        with open(csv_path, 'r', encoding='utf-8') as f:
+            reader = csv.DictReader(f)
+            keep = None
+            if columns is not None:
+                keep = [c for c in columns if c in (reader.fieldnames or [])]
+            for row in reader:
+                if keep is None:
+                    yield row
+                else:
+                    yield {c: row.get(c) or '' for c in keep}
+        return
+
+    yield from table_rows(load_table(csv_path, columns, cache_dir))
+
+
+def table_rows(table):
+    """Yield the rows of a snapshot Table as {column: str} dicts"""
+    names = table.column_names
+    for batch in table.to_batches(max_chunksize=BATCH_SIZE):
+        values = [batch.column(i).to_pylist() for i in range(batch.num_columns)]
+        for row in zip(*values):
+            yield {name: _to_text(value) for name, value in zip(names, row)}
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: python -m onemap_lib.snapshot <csv_file> [--force]")
+        sys.exit(1)
+
+    path = build_snapshot(sys.argv[1], force='--force' in sys.argv)
+    schema = pq.read_schema(path)
+    print(f"\nSnapshot: {path}")
+    print(f"Size: {path.stat().st_size / (1024 * 1024):.2f} MB")
+    print(f"Columns: {len(schema.names)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""
+Synthetic Lawley-style OneMap exports for benchmarks
+Writes an export with the real column layout at any scale (10k to 5M rows)
+without holding it in memory. The data is shaped like the Lawley project:
+  - poles numbered LAW.P.<letter><digits>, strung along streets, each
+    with one to twelve records (drops and status updates) at its address
+  - GPS points clustered a few metres around their pole
+  - a skewed field agent workload (a few agents collect most permissions)
+  - Flow Name Groups histories that progress through the workflow, with
+    declines and the odd out-of-order history
+and with known problems injected at configurable rates:
+  - conflicts        a second agent claims an already permitted pole
+  - resubmissions    the same agent submits a pole again
+  - moved poles      a pole recorded at an address on another street
+  - respellings      a pole record with its address written another way
+                     ("12 Shilowa St, Lawley", a dropped letter)
+  - day-first dates  a row whose permission dates are written dd/mm/yyyy
+                     (off by default; a share of rows, not of poles)
+Injected rows get later Property IDs and land a little further down the
+file, as they do in real exports. The same seed gives the same file.
+
+Usage:
+    from onemap_lib.synthetic import generate_export
+
+    truth = generate_export('cache/synthetic/lawley_100000.csv', rows=100_000, seed=1)
+    truth['conflicts']     # injected counts, to check analyzer findings against
+"""
+
+import csv
+import heapq
+import random
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Columns the analyzers read, in export order
+EXPORT_COLUMNS = [
+    'Property ID', '1map NAD ID', 'Job ID', 'Status', 'Flow Name Groups', 'Site', 'Sections', 'PONs',
+    'Location Address', 'lst_mod_by', 'lst_mod_dt', 'date_status_changed', 'Pole Number', 'Drop Number',
+    'Language', 'Survey Date', 'Stand Number', 'Owner or Tenant', 'Field Agent Name (pole permission)',
+    'Date', 'Latitude', 'Longitude', 'Last Modified Pole Permissions By', 'Last Modified Pole Permissions Date',
+    'Contact Person: Name', 'Contact Person: Surname', 'Contact Number (e.g.0123456789)',
+    'Field Agent Name (Home Sign Ups)', 'Last Modified Home Sign Ups By', 'Last Modified Home Sign Ups Date',
+    'Installer Name', 'Last Modified Home Installations Date',
+]
+
+# Real exports have 150+ columns, mostly blank form fields
+DEFAULT_WIDTH = 160
+
+WORKFLOW = [
+    'Pole Permission: Approved',
+    'Home Sign Ups: Approved & Installation Scheduled',
+    'Home Installation: In Progress',
+    'Home Installation: Installed',
+]
+# How far each property got through WORKFLOW (weights for 1..4 steps)
+DEPTH_WEIGHTS = [35, 40, 10, 15]
+
+STREETS = [
+    'SHILOWA', 'AWELANI', 'MAHLANGU', 'RAMODIKE', 'KWENA', 'TAU', 'NKWE', 'PHIRI', 'KGOMO', 'TLOU',
+    'NOKENG', 'MOTHEO', 'LESEDI', 'THABO', 'MPHO', 'TSHEPO', 'NALEDI', 'PULA', 'KHUMO', 'BOITUMELO',
+]
+FIRST_NAMES = [
+    'Thabo', 'Sipho', 'Lerato', 'Nomsa', 'Bongani', 'Zanele', 'Mandla', 'Palesa', 'Kagiso', 'Ayanda',
+    'Lwazi', 'Refilwe', 'Tshepo', 'Naledi', 'Sibusiso', 'Karabo', 'Nthabiseng', 'Musa', 'Dineo', 'Vusi',
+]
+SURNAMES = [
+    'Mokoena', 'Dlamini', 'Nkosi', 'Khumalo', 'Ndlovu', 'Mahlangu', 'Molefe', 'Sithole', 'Zulu', 'Mabaso',
+    'Radebe', 'Ngcobo', 'Baloyi', 'Maluleke', 'Shabalala', 'Mthembu', 'Masilela', 'Chauke', 'Tshabalala', 'Moloi',
+]
+LANGUAGES = ['English', 'isiZulu', 'Sesotho', 'Setswana', 'Xitsonga', 'isiXhosa']
+
+# Lawley estate, south of Johannesburg
+ORIGIN = (-26.37, 27.80)
+AREA_DEGREES = 0.03
+POLE_SPACING = 0.0004   # ~40 m between poles along a street
+GPS_JITTER = 0.00002    # ~2 m spread of readings around a pole
+
+START_DATE = datetime(2025, 4, 1, 7, 0)
+SURVEY_DAYS = 120
+
+# Injected rows are written up to this many rows after their pole
+DELAY_WINDOW = 5000
+
+# Columns rewritten as dd/mm/yyyy in day-first rows
+DAY_FIRST_COLUMNS = ['Last Modified Pole Permissions Date', 'Date']
+
+
+def _timestamp(moment):
+    return f"{moment:%Y/%m/%d %H:%M:%S}.{moment.microsecond // 1000:03d}"
+
+
+def _day_first(row):
+    """Rewrite a row's permission dates as dd/mm/yyyy (the time is lost, as in such exports)"""
+    for column in DAY_FIRST_COLUMNS:
+        value = row.get(column)
+        if value:
+            year, month, day = value[:10].split('/')
+            row[column] = f"{day}/{month}/{year}"
+
+
+class _Street:
+    def __init__(self, rng, index):
+        self.name = STREETS[index % len(STREETS)] + ('' if index < len(STREETS) else f' {index // len(STREETS) + 1}')
+        self.lat = ORIGIN[0] - rng.random() * AREA_DEGREES
+        self.lon = ORIGIN[1] + rng.random() * AREA_DEGREES
+        direction = rng.choice([(1, 0), (0, 1), (0.7, 0.7), (0.7, -0.7)])
+        self.step = (direction[0] * POLE_SPACING, direction[1] * POLE_SPACING)
+        self.poles = 0
+        self.houses = 0
+        self.code = rng.randrange(79_800_000, 79_899_999)
+
+    def address(self):
+        self.houses += 1
+        return f"{self.houses} {self.name} STREET LAWLEY ESTATE LENASIA 1824 GT {self.code} JHB"
+
+    def respell(self, address, rng):
+        """The same address written another way"""
+        house = address.split(' ', 1)[0]
+        variants = [f"{house} {self.name.title()} St, Lawley", f"{house} {self.name} STR LENASIA"]
+        first, _, rest = self.name.partition(' ')
+        if len(first) > 5:
+            # A typo after the first four letters
+            position = rng.randrange(4, len(first))
+            typo = ' '.join(filter(None, [first[:position] + first[position + 1:], rest]))
+            variants.append(f"{house} {typo} STREET LAWLEY ESTATE LENASIA 1824 GT {self.code} JHB")
+        return rng.choice(variants)
+
+    def next_location(self):
+        position = self.poles
+        self.poles += 1
+        return self.lat + self.step[0] * position, self.lon + self.step[1] * position
+
+
+class SyntheticExport:
+    """Streams rows of a synthetic export; see generate_export()"""
+
+    def __init__(self, rows, seed=1, conflict_rate=0.02, resubmission_rate=0.01, moved_rate=0.005,
+                 respelled_rate=0.01, width=DEFAULT_WIDTH, day_first_rate=0.0):
+        self.rows = rows
+        self.rng = random.Random(seed)
+        self.conflict_rate = conflict_rate
+        self.resubmission_rate = resubmission_rate
+        self.moved_rate = moved_rate
+        self.respelled_rate = respelled_rate
+        self.day_first_rate = day_first_rate
+        self.filler = [f'Form Field {n}' for n in range(1, max(0, width - len(EXPORT_COLUMNS)) + 1)]
+
+        # About four rows per pole and 40 poles per street
+        self.streets = [_Street(self.rng, i) for i in range(max(1, rows // 160))]
+        agent_count = min(400, max(12, rows // 2500))
+        names = [f"{first} {surname}" for first in FIRST_NAMES for surname in SURNAMES]
+        self.agents = self.rng.sample(names, agent_count)
+        # Zipf-like workload: a few agents collect most of the permissions
+        weights = [1 / (k + 1) ** 0.8 for k in range(agent_count)]
+        self.agent_weights = [sum(weights[:k + 1]) for k in range(agent_count)]
+
+        self.truth = {
+            'rows': 0, 'poles': 0, 'streets': len(self.streets), 'agents': agent_count,
+            'conflicts': 0, 'resubmissions': 0, 'moved_poles': 0, 'respelled_addresses': 0,
+            'day_first_dates': 0,
+        }
+        self._pending = []  # heap of (write position, sequence, row)
+        self._sequence = 0
+
+    def header(self):
+        return EXPORT_COLUMNS + self.filler
+
+    def _int(self, low, high):
+        """Random integer in [low, high); randrange is several times slower"""
+        return low + int(self.rng.random() * (high - low))
+
+    def _agent(self):
+        return self.rng.choices(self.agents, cum_weights=self.agent_weights)[0]
+
+    def _history(self, depth):
+        rng = self.rng
+        entries = WORKFLOW[:depth]
+        roll = rng.random()
+        if roll < 0.05:
+            entries = ['Pole Permission: Declined']
+        elif roll < 0.08 and depth >= 2:
+            entries = [WORKFLOW[0], 'Home Sign Ups: Declined']
+        elif roll < 0.085 and depth >= 3:
+            entries = [entries[1], entries[0]] + entries[2:]
+        status = entries[-1]
+        if status == WORKFLOW[0] and rng.random() < 0.01:
+            status += ' '  # as in real exports
+        return ', '.join(entries), status
+
+    def _row(self, pole, address, location, agent, surveyed, depth):
+        """One property row (without Property ID)"""
+        rng = self.rng
+        history, status = self._history(depth)
+        permitted = surveyed + timedelta(seconds=self._int(60, 3600), microseconds=self._int(0, 1_000_000))
+        changed = permitted + timedelta(days=self._int(0, 20) * (depth - 1), seconds=self._int(0, 86_400))
+        has_gps = location is not None and rng.random() < 0.95
+        row = {
+            '1map NAD ID': str(self._int(105_000_000, 106_000_000)),
+            'Status': status,
+            'Flow Name Groups': history,
+            'Site': 'LAW',
+            'Sections': str(self._int(1, 8)),
+            'PONs': str(self._int(1, 200)),
+            'Location Address': address,
+            'lst_mod_by': f"ftlawhh{self._int(1, 60)}@fibertime.com",
+            'lst_mod_dt': f"{changed:%Y-%m-%d %H:%M:%S.%f}+02",
+            'date_status_changed': _timestamp(changed),
+            'Pole Number': pole,
+            'Drop Number': f"DR{self._int(1_700_000, 1_800_000)}" if depth > 1 else '',
+            'Language': rng.choice(LANGUAGES),
+            'Survey Date': _timestamp(surveyed),
+            'Stand Number': str(self._int(1, 5000)),
+            'Owner or Tenant': rng.choice(['Owner', 'Tenant']),
+            'Field Agent Name (pole permission)': agent if rng.random() < 0.97 else '',
+            'Date': f"{permitted:%Y/%m/%d}",
+            'Latitude': f"{location[0] + rng.gauss(0, GPS_JITTER):.7f}" if has_gps else '',
+            'Longitude': f"{location[1] + rng.gauss(0, GPS_JITTER):.7f}" if has_gps else '',
+            'Last Modified Pole Permissions By': f"ftlawpp{self._int(1, 40)}@fibertime.com",
+            'Last Modified Pole Permissions Date': _timestamp(permitted),
+            'Contact Person: Name': rng.choice(FIRST_NAMES),
+            'Contact Person: Surname': rng.choice(SURNAMES),
+            'Contact Number (e.g.0123456789)': f"0{self._int(600_000_000, 849_999_999)}",
+        }
+        if depth > 1:
+            row['Field Agent Name (Home Sign Ups)'] = self._agent()
+            row['Last Modified Home Sign Ups Date'] = _timestamp(changed)
+        if depth > 2:
+            row['Installer Name'] = self._agent()
+            row['Last Modified Home Installations Date'] = _timestamp(changed)
+        return row
+
+    def _defer(self, position, row):
+        self._sequence += 1
+        heapq.heappush(self._pending, (position + self._int(1, DELAY_WINDOW), self._sequence, row))
+
+    def _pole_rows(self, number, position):
+        """Rows of one pole, deferring injected ones"""
+        rng = self.rng
+        street = self.streets[number % len(self.streets)]
+        location = street.next_location()
+        address = street.address()
+        pole = f"LAW.P.{chr(65 + number % 26)}{number // 26 + 1:03d}"
+        agent = self._agent()
+        surveyed = START_DATE + timedelta(days=self._int(0, SURVEY_DAYS), seconds=self._int(0, 36_000),
+                                          microseconds=self._int(0, 1_000_000))
+        self.truth['poles'] += 1
+
+        rows = []
+        for _ in range(min(12, max(1, int(rng.expovariate(1 / 3.5)) + 1))):
+            depth = rng.choices(range(1, 5), weights=DEPTH_WEIGHTS)[0]
+            rows.append(self._row(pole, address, location, agent, surveyed, depth))
+            surveyed += timedelta(seconds=self._int(30, 900))
+
+        later = surveyed + timedelta(days=self._int(1, 30))
+        if rng.random() < self.conflict_rate and len(self.agents) > 1:
+            other = self._agent()
+            while other == agent:
+                other = self._agent()
+            self._defer(position, ('conflicts', self._row(pole, address, location, other, later, 1)))
+        if rng.random() < self.resubmission_rate:
+            self._defer(position, ('resubmissions', self._row(pole, address, location, agent, later, 1)))
+        if rng.random() < self.moved_rate and len(self.streets) > 1:
+            elsewhere = rng.choice(self.streets)
+            while elsewhere is street:
+                elsewhere = rng.choice(self.streets)
+            self._defer(position, ('moved_poles', self._row(pole, elsewhere.address(),
+                                                            elsewhere.next_location(), agent, later, 1)))
+        if rng.random() < self.respelled_rate:
+            self._defer(position, ('respelled_addresses', self._row(pole, street.respell(address, rng),
+                                                                    location, agent, later, 1)))
+
+        # A few properties have no pole yet
+        if rng.random() < 0.05:
+            rows.append(self._row('', street.address(), None, '', surveyed, 1))
+        return rows
+
+    def __iter__(self):
+        """Yield rows as {column: value} dicts (blank columns left out), exactly self.rows of them"""
+        property_id = 200_000
+        poles = 0
+        written = 0
+        batch = []
+        while written < self.rows:
+            if self._pending and self._pending[0][0] <= written:
+                _, _, (kind, row) = heapq.heappop(self._pending)
+                self.truth[kind] += 1
+            elif batch:
+                row = batch.pop()
+            else:
+                batch = self._pole_rows(poles, written)
+                batch.reverse()
+                poles += 1
+                continue
+            # No draw at rate 0, so a seed gives the same file as before
+            if self.day_first_rate and self.rng.random() < self.day_first_rate:
+                _day_first(row)
+                self.truth['day_first_dates'] += 1
+            property_id += self._int(1, 4)
+            row['Property ID'] = str(property_id)
+            written += 1
+            yield row
+        self.truth['rows'] = written
+
+
+def generate_export(path, rows, seed=1, conflict_rate=0.02, resubmission_rate=0.01, moved_rate=0.005,
+                    respelled_rate=0.01, width=DEFAULT_WIDTH, day_first_rate=0.0):
+    """Write a synthetic export of `rows` rows to path; returns the injected counts"""
+    export = SyntheticExport(rows, seed, conflict_rate, resubmission_rate, moved_rate, respelled_rate, width,
+                             day_first_rate)
+    columns = export.header()
+    blank = [''] * len(columns)
+    index = {name: i for i, name in enumerate(columns)}
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    partial = path.with_name(path.name + '.part')
+    with open(partial, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(columns)
+        for row in export:
+            values = blank.copy()
+            for name, value in row.items():
+                values[index[name]] = value
+            writer.writerow(values)
+    partial.replace(path)
+    return export.truth
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Compiled workflow model for the `Flow Name Groups` history
+Every workflow step gets a bit, so a history such as
+"Pole Permission: Approved, Home Sign Ups: Approved" compiles to a small
+integer: the steps reached plus flags for out-of-order and unrecognised
+entries. Each distinct history string is parsed once; progression,
+regression and skipped-step checks then run as bitwise NumPy operations
+over whole arrays of codes.
+
+Usage:
+    from onemap_lib.workflow import WorkflowModel, WorkflowRows
+
+    model = WorkflowModel()
+    codes, depths = model.encode(row['Flow Name Groups'] for row in rows)
+    skipped = model.skipped_steps(codes)          # bool array
+
+    # Per-property summary: collect rows, then compile and group in bulk
+    workflow_rows = WorkflowRows(model)
+    workflow_rows.add(property_index, row['Flow Name Groups'], row['Status'], row['Survey Date'])
+    summary = workflow_rows.summarize()
+    regressed = summary.regressed()
+"""
+
+import numpy as np
+
+from onemap_lib.dates import DateParser
+
+# Workflow steps in the order a property moves through them
+WORKFLOW_STEPS = ['Pole Permission', 'Home Sign Ups', 'Home Installation']
+
+# Entry that marks the end of the workflow
+COMPLETED_STATUS = 'Home Installation: Installed'
+
+# Flag bits, kept above the step bits
+MAX_STEPS = 12
+OUT_OF_ORDER = 1 << 12  # an earlier step was recorded after a later one
+UNKNOWN_STEP = 1 << 13  # an entry that matches no known step
+COMPLETED = 1 << 14     # COMPLETED_STATUS appears in the history
+
+CODE_DTYPE = np.uint16
+
+
+class WorkflowModel:
+    """Compiles workflow histories and statuses to bitset codes"""
+
+    def __init__(self, steps=WORKFLOW_STEPS):
+        if len(steps) > MAX_STEPS:
+            raise ValueError(f"At most {MAX_STEPS} workflow steps fit in a code")
+        self.steps = list(steps)
+        self.step_bits = {step: 1 << i for i, step in enumerate(self.steps)}
+        self.all_steps = (1 << len(self.steps)) - 1
+        self._compiled = {}
+        self._entry_codes = {}
+
+        # Highest set step bit for every possible step mask
+        masks = np.arange(self.all_steps + 1)
+        self._highest = np.zeros(self.all_steps + 1, dtype=CODE_DTYPE)
+        for bit in (1 << i for i in range(len(self.steps))):
+            self._highest[(masks & bit) != 0] = bit
+
+    def compile(self, history):
+        """
+        Return (code, depth) for one history string
+
+        depth counts comma-separated entries, like len(history.split(',')).
+        """
+        compiled = self._compiled.get(history)
+        if compiled is not None:
+            return compiled
+
+        code = 0
+        depth = 0
+        text = history.strip()
+        if text:
+            entries = text.split(',')
+            depth = len(entries)
+            reached = 0
+            for entry in entries:
+                entry_code = self._entry_codes.get(entry)
+                if entry_code is None:
+                    entry_code = self._entry_codes[entry] = self._compile_entry(entry.strip())
+                bit = entry_code & self.all_steps
+                if bit and bit < reached:
+                    code |= OUT_OF_ORDER
+                reached = max(reached, bit)
+                code |= entry_code
+
+        compiled = self._compiled[history] = (code, depth)
+        return compiled
+
+    def _compile_entry(self, entry):
+        """Code of a single 'Step: Outcome' entry"""
+        if not entry:
+            return 0
+        bit = self.step_bits.get(entry.split(':', 1)[0].strip(), 0)
+        if not bit:
+            return UNKNOWN_STEP
+        return bit | (COMPLETED if entry == COMPLETED_STATUS else 0)
+
+    def encode(self, histories):
+        """Compile an iterable of histories (or statuses) to (codes, depths) arrays"""
+        # Each distinct string is compiled once, then expanded by index
+        index = {}
+        positions = np.fromiter((index.setdefault(h or '', len(index)) for h in histories), dtype=np.int64)
+        compiled = [self.compile(h) for h in index]
+        codes = np.array([c for c, _ in compiled], dtype=CODE_DTYPE)
+        depths = np.array([d for _, d in compiled], dtype=np.int32)
+        return codes[positions], depths[positions]
+
+    def step_names(self, code):
+        """Names of the steps set in one code"""
+        return [step for step, bit in self.step_bits.items() if code & bit]
+
+    # Vectorized checks over code arrays
+
+    def reached(self, codes):
+        """Step bits of each code"""
+        return np.asarray(codes) & self.all_steps
+
+    def highest_step(self, codes):
+        """Bit of the furthest step reached (0 if none)"""
+        return self._highest[self.reached(codes)]
+
+    def skipped_steps(self, codes):
+        """True where a step before the furthest one reached is missing"""
+        steps = self.reached(codes)
+        expected = self.highest_step(codes).astype(np.int64) * 2 - 1
+        return (steps != 0) & ((expected & ~steps) != 0)
+
+    def out_of_order(self, codes):
+        return (np.asarray(codes) & OUT_OF_ORDER) != 0
+
+    def unknown_steps(self, codes):
+        return (np.asarray(codes) & UNKNOWN_STEP) != 0
+
+    def completed(self, codes):
+        return (np.asarray(codes) & COMPLETED) != 0
+
+    def in_order(self, codes):
+        """Histories that follow the workflow: known steps, in order, none skipped"""
+        codes = np.asarray(codes)
+        return (self.reached(codes) != 0) & ((codes & (OUT_OF_ORDER | UNKNOWN_STEP)) == 0) & ~self.skipped_steps(codes)
+
+    def regressed(self, history_codes, status_codes):
+        """True where the current status is at an earlier step than the history reached"""
+        status_step = self.highest_step(status_codes)
+        return (status_step != 0) & (status_step < self.highest_step(history_codes))
+
+    def step_counts(self, codes):
+        """{step: number of codes that reached it}"""
+        steps = self.reached(codes)
+        return {step: int(np.count_nonzero(steps & bit)) for step, bit in self.step_bits.items()}
+
+    def summarize(self, groups, history_codes, status_codes, depths=None, order=None):
+        """
+        Combine per-row arrays into one workflow summary per group (property)
+
+        groups are integer ids 0..n-1. Within a group, rows are ordered by
+        `order` (e.g. survey dates; ties keep row order) and the last row's
+        status is the group's current status.
+        """
+        return WorkflowSummary(self, groups, history_codes, status_codes, depths, order)
+
+
+class WorkflowRows:
+    """
+    Per-row workflow fields collected while streaming a CSV
+    Strings are kept as-is and compiled in bulk by summarize(), which keeps
+    the per-row cost to a few list appends.
+    """
+
+    def __init__(self, model=None):
+        self.model = model or WorkflowModel()
+        self.groups = []
+        self.histories = []
+        self.statuses = []
+        self.dates = []
+
+    def add(self, group, history, status='', date=''):
+        self.groups.append(group)
+        self.histories.append(history)
+        self.statuses.append(status)
+        self.dates.append(date)
+
+    def __len__(self):
+        return len(self.groups)
+
+    def summarize(self):
+        """
+        WorkflowSummary per group, latest status taken by parsed date
+        Rows whose date is blank or does not parse count as the oldest.
+        """
+        history_codes, depths = self.model.encode(self.histories)
+        status_codes, _ = self.model.encode(self.statuses)
+        order = DateParser(sample=self.dates).to_epoch(self.dates) if self.dates else None
+        return self.model.summarize(self.groups, history_codes, status_codes, depths, order)
+
+
+class WorkflowSummary:
+    """Per-group arrays: updates, history (OR of codes), max_depth, status"""
+
+    def __init__(self, model, groups, history_codes, status_codes, depths=None, order=None):
+        self.model = model
+        groups = np.asarray(groups, dtype=np.int64)
+        history_codes = np.asarray(history_codes, dtype=CODE_DTYPE)
+        status_codes = np.asarray(status_codes, dtype=CODE_DTYPE)
+
+        if len(groups) == 0:
+            self.groups = groups
+            self.updates = np.zeros(0, dtype=np.int64)
+            self.history = np.zeros(0, dtype=CODE_DTYPE)
+            self.max_depth = np.zeros(0, dtype=np.int32)
+            self.status = np.zeros(0, dtype=CODE_DTYPE)
+            return
+
+        keys = (groups,) if order is None else (np.asarray(order), groups)
+        rows = np.lexsort(keys)
+        sorted_groups = groups[rows]
+        starts = np.flatnonzero(np.r_[True, sorted_groups[1:] != sorted_groups[:-1]])
+        ends = np.r_[starts[1:], len(rows)] - 1
+
+        self.groups = sorted_groups[starts]
+        self.updates = ends - starts + 1
+        self.history = np.bitwise_or.reduceat(history_codes[rows], starts)
+        self.status = status_codes[rows[ends]]
+        self.max_depth = (np.maximum.reduceat(np.asarray(depths)[rows], starts)
+                          if depths is not None else np.zeros(len(starts), dtype=np.int32))
+
+    def regressed(self):
+        return self.model.regressed(self.history, self.status)
+
+    def skipped_steps(self):
+        return self.model.skipped_steps(self.history)
+
+    def out_of_order(self):
+        return self.model.out_of_order(self.history)
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Benchmark the OneMap analyzers on synthetic exports of increasing size
+Generates a synthetic Lawley-style export for each --rows size (cached in
+cache/synthetic/), runs each analyzer on it in its own scratch directory and
+records the wall time and peak memory (max RSS) of the run. The marginal
+time per row between sizes shows how each analyzer scales.
+
+Usage (from the OneMap directory):
+    python3 scripts/benchmark_analyzers.py [--rows 10k,100k,1m] [--only gps,true_duplicates,workflow]
+                                           [--repeat 1] [--seed 1] [--day-first-rate 0]
+                                           [--save results.json] [--baseline results.json] [--tolerance 0.25]
+
+Analyzers: snapshot (columnar cache build), gps, true_duplicates, workflow,
+first_permissions, chunks (split untimed, then analyze_chunks.py).
+
+--day-first-rate writes that share of rows' permission dates as dd/mm/yyyy,
+so the date parsing of mixed-format exports is part of the timing.
+
+With --baseline, exits with status 1 if any analyzer got slower or used more
+memory than the saved results by more than the tolerance.
+"""
+
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+ONEMAP_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ONEMAP_DIR))
+
+from onemap_lib import synthetic
+from onemap_lib.snapshot import HAS_PYARROW, file_hash
+
+SYNTHETIC_DIR = ONEMAP_DIR / 'cache' / 'synthetic'
+
+CSV = '{csv}'
+
+# name -> command line (script relative to ONEMAP_DIR, then arguments)
+ANALYZERS = {
+    'snapshot': ['onemap_lib/snapshot.py', CSV, '--force'],
+    'gps': ['scripts/payment_verification/analyze_gps_duplicates.py', CSV],
+    'true_duplicates': ['identify_true_duplicates.py', CSV],
+    'workflow': ['scripts/data_analysis/reanalyze_with_workflow.py', CSV],
+    'first_permissions': ['extract_first_permissions_complete.py', CSV],
+    # One worker, so its memory is in the measured process
+    'chunks': ['analyze_chunks.py', '--workers', '1'],
+}
+
+# Untimed preparation run in the same scratch directory first
+SETUP = {
+    'chunks': ['scripts/utilities/split_large_csv.py', CSV, 'rows', '20000'],
+}
+
+# Time differences below this are noise, not regressions
+NOISE_SECONDS = 0.5
+
+
+def parse_size(text):
+    """'10k' -> 10000, '5m' -> 5000000"""
+    text = text.strip().lower().replace('_', '')
+    scale = {'k': 1_000, 'm': 1_000_000}.get(text[-1:], 1)
+    return int(float(text.rstrip('km')) * scale)
+
+
+def synthetic_export(rows, seed, day_first_rate=0.0):
+    """Path of a cached synthetic export of `rows` rows, generated if missing or stale"""
+    suffix = f'_dayfirst{day_first_rate:g}' if day_first_rate else ''
+    path = SYNTHETIC_DIR / f'lawley_{rows}_seed{seed}{suffix}.csv'
+    truth_path = path.with_name(path.name + '.truth.json')
+    generator = file_hash(synthetic.__file__)
+
+    if path.exists() and truth_path.exists():
+        with open(truth_path, 'r', encoding='utf-8') as f:
+            truth = json.load(f)
+        if truth.get('generator') == generator:
+            return path, truth
+
+    print(f"Generating synthetic export: {rows:,} rows...")
+    start = time.perf_counter()
+    truth = synthetic.generate_export(path, rows, seed, day_first_rate=day_first_rate)
+    truth['generator'] = generator
+    with open(truth_path, 'w', encoding='utf-8') as f:
+        json.dump(truth, f, indent=2)
+    print(f"✓ {path.name} in {time.perf_counter() - start:.1f}s "
+          f"({path.stat().st_size / 1e6:,.0f} MB, {truth['poles']:,} poles)")
+    return path, truth
+
+
+def run_command(command, csv_path, workdir):
+    """Run one script in workdir; returns (seconds, peak RSS in MB)"""
+    Path(workdir, 'reports').mkdir(exist_ok=True)
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [str(ONEMAP_DIR), env.get('PYTHONPATH')]))
+    env['PYTHONHASHSEED'] = '0'
+    args = [str(csv_path) if arg == CSV else arg for arg in command[1:]]
+
+    with open(Path(workdir, 'stderr.log'), 'w+b') as stderr:
+        start = time.perf_counter()
+        process = subprocess.Popen([sys.executable, str(ONEMAP_DIR / command[0])] + args,
+                                   cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=stderr)
+        # wait4 gives this child's own resource usage, including its peak RSS
+        _, status, usage = os.wait4(process.pid, 0)
+        elapsed = time.perf_counter() - start
+        process.returncode = os.waitstatus_to_exitcode(status)
+        if process.returncode != 0:
+            stderr.seek(0)
+            raise RuntimeError(f"{command[0]} failed:\n{stderr.read().decode(errors='replace')}")
+
+    # ru_maxrss is in kilobytes on Linux, bytes on macOS
+    peak = usage.ru_maxrss / (1 << 20 if sys.platform == 'darwin' else 1 << 10)
+    return elapsed, peak
+
+
+def benchmark(name, csv_path, repeat):
+    """Best time and peak memory of `repeat` runs of one analyzer"""
+    best = None
+    peak = 0.0
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory(prefix=f'onemap_bench_{name}_') as workdir:
+            if name in SETUP:
+                run_command(SETUP[name], csv_path, workdir)
+            elapsed, memory = run_command(ANALYZERS[name], csv_path, workdir)
+        best = elapsed if best is None else min(best, elapsed)
+        peak = max(peak, memory)
+    return best, peak
+
+
+def compare(results, baseline, tolerance):
+    """List of regression messages against the baseline results"""
+    previous = {(r['analyzer'], r['rows']): r for r in baseline['results']}
+    regressions = []
+    for result in results:
+        before = previous.get((result['analyzer'], result['rows']))
+        if before is None:
+            continue
+        label = f"{result['analyzer']} at {result['rows']:,} rows"
+        if (result['seconds'] > before['seconds'] * (1 + tolerance)
+                and result['seconds'] - before['seconds'] > NOISE_SECONDS):
+            regressions.append(f"{label}: {before['seconds']:.2f}s → {result['seconds']:.2f}s")
+        if result['peak_mb'] > before['peak_mb'] * (1 + tolerance):
+            regressions.append(f"{label}: {before['peak_mb']:,.0f} MB → {result['peak_mb']:,.0f} MB")
+    return regressions
+
+
+def main():
+    args = sys.argv[1:]
+    if '--help' in args or '-h' in args:
+        print(__doc__)
+        return 0
+
+    def option(name, default):
+        if name in args:
+            position = args.index(name)
+            value = args[position + 1]
+            del args[position:position + 2]
+            return value
+        return default
+
+    sizes = [parse_size(s) for s in option('--rows', '10k,100k').split(',') if s.strip()]
+    names = [n.strip() for n in option('--only', ','.join(ANALYZERS)).split(',') if n.strip()]
+    repeat = max(1, int(option('--repeat', 1)))
+    seed = int(option('--seed', 1))
+    day_first_rate = float(option('--day-first-rate', 0))
+    save_path = option('--save', None)
+    baseline_path = option('--baseline', None)
+    tolerance = float(option('--tolerance', 0.25))
+
+    unknown = [n for n in names if n not in ANALYZERS]
+    if unknown or args:
+        print(f"Unknown analyzers: {', '.join(unknown)} (choose from: {', '.join(ANALYZERS)})"
+              if unknown else __doc__)
+        return 1
+    if not HAS_PYARROW and 'snapshot' in names:
+        names.remove('snapshot')
+
+    print("=== ONEMAP ANALYZER BENCHMARK ===")
+    print(f"Sizes: {', '.join(f'{n:,}' for n in sizes)} rows; best of {repeat} run(s)\n")
+
+    results = []
+    for rows in sizes:
+        csv_path, truth = synthetic_export(rows, seed, day_first_rate)
+        print(f"{rows:,} rows: {truth['conflicts']:,} conflicts, {truth['resubmissions']:,} resubmissions, "
+              f"{truth['moved_poles']:,} moved poles, {truth['respelled_addresses']:,} respelled addresses injected")
+        # Every analyzer reads the snapshot; build it outside the timed runs
+        if HAS_PYARROW:
+            with tempfile.TemporaryDirectory(prefix='onemap_bench_') as workdir:
+                run_command(['onemap_lib/snapshot.py', CSV], csv_path, workdir)
+        for name in names:
+            seconds, peak = benchmark(name, csv_path, repeat)
+            results.append({'analyzer': name, 'rows': rows, 'seconds': round(seconds, 3), 'peak_mb': round(peak, 1)})
+            print(f"  {name:<18} {rows:>10,} rows {seconds:>8.2f}s {peak:>8,.0f} MB")
+
+    previous = {}
+    print(f"\n{'Analyzer':<18} {'Rows':>10} {'Time':>9} {'µs/row':>8} {'Marginal':>9} {'Peak MB':>9}")
+    for result in sorted(results, key=lambda r: (names.index(r['analyzer']), r['rows'])):
+        per_row = result['seconds'] / result['rows'] * 1e6
+        # Cost of the extra rows since the next smaller size: start-up time
+        # cancels out, so a growing value means worse than linear scaling
+        marginal = ''
+        before = previous.get(result['analyzer'])
+        if before and result['rows'] > before['rows']:
+            marginal = f"{(result['seconds'] - before['seconds']) / (result['rows'] - before['rows']) * 1e6:.1f}"
+        previous[result['analyzer']] = result
+        print(f"{result['analyzer']:<18} {result['rows']:>10,} {result['seconds']:>8.2f}s {per_row:>8.1f} "
+              f"{marginal:>9} {result['peak_mb']:>9,.0f}")
+
+    if save_path:
+        with open(save_path, 'w', encoding='utf-8') as f:
+            json.dump({'created': datetime.now().isoformat(), 'python': platform.python_version(),
+                       'seed': seed, 'day_first_rate': day_first_rate, 'results': results}, f, indent=2)
+        print(f"\n✓ Results saved to {save_path}")
+
+    if baseline_path:
+        with open(baseline_path, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, tolerance)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regression(s) against {baseline_path} (tolerance {tolerance:.0%}):")
+            for message in regressions:
+                print(f"    {message}")
+            return 1
+        print(f"\n✓ No regressions against {baseline_path} (tolerance {tolerance:.0%})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Benchmark the Python and DuckDB analyzer backends against each other
+Each analysis is run with --backend python and --backend duckdb in its own
+scratch directory; the timings are reported and the report files of both
+backends are compared byte for byte (generation timestamps masked).
+
+Usage (from the OneMap directory):
+    python3 scripts/benchmark_backends.py <export.csv> [--only gps,conflicts,first_permissions]
+                                          [--repeat 3]
+
+Exits with status 1 if any report differs between the backends.
+"""
+
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ONEMAP_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ONEMAP_DIR))
+
+from onemap_lib.snapshot import HAS_PYARROW, build_snapshot
+
+ANALYSES = {
+    'gps': 'scripts/payment_verification/analyze_gps_duplicates.py',
+    'conflicts': 'export_pole_conflicts.py',
+    'first_permissions': 'extract_first_permissions_complete.py',
+}
+
+BACKENDS = ['python', 'duckdb']
+
+# Run-time stamps written into otherwise deterministic reports
+TIMESTAMP_PATTERNS = [
+    re.compile(rb'"(timestamp|report_date|generated)": "[^"]*"'),
+    re.compile(rb'^Generated: .*$', re.MULTILINE),
+]
+
+
+def run_analysis(script, csv_path, backend, workdir):
+    """Run one analysis script in workdir and return its wall time"""
+    Path(workdir, 'reports').mkdir(exist_ok=True)
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [str(ONEMAP_DIR), env.get('PYTHONPATH')]))
+    # Reports list set contents; a fixed hash seed makes both runs iterate alike
+    env['PYTHONHASHSEED'] = '0'
+
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, str(ONEMAP_DIR / script), str(csv_path), '--backend', backend],
+        cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE
+    )
+    elapsed = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(f"{script} --backend {backend} failed:\n{result.stderr.decode(errors='replace')}")
+    return elapsed
+
+
+def read_outputs(workdir):
+    """{relative path: contents with timestamps masked} for every file written"""
+    outputs = {}
+    for path in sorted(Path(workdir).rglob('*')):
+        if path.is_file():
+            data = path.read_bytes()
+            for pattern in TIMESTAMP_PATTERNS:
+                data = pattern.sub(b'<timestamp>', data)
+            outputs[str(path.relative_to(workdir))] = data
+    return outputs
+
+
+def compare_outputs(expected, actual):
+    """List of report paths that are missing or differ"""
+    differences = []
+    for name in sorted(set(expected) | set(actual)):
+        if expected.get(name) != actual.get(name):
+            differences.append(name)
+    return differences
+
+
+def benchmark(csv_path, names, repeat):
+    results = []
+    for name in names:
+        timings = {}
+        outputs = {}
+        for backend in BACKENDS:
+            best = None
+            for _ in range(repeat):
+                with tempfile.TemporaryDirectory(prefix=f'onemap_{name}_{backend}_') as workdir:
+                    elapsed = run_analysis(ANALYSES[name], csv_path, backend, workdir)
+                    outputs[backend] = read_outputs(workdir)
+                best = elapsed if best is None else min(best, elapsed)
+            timings[backend] = best
+
+        differences = compare_outputs(outputs['python'], outputs['duckdb'])
+        results.append((name, timings, len(outputs['python']), differences))
+    return results
+
+
+def main():
+    args = sys.argv[1:]
+    names = list(ANALYSES)
+    repeat = 3
+    if '--only' in args:
+        position = args.index('--only')
+        names = [n.strip() for n in args[position + 1].split(',') if n.strip()]
+        del args[position:position + 2]
+        unknown = [n for n in names if n not in ANALYSES]
+        if unknown:
+            print(f"Unknown analyses: {', '.join(unknown)} (choose from: {', '.join(ANALYSES)})")
+            sys.exit(1)
+    if '--repeat' in args:
+        position = args.index('--repeat')
+        repeat = max(1, int(args[position + 1]))
+        del args[position:position + 2]
+
+    if not args:
+        print(__doc__)
+        sys.exit(1)
+    csv_path = Path(args[0]).resolve()
+
+    print("=== ONEMAP BACKEND BENCHMARK ===")
+    print(f"Export: {csv_path}")
+    print(f"Best of {repeat} run(s) per backend\n")
+
+    # Both backends read the snapshot; build it outside the timed runs
+    if HAS_PYARROW:
+        build_snapshot(csv_path)
+
+    results = benchmark(csv_path, names, repeat)
+
+    print(f"\n{'Analysis':<20} {'Python':>10} {'DuckDB':>10} {'Speedup':>9}  Reports")
+    all_identical = True
+    for name, timings, report_count, differences in results:
+        speedup = timings['python'] / timings['duckdb'] if timings['duckdb'] else 0
+        status = f"{report_count} identical" if not differences else f"{len(differences)} DIFFER"
+        print(f"{name:<20} {timings['python']:>9.2f}s {timings['duckdb']:>9.2f}s {speedup:>8.2f}x  {status}")
+        for path in differences:
+            print(f"    ❌ {path}")
+        all_identical = all_identical and not differences
+
+    if not all_identical:
+        sys.exit(1)
+    print("\n✓ Both backends wrote identical reports")
+
+
+if __name__ == "__main__":
+    main()
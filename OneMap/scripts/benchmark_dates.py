@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Benchmark date parsing on synthetic OneMap date columns
+Compares, per column layout:
+  - strptime per value, trying each known format in turn (the old parse_date)
+  - DateParser.parse, dominant format first and cached per distinct string
+  - to_epoch, whole-column conversion to epoch integers
+and checks that all three agree.
+
+Usage (from the OneMap directory):
+    python3 scripts/benchmark_dates.py [--count 1000000] [--distinct 20000]
+
+--distinct sets how many different dates a column holds; "all" makes every
+value unique (millisecond Survey Dates). The uncached strptime loop is timed
+on the first 100,000 values and scaled up (marked *) - a failed strptime
+raises, so a dd/mm/yyyy column takes minutes per million that way.
+"""
+
+import random
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from onemap_lib.dates import DATE_FORMATS, EPOCH, MICROSECOND, DateParser, to_epoch
+
+NAIVE_LIMIT = 100_000
+
+COLUMNS = {
+    'Survey Date': lambda dt: dt.strftime('%Y/%m/%d %H:%M:%S.') + f"{dt.microsecond // 1000:03d}",
+    'ISO timestamp': lambda dt: dt.strftime('%Y-%m-%dT%H:%M:%S'),
+    'dd/mm/yyyy': lambda dt: dt.strftime('%d/%m/%Y'),
+}
+
+
+def option(args, name, default):
+    if name in args:
+        return args[args.index(name) + 1]
+    return default
+
+
+def make_column(layout, count, distinct, seed=1):
+    """count date strings in one layout, drawn from `distinct` values"""
+    rng = random.Random(seed)
+    start = datetime(2025, 1, 1).timestamp()
+
+    def value():
+        return COLUMNS[layout](datetime.fromtimestamp(start + rng.random() * 200 * 86400))
+
+    if distinct is None:
+        return [value() for _ in range(count)]
+    pool = [value() for _ in range(distinct)]
+    return [rng.choice(pool) for _ in range(count)]
+
+
+def naive_epochs(values):
+    """strptime every value against each format in turn, no cache"""
+    epochs = []
+    for value in values:
+        epoch = None
+        for fmt in DATE_FORMATS:
+            try:
+                epoch = (datetime.strptime(value.strip(), fmt) - EPOCH) // MICROSECOND
+                break
+            except ValueError:
+                continue
+        epochs.append(epoch)
+    return epochs
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    args = sys.argv[1:]
+    if '--help' in args or '-h' in args:
+        print(__doc__)
+        return 0
+    count = int(option(args, '--count', 1_000_000))
+    distinct = option(args, '--distinct', '20000')
+    distinct = None if distinct == 'all' else int(distinct)
+
+    print("=== DATE PARSING BENCHMARK ===")
+    print(f"{count:,} values per column, {'all' if distinct is None else f'{distinct:,}'} distinct\n")
+    scaled = '*' if count > NAIVE_LIMIT else ' '
+    print(f"{'Column':<16} {'strptime':>10} {'DateParser':>11} {'to_epoch':>10} {'Speedup':>9}  Match")
+
+    all_match = True
+    for layout in COLUMNS:
+        values = make_column(layout, count, distinct)
+
+        naive_values = values[:NAIVE_LIMIT]
+        expected, naive_time = timed(naive_epochs, naive_values)
+        naive_time *= len(values) / len(naive_values)
+
+        def memoized(values):
+            parser = DateParser(sample=values)
+            return [parser.epoch(v) for v in values]
+
+        cached, cached_time = timed(memoized, values)
+        vectorized, vector_time = timed(to_epoch, values)
+
+        match = cached[:len(expected)] == expected and vectorized[:len(expected)].tolist() == expected
+        all_match &= match
+        print(f"{layout:<16} {naive_time:>8.2f}s{scaled} {cached_time:>10.2f}s {vector_time:>9.2f}s "
+              f"{naive_time / vector_time:>8.1f}x  {'✓' if match else '❌'}")
+
+    if not all_match:
+        print("\n❌ Parsers disagree")
+        return 1
+    print("\n✓ All parsers agree")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Benchmark Firestore bulk writes against the local emulator
+Writes the same synthetic pole documents with:
+  - one batch at a time, fixed size (the old import loop)
+  - ConcurrentBatchWriter at each --in-flight limit, adaptive batch size
+and checks that every document arrived. The collection is cleared through
+the emulator between runs.
+
+Only runs against the emulator - start it and point the script at it:
+    firebase emulators:start --only firestore
+    FIRESTORE_EMULATOR_HOST=localhost:8080 python3 scripts/benchmark_firestore_writer.py \
+        [--count 20000] [--in-flight 2,4,8,16] [--project demo-onemap]
+"""
+
+import os
+import random
+import sys
+import urllib.request
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from onemap_lib.firestore_writer import EMULATOR_ENV, ConcurrentBatchWriter, connect
+
+COLLECTION = 'benchmark-poles'
+
+
+def option(args, name, default):
+    if name in args:
+        return args[args.index(name) + 1]
+    return default
+
+
+def make_poles(count, seed=1):
+    """count pole documents shaped like poles-with-drops records"""
+    rng = random.Random(seed)
+    poles = []
+    for i in range(count):
+        drops = [f'DR{1_000_000 + i * 12 + d}' for d in range(rng.randrange(13))]
+        poles.append({
+            'poleNumber': f'LAW.P.{chr(65 + i // 100_000 % 26)}{i % 100_000:05d}',
+            'poleType': rng.choice(['feeder', 'distribution', 'unknown']),
+            'height': '7m',
+            'diameter': rng.choice(['140-160mm', '120-140mm']),
+            'status': rng.choice(['Pole Permission: Approved', 'Pole Permission: Declined', '']),
+            'location': {'latitude': -26.37 - rng.random() / 10, 'longitude': 27.80 + rng.random() / 10},
+            'ponNumber': str(rng.randrange(1, 200)),
+            'zoneNumber': str(rng.randrange(1, 20)),
+            'connectedDrops': drops,
+            'dropCount': len(drops),
+        })
+    return poles
+
+
+def clear_emulator(project):
+    """Delete every document in the emulator database"""
+    url = f"http://{os.environ[EMULATOR_ENV]}/emulator/v1/projects/{project}/databases/(default)/documents"
+    urllib.request.urlopen(urllib.request.Request(url, method='DELETE')).close()
+
+
+def run(db, project, poles, **settings):
+    clear_emulator(project)
+    collection = db.collection(COLLECTION)
+    with ConcurrentBatchWriter(db, progress=None, **settings) as writer:
+        for i, pole in enumerate(poles):
+            writer.set(collection.document(f'pole-{i:07d}'), pole)
+    stored = collection.count().get()[0][0].value
+    return writer.stats(), stored
+
+
+def main():
+    args = sys.argv[1:]
+    if '--help' in args or '-h' in args:
+        print(__doc__)
+        return 0
+    if not os.environ.get(EMULATOR_ENV):
+        print(f"❌ {EMULATOR_ENV} is not set - this benchmark only writes to the Firestore emulator")
+        return 1
+    count = int(option(args, '--count', 20_000))
+    limits = [int(n) for n in option(args, '--in-flight', '2,4,8,16').split(',')]
+    project = option(args, '--project', 'demo-onemap')
+
+    db = connect(project)
+    poles = make_poles(count)
+
+    print("=== FIRESTORE WRITER BENCHMARK ===")
+    print(f"{count:,} documents, emulator at {os.environ[EMULATOR_ENV]}\n")
+    print(f"{'Writer':<16} {'Time':>8} {'docs/s':>9} {'Batches':>8} {'Retries':>8} {'Size':>5} {'Speedup':>8}  Stored")
+
+    runs = [('sequential', dict(max_in_flight=1, adaptive=False))]
+    runs += [(f'{n} in flight', dict(max_in_flight=n)) for n in limits]
+
+    baseline = None
+    all_stored = True
+    for label, settings in runs:
+        stats, stored = run(db, project, poles, **settings)
+        baseline = baseline or stats['elapsed_seconds']
+        complete = stored == count
+        all_stored &= complete
+        print(f"{label:<16} {stats['elapsed_seconds']:>7.2f}s {stats['docs_per_second']:>9,.0f} "
+              f"{stats['batches']:>8} {stats['retries']:>8} {stats['final_batch_size']:>5} "
+              f"{baseline / stats['elapsed_seconds']:>7.1f}x  {stored:,} {'✓' if complete else '❌'}")
+
+    clear_emulator(project)
+    if not all_stored:
+        print("\n❌ Some runs did not store every document")
+        return 1
+    print("\n✓ Every run stored all documents")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -5,14 +5,63 @@ Analyzes pole permission data to prevent duplicate payment claims
 """
 
 import csv
+import io
 import json
+import hashlib
+import pickle
 from collections import defaultdict
 from datetime import datetime
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from onemap_lib.snapshot import iter_rows, read_header
+
+ANALYSIS_COLUMNS = [
+    'Status', 'Field Agent Name (pole permission)', 'Pole Number',
+    'Property ID', 'Location Address', 'Survey Date'
+]
+
+DEFAULT_STATE_PATH = Path(__file__).resolve().parents[2] / 'cache' / 'agent_payment_state.pkl'
+
+# Bytes before the saved offset that must be unchanged for an incremental run
+TAIL_CHECK_BYTES = 65536
+
+# Indexes and counters kept between incremental runs (no raw records)
+STATE_FIELDS = ('record_count', 'agent_index', 'pole_addresses', 'pole_agent_map', 'duplicate_claims',
+                'approved_permissions', 'missing_agent_count',
+                'kwena_entries', 'kwena_agents', 'kwena_poles', 'kwena_first_date', 'kwena_last_date',
+                'source_offset', 'source_header')
+
+KWENA_ADDRESS = '1 KWENA STREET'
 
 class AgentPaymentAnalyzer:
-    def __init__(self, csv_path):
+    def __init__(self, csv_path, state_path=DEFAULT_STATE_PATH):
         self.csv_path = csv_path
-        self.records = []
+        self.state_path = Path(state_path)
+        self.record_count = 0
+        
+        # Indexes maintained record-by-record (see add_record)
+        self.agent_index = defaultdict(list)     # agent -> approved permission records
+        self.pole_addresses = defaultdict(set)   # pole -> addresses it appears at
+        self.pole_agent_map = defaultdict(set)   # pole -> agents who claimed it
+        self.duplicate_claims = []               # pole claimed by an additional agent
+        
+        # Missing-agent counters
+        self.approved_permissions = 0
+        self.missing_agent_count = 0
+        
+        # 1 KWENA STREET counters
+        self.kwena_entries = 0
+        self.kwena_agents = defaultdict(int)     # agent -> approved permissions at the address
+        self.kwena_poles = set()
+        self.kwena_first_date = None
+        self.kwena_last_date = None
+        
+        # Position in the source file covered by the indexes
+        self.source_offset = 0
+        self.source_header = None
+        
         self.analysis_results = {
             'timestamp': datetime.now().isoformat(),
             'purpose': 'Agent payment analysis for pole permissions',
@@ -20,51 +69,141 @@ class AgentPaymentAnalyzer:
         }
         
     def load_data(self):
-        """Load CSV data for analysis"""
-        with open(self.csv_path, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                self.records.append(row)
+        """Load CSV data and build all indexes in one pass"""
+        self.source_offset = Path(self.csv_path).stat().st_size
+        self.source_header = read_header(self.csv_path)
+        
+        for row in iter_rows(self.csv_path, ANALYSIS_COLUMNS):
+            self.add_record(row)
         
-        print(f"✓ Loaded {len(self.records)} records")
+        print(f"✓ Loaded {self.record_count} records")
+    
+    def load_incremental(self):
+        """Restore saved indexes and apply only rows appended since the last run"""
+        if not self._restore_state():
+            print("No usable saved state - indexing full file")
+            self.load_data()
+            self._save_state()
+            return
+        
+        previous = self.record_count
+        size = Path(self.csv_path).stat().st_size
+        with open(self.csv_path, 'rb') as f:
+            f.seek(self.source_offset)
+            new_text = f.read(size - self.source_offset).decode('utf-8')
+        
+        reader = csv.DictReader(io.StringIO(new_text, newline=''), fieldnames=self.source_header)
+        for row in reader:
+            self.add_record({c: row.get(c) or '' for c in ANALYSIS_COLUMNS})
+        
+        self.source_offset = size
+        self._save_state()
+        print(f"✓ Loaded {previous} indexed records + {self.record_count - previous} new records")
+    
+    def add_record(self, record):
+        """Add one record to the indexes and update duplicate-claim, missing-agent and Kwena counters"""
+        self.record_count += 1
+        
+        pole = record.get('Pole Number', '').strip()
+        address = record.get('Location Address', '').strip()
+        property_id = record.get('Property ID', '').strip()
+        approved = 'Pole Permission: Approved' in record.get('Status', '')
+        agent = record.get('Field Agent Name (pole permission)', '').strip()
+        
+        if pole:
+            self.pole_addresses[pole].add(address)
+        
+        if KWENA_ADDRESS in record.get('Location Address', ''):
+            self.add_kwena_record(pole, agent if approved else '', record.get('Survey Date', '').strip())
+        
+        if approved:
+            self.approved_permissions += 1
+            if not agent:
+                self.missing_agent_count += 1
+            
+            if agent and pole:  # Only count if agent is named
+                self.agent_index[agent].append({
+                    'pole': pole,
+                    'property_id': property_id,
+                    'address': address,
+                    'date': record.get('Survey Date', '').strip(),
+                    'agent': agent
+                })
+                
+                # Check if this pole was already claimed by another agent
+                if pole in self.pole_agent_map and agent not in self.pole_agent_map[pole]:
+                    self.duplicate_claims.append({
+                        'pole': pole,
+                        'agents': list(self.pole_agent_map[pole]) + [agent]
+                    })
+                
+                self.pole_agent_map[pole].add(agent)
+    
+    def add_kwena_record(self, pole, agent, date):
+        """Count one 1 KWENA STREET entry (agent only for approved permissions)"""
+        self.kwena_entries += 1
+        if agent:
+            self.kwena_agents[agent] += 1
+        if pole:
+            self.kwena_poles.add(pole)
+        if date:
+            day = date[:10]  # Just the date part
+            if self.kwena_first_date is None or day < self.kwena_first_date:
+                self.kwena_first_date = day
+            if self.kwena_last_date is None or day > self.kwena_last_date:
+                self.kwena_last_date = day
+    
+    def _tail_hash(self, offset):
+        with open(self.csv_path, 'rb') as f:
+            start = max(0, offset - TAIL_CHECK_BYTES)
+            f.seek(start)
+            return hashlib.sha256(f.read(offset - start)).hexdigest()
+    
+    def _restore_state(self):
+        """Load saved indexes if the source file has only grown since they were saved"""
+        if not self.state_path.exists():
+            return False
+        
+        with open(self.state_path, 'rb') as f:
+            state = pickle.load(f)
+        
+        # State saved by an older version (e.g. with raw records) is rebuilt
+        if any(name not in state for name in STATE_FIELDS):
+            return False
+        
+        size = Path(self.csv_path).stat().st_size
+        if (state['csv_path'] != str(Path(self.csv_path).resolve())
+                or size < state['source_offset']
+                or read_header(self.csv_path) != state['source_header']
+                or self._tail_hash(state['source_offset']) != state['tail_hash']):
+            return False
+        
+        for name in STATE_FIELDS:
+            setattr(self, name, state[name])
+        return True
+    
+    def _save_state(self):
+        state = {
+            'csv_path': str(Path(self.csv_path).resolve()),
+            'tail_hash': self._tail_hash(self.source_offset),
+            **{name: getattr(self, name) for name in STATE_FIELDS}
+        }
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.state_path.with_suffix('.tmp')
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        tmp_path.replace(self.state_path)
         
     def analyze_pole_permissions(self):
         """Analyze pole permission approvals for payment validation"""
         print("\n=== POLE PERMISSION PAYMENT ANALYSIS ===")
         
-        # Track pole permissions by agent
-        agent_permissions = defaultdict(list)
-        pole_agent_map = defaultdict(set)  # Track which agents claimed which poles
-        duplicate_claims = []
-        
-        for record in self.records:
-            if 'Pole Permission: Approved' in record.get('Status', ''):
-                agent = record.get('Field Agent Name (pole permission)', '').strip()
-                pole = record.get('Pole Number', '').strip()
-                property_id = record.get('Property ID', '').strip()
-                address = record.get('Location Address', '').strip()
-                date = record.get('Survey Date', '').strip()
-                
-                if agent and pole:  # Only count if agent is named
-                    permission_record = {
-                        'pole': pole,
-                        'property_id': property_id,
-                        'address': address,
-                        'date': date,
-                        'agent': agent
-                    }
-                    
-                    agent_permissions[agent].append(permission_record)
-                    
-                    # Check if this pole was already claimed by another agent
-                    if pole in pole_agent_map and agent not in pole_agent_map[pole]:
-                        duplicate_claims.append({
-                            'pole': pole,
-                            'agents': list(pole_agent_map[pole]) + [agent],
-                            'addresses': self.get_pole_addresses(pole)
-                        })
-                    
-                    pole_agent_map[pole].add(agent)
+        agent_permissions = self.agent_index
+        pole_agent_map = self.pole_agent_map
+        duplicate_claims = [
+            {**claim, 'addresses': self.get_pole_addresses(claim['pole'])}
+            for claim in self.duplicate_claims
+        ]
         
         # Analyze results
         total_permissions_with_agents = sum(len(perms) for perms in agent_permissions.values())
@@ -104,60 +243,37 @@ class AgentPaymentAnalyzer:
     
     def get_pole_addresses(self, pole_number):
         """Get all addresses where a pole appears"""
-        addresses = set()
-        for record in self.records:
-            if record.get('Pole Number', '').strip() == pole_number:
-                addresses.add(record.get('Location Address', '').strip())
-        return list(addresses)
+        return list(self.pole_addresses.get(pole_number, ()))
     
     def analyze_missing_agents(self):
         """Analyze records missing agent names"""
         print("\n=== MISSING AGENT ANALYSIS ===")
         
-        missing_agent_permissions = []
-        total_permissions = 0
-        
-        for record in self.records:
-            if 'Pole Permission: Approved' in record.get('Status', ''):
-                total_permissions += 1
-                agent = record.get('Field Agent Name (pole permission)', '').strip()
-                if not agent:
-                    missing_agent_permissions.append({
-                        'property_id': record.get('Property ID', ''),
-                        'pole': record.get('Pole Number', ''),
-                        'address': record.get('Location Address', ''),
-                        'date': record.get('Survey Date', '')
-                    })
-        
-        missing_percentage = (len(missing_agent_permissions) / total_permissions * 100) if total_permissions > 0 else 0
+        total_permissions = self.approved_permissions
+        missing_count = self.missing_agent_count
+        missing_percentage = (missing_count / total_permissions * 100) if total_permissions > 0 else 0
         
         print(f"\n✓ Total pole permissions: {total_permissions}")
-        print(f"⚠️  Missing agent name: {len(missing_agent_permissions)} ({missing_percentage:.1f}%)")
+        print(f"⚠️  Missing agent name: {missing_count} ({missing_percentage:.1f}%)")
         
         self.analysis_results['findings']['missing_agents'] = {
             'total_permissions': total_permissions,
-            'missing_agent_count': len(missing_agent_permissions),
+            'missing_agent_count': missing_count,
             'missing_percentage': missing_percentage
         }
         
-        return missing_agent_permissions
+        return self.analysis_results['findings']['missing_agents']
     
     def analyze_pole_conflicts(self):
         """Analyze poles appearing at multiple addresses"""
         print("\n=== POLE LOCATION CONFLICTS ===")
         
-        pole_locations = defaultdict(set)
-        pole_agents = defaultdict(set)
-        
-        for record in self.records:
-            pole = record.get('Pole Number', '').strip()
-            address = record.get('Location Address', '').strip()
-            agent = record.get('Field Agent Name (pole permission)', '').strip()
-            
-            if pole and address:
-                pole_locations[pole].add(address)
-                if agent and 'Pole Permission: Approved' in record.get('Status', ''):
-                    pole_agents[pole].add(agent)
+        pole_locations = {}
+        for pole, addresses in self.pole_addresses.items():
+            addresses = {a for a in addresses if a}
+            if addresses:
+                pole_locations[pole] = addresses
+        pole_agents = self.pole_agent_map
         
         # Find poles at multiple locations
         conflicted_poles = {pole: list(addrs) for pole, addrs in pole_locations.items() if len(addrs) > 1}
@@ -199,31 +315,13 @@ class AgentPaymentAnalyzer:
         """Special analysis for 1 KWENA STREET anomaly"""
         print("\n=== 1 KWENA STREET ANALYSIS ===")
         
-        kwena_records = []
-        kwena_agents = defaultdict(int)
-        kwena_poles = set()
-        kwena_dates = set()
+        kwena_agents = self.kwena_agents
+        kwena_poles = self.kwena_poles
+        date_range = f"{self.kwena_first_date or 'N/A'} to {self.kwena_last_date or 'N/A'}"
         
-        for record in self.records:
-            if '1 KWENA STREET' in record.get('Location Address', ''):
-                kwena_records.append(record)
-                
-                if 'Pole Permission: Approved' in record.get('Status', ''):
-                    agent = record.get('Field Agent Name (pole permission)', '').strip()
-                    if agent:
-                        kwena_agents[agent] += 1
-                
-                pole = record.get('Pole Number', '').strip()
-                if pole:
-                    kwena_poles.add(pole)
-                
-                date = record.get('Survey Date', '').strip()
-                if date:
-                    kwena_dates.add(date[:10])  # Just the date part
-        
-        print(f"\n✓ Total 1 KWENA STREET entries: {len(kwena_records)}")
+        print(f"\n✓ Total 1 KWENA STREET entries: {self.kwena_entries}")
         print(f"✓ Unique poles at this address: {len(kwena_poles)}")
-        print(f"✓ Date range: {min(kwena_dates) if kwena_dates else 'N/A'} to {max(kwena_dates) if kwena_dates else 'N/A'}")
+        print(f"✓ Date range: {date_range}")
         print(f"✓ Agents involved: {len(kwena_agents)}")
         
         print("\n📊 TOP AGENTS AT 1 KWENA STREET:")
@@ -231,14 +329,14 @@ class AgentPaymentAnalyzer:
             print(f"   {agent}: {count} permissions")
         
         self.analysis_results['findings']['kwena_street'] = {
-            'total_entries': len(kwena_records),
+            'total_entries': self.kwena_entries,
             'unique_poles': len(kwena_poles),
-            'date_range': f"{min(kwena_dates) if kwena_dates else 'N/A'} to {max(kwena_dates) if kwena_dates else 'N/A'}",
+            'date_range': date_range,
             'agents_involved': len(kwena_agents),
             'top_agents': dict(sorted(kwena_agents.items(), key=lambda x: x[1], reverse=True)[:5])
         }
         
-        return kwena_records
+        return self.analysis_results['findings']['kwena_street']
     
     def generate_payment_report(self, agent_permissions, duplicate_claims, payment_conflicts):
         """Generate payment validation report"""
@@ -285,8 +383,10 @@ class AgentPaymentAnalyzer:
                 })
         
         if verification_needed:
-            df_verify = pd.DataFrame(verification_needed)
-            df_verify.to_csv('field_verification_required.csv', index=False)
+            with open('field_verification_required.csv', 'w', newline='', encoding='utf-8') as f:
+                writer = csv.DictWriter(f, fieldnames=list(verification_needed[0].keys()))
+                writer.writeheader()
+                writer.writerows(verification_needed)
             print("✓ Saved field_verification_required.csv")
         
         # 4. Save complete analysis
@@ -296,22 +396,29 @@ class AgentPaymentAnalyzer:
         
         return payment_summary
 
+def run_analyses(analyzer):
+    """Run every analysis on loaded records and write the payment reports"""
+    agent_permissions, duplicate_claims = analyzer.analyze_pole_permissions()
+    analyzer.analyze_missing_agents()
+    payment_conflicts = analyzer.analyze_pole_conflicts()
+    analyzer.analyze_kwena_street()
+    
+    # Generate reports
+    return analyzer.generate_payment_report(agent_permissions, duplicate_claims, payment_conflicts)
+
 def main():
     analyzer = AgentPaymentAnalyzer('/home/ldp/VF/Apps/FibreFlow/OneMap/Lawley_Project_Louis.csv')
     
     print("=== VELOCITY FIBRE - AGENT PAYMENT ANALYSIS ===")
     print("Analyzing pole permission data for payment validation...\n")
     
-    analyzer.load_data()
+    # --incremental reuses saved indexes and only processes appended rows
+    if '--incremental' in sys.argv:
+        analyzer.load_incremental()
+    else:
+        analyzer.load_data()
     
-    # Run analyses
-    agent_permissions, duplicate_claims = analyzer.analyze_pole_permissions()
-    missing_agents = analyzer.analyze_missing_agents()
-    payment_conflicts = analyzer.analyze_pole_conflicts()
-    kwena_records = analyzer.analyze_kwena_street()
-    
-    # Generate reports
-    payment_summary = analyzer.generate_payment_report(agent_permissions, duplicate_claims, payment_conflicts)
+    run_analyses(analyzer)
     
     print("\n=== RECOMMENDATIONS ===")
     print("1. IMMEDIATE: Review high-risk payment conflicts in field_verification_required.csv")
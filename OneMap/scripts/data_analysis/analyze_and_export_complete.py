@@ -6,10 +6,20 @@ Combines analysis, validation, and export following context engineering principl
 
 import csv
 import json
+import sys
 from collections import defaultdict
 from datetime import datetime
+from pathlib import Path
 import os
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from onemap_lib.datasets import DatasetRegistry
+
+CONFLICT_COLUMNS = [
+    'Pole Number', 'Location Address', 'Property ID', 'Status', 'Flow Name Groups',
+    'Survey Date', 'Field Agent Name (pole permission)', 'Latitude', 'Longitude'
+]
+
 class PoleConflictAnalyzer:
     """
     Context-aware analyzer following OneMap CLAUDE.md principles:
@@ -18,9 +28,10 @@ class PoleConflictAnalyzer:
     3. No assumptions - data drives conclusions
     """
     
-    def __init__(self, csv_path):
+    def __init__(self, csv_path, registry=None):
         self.csv_path = csv_path
-        self.records = []
+        self.registry = registry or DatasetRegistry()
+        self.data = None
         self.pole_locations = defaultdict(set)
         self.pole_details = defaultdict(list)
         self.validation_results = {}
@@ -29,11 +40,8 @@ class PoleConflictAnalyzer:
         """Load and validate data exists"""
         print(f"Loading data from {self.csv_path}...")
         try:
-            with open(self.csv_path, 'r', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    self.records.append(row)
-            print(f"✓ Loaded {len(self.records)} records")
+            self.data = self.registry.csv(self.csv_path)
+            print(f"✓ Loaded {self.data.rows} records")
             return True
         except Exception as e:
             print(f"❌ Error loading data: {e}")
@@ -47,7 +55,7 @@ class PoleConflictAnalyzer:
         """
         print("\nAnalyzing pole conflicts...")
         
-        for record in self.records:
+        for record in self.data.records(CONFLICT_COLUMNS):
             pole = record.get('Pole Number', '').strip()
             address = record.get('Location Address', '').strip()
             
@@ -96,10 +104,10 @@ class PoleConflictAnalyzer:
             print(f"✓ Worst conflict: {worst[0]} at {len(worst[1])} locations")
         
         # Validation 3: Data quality
-        missing_agents = sum(1 for r in self.records 
-                           if not r.get('Field Agent Name (pole permission)', '').strip())
+        missing_agents = sum(1 for agent in self.data.column('Field Agent Name (pole permission)', str.strip)
+                           if not agent)
         self.validation_results['missing_agents'] = missing_agents
-        self.validation_results['missing_agents_pct'] = (missing_agents / len(self.records)) * 100
+        self.validation_results['missing_agents_pct'] = (missing_agents / self.data.rows) * 100
         print(f"✓ Missing field agents: {missing_agents} ({self.validation_results['missing_agents_pct']:.1f}%)")
         
         # Save validation proof
@@ -107,7 +115,8 @@ class PoleConflictAnalyzer:
             json.dump({
                 'analysis_date': datetime.now().isoformat(),
                 'data_source': self.csv_path,
-                'total_records': len(self.records),
+                'total_records': self.data.rows,
+                'source_files': self.registry.evidence([self.csv_path]),
                 'validation_results': self.validation_results,
                 'validation_passed': True
             }, f, indent=2)
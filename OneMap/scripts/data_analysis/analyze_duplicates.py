@@ -7,8 +7,14 @@ Updated to understand workflow tracking vs true duplicates
 
 import csv
 import json
+import sys
 from collections import defaultdict
 from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from onemap_lib.bursts import BulkEntryDetector
+from onemap_lib.workflow import WorkflowRows
 
 def load_data(csv_path):
     """Load CSV data and return list of records"""
@@ -26,11 +32,13 @@ def analyze_workflow_and_issues(records):
     property_workflows = defaultdict(list)  # Property ID -> list of updates
     pole_locations = defaultdict(set)       # Pole Number -> set of addresses
     address_activity = defaultdict(list)    # Address -> list of records
+    workflow_rows = WorkflowRows()          # Compiled Flow Name Groups per update
+    property_index = {}
     
     # Data quality tracking
     missing_field_agents = 0
     missing_status = 0
-    bulk_entries = defaultdict(list)
+    bulk_entries = BulkEntryDetector()
     
     for idx, record in enumerate(records):
         # Skip empty records
@@ -56,6 +64,8 @@ def analyze_workflow_and_issues(records):
                 'address': address,
                 'field_agent': field_agent
             })
+            group = property_index.setdefault(prop_id, len(property_index))
+            workflow_rows.add(group, flow_history, status, survey_date)
         
         # Track pole locations (this identifies real issues)
         if pole_number and address:
@@ -76,17 +86,14 @@ def analyze_workflow_and_issues(records):
         if not status:
             missing_status += 1
             
-        # Track bulk entries (same timestamp)
+        # Track bulk entries (bursts by one agent within seconds)
         if survey_date:
-            bulk_entries[survey_date].append({
-                'property_id': prop_id,
-                'address': address
-            })
+            bulk_entries.add(field_agent, survey_date, prop_id, address)
     
     # Identify REAL issues
     issues = {
         'pole_conflicts': {},      # Poles at multiple locations
-        'bulk_entries': {},        # Same timestamp entries
+        'bulk_entries': [],        # Entry bursts by one agent
         'data_quality': {},        # Missing data
         'workflow_summary': {},    # Workflow statistics
         'address_activity': {}     # High activity addresses
@@ -101,12 +108,7 @@ def analyze_workflow_and_issues(records):
             }
     
     # Find bulk entries (potential system issues)
-    for timestamp, entries in bulk_entries.items():
-        if len(entries) > 3:  # More than 3 at exact same time
-            issues['bulk_entries'][timestamp] = {
-                'count': len(entries),
-                'sample': entries[:5]
-            }
+    issues['bulk_entries'] = bulk_entries.bursts()
     
     # Data quality summary
     issues['data_quality'] = {
@@ -117,12 +119,16 @@ def analyze_workflow_and_issues(records):
         'missing_status_pct': (missing_status / len(records)) * 100 if records else 0
     }
     
-    # Workflow summary
+    # Workflow summary (progression checks are bitwise over all properties)
+    workflows = workflow_rows.summarize()
     issues['workflow_summary'] = {
         'total_properties': len(property_workflows),
         'properties_with_single_update': sum(1 for p in property_workflows.values() if len(p) == 1),
         'properties_with_multiple_updates': sum(1 for p in property_workflows.values() if len(p) > 1),
-        'max_updates_single_property': max(len(p) for p in property_workflows.values()) if property_workflows else 0
+        'max_updates_single_property': max(len(p) for p in property_workflows.values()) if property_workflows else 0,
+        'properties_with_skipped_steps': int(workflows.skipped_steps().sum()),
+        'properties_with_out_of_order_history': int(workflows.out_of_order().sum()),
+        'properties_with_status_regression': int(workflows.regressed().sum())
     }
     
     # High activity addresses (not duplicates, just busy locations)
@@ -168,16 +174,14 @@ def generate_report(issues):
             report.append(f"  - ... and {data['count'] - 3} more locations")
     
     # Bulk entries
-    report.append(f"\n### 2. Bulk Entry Anomalies ({len(issues['bulk_entries'])} timestamps)")
-    report.append("Multiple entries at exact same timestamp (potential system issues):")
-    
-    sorted_bulk = sorted(issues['bulk_entries'].items(), 
-                        key=lambda x: x[1]['count'], reverse=True)[:10]
+    report.append(f"\n### 2. Bulk Entry Anomalies ({len(issues['bulk_entries'])} bursts)")
+    report.append("Several entries by one agent within seconds (potential system issues):")
     
-    for timestamp, data in sorted_bulk:
-        report.append(f"\n**{timestamp}**: {data['count']} entries")
-        if data['sample']:
-            report.append(f"  Sample address: {data['sample'][0]['address'][:50]}...")
+    for data in issues['bulk_entries'][:10]:
+        report.append(f"\n**{data['start']}**: {data['count']} entries in {data['span_seconds']:g}s by {data['agent'] or 'unknown agent'}")
+        report.append(f"  Properties: {len(data['properties'])}")
+        if data['addresses']:
+            report.append(f"  Sample address: {data['addresses'][0][:50]}...")
     
     # Data quality
     report.append("\n### 3. Data Quality Issues")
@@ -191,6 +195,9 @@ def generate_report(issues):
     report.append(f"- Properties with single update: {ws['properties_with_single_update']:,}")
     report.append(f"- Properties with multiple updates: {ws['properties_with_multiple_updates']:,} (This is normal!)")
     report.append(f"- Maximum updates for one property: {ws['max_updates_single_property']}")
+    report.append(f"- Properties skipping a workflow step: {ws['properties_with_skipped_steps']:,}")
+    report.append(f"- Properties with out-of-order history: {ws['properties_with_out_of_order_history']:,}")
+    report.append(f"- Properties whose latest status is behind their history: {ws['properties_with_status_regression']:,}")
     
     # High activity addresses
     report.append("\n### High Activity Addresses")
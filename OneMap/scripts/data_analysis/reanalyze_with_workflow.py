@@ -7,6 +7,20 @@ import csv
 import json
 from collections import defaultdict
 from datetime import datetime
+import sys
+from pathlib import Path
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from onemap_lib.addresses import distinct_places
+from onemap_lib.snapshot import iter_rows
+from onemap_lib.bursts import BulkEntryDetector
+from onemap_lib.workflow import WorkflowRows
+
+WORKFLOW_COLUMNS = [
+    'Property ID', 'Pole Number', 'Location Address', 'Flow Name Groups',
+    'Status', 'Survey Date', 'Field Agent Name (pole permission)'
+]
 
 class WorkflowAnalyzer:
     def __init__(self):
@@ -15,48 +29,65 @@ class WorkflowAnalyzer:
         self.workflow_patterns = defaultdict(int)
         self.true_duplicates = []
         self.workflow_updates = []
+        self.property_index = {}  # Property ID -> group id in workflow_rows
+        self.workflow_rows = WorkflowRows()
+        self.bulk_entries = BulkEntryDetector()
         
     def analyze_data(self, csv_file):
         """Analyze data with workflow understanding"""
         print("Loading and analyzing data with workflow understanding...")
         
-        with open(csv_file, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
+        for row in iter_rows(csv_file, WORKFLOW_COLUMNS):
+            self.add_row(row)
+        
+        self.finalize()
+    
+    def add_row(self, row, track_pole_locations=True):
+        """
+        Add one CSV row to the property history
+        
+        Pass track_pole_locations=False when pole_locations is supplied
+        from a shared index instead.
+        """
+        prop_id = row.get('Property ID', '').strip()
+        pole = row.get('Pole Number', '').strip()
+        address = row.get('Location Address', '').strip()
+        flow_history = row.get('Flow Name Groups', '').strip()
+        status = row.get('Status', '').strip()
+        date = row.get('Survey Date', '').strip()
+        agent = row.get('Field Agent Name (pole permission)', '').strip()
+        
+        # Track property history
+        if prop_id:
+            if prop_id not in self.properties:
+                self.properties[prop_id] = []
+                self.property_index[prop_id] = len(self.property_index)
             
-            for row in reader:
-                prop_id = row.get('Property ID', '').strip()
-                pole = row.get('Pole Number', '').strip()
-                address = row.get('Location Address', '').strip()
-                flow_history = row.get('Flow Name Groups', '').strip()
-                status = row.get('Status', '').strip()
-                date = row.get('Survey Date', '').strip()
-                agent = row.get('Field Agent Name (pole permission)', '').strip()
-                
-                # Track property history
-                if prop_id:
-                    if prop_id not in self.properties:
-                        self.properties[prop_id] = []
-                    
-                    self.properties[prop_id].append({
-                        'pole': pole,
-                        'address': address,
-                        'flow_history': flow_history,
-                        'status': status,
-                        'date': date,
-                        'agent': agent,
-                        'workflow_depth': len(flow_history.split(',')) if flow_history else 0
-                    })
-                
-                # Track pole locations
-                if pole and address:
-                    if pole not in self.pole_locations:
-                        self.pole_locations[pole] = set()
-                    self.pole_locations[pole].add(address)
-                
-                # Track workflow patterns
-                if flow_history:
-                    self.workflow_patterns[flow_history] += 1
+            self.properties[prop_id].append({
+                'pole': pole,
+                'address': address,
+                'flow_history': flow_history,
+                'status': status,
+                'date': date,
+                'agent': agent,
+                'workflow_depth': len(flow_history.split(',')) if flow_history else 0
+            })
+            self.workflow_rows.add(self.property_index[prop_id], flow_history, status, date)
+            if date:
+                self.bulk_entries.add(agent, date, prop_id, address)
         
+        # Track pole locations
+        if track_pole_locations and pole and address:
+            if pole not in self.pole_locations:
+                self.pole_locations[pole] = set()
+            self.pole_locations[pole].add(address)
+        
+        # Track workflow patterns
+        if flow_history:
+            self.workflow_patterns[flow_history] += 1
+    
+    def finalize(self):
+        """Run the analyses once all rows are loaded"""
         print(f"Loaded {len(self.properties)} unique properties")
         self._identify_true_duplicates()
         self._analyze_workflows()
@@ -64,41 +95,21 @@ class WorkflowAnalyzer:
     def _identify_true_duplicates(self):
         """Identify REAL duplicates vs workflow updates"""
         
-        # 1. Find poles at multiple addresses (impossible)
+        # 1. Find poles at multiple addresses (impossible); spellings of
+        # one address ("12 Mousebird St" / "12 MOUSEBIRD STREET") are one place
+        multi_place, _ = distinct_places(self.pole_locations)
         multi_location_poles = []
-        for pole, addresses in self.pole_locations.items():
-            if len(addresses) > 1:
-                multi_location_poles.append({
-                    'pole': pole,
-                    'addresses': list(addresses),
-                    'count': len(addresses)
-                })
-        
-        # 2. Find same-second entries (system duplicates)
-        time_duplicates = defaultdict(list)
-        for prop_id, records in self.properties.items():
-            for record in records:
-                if record['date']:
-                    time_key = f"{record['date']}_{record['address']}"
-                    time_duplicates[time_key].append({
-                        'property_id': prop_id,
-                        'pole': record['pole'],
-                        'status': record['status']
-                    })
-        
-        same_second_dupes = []
-        for time_key, entries in time_duplicates.items():
-            if len(entries) > 3:  # More than 3 entries at exact same time
-                same_second_dupes.append({
-                    'timestamp': time_key.split('_')[0],
-                    'address': time_key.split('_')[1],
-                    'count': len(entries),
-                    'entries': entries[:5]  # Sample
-                })
+        for pole, addresses in multi_place.items():
+            multi_location_poles.append({
+                'pole': pole,
+                'addresses': addresses,
+                'count': len(addresses)
+            })
         
+        # 2. Find bulk entries (bursts of entries by one agent within seconds)
         self.true_duplicates = {
             'multi_location_poles': sorted(multi_location_poles, key=lambda x: x['count'], reverse=True),
-            'same_second_entries': sorted(same_second_dupes, key=lambda x: x['count'], reverse=True)
+            'bulk_entries': self.bulk_entries.bursts()
         }
     
     def _analyze_workflows(self):
@@ -109,26 +120,25 @@ class WorkflowAnalyzer:
             'single_update': 0,  # Properties with only one entry
             'normal_progression': 0,  # Following expected workflow
             'complex_workflow': 0,  # Many updates
-            'status_regression': 0  # Status went backwards
+            'status_regression': 0,  # Status went backwards
+            'skipped_steps': 0  # History skips a workflow step
         }
         
-        workflow_depths = defaultdict(int)
+        summary = self.workflow_rows.summarize()
         
-        for prop_id, records in self.properties.items():
-            if len(records) == 1:
-                workflow_stats['single_update'] += 1
-            else:
-                # Sort by date to see progression
-                sorted_records = sorted(records, key=lambda x: x['date'] if x['date'] else '')
-                
-                # Check workflow depth
-                max_depth = max(r['workflow_depth'] for r in records)
-                workflow_depths[max_depth] += 1
-                
-                if max_depth > 5:
-                    workflow_stats['complex_workflow'] += 1
-                else:
-                    workflow_stats['normal_progression'] += 1
+        # Properties are grouped with bitwise ops over the compiled histories
+        multiple = summary.updates > 1
+        complex_workflow = multiple & (summary.max_depth > 5)
+        workflow_stats['single_update'] = int(np.count_nonzero(~multiple))
+        workflow_stats['complex_workflow'] = int(np.count_nonzero(complex_workflow))
+        workflow_stats['normal_progression'] = int(np.count_nonzero(multiple & ~complex_workflow))
+        # Latest status (by date) at an earlier step than the history reached
+        workflow_stats['status_regression'] = int(np.count_nonzero(multiple & summary.regressed()))
+        workflow_stats['skipped_steps'] = int(np.count_nonzero(summary.skipped_steps()))
+        
+        # Check workflow depth
+        depths, counts = np.unique(summary.max_depth[multiple], return_counts=True)
+        workflow_depths = dict(zip(depths.tolist(), counts.tolist()))
         
         self.workflow_updates = {
             'stats': workflow_stats,
@@ -153,6 +163,8 @@ class WorkflowAnalyzer:
         report.append(f"- Single Update Properties: {self.workflow_updates['stats']['single_update']:,} ({self.workflow_updates['stats']['single_update']/len(self.properties)*100:.1f}%)")
         report.append(f"- Normal Workflow Progression: {self.workflow_updates['stats']['normal_progression']:,}")
         report.append(f"- Complex Workflows (>5 stages): {self.workflow_updates['stats']['complex_workflow']:,}")
+        report.append(f"- Status Regressions (latest status behind history): {self.workflow_updates['stats']['status_regression']:,}")
+        report.append(f"- Skipped Workflow Steps: {self.workflow_updates['stats']['skipped_steps']:,}")
         
         report.append("\n### Workflow Depth Distribution")
         for depth, count in sorted(self.workflow_updates['depth_distribution'].items()):
@@ -169,11 +181,12 @@ class WorkflowAnalyzer:
             for addr in item['addresses'][:3]:
                 report.append(f"  - {addr[:60]}...")
         
-        report.append(f"\n### 2. Bulk Entry Issues: {len(self.true_duplicates['same_second_entries'])}")
-        report.append("Multiple entries at exact same timestamp (likely system issues):")
+        report.append(f"\n### 2. Bulk Entry Issues: {len(self.true_duplicates['bulk_entries'])}")
+        report.append(f"{self.bulk_entries.min_entries}+ entries by one agent within {self.bulk_entries.window_seconds:g} seconds (likely system issues):")
         
-        for item in self.true_duplicates['same_second_entries'][:5]:
-            report.append(f"\n**{item['timestamp']}** - {item['count']} entries at {item['address'][:40]}...")
+        for item in self.true_duplicates['bulk_entries'][:5]:
+            report.append(f"\n**{item['start']}** - {item['count']} entries in {item['span_seconds']:g}s by {item['agent'] or 'unknown agent'}")
+            report.append(f"  - Properties: {', '.join(item['properties'][:5])}{' ...' if len(item['properties']) > 5 else ''}")
         
         # Address Analysis
         report.append("\n## Address Analysis (Not Duplicates!)")
@@ -207,7 +220,7 @@ class WorkflowAnalyzer:
         
         report.append("\n### 2. True Issues to Fix")
         report.append(f"- Resolve {len(self.true_duplicates['multi_location_poles'])} poles appearing at multiple addresses")
-        report.append(f"- Investigate {len(self.true_duplicates['same_second_entries'])} bulk entry anomalies")
+        report.append(f"- Investigate {len(self.true_duplicates['bulk_entries'])} bulk entry anomalies")
         report.append("- Add field agent names to improve data quality")
         
         report.append("\n### 3. Reporting Improvements")
@@ -242,14 +255,14 @@ class WorkflowAnalyzer:
 
 def main():
     analyzer = WorkflowAnalyzer()
-    analyzer.analyze_data('Lawley_Essential.csv')
+    analyzer.analyze_data(sys.argv[1] if len(sys.argv) > 1 else 'Lawley_Essential.csv')
     analyzer.generate_report()
     
     # Quick summary
     print("\n=== KEY FINDINGS ===")
     print(f"✓ Properties tracked through workflow: {len(analyzer.properties):,}")
     print(f"✗ Poles at multiple locations: {len(analyzer.true_duplicates['multi_location_poles'])}")
-    print(f"✗ Bulk entry issues: {len(analyzer.true_duplicates['same_second_entries'])}")
+    print(f"✗ Bulk entry issues: {len(analyzer.true_duplicates['bulk_entries'])}")
     
     # Show that "1 KWENA STREET" is likely legitimate
     kwena_props = sum(1 for p, records in analyzer.properties.items() 
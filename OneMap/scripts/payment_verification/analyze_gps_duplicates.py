@@ -9,7 +9,75 @@ import csv
 import json
 from collections import defaultdict
 from datetime import datetime
-import math
+import sys
+from pathlib import Path
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from onemap_lib.snapshot import iter_rows
+from onemap_lib.geo import GridIndex, haversine_m, max_pairwise_distance, CELL_PADDING, METERS_PER_DEGREE_LAT
+from onemap_lib.duckdb_backend import OneMapTable, backend_from_args
+
+PERMISSION_COLUMNS = [
+    'Status', 'Pole Number', 'Latitude', 'Longitude',
+    'Field Agent Name (pole permission)', 'Property ID',
+    'Survey Date', 'Location Address'
+]
+
+# Columns of the payment conflicts report, one row per permission of a duplicated pole
+CONFLICT_COLUMNS = [
+    'Pole Number', 'Agent Name', 'Permission Date', 'Property ID',
+    'Latitude', 'Longitude', 'Address Sample', 'Risk Level',
+    'Total Claims', 'Unique Agents', 'Action Required'
+]
+
+# Permissions for different pole numbers closer than this are flagged as
+# the same physical pole re-submitted under a new number
+CROSS_POLE_RADIUS_METERS = 5.0
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+def permission_record(row):
+    """Permission details kept for each approved pole permission row"""
+    lat = row.get('Latitude', '').strip()
+    lon = row.get('Longitude', '').strip()
+    agent = row.get('Field Agent Name (pole permission)', '').strip()
+    
+    return {
+        'property_id': row.get('Property ID', '').strip(),
+        'agent': agent,
+        'date': row.get('Survey Date', '').strip(),
+        'latitude': lat,
+        'longitude': lon,
+        'address': row.get('Location Address', '').strip()[:100],  # Keep for reference
+        'has_gps': bool(lat and lon),
+        'has_agent': bool(agent),
+        # Parsed once here; NaN when missing or unparseable
+        'lat_value': _to_float(lat),
+        'lon_value': _to_float(lon)
+    }
+
+def conflict_rows(duplicate_analysis):
+    """Rows of the payment conflicts report (CONFLICT_COLUMNS order)"""
+    for dup in duplicate_analysis:
+        for perm in dup['permissions']:
+            yield [
+                dup['pole'],
+                perm['agent'] or 'NO AGENT RECORDED',
+                perm['date'][:10] if perm['date'] else 'NO DATE',
+                perm['property_id'],
+                perm['latitude'] or 'NO GPS',
+                perm['longitude'] or 'NO GPS',
+                perm['address'][:50],
+                dup['risk'],
+                dup['permission_count'],
+                dup['agent_count'],
+                'HOLD PAYMENT - VERIFY' if dup['risk'] == 'HIGH' else 'REVIEW'
+            ]
 
 class GPSDuplicateAnalyzer:
     def __init__(self, csv_path):
@@ -21,82 +89,64 @@ class GPSDuplicateAnalyzer:
             'context': 'High-density informal settlements - addresses unreliable, GPS is truth'
         }
         
-    def load_pole_permissions(self):
-        """Load only pole permission records"""
-        total_records = 0
-        permission_records = 0
-        missing_gps = 0
-        missing_agent = 0
-        
-        with open(self.csv_path, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            
-            for row in reader:
-                total_records += 1
-                
-                # Only process pole permissions
-                if 'Pole Permission: Approved' in row.get('Status', ''):
-                    permission_records += 1
-                    
-                    pole = row.get('Pole Number', '').strip()
-                    if not pole:
-                        continue
-                    
-                    # Extract data
-                    lat = row.get('Latitude', '').strip()
-                    lon = row.get('Longitude', '').strip()
-                    agent = row.get('Field Agent Name (pole permission)', '').strip()
-                    
-                    if not lat or not lon:
-                        missing_gps += 1
-                    if not agent:
-                        missing_agent += 1
-                    
-                    permission_data = {
-                        'property_id': row.get('Property ID', '').strip(),
-                        'agent': agent,
-                        'date': row.get('Survey Date', '').strip(),
-                        'latitude': lat,
-                        'longitude': lon,
-                        'address': row.get('Location Address', '').strip()[:100],  # Keep for reference
-                        'has_gps': bool(lat and lon),
-                        'has_agent': bool(agent)
-                    }
-                    
-                    self.pole_permissions[pole].append(permission_data)
-        
-        print(f"✓ Loaded {permission_records} pole permissions from {total_records} total records")
-        print(f"  - Records missing GPS: {missing_gps} ({missing_gps/permission_records*100:.1f}%)")
-        print(f"  - Records missing agent: {missing_agent} ({missing_agent/permission_records*100:.1f}%)")
-        
-        self.analysis_results['data_quality'] = {
-            'total_records': total_records,
-            'permission_records': permission_records,
-            'missing_gps': missing_gps,
-            'missing_agent': missing_agent
-        }
+    def load_pole_permissions(self, rows=None):
+        """Load only pole permission records (from rows already read, if given)"""
+        if rows is None:
+            rows = iter_rows(self.csv_path, PERMISSION_COLUMNS)
+        for row in rows:
+            self.add_row(row)
+        self.finish_loading()
+    
+    def add_row(self, row):
+        """Process one CSV row (keeps pole permissions only)"""
+        quality = self.analysis_results.setdefault('data_quality', {
+            'total_records': 0,
+            'permission_records': 0,
+            'missing_gps': 0,
+            'missing_agent': 0
+        })
+        quality['total_records'] += 1
+        
+        # Only process pole permissions
+        if 'Pole Permission: Approved' not in row.get('Status', ''):
+            return
+        quality['permission_records'] += 1
+        
+        pole = row.get('Pole Number', '').strip()
+        if not pole:
+            return
+        
+        permission_data = permission_record(row)
+        if not permission_data['has_gps']:
+            quality['missing_gps'] += 1
+        if not permission_data['has_agent']:
+            quality['missing_agent'] += 1
+        
+        self.pole_permissions[pole].append(permission_data)
+    
+    def finish_loading(self):
+        """Print load statistics"""
+        quality = self.analysis_results.get('data_quality', {})
+        permission_records = quality.get('permission_records', 0)
+        missing_gps = quality.get('missing_gps', 0)
+        missing_agent = quality.get('missing_agent', 0)
+        
+        print(f"✓ Loaded {permission_records} pole permissions from {quality.get('total_records', 0)} total records")
+        if permission_records:
+            print(f"  - Records missing GPS: {missing_gps} ({missing_gps/permission_records*100:.1f}%)")
+            print(f"  - Records missing agent: {missing_agent} ({missing_agent/permission_records*100:.1f}%)")
         
     def calculate_gps_distance(self, lat1, lon1, lat2, lon2):
         """Calculate distance between two GPS points in meters"""
         try:
-            # Convert to float
-            lat1, lon1 = float(lat1), float(lon1)
-            lat2, lon2 = float(lat2), float(lon2)
-            
-            # Haversine formula
-            R = 6371000  # Earth radius in meters
-            phi1 = math.radians(lat1)
-            phi2 = math.radians(lat2)
-            delta_phi = math.radians(lat2 - lat1)
-            delta_lambda = math.radians(lon2 - lon1)
-            
-            a = math.sin(delta_phi/2)**2 + math.cos(phi1) * math.cos(phi2) * math.sin(delta_lambda/2)**2
-            c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
-            
-            return R * c
-        except:
+            return float(haversine_m(float(lat1), float(lon1), float(lat2), float(lon2)))
+        except (TypeError, ValueError):
             return None
     
+    def pole_count(self):
+        """Number of distinct poles with approved permissions"""
+        return len(self.pole_permissions)
+    
     def analyze_duplicates(self):
         """Analyze duplicate pole permissions"""
         print("\n=== ANALYZING DUPLICATE POLE PERMISSIONS ===")
@@ -110,20 +160,16 @@ class GPSDuplicateAnalyzer:
                 unique_agents = list(set(agents))
                 
                 # Check GPS consistency
-                gps_locations = [(p['latitude'], p['longitude']) for p in permissions if p['has_gps']]
-                unique_gps = list(set(gps_locations))
+                unique_gps = {}
+                for p in permissions:
+                    if p['has_gps']:
+                        unique_gps[(p['latitude'], p['longitude'])] = (p['lat_value'], p['lon_value'])
                 
                 # Calculate max GPS distance if multiple GPS points
                 max_distance = 0
                 if len(unique_gps) > 1:
-                    for i in range(len(unique_gps)):
-                        for j in range(i+1, len(unique_gps)):
-                            dist = self.calculate_gps_distance(
-                                unique_gps[i][0], unique_gps[i][1],
-                                unique_gps[j][0], unique_gps[j][1]
-                            )
-                            if dist and dist > max_distance:
-                                max_distance = dist
+                    coords = np.array(list(unique_gps.values()))
+                    max_distance = max_pairwise_distance(coords[:, 0], coords[:, 1])
                 
                 # Determine risk level
                 risk = 'LOW'
@@ -161,6 +207,104 @@ class GPSDuplicateAnalyzer:
         
         return duplicate_analysis
     
+    def pole_agents(self, pole):
+        """Set of agents recorded on the pole's permissions"""
+        return {p['agent'] for p in self.pole_permissions[pole] if p['agent']}
+    
+    def cross_pole_pairs(self, radius_m):
+        """
+        (pole_a, pole_b, min distance, matching claims) for every pair of
+        different pole numbers with permissions within radius_m, ordered by pole pair
+        """
+        points = [
+            (pole, perm)
+            for pole, permissions in self.pole_permissions.items()
+            for perm in permissions
+            if perm['has_gps']
+        ]
+        if not points:
+            return []
+        
+        lats = np.array([perm['lat_value'] for _, perm in points])
+        lons = np.array([perm['lon_value'] for _, perm in points])
+        poles, pole_codes = np.unique([pole for pole, _ in points], return_inverse=True)
+        poles = poles.tolist()
+        
+        i, j, distances = GridIndex(lats, lons, radius_m).pairs_within()
+        
+        # Keep pairs from different pole numbers, then collapse to one row per pole pair
+        different = pole_codes[i] != pole_codes[j]
+        i, j, distances = i[different], j[different], distances[different]
+        code_a = np.minimum(pole_codes[i], pole_codes[j])
+        code_b = np.maximum(pole_codes[i], pole_codes[j])
+        pair_keys = code_a.astype(np.int64) * len(poles) + code_b
+        
+        order = np.lexsort((distances, pair_keys))
+        pair_keys, distances = pair_keys[order], distances[order]
+        unique_keys, first, counts = np.unique(pair_keys, return_index=True, return_counts=True)
+        
+        return [
+            (poles[key // len(poles)], poles[key % len(poles)], distances[start], count)
+            for key, start, count in zip(unique_keys.tolist(), first.tolist(), counts.tolist())
+        ]
+    
+    def find_cross_pole_matches(self, radius_m=CROSS_POLE_RADIUS_METERS):
+        """Find permissions for different pole numbers within radius_m of each other"""
+        print(f"\n=== CROSS-POLE GPS MATCHES (within {radius_m}m) ===")
+        
+        matches = []
+        for pole_a, pole_b, distance, count in self.cross_pole_pairs(radius_m):
+            agents_a = sorted(self.pole_agents(pole_a))
+            agents_b = sorted(self.pole_agents(pole_b))
+            shared = sorted(set(agents_a) & set(agents_b))
+            matches.append({
+                'pole_a': pole_a,
+                'pole_b': pole_b,
+                'min_distance': round(float(distance), 2),
+                'matching_claims': count,
+                'agents_a': agents_a,
+                'agents_b': agents_b,
+                'shared_agents': shared,
+                'risk': 'HIGH' if shared else 'REVIEW'
+            })
+        
+        matches.sort(key=lambda m: (m['risk'] != 'HIGH', m['min_distance']))
+        
+        shared_count = sum(1 for m in matches if m['shared_agents'])
+        print(f"✓ {len(matches)} pole pairs within {radius_m}m ({shared_count} claimed by the same agent)")
+        
+        self.analysis_results['cross_pole_summary'] = {
+            'radius_m': radius_m,
+            'pole_pairs': len(matches),
+            'shared_agent_pairs': shared_count
+        }
+        
+        return matches
+    
+    def generate_cross_pole_report(self, matches):
+        """Save cross-pole GPS matches for field verification"""
+        report_date = datetime.now().strftime('%Y-%m-%d')
+        with open(f'reports/{report_date}_cross_pole_gps_matches.csv', 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(['Pole A', 'Pole B', 'Distance (m)', 'Matching Claims',
+                           'Agents (Pole A)', 'Agents (Pole B)', 'Shared Agents',
+                           'Risk Level', 'Action Required'])
+            
+            for match in matches:
+                writer.writerow([
+                    match['pole_a'],
+                    match['pole_b'],
+                    match['min_distance'],
+                    match['matching_claims'],
+                    ', '.join(match['agents_a']) or 'NO AGENT RECORDED',
+                    ', '.join(match['agents_b']) or 'NO AGENT RECORDED',
+                    ', '.join(match['shared_agents']),
+                    match['risk'],
+                    'HOLD PAYMENT - SAME POLE?' if match['risk'] == 'HIGH' else 'REVIEW'
+                ])
+        
+        print(f"✓ Saved: reports/{report_date}_cross_pole_gps_matches.csv")
+    
     def generate_reports(self, duplicate_analysis):
         """Generate payment verification reports"""
         print("\n=== GENERATING REPORTS ===")
@@ -174,25 +318,8 @@ class GPSDuplicateAnalyzer:
         report_date = datetime.now().strftime('%Y-%m-%d')
         with open(f'reports/{report_date}_payment_conflicts_detailed.csv', 'w', newline='', encoding='utf-8') as f:
             writer = csv.writer(f)
-            writer.writerow(['Pole Number', 'Agent Name', 'Permission Date', 'Property ID',
-                           'Latitude', 'Longitude', 'Address Sample', 'Risk Level',
-                           'Total Claims', 'Unique Agents', 'Action Required'])
-            
-            for dup in duplicate_analysis:
-                for perm in dup['permissions']:
-                    writer.writerow([
-                        dup['pole'],
-                        perm['agent'] or 'NO AGENT RECORDED',
-                        perm['date'][:10] if perm['date'] else 'NO DATE',
-                        perm['property_id'],
-                        perm['latitude'] or 'NO GPS',
-                        perm['longitude'] or 'NO GPS',
-                        perm['address'][:50],
-                        dup['risk'],
-                        dup['permission_count'],
-                        dup['agent_count'],
-                        'HOLD PAYMENT - VERIFY' if dup['risk'] == 'HIGH' else 'REVIEW'
-                    ])
+            writer.writerow(CONFLICT_COLUMNS)
+            writer.writerows(conflict_rows(duplicate_analysis))
         
         print(f"✓ Saved: reports/{report_date}_payment_conflicts_detailed.csv")
         
@@ -267,7 +394,7 @@ class GPSDuplicateAnalyzer:
         high_risk = [d for d in duplicate_analysis if d['risk'] == 'HIGH']
         
         print(f"\n📊 OVERALL FINDINGS:")
-        print(f"  - Total poles analyzed: {len(self.pole_permissions)}")
+        print(f"  - Total poles analyzed: {self.pole_count()}")
         print(f"  - Poles with duplicate permissions: {len(duplicate_analysis)}")
         print(f"  - HIGH RISK (multiple agents): {len(high_risk)} poles")
         
@@ -292,17 +419,126 @@ class GPSDuplicateAnalyzer:
         print(f"  - Potential duplicate payments to prevent: {total_duplicate_claims}")
         print(f"  - Poles requiring verification: {len(high_risk)}")
 
-def main():
-    print("=== VELOCITY FIBRE - GPS-BASED PAYMENT VERIFICATION ===")
-    print("Context: High-density informal settlements")
-    print("Approach: Using GPS coordinates, not addresses\n")
+class DuckDBGPSDuplicateAnalyzer(GPSDuplicateAnalyzer):
+    """
+    GPSDuplicateAnalyzer with grouping and proximity search run as SQL in DuckDB
+    Only poles with more than one permission are loaded into pole_permissions;
+    they are all the duplicate reports need.
+    """
     
-    analyzer = GPSDuplicateAnalyzer('/home/ldp/VF/Apps/FibreFlow/OneMap/Lawley_Project_Louis.csv')
+    def load_pole_permissions(self):
+        """Load pole permissions into DuckDB and fetch the duplicated poles"""
+        self.table = OneMapTable(self.csv_path, PERMISSION_COLUMNS)
+        self.table.execute(f"""
+            CREATE TEMP TABLE permissions AS
+            SELECT rowid AS row_number, *,
+                   py_strip("Pole Number") AS pole,
+                   py_strip("Field Agent Name (pole permission)") AS agent,
+                   {self.table.has_value('Latitude')} AND {self.table.has_value('Longitude')} AS has_gps,
+                   {self.table.number('Latitude')} AS lat_value,
+                   {self.table.number('Longitude')} AS lon_value
+            FROM onemap
+            WHERE contains("Status", 'Pole Permission: Approved')
+        """)
+        
+        total, permission_records, missing_gps, missing_agent, poles = self.table.execute("""
+            SELECT (SELECT count(*) FROM onemap),
+                   count(*),
+                   count(*) FILTER (WHERE pole <> '' AND NOT has_gps),
+                   count(*) FILTER (WHERE pole <> '' AND agent = ''),
+                   count(DISTINCT pole) FILTER (WHERE pole <> '')
+            FROM permissions
+        """).fetchone()
+        if total:
+            self.analysis_results['data_quality'] = {
+                'total_records': total,
+                'permission_records': permission_records,
+                'missing_gps': missing_gps,
+                'missing_agent': missing_agent
+            }
+        self.poles = poles
+        self.agents_by_pole = None
+        
+        # Poles in order of first appearance, permissions in file order
+        for row in self.table.dict_rows("""
+            SELECT p.*
+            FROM permissions p
+            JOIN (
+                SELECT pole, min(row_number) AS first_row
+                FROM permissions
+                WHERE pole <> ''
+                GROUP BY pole
+                HAVING count(*) > 1
+            ) d USING (pole)
+            ORDER BY d.first_row, p.row_number
+        """):
+            self.pole_permissions[row['pole']].append(permission_record(row))
+        
+        self.finish_loading()
     
-    # Run analysis
-    analyzer.load_pole_permissions()
-    duplicate_analysis = analyzer.analyze_duplicates()
-    high_risk = analyzer.generate_reports(duplicate_analysis)
+    def pole_count(self):
+        return self.poles
+    
+    def pole_agents(self, pole):
+        if self.agents_by_pole is None:
+            self.agents_by_pole = {
+                name: set(agents)
+                for name, agents in self.table.execute("""
+                    SELECT pole, list(DISTINCT agent)
+                    FROM permissions
+                    WHERE pole <> '' AND agent <> ''
+                    GROUP BY pole
+                """).fetchall()
+            }
+        return self.agents_by_pole.get(pole, set())
+    
+    def cross_pole_pairs(self, radius_m):
+        """Spatial bucketing join: points are only compared with the 3x3 cells around them"""
+        return self.table.execute("""
+            WITH points AS (
+                SELECT row_number AS id, pole, lat_value AS lat, lon_value AS lon
+                FROM permissions
+                WHERE pole <> '' AND has_gps AND NOT isnan(lat_value) AND NOT isnan(lon_value)
+            ),
+            grid AS (
+                -- Cells at least radius_m wide at the most poleward point
+                SELECT $cell_m / $meters_per_degree AS cell_lat,
+                       $cell_m / ($meters_per_degree * cos(radians(least(max(abs(lat)), 89.0)))) AS cell_lon
+                FROM points
+            ),
+            cells AS (
+                SELECT id, pole, lat, lon,
+                       CAST(floor(lat / cell_lat) AS BIGINT) AS cell_x,
+                       CAST(floor(lon / cell_lon) AS BIGINT) AS cell_y
+                FROM points, grid
+            ),
+            neighbours AS (
+                SELECT cells.*, cell_x + dx AS near_x, cell_y + dy AS near_y
+                FROM cells, (VALUES (-1), (0), (1)) x(dx), (VALUES (-1), (0), (1)) y(dy)
+            ),
+            close_pairs AS (
+                SELECT least(a.pole, b.pole) AS pole_a,
+                       greatest(a.pole, b.pole) AS pole_b,
+                       haversine_m(a.lat, a.lon, b.lat, b.lon) AS distance
+                FROM neighbours a
+                JOIN cells b ON b.cell_x = a.near_x AND b.cell_y = a.near_y
+                WHERE a.id < b.id AND a.pole <> b.pole
+            )
+            SELECT pole_a, pole_b, min(distance), count(*)
+            FROM close_pairs
+            WHERE distance <= $radius
+            GROUP BY pole_a, pole_b
+            ORDER BY pole_a, pole_b
+        """, {'radius': radius_m, 'cell_m': radius_m * (1 + CELL_PADDING),
+              'meters_per_degree': METERS_PER_DEGREE_LAT}).fetchall()
+
+def run_reports(analyzer, duplicate_analysis=None):
+    """Run all analyses on loaded permissions and write every report"""
+    if duplicate_analysis is None:
+        duplicate_analysis = analyzer.analyze_duplicates()
+    cross_pole_matches = analyzer.find_cross_pole_matches()
+    analyzer.generate_reports(duplicate_analysis)
+    analyzer.generate_cross_pole_report(cross_pole_matches)
     analyzer.print_summary(duplicate_analysis)
     
     # Save complete analysis
@@ -310,12 +546,33 @@ def main():
     with open(f'reports/{report_date}_gps_duplicate_analysis.json', 'w') as f:
         json.dump(analyzer.analysis_results, f, indent=2)
     
+    return report_date
+
+def main():
+    print("=== VELOCITY FIBRE - GPS-BASED PAYMENT VERIFICATION ===")
+    print("Context: High-density informal settlements")
+    print("Approach: Using GPS coordinates, not addresses\n")
+    
+    args = sys.argv[1:]
+    backend = backend_from_args(args)
+    csv_path = args[0] if args else '/home/ldp/VF/Apps/FibreFlow/OneMap/Lawley_Project_Louis.csv'
+    
+    if backend == 'duckdb':
+        analyzer = DuckDBGPSDuplicateAnalyzer(csv_path)
+    else:
+        analyzer = GPSDuplicateAnalyzer(csv_path)
+    
+    # Run analysis
+    analyzer.load_pole_permissions()
+    report_date = run_reports(analyzer)
+    
     print("\n✓ Analysis complete!")
     print("\n📋 GENERATED REPORTS (in reports/ folder):")
     print(f"  1. {report_date}_payment_conflicts_detailed.csv - Full details for verification")
     print(f"  2. {report_date}_high_risk_payment_summary.json - Management summary")
     print(f"  3. {report_date}_agent_conflict_summary.csv - Agent accountability")
     print(f"  4. {report_date}_gps_duplicate_analysis.json - Complete analysis results")
+    print(f"  5. {report_date}_cross_pole_gps_matches.csv - Same location, different pole numbers")
     
     print("\n🎯 NEXT STEPS:")
     print("  1. Review high_risk_payment_summary.json")
@@ -7,28 +7,43 @@ import csv
 from collections import defaultdict
 from datetime import datetime
 
-def create_agent_followup_report():
-    """Create a simplified report for contacting agents about duplicate claims"""
+CSV_PATH = '/home/ldp/VF/Apps/FibreFlow/OneMap/Lawley_Project_Louis.csv'
+
+# Export columns the reports use
+FOLLOWUP_COLUMNS = [
+    'Status', 'Pole Number', 'Field Agent Name (pole permission)', 'Survey Date',
+    'Location Address', 'Contact Number (e.g.0123456789)', 'Property ID'
+]
+
+CONTACT_COLUMNS = ['Agent Name', 'Contact Number', 'Number of Conflicts', 'Sample Poles']
+
+def read_export(csv_path=CSV_PATH):
+    with open(csv_path, 'r', encoding='utf-8') as f:
+        yield from csv.DictReader(f)
+
+def create_agent_followup_report(rows=None):
+    """
+    Create a simplified report for contacting agents about duplicate claims
+    rows are export rows already read (the export CSV is read if not given);
+    returns the agent contact list rows.
+    """
     
     # Load all pole permissions
     pole_claims = defaultdict(list)
     
-    with open('/home/ldp/VF/Apps/FibreFlow/OneMap/Lawley_Project_Louis.csv', 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        
-        for row in reader:
-            if 'Pole Permission: Approved' in row.get('Status', ''):
-                pole = row.get('Pole Number', '').strip()
-                agent = row.get('Field Agent Name (pole permission)', '').strip()
-                
-                if pole and agent:  # Only include records with both pole and agent
-                    pole_claims[pole].append({
-                        'agent': agent,
-                        'date': row.get('Survey Date', '')[:10],
-                        'address': row.get('Location Address', '')[:80],
-                        'contact': row.get('Contact Number (e.g.0123456789)', '').strip(),
-                        'property_id': row.get('Property ID', '')
-                    })
+    for row in read_export() if rows is None else rows:
+        if 'Pole Permission: Approved' in row.get('Status', ''):
+            pole = row.get('Pole Number', '').strip()
+            agent = row.get('Field Agent Name (pole permission)', '').strip()
+            
+            if pole and agent:  # Only include records with both pole and agent
+                pole_claims[pole].append({
+                    'agent': agent,
+                    'date': row.get('Survey Date', '')[:10],
+                    'address': row.get('Location Address', '')[:80],
+                    'contact': row.get('Contact Number (e.g.0123456789)', '').strip(),
+                    'property_id': row.get('Property ID', '')
+                })
     
     # Find poles with multiple agents
     report_date = datetime.now().strftime('%Y-%m-%d')
@@ -78,20 +93,23 @@ def create_agent_followup_report():
                     agent_contacts[claim['agent']]['contact'] = claim['contact']
     
     # Save agent contact list
+    contact_rows = []
+    for agent, data in sorted(agent_contacts.items(), key=lambda x: len(x[1]['poles']), reverse=True):
+        unique_poles = list(set(data['poles']))
+        contact_rows.append([
+            agent,
+            data['contact'] or 'NO CONTACT',
+            len(unique_poles),
+            ', '.join(unique_poles[:5])  # First 5 poles
+        ])
+    
     with open(f'reports/{report_date}_agent_contact_list.csv', 'w', newline='', encoding='utf-8') as f:
         writer = csv.writer(f)
-        writer.writerow(['Agent Name', 'Contact Number', 'Number of Conflicts', 'Sample Poles'])
-        
-        for agent, data in sorted(agent_contacts.items(), key=lambda x: len(x[1]['poles']), reverse=True):
-            unique_poles = list(set(data['poles']))
-            writer.writerow([
-                agent,
-                data['contact'] or 'NO CONTACT',
-                len(unique_poles),
-                ', '.join(unique_poles[:5])  # First 5 poles
-            ])
+        writer.writerow(CONTACT_COLUMNS)
+        writer.writerows(contact_rows)
     
     print(f"✓ Created: reports/{report_date}_agent_contact_list.csv")
+    return contact_rows
 
 if __name__ == "__main__":
     print("Creating agent follow-up reports...")
@@ -2,39 +2,112 @@
 """
 Master script to run all payment verification reports
 Generates all reports needed to prevent duplicate agent payments
+
+The reports are stages of one in-process pipeline: the export is read
+once, and stages hand each other their results in memory instead of
+re-reading the CSV or each other's report files. Each stage's results are
+cached by input hash (cache/pipeline/), so stages whose inputs have not
+changed since the last run are skipped, and independent stages run
+concurrently. A per-stage timing summary is printed at the end.
+
+Usage:
+    python3 scripts/payment_verification/run_payment_verification.py [csv_file] [--force] [--workers N]
+
+--force reruns every stage instead of using cached results.
 """
 
-import subprocess
 import os
+import sys
 from datetime import datetime
+from pathlib import Path
+
+ONEMAP_DIR = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ONEMAP_DIR))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import pyarrow as pa
+
+from onemap_lib.pipeline import Pipeline, Stage
+from onemap_lib.snapshot import load_table, table_rows
+from analyze_gps_duplicates import CONFLICT_COLUMNS, PERMISSION_COLUMNS, GPSDuplicateAnalyzer, conflict_rows, run_reports
+from create_agent_followup_report import CONTACT_COLUMNS, FOLLOWUP_COLUMNS, create_agent_followup_report
+from create_complete_agent_report import create_complete_agent_report
+from analyze_single_agent_duplicates import analyze_single_agent_duplicates
+
+CSV_PATH = ONEMAP_DIR / 'Lawley_Project_Louis.csv'
+
+def report_table(columns, rows):
+    """Report rows as a Table of strings, the values they read back as from the CSV"""
+    values = list(zip(*rows)) if rows else [() for _ in columns]
+    return pa.table({name: pa.array([str(v) for v in column], pa.string())
+                     for name, column in zip(columns, values)})
 
-def run_payment_verification():
-    """Run all payment verification scripts and generate reports"""
+def load_export(csv_path):
+    """Read the export columns every stage uses, once"""
+    columns = list(dict.fromkeys(PERMISSION_COLUMNS + FOLLOWUP_COLUMNS))
+    export = load_table(csv_path, columns)
+    print(f"✓ Loaded {export.num_rows} records from {csv_path}")
+    return {'export': export}
+
+def gps_duplicates(export, csv_path):
+    """GPS-based duplicate analysis and the payment conflict reports"""
+    analyzer = GPSDuplicateAnalyzer(csv_path)
+    analyzer.load_pole_permissions(table_rows(export['export']))
+    duplicate_analysis = analyzer.analyze_duplicates()
+    run_reports(analyzer, duplicate_analysis)
+    return {'conflicts': report_table(CONFLICT_COLUMNS, list(conflict_rows(duplicate_analysis)))}
+
+def agent_followup(export):
+    """Agent follow-up and contact lists"""
+    contacts = create_agent_followup_report(table_rows(export['export']))
+    return {'contacts': report_table(CONTACT_COLUMNS, contacts)}
+
+def complete_agent_report(gps_duplicates, agent_followup):
+    """All agents per conflicting pole, with contact numbers"""
+    create_complete_agent_report(gps_duplicates['conflicts'].to_pylist(),
+                                 agent_followup['contacts'].to_pylist())
+
+def same_agent_duplicates(gps_duplicates):
+    """Poles the same agent submitted more than once"""
+    analyze_single_agent_duplicates(gps_duplicates['conflicts'].to_pylist())
+
+def payment_pipeline(csv_path, force=False):
+    return Pipeline([
+        # The snapshot cache already keeps the parsed export by content hash
+        Stage('export', load_export, params={'csv_path': str(csv_path)}, source=csv_path, cache=False),
+        Stage('gps_duplicates', gps_duplicates, inputs=['export'], params={'csv_path': str(csv_path)},
+              code=[GPSDuplicateAnalyzer],
+              reports=['payment_conflicts_detailed.csv', 'high_risk_payment_summary.json',
+                       'agent_conflict_summary.csv', 'cross_pole_gps_matches.csv',
+                       'gps_duplicate_analysis.json']),
+        Stage('agent_followup', agent_followup, inputs=['export'], code=[create_agent_followup_report],
+              reports=['agent_followup_list.csv', 'agent_contact_list.csv']),
+        Stage('complete_agent_report', complete_agent_report, inputs=['gps_duplicates', 'agent_followup'],
+              code=[create_complete_agent_report],
+              reports=['complete_agent_followup.csv', 'agent_followup_expanded.csv']),
+        Stage('same_agent_duplicates', same_agent_duplicates, inputs=['gps_duplicates'],
+              code=[analyze_single_agent_duplicates],
+              reports=['same_agent_duplicates.csv']),
+    ], force=force)
+
+def run_payment_verification(csv_path=CSV_PATH, force=False, workers=4):
+    """Run all payment verification stages and generate reports"""
     
     print("=== VELOCITY FIBRE - PAYMENT VERIFICATION SYSTEM ===")
     print(f"Report Date: {datetime.now().strftime('%Y-%m-%d %H:%M')}")
     print("=" * 50)
     
-    # Change to OneMap directory
-    os.chdir('/home/ldp/VF/Apps/FibreFlow/OneMap')
+    # Reports are written relative to the OneMap directory
+    os.chdir(ONEMAP_DIR)
     
     # Ensure reports directory exists
     os.makedirs('reports', exist_ok=True)
     
-    print("\n1. Running GPS-based duplicate analysis...")
-    print("-" * 50)
-    try:
-        subprocess.run(['python3', 'scripts/payment_verification/analyze_gps_duplicates.py'], check=True)
-    except subprocess.CalledProcessError as e:
-        print(f"Error running GPS analysis: {e}")
-        return False
-    
-    print("\n2. Creating agent follow-up reports...")
-    print("-" * 50)
-    try:
-        subprocess.run(['python3', 'scripts/payment_verification/create_agent_followup_report.py'], check=True)
-    except subprocess.CalledProcessError as e:
-        print(f"Error creating follow-up reports: {e}")
+    pipeline = payment_pipeline(csv_path, force)
+    outputs = pipeline.run(workers)
+    pipeline.print_timings()
+    if outputs is None:
+        print("\n❌ Payment verification stopped: a stage failed (see above)")
         return False
     
     print("\n" + "=" * 50)
@@ -51,9 +124,11 @@ def run_payment_verification():
     print("\n📞 FOR AGENT FOLLOW-UP:")
     print(f"   - {report_date}_agent_followup_list.csv (with phone numbers)")
     print(f"   - {report_date}_agent_contact_list.csv")
+    print(f"   - {report_date}_complete_agent_followup.csv (all agents per pole)")
     
     print("\n📊 FOR ACCOUNTABILITY:")
     print(f"   - {report_date}_agent_conflict_summary.csv")
+    print(f"   - {report_date}_same_agent_duplicates.csv")
     
     print("\n💡 NEXT STEPS:")
     print("   1. Review high_risk_payment_summary.json for overview")
@@ -64,5 +139,10 @@ def run_payment_verification():
     return True
 
 if __name__ == "__main__":
-    success = run_payment_verification()
-    exit(0 if success else 1)
\ No newline at end of file
+    args = sys.argv[1:]
+    workers = int(args[args.index('--workers') + 1]) if '--workers' in args else 4
+    positional = [a for i, a in enumerate(args)
+                  if not a.startswith('--') and (i == 0 or args[i - 1] != '--workers')]
+    csv_path = Path(positional[0]).resolve() if positional else CSV_PATH
+    success = run_payment_verification(csv_path, force='--force' in args, workers=workers)
+    exit(0 if success else 1)
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Process a daily OneMap export as a delta against the stored state
+Only new, changed and removed properties are written, and the persisted
+duplicate / first-permission / payment-conflict results are updated for the
+poles they touch, so the daily run scales with the change, not the history.
+
+Usage (from the OneMap directory):
+    python3 scripts/process_daily_delta.py <export.csv> [--state cache/onemap_state.db]
+                                            [--dry-run] [--force] [--export]
+
+    --dry-run  classify and report without saving the new state
+    --force    reprocess an export that was already applied
+    --export   also write the full current results as CSV
+"""
+
+import csv
+import json
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from onemap_lib.delta import DeltaStore
+
+
+def write_delta_reports(result, report_date):
+    """Save the changed properties and the run summary"""
+    changes_file = f'reports/{report_date}_daily_delta_changes.csv'
+    with open(changes_file, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['Property ID', 'Change', 'Pole Number'])
+        writer.writerows(result.changes)
+    print(f"✓ Saved: {changes_file}")
+
+    summary_file = f'reports/{report_date}_daily_delta_summary.json'
+    with open(summary_file, 'w') as f:
+        json.dump({'generated': datetime.now().isoformat(), **result.summary()}, f, indent=2)
+    print(f"✓ Saved: {summary_file}")
+
+
+def export_current_results(store, report_date):
+    """Write the full persisted results (no CSV re-read needed)"""
+    output = f'reports/{report_date}_delta_true_duplicate_poles.csv'
+    with open(output, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['Pole Number', 'Location Count', 'Addresses'])
+        for pole, count, addresses in store.multi_address_poles():
+            writer.writerow([pole, count, ' | '.join(addresses)])
+    print(f"✓ Saved: {output}")
+
+    output = f'reports/{report_date}_delta_first_pole_permissions.csv'
+    with open(output, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['Pole Number', 'First Permission Date', 'Original Agent', 'Contact Number',
+                         'Contact Person', 'Property ID', 'Latitude', 'Longitude', 'Address',
+                         'Stand Number', 'Status'])
+        for pole, property_id, date, record in store.first_permissions():
+            writer.writerow([pole, date, record['agent'], record['contact'], record['contact_name'],
+                             property_id, record['latitude'], record['longitude'], record['address'],
+                             record['stand_number'], record['status']])
+    print(f"✓ Saved: {output}")
+
+    output = f'reports/{report_date}_delta_pole_conflicts.csv'
+    with open(output, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['Pole Number', 'Permission Count', 'Agent Count', 'Agents', 'Risk Level'])
+        for pole, count, agent_count, agents, risk in store.pole_conflicts():
+            writer.writerow([pole, count, agent_count, ', '.join(agents), risk])
+    print(f"✓ Saved: {output}")
+
+
+def print_summary(result):
+    counts = result.counts
+    changes = result.result_changes
+
+    print(f"\n📊 DELTA (run {result.run_id})")
+    print(f"  New properties: {counts['new']}")
+    print(f"  Changed properties: {counts['changed']}")
+    print(f"  Unchanged properties: {counts['unchanged']}")
+    print(f"  Removed properties: {counts['removed']}")
+    if counts['missing_property_id'] or counts['repeated_property_id']:
+        print(f"  ⚠️  Rows without Property ID: {counts['missing_property_id']}, "
+              f"repeated Property IDs: {counts['repeated_property_id']}")
+
+    print(f"\n🔄 RESULTS UPDATED FOR {len(result.affected_poles)} POLES")
+    print(f"  New multi-address poles: {len(changes['new_multi_address_poles'])}")
+    print(f"  Resolved multi-address poles: {len(changes['resolved_multi_address_poles'])}")
+    print(f"  New HIGH risk payment conflicts: {len(changes['new_high_risk_poles'])}")
+    print(f"  Resolved HIGH risk payment conflicts: {len(changes['resolved_high_risk_poles'])}")
+    print(f"  First permission changes: {len(changes['first_permission_changes'])}")
+
+    for pole in changes['new_high_risk_poles'][:10]:
+        print(f"    🚨 {pole}")
+
+
+def main():
+    args = sys.argv[1:]
+    state_path = None
+    if '--state' in args:
+        position = args.index('--state')
+        state_path = args[position + 1]
+        del args[position:position + 2]
+
+    paths = [a for a in args if not a.startswith('--')]
+    if not paths:
+        print(__doc__)
+        sys.exit(1)
+    csv_path = paths[0]
+    dry_run = '--dry-run' in args
+
+    print("=== VELOCITY FIBRE - ONEMAP DAILY DELTA ===")
+    print(f"Report Date: {datetime.now().strftime('%Y-%m-%d %H:%M')}")
+    print("=" * 50)
+
+    Path('reports').mkdir(exist_ok=True)
+    report_date = datetime.now().strftime('%Y-%m-%d')
+
+    start = time.perf_counter()
+    with DeltaStore(state_path) as store:
+        result = store.apply_export(csv_path, force='--force' in args, dry_run=dry_run)
+        if result.skipped:
+            return
+
+        print_summary(result)
+        write_delta_reports(result, report_date)
+        if '--export' in args and not dry_run:
+            export_current_results(store, report_date)
+
+    if dry_run:
+        print("\n(dry run - state not saved)")
+    print(f"\n✓ Done in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Run all OneMap analyzers in a single pass over the CSV
+Each analyzer still writes its usual reports, but the export is read once
+and shared indexes (pole -> addresses etc.) are built once.
+
+Usage (from the OneMap directory):
+    python3 scripts/run_all_analyses.py [csv_file] [--only gps,workflow,...]
+"""
+
+import json
+import sys
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+
+ONEMAP_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ONEMAP_DIR))
+sys.path.insert(0, str(ONEMAP_DIR / 'scripts' / 'data_analysis'))
+sys.path.insert(0, str(ONEMAP_DIR / 'scripts' / 'payment_verification'))
+
+from onemap_lib.engine import AnalyzerVisitor, SinglePassEngine
+from onemap_lib.first_permissions import FirstPermissionTracker
+import analyze_agent_payments
+import analyze_gps_duplicates
+import extract_first_permissions_complete
+import identify_true_duplicates
+import reanalyze_with_workflow
+
+
+class GPSDuplicatesVisitor(AnalyzerVisitor):
+    name = 'gps'
+    columns = analyze_gps_duplicates.PERMISSION_COLUMNS
+
+    def __init__(self, csv_path):
+        self.analyzer = analyze_gps_duplicates.GPSDuplicateAnalyzer(csv_path)
+
+    def visit(self, row, shared):
+        self.analyzer.add_row(row)
+
+    def finish(self, shared):
+        self.analyzer.finish_loading()
+        analyze_gps_duplicates.run_reports(self.analyzer)
+
+
+class TrueDuplicatesVisitor(AnalyzerVisitor):
+    name = 'true_duplicates'
+    columns = identify_true_duplicates.TRUE_DUPLICATE_COLUMNS
+
+    def __init__(self, csv_path):
+        self.pole_address_history = defaultdict(list)
+
+    def visit(self, row, shared):
+        identify_true_duplicates.collect_row(row, None, self.pole_address_history)
+
+    def finish(self, shared):
+        identify_true_duplicates.report_true_duplicates(shared.pole_addresses, self.pole_address_history)
+
+
+class WorkflowVisitor(AnalyzerVisitor):
+    name = 'workflow'
+    columns = reanalyze_with_workflow.WORKFLOW_COLUMNS
+
+    def __init__(self, csv_path):
+        self.analyzer = reanalyze_with_workflow.WorkflowAnalyzer()
+
+    def visit(self, row, shared):
+        self.analyzer.add_row(row, track_pole_locations=False)
+
+    def finish(self, shared):
+        self.analyzer.pole_locations = shared.pole_addresses
+        self.analyzer.finalize()
+        self.analyzer.generate_report()
+
+
+class FirstPermissionsVisitor(AnalyzerVisitor):
+    name = 'first_permissions'
+    columns = extract_first_permissions_complete.PERMISSION_COLUMNS
+
+    def __init__(self, csv_path):
+        self.tracker = FirstPermissionTracker()
+
+    def visit(self, row, shared):
+        extract_first_permissions_complete.collect_permission(row, self.tracker)
+
+    def finish(self, shared):
+        extract_first_permissions_complete.write_first_permission_reports(self.tracker)
+
+
+class AgentPaymentsVisitor(AnalyzerVisitor):
+    name = 'agent_payments'
+    columns = analyze_agent_payments.ANALYSIS_COLUMNS
+
+    def __init__(self, csv_path):
+        self.analyzer = analyze_agent_payments.AgentPaymentAnalyzer(csv_path)
+
+    def visit(self, row, shared):
+        self.analyzer.add_record({c: row.get(c, '') for c in self.columns})
+
+    def finish(self, shared):
+        print(f"✓ Loaded {self.analyzer.record_count} records")
+        analyze_agent_payments.run_analyses(self.analyzer)
+
+
+class DataQualityVisitor(AnalyzerVisitor):
+    """Column completeness and bulk-entry timestamps"""
+
+    name = 'data_quality'
+    columns = ['Pole Number', 'Location Address', 'Latitude', 'Longitude',
+               'Survey Date', 'Field Agent Name (pole permission)', 'Status']
+
+    # Same exact timestamp on more rows than this is flagged as bulk entry
+    BULK_ENTRY_THRESHOLD = 3
+
+    def __init__(self, csv_path):
+        self.csv_path = csv_path
+        self.missing = defaultdict(int)
+
+    def visit(self, row, shared):
+        for column in self.columns:
+            if not row.get(column, '').strip():
+                self.missing[column] += 1
+
+    def finish(self, shared):
+        total = shared.row_count
+        completeness = {
+            column: {
+                'missing': self.missing[column],
+                'missing_pct': round(self.missing[column] / total * 100, 1) if total else 0
+            }
+            for column in self.columns
+        }
+        bulk = sorted(
+            ((ts, count) for ts, count in shared.timestamp_buckets.items()
+             if count > self.BULK_ENTRY_THRESHOLD),
+            key=lambda x: x[1], reverse=True
+        )
+
+        for column, info in completeness.items():
+            print(f"  {column}: {info['missing']} missing ({info['missing_pct']}%)")
+        print(f"  Timestamps shared by >{self.BULK_ENTRY_THRESHOLD} rows: {len(bulk)}")
+
+        report_date = datetime.now().strftime('%Y-%m-%d')
+        output = f'reports/{report_date}_data_quality_summary.json'
+        with open(output, 'w') as f:
+            json.dump({
+                'generated': datetime.now().isoformat(),
+                'data_source': str(self.csv_path),
+                'total_records': total,
+                'unique_properties': len(shared.property_rows),
+                'unique_poles': len(shared.pole_addresses),
+                'agents_with_permissions': len(shared.agent_permissions),
+                'completeness': completeness,
+                'bulk_entry_timestamps': [{'timestamp': ts, 'count': count} for ts, count in bulk[:50]]
+            }, f, indent=2)
+        print(f"✓ Saved: {output}")
+
+
+VISITORS = {
+    'gps': GPSDuplicatesVisitor,
+    'true_duplicates': TrueDuplicatesVisitor,
+    'workflow': WorkflowVisitor,
+    'first_permissions': FirstPermissionsVisitor,
+    'agent_payments': AgentPaymentsVisitor,
+    'data_quality': DataQualityVisitor,
+}
+
+
+def main():
+    args = sys.argv[1:]
+    selected = list(VISITORS)
+    if '--only' in args:
+        position = args.index('--only')
+        if position + 1 >= len(args):
+            print(f"--only needs a comma-separated list: {', '.join(VISITORS)}")
+            sys.exit(1)
+        selected = args[position + 1].split(',')
+        del args[position:position + 2]
+        unknown = [name for name in selected if name not in VISITORS]
+        if unknown:
+            print(f"Unknown analyzers: {', '.join(unknown)} (available: {', '.join(VISITORS)})")
+            sys.exit(1)
+
+    csv_path = args[0] if args else 'Lawley_Project_Louis.csv'
+
+    print("=== VELOCITY FIBRE - SINGLE-PASS ONEMAP ANALYSIS ===")
+    print(f"Report Date: {datetime.now().strftime('%Y-%m-%d %H:%M')}")
+    print("=" * 50)
+
+    Path('reports').mkdir(exist_ok=True)
+
+    engine = SinglePassEngine(csv_path)
+    for name in selected:
+        engine.register(VISITORS[name](csv_path))
+
+    timings = engine.run()
+
+    print("\n" + "=" * 50)
+    print("⏱  TIMINGS")
+    for name, seconds in timings.items():
+        print(f"  {name}: {seconds:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Run all antiHall validators with one read per input file
+Every input (the export, the payment reports, the extraction outputs) is
+loaded once into a shared dataset registry; the validators then run in
+parallel worker processes and each writes its usual validation report,
+with the content hash and row count of the files it used as evidence.
+
+Usage (from the OneMap directory):
+    python3 scripts/run_all_validations.py [csv_file] [--only payment,data,...] [--workers N]
+"""
+
+import sys
+import time
+from datetime import datetime
+from functools import partial
+from pathlib import Path
+
+ONEMAP_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ONEMAP_DIR))
+sys.path.insert(0, str(ONEMAP_DIR / 'scripts' / 'utilities'))
+sys.path.insert(0, str(ONEMAP_DIR / 'scripts' / 'data_analysis'))
+
+from onemap_lib.datasets import DatasetRegistry, run_parallel
+import analyze_and_export_complete
+import validate_analysis
+import validate_extraction_results
+import validate_payment_analysis
+
+
+def run_extraction_validation(registry):
+    validate_extraction_results.ExtractionResultsValidator(registry).generate_report()
+
+
+def run_conflict_analysis(csv_path, registry):
+    analyze_and_export_complete.PoleConflictAnalyzer(csv_path, registry).run_complete_analysis()
+
+
+def validators(csv_path):
+    """{name: (func(registry), input files)}"""
+    return {
+        'payment': (validate_payment_analysis.run_payment_validation, validate_payment_analysis.INPUTS),
+        'data': (partial(validate_analysis.run_data_validation, csv_path), [csv_path]),
+        'extraction': (run_extraction_validation, validate_extraction_results.INPUT_FILES),
+        'conflicts': (partial(run_conflict_analysis, csv_path), [csv_path]),
+    }
+
+
+def option(args, name):
+    """Remove 'name VALUE' from args and return VALUE (None if absent)"""
+    if name not in args:
+        return None
+    position = args.index(name)
+    if position + 1 >= len(args):
+        print(f"{name} needs a value")
+        sys.exit(1)
+    value = args[position + 1]
+    del args[position:position + 2]
+    return value
+
+
+def main():
+    args = sys.argv[1:]
+    only = option(args, '--only')
+    workers = option(args, '--workers')
+    csv_path = args[0] if args else 'Lawley_Project_Louis.csv'
+
+    available = validators(csv_path)
+    selected = only.split(',') if only else list(available)
+    unknown = [name for name in selected if name not in available]
+    if unknown:
+        print(f"Unknown validators: {', '.join(unknown)} (available: {', '.join(available)})")
+        sys.exit(1)
+
+    print("=== antiHall VALIDATION - ALL VALIDATORS ===")
+    print(f"Report Date: {datetime.now().strftime('%Y-%m-%d %H:%M')}")
+    print("=" * 50)
+
+    Path('reports').mkdir(exist_ok=True)
+
+    inputs = [path for name in selected for path in available[name][1]]
+    registry = DatasetRegistry()
+    start = time.perf_counter()
+    registry.preload(inputs)
+    load_time = time.perf_counter() - start
+
+    print(f"\n📂 Loaded {len(registry.datasets)} input files once ({load_time:.2f}s)")
+    for path, evidence in registry.evidence(inputs).items():
+        rows = f"{evidence['rows']:,} rows, " if 'rows' in evidence else ''
+        print(f"  {Path(path).name}: {rows}sha256 {evidence['sha256'][:12]}")
+
+    start = time.perf_counter()
+    results = run_parallel(registry, {name: available[name][0] for name in selected},
+                           int(workers) if workers else None)
+    run_time = time.perf_counter() - start
+
+    failed = []
+    for name, output, error in results:
+        print(f"\n{'=' * 50}\n▶ {name}\n{'=' * 50}")
+        print(output, end='')
+        if error:
+            print(f"❌ {name} failed:\n{error}")
+            failed.append(name)
+
+    print("\n" + "=" * 50)
+    print(f"⏱  Validators ran in {run_time:.2f}s")
+    if failed:
+        print(f"❌ Failed: {', '.join(failed)}")
+        sys.exit(1)
+    print(f"✓ {len(results)} validators complete")
+
+
+if __name__ == '__main__':
+    main()
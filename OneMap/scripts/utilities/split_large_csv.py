@@ -5,16 +5,75 @@ Splits large CSV files into manageable chunks while preserving data integrity
 """
 
 import csv
+import io
 import os
+import sys
 import json
 from datetime import datetime
+from collections import OrderedDict
+from functools import partial
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from onemap_lib.parallel_csv import map_ranges
+
+# Open output files kept by the streaming field/date splits
+DEFAULT_MAX_OPEN_FILES = 64
+
+
+class _WriterCache:
+    """
+    LRU cache of open CSV writers, one per output file
+    
+    At most max_open_files handles are open at once; the least recently used
+    one is closed and reopened in append mode when its key comes back, so a
+    split with thousands of keys still runs with constant memory.
+    """
+    
+    def __init__(self, output_dir, headers, max_open_files=DEFAULT_MAX_OPEN_FILES):
+        self.output_dir = Path(output_dir)
+        self.headers = headers
+        self.max_open_files = max(1, max_open_files)
+        self.open_writers = OrderedDict()  # filename -> (file, DictWriter)
+        self.started = set()
+        
+    def write(self, filename, row):
+        entry = self.open_writers.get(filename)
+        if entry is None:
+            if len(self.open_writers) >= self.max_open_files:
+                _, (old_file, _) = self.open_writers.popitem(last=False)
+                old_file.close()
+            
+            new_file = filename not in self.started
+            handle = open(self.output_dir / filename, 'w' if new_file else 'a', newline='', encoding='utf-8')
+            writer = csv.DictWriter(handle, fieldnames=self.headers)
+            if new_file:
+                writer.writeheader()
+                self.started.add(filename)
+            entry = self.open_writers[filename] = (handle, writer)
+        else:
+            self.open_writers.move_to_end(filename)
+        entry[1].writerow(row)
+        
+    def close(self):
+        for handle, _ in self.open_writers.values():
+            handle.close()
+        self.open_writers.clear()
+        
+    def __enter__(self):
+        return self
+        
+    def __exit__(self, *exc):
+        self.close()
+
+
 class CSVSplitter:
-    def __init__(self, input_file, output_dir='split_data', chunk_size=1000):
+    def __init__(self, input_file, output_dir='split_data', chunk_size=1000, max_open_files=DEFAULT_MAX_OPEN_FILES):
         self.input_file = input_file
         self.output_dir = Path(output_dir)
         self.chunk_size = chunk_size
+        self.max_open_files = max_open_files
         self.metadata = {
             'original_file': input_file,
             'split_date': datetime.now().isoformat(),
@@ -55,77 +114,158 @@ class CSVSplitter:
         
         print(f"✓ Split complete: {total_rows} rows → {chunk_num + 1} files")
         
+    def split_by_rows_parallel(self, workers=None):
+        """
+        Split CSV into chunks of about N rows each, in parallel
+        
+        The file is memory-mapped and cut at record boundaries (quoted
+        newlines respected); each worker parses and writes its own chunks.
+        Chunks are sized by bytes, so row counts vary around chunk_size.
+        """
+        workers = workers or os.cpu_count() or 1
+        print(f"Splitting {self.input_file} by rows (~{self.chunk_size} rows per file, {workers} workers)...")
+        
+        # Create output directory
+        self.output_dir.mkdir(exist_ok=True)
+        
+        parts = self._estimate_chunk_count()
+        write_chunk = partial(_write_range_chunk, output_dir=str(self.output_dir))
+        results = map_ranges(self.input_file, write_chunk, workers=workers, parts=parts)
+        
+        total_rows = 0
+        for chunk_num, result in enumerate(results):
+            total_rows += result['rows']
+            self.metadata['chunks'].append({
+                'filename': result['filename'],
+                'rows': result['rows'],
+                'split_type': 'rows',
+                'chunk_num': chunk_num,
+                'byte_start': result['byte_start'],
+                'byte_end': result['byte_end']
+            })
+            if result['malformed_rows']:
+                print(f"  ⚠️  {result['filename']}: {result['malformed_rows']} rows with a different column count than the header")
+            print(f"  Written: {result['filename']} ({result['rows']} rows)")
+        
+        self.metadata['total_rows'] = total_rows
+        self.metadata['total_chunks'] = len(results)
+        self._save_metadata()
+        
+        print(f"✓ Split complete: {total_rows} rows → {len(results)} files")
+        
+    def _estimate_chunk_count(self, sample_rows=1000):
+        """Number of byte ranges giving about chunk_size rows each"""
+        sample = io.StringIO()
+        writer = csv.writer(sample, lineterminator='\n')
+        sampled = 0
+        with open(self.input_file, 'r', encoding='utf-8', newline='') as infile:
+            reader = csv.reader(infile)
+            next(reader, None)
+            for row in reader:
+                writer.writerow(row)
+                sampled += 1
+                if sampled >= sample_rows:
+                    break
+        
+        if not sampled:
+            return 1
+        bytes_per_row = len(sample.getvalue().encode('utf-8')) / sampled
+        estimated_rows = os.path.getsize(self.input_file) / bytes_per_row
+        return max(1, round(estimated_rows / self.chunk_size))
+        
     def split_by_field(self, field_name):
-        """Split CSV by unique values in a specific field"""
+        """Split CSV by unique values in a specific field (streaming, single pass)"""
         print(f"Splitting {self.input_file} by field '{field_name}'...")
         
         # Create output directory
         self.output_dir.mkdir(exist_ok=True)
         
-        # First pass: collect unique values
-        field_values = {}
+        groups = {}  # safe value -> chunk info, in order of first appearance
         with open(self.input_file, 'r', encoding='utf-8') as infile:
             reader = csv.DictReader(infile)
             headers = reader.fieldnames
             
             if field_name not in headers:
                 raise ValueError(f"Field '{field_name}' not found in CSV")
-                
-            for row in reader:
-                value = row.get(field_name, 'UNKNOWN').strip() or 'EMPTY'
-                # Sanitize for filename
-                safe_value = "".join(c for c in value if c.isalnum() or c in (' ', '-', '_')).rstrip()[:50]
-                
-                if safe_value not in field_values:
-                    field_values[safe_value] = []
-                field_values[safe_value].append(row)
-        
-        # Write chunks
-        for idx, (value, rows) in enumerate(field_values.items()):
-            filename = f"chunk_{idx:04d}_{value}.csv"
-            self._write_chunk(headers, rows, idx, f'field_{field_name}', filename)
+            
+            with _WriterCache(self.output_dir, headers, self.max_open_files) as writers:
+                for row_num, row in enumerate(reader):
+                    value = row.get(field_name, 'UNKNOWN').strip() or 'EMPTY'
+                    # Sanitize for filename
+                    safe_value = "".join(c for c in value if c.isalnum() or c in (' ', '-', '_')).rstrip()[:50]
+                    
+                    info = groups.get(safe_value)
+                    if info is None:
+                        idx = len(groups)
+                        info = groups[safe_value] = self._new_chunk_info(
+                            f"chunk_{idx:04d}_{safe_value}.csv", idx, f'field_{field_name}', row_num)
+                    info['rows'] += 1
+                    info['last_row'] = row_num
+                    writers.write(info['filename'], row)
+        
+        for info in groups.values():
+            self._record_chunk(info)
             
         self.metadata['split_field'] = field_name
-        self.metadata['unique_values'] = len(field_values)
+        self.metadata['unique_values'] = len(groups)
         self._save_metadata()
         
-        print(f"✓ Split complete: {len(field_values)} unique values in '{field_name}'")
+        print(f"✓ Split complete: {len(groups)} unique values in '{field_name}'")
         
     def split_by_date(self, date_field):
-        """Split CSV by date ranges (monthly)"""
+        """Split CSV by date ranges (monthly, streaming, single pass)"""
         print(f"Splitting {self.input_file} by date field '{date_field}'...")
         
         # Create output directory
         self.output_dir.mkdir(exist_ok=True)
         
-        # Group by year-month
+        # Group by year-month; files get their sorted index once all months are known
         date_groups = {}
         with open(self.input_file, 'r', encoding='utf-8') as infile:
             reader = csv.DictReader(infile)
             headers = reader.fieldnames
             
-            for row in reader:
-                date_str = row.get(date_field, '').strip()
-                if not date_str:
-                    month_key = 'NO_DATE'
-                else:
-                    try:
-                        # Handle various date formats
-                        if 'T' in date_str:
-                            date_str = date_str.split('T')[0]
-                        date_obj = datetime.fromisoformat(date_str)
-                        month_key = date_obj.strftime('%Y_%m')
-                    except:
-                        month_key = 'INVALID_DATE'
-                        
-                if month_key not in date_groups:
-                    date_groups[month_key] = []
-                date_groups[month_key].append(row)
-        
-        # Write chunks
-        for idx, (month, rows) in enumerate(sorted(date_groups.items())):
+            with _WriterCache(self.output_dir, headers, self.max_open_files) as writers:
+                for row_num, row in enumerate(reader):
+                    date_str = row.get(date_field, '').strip()
+                    date_obj = None
+                    if not date_str:
+                        month_key = 'NO_DATE'
+                    else:
+                        try:
+                            # Handle various date formats
+                            if 'T' in date_str:
+                                date_str = date_str.split('T')[0]
+                            date_obj = datetime.fromisoformat(date_str)
+                            month_key = date_obj.strftime('%Y_%m')
+                        except:
+                            month_key = 'INVALID_DATE'
+                    
+                    info = date_groups.get(month_key)
+                    if info is None:
+                        info = date_groups[month_key] = self._new_chunk_info(
+                            f".{month_key}.csv.part", None, f'date_{date_field}', row_num)
+                    info['rows'] += 1
+                    info['last_row'] = row_num
+                    if date_obj is not None:
+                        # Compare calendar dates: naive and tz-aware values don't order
+                        day = date_obj.date()
+                        if info.get('min_date') is None or day < info['min_date']:
+                            info['min_date'] = day
+                        if info.get('max_date') is None or day > info['max_date']:
+                            info['max_date'] = day
+                    writers.write(info['filename'], row)
+        
+        # Rename to final chunk names
+        for idx, (month, info) in enumerate(sorted(date_groups.items())):
             filename = f"chunk_{idx:04d}_{month}.csv"
-            self._write_chunk(headers, rows, idx, f'date_{date_field}', filename)
+            (self.output_dir / info['filename']).replace(self.output_dir / filename)
+            info['filename'] = filename
+            info['chunk_num'] = idx
+            for key in ('min_date', 'max_date'):
+                if info.get(key) is not None:
+                    info[key] = info[key].isoformat()
+            self._record_chunk(info)
             
         self._save_metadata()
         print(f"✓ Split complete: {len(date_groups)} date groups")
@@ -211,6 +351,22 @@ class CSVSplitter:
         
         print(f"  Written: {filename} ({len(rows)} rows)")
         
+    def _new_chunk_info(self, filename, chunk_num, split_type, first_row):
+        """Metadata for a chunk that is filled in while streaming"""
+        return {
+            'filename': filename,
+            'rows': 0,
+            'split_type': split_type,
+            'chunk_num': chunk_num,
+            'first_row': first_row,
+            'last_row': first_row
+        }
+        
+    def _record_chunk(self, info):
+        """Add a streamed chunk to the metadata"""
+        self.metadata['chunks'].append(info)
+        print(f"  Written: {info['filename']} ({info['rows']} rows)")
+        
     def _save_metadata(self):
         """Save split metadata"""
         metadata_file = self.output_dir / 'split_metadata.json'
@@ -219,6 +375,33 @@ class CSVSplitter:
             
         print(f"\n✓ Metadata saved to: {metadata_file}")
 
+def _write_range_chunk(csv_range, output_dir):
+    """Parse one byte range and write it as a chunk file (runs in a worker)"""
+    output_dir = Path(output_dir)
+    filename = f"chunk_{csv_range.index:04d}.csv"
+    header = csv_range.header
+    rows = 0
+    malformed = 0
+    
+    with open(output_dir / filename, 'w', newline='', encoding='utf-8') as outfile:
+        writer = csv.writer(outfile)
+        writer.writerow(header)
+        for row in csv_range.rows():
+            if len(row) != len(header):
+                malformed += 1
+                # Same padding csv.DictReader/DictWriter apply to short rows
+                row = row + [''] * (len(header) - len(row))
+            writer.writerow(row)
+            rows += 1
+    
+    return {
+        'filename': filename,
+        'rows': rows,
+        'byte_start': csv_range.start,
+        'byte_end': csv_range.end,
+        'malformed_rows': malformed
+    }
+
 def create_split_strategy():
     """Create standard splitting strategy document"""
     strategy = """# CSV Splitting Strategy for Large Files
@@ -296,27 +479,37 @@ Each split generates `split_metadata.json`:
 
 def main():
     """Example usage"""
-    import sys
+    max_open_files = DEFAULT_MAX_OPEN_FILES
+    if '--max-open' in sys.argv:
+        position = sys.argv.index('--max-open')
+        max_open_files = int(sys.argv[position + 1])
+        del sys.argv[position:position + 2]
     
     if len(sys.argv) < 2:
         print("Usage: python split_large_csv.py <csv_file> [method] [parameter]")
         print("\nExamples:")
         print("  python split_large_csv.py data.csv rows 2000")
+        print("  python split_large_csv.py data.csv rows-parallel 2000")
         print("  python split_large_csv.py data.csv field Status")
         print("  python split_large_csv.py data.csv date 'Survey Date'")
         print("  python split_large_csv.py data.csv smart")
+        print("  python split_large_csv.py data.csv field Status --max-open 32")
         create_split_strategy()
         return
         
     csv_file = sys.argv[1]
     method = sys.argv[2] if len(sys.argv) > 2 else 'smart'
     
-    splitter = CSVSplitter(csv_file)
+    splitter = CSVSplitter(csv_file, max_open_files=max_open_files)
     
     if method == 'rows':
         chunk_size = int(sys.argv[3]) if len(sys.argv) > 3 else 2000
         splitter.chunk_size = chunk_size
         splitter.split_by_rows()
+    elif method == 'rows-parallel':
+        chunk_size = int(sys.argv[3]) if len(sys.argv) > 3 else 2000
+        splitter.chunk_size = chunk_size
+        splitter.split_by_rows_parallel()
     elif method == 'field':
         field_name = sys.argv[3] if len(sys.argv) > 3 else 'Status'
         splitter.split_by_field(field_name)
@@ -4,30 +4,32 @@ antiHall Validation Script for OneMap Data Analysis
 Ensures all analysis claims are backed by actual data
 """
 
-import csv
 import json
+import sys
 from collections import defaultdict
 from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from onemap_lib.datasets import DatasetRegistry
 
 class DataValidator:
-    def __init__(self, csv_path):
+    def __init__(self, csv_path, registry=None):
         self.csv_path = csv_path
-        self.records = []
+        self.registry = registry or DatasetRegistry()
+        self.data = None
         self.validations = {}
         
     def load_data(self):
         """Load CSV data with verification"""
-        with open(self.csv_path, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                self.records.append(row)
+        self.data = self.registry.csv(self.csv_path)
         
-        self.validations['total_records'] = len(self.records)
-        print(f"✓ Loaded {len(self.records)} records")
+        self.validations['total_records'] = self.data.rows
+        print(f"✓ Loaded {self.data.rows} records")
         
     def validate_claim_1(self):
         """Validate: 0 duplicate Property IDs"""
-        property_ids = [r.get('Property ID', '').strip() for r in self.records if r.get('Property ID', '').strip()]
+        property_ids = [p for p in self.data.column('Property ID', str.strip) if p]
         unique_ids = set(property_ids)
         
         duplicate_count = len(property_ids) - len(unique_ids)
@@ -42,8 +44,7 @@ class DataValidator:
     def validate_claim_2(self):
         """Validate: 3,391 duplicate addresses"""
         address_counts = defaultdict(int)
-        for r in self.records:
-            addr = r.get('Location Address', '').strip()
+        for addr in self.data.column('Location Address', str.strip):
             if addr:
                 address_counts[addr] += 1
         
@@ -62,10 +63,10 @@ class DataValidator:
         kwena_records = []
         kwena_poles = set()
         
-        for r in self.records:
-            if '1 KWENA STREET' in r.get('Location Address', ''):
-                kwena_records.append(r)
-                pole = r.get('Pole Number', '').strip()
+        for idx, (addr, pole) in enumerate(zip(self.data.column('Location Address'),
+                                               self.data.column('Pole Number', str.strip))):
+            if '1 KWENA STREET' in addr:
+                kwena_records.append(idx)
                 if pole:
                     kwena_poles.add(pole)
         
@@ -84,8 +85,7 @@ class DataValidator:
         # Group by exact timestamp
         timestamp_groups = defaultdict(list)
         
-        for idx, r in enumerate(self.records):
-            date_str = r.get('Survey Date', '').strip()
+        for idx, date_str in enumerate(self.data.column('Survey Date', str.strip)):
             if date_str:
                 timestamp_groups[date_str].append(idx)
         
@@ -113,8 +113,7 @@ class DataValidator:
         # 1. What types of locations have most duplicates?
         print("\n1. Locations with most entries:")
         addr_counts = defaultdict(int)
-        for r in self.records:
-            addr = r.get('Location Address', '').strip()
+        for addr in self.data.column('Location Address', str.strip):
             if addr:
                 addr_counts[addr] += 1
         
@@ -127,8 +126,7 @@ class DataValidator:
         agent_counts = defaultdict(int)
         empty_agent_count = 0
         
-        for r in self.records:
-            agent = r.get('Field Agent Name (pole permission)', '').strip()
+        for agent in self.data.column('Field Agent Name (pole permission)', str.strip):
             if agent:
                 agent_counts[agent] += 1
             else:
@@ -142,9 +140,8 @@ class DataValidator:
         print("\n3. Status Patterns per Address:")
         # For addresses with multiple entries, what statuses do they have?
         addr_statuses = defaultdict(set)
-        for r in self.records:
-            addr = r.get('Location Address', '').strip()
-            status = r.get('Status', '').strip()
+        for addr, status in zip(self.data.column('Location Address', str.strip),
+                                self.data.column('Status', str.strip)):
             if addr and addr_counts[addr] > 10:  # Only check addresses with many entries
                 addr_statuses[addr].add(status)
         
@@ -157,6 +154,7 @@ class DataValidator:
         report = {
             'validation_timestamp': datetime.now().isoformat(),
             'data_file': self.csv_path,
+            'source_files': self.registry.evidence([self.csv_path]),
             'validations': self.validations,
             'verification_status': 'VERIFIED'
         }
@@ -166,8 +164,11 @@ class DataValidator:
             
         print("\n✓ Validation report saved to antiHall_validation_report.json")
 
-def main():
-    validator = DataValidator('/home/ldp/VF/Apps/FibreFlow/OneMap/Lawley_Project_Louis.csv')
+DEFAULT_CSV = '/home/ldp/VF/Apps/FibreFlow/OneMap/Lawley_Project_Louis.csv'
+
+def run_data_validation(csv_path=DEFAULT_CSV, registry=None):
+    """Run every claim check on csv_path and write the validation report"""
+    validator = DataValidator(csv_path, registry)
     
     print("=== antiHall Data Validation ===")
     print("Verifying all claims with actual data...\n")
@@ -179,6 +180,10 @@ def main():
     validator.validate_claim_4()
     validator.investigate_unknowns()
     validator.generate_validation_report()
+    return validator
+
+def main():
+    run_data_validation(sys.argv[1] if len(sys.argv) > 1 else DEFAULT_CSV)
     
     print("\n=== QUESTIONS BEFORE PROCEEDING ===")
     print("1. Is '1 KWENA STREET' a single house or a complex/development?")
@@ -18,20 +18,31 @@ import os
 from pathlib import Path
 from datetime import datetime
 from collections import defaultdict
+from onemap_lib.datasets import DatasetRegistry
+from onemap_lib.records import find_output
+
+OUTPUT_DIR = Path(__file__).parent / 'output'
+
+# Extraction outputs read by the validations (each loaded once through the registry)
+POLES_OUTPUT = find_output(OUTPUT_DIR / 'lawley-poles-extracted')
+DROPS_OUTPUT = find_output(OUTPUT_DIR / 'lawley-drops-extracted')
+RELATIONSHIP_REPORT = OUTPUT_DIR / 'relationship-validation-report.json'
+POLES_WITH_DROPS_OUTPUT = find_output(OUTPUT_DIR / 'poles-with-drops')
+INPUT_FILES = [POLES_OUTPUT, DROPS_OUTPUT, RELATIONSHIP_REPORT, POLES_WITH_DROPS_OUTPUT]
 
 class ExtractionResultsValidator:
-    def __init__(self):
+    def __init__(self, registry=None):
         self.validations = {}
         self.evidence = {}
-        self.output_dir = Path(__file__).parent / 'output'
+        self.output_dir = OUTPUT_DIR
+        self.registry = registry or DatasetRegistry()
         
     def validate_pole_counts(self):
         """Validate all pole-related counts and statistics"""
         print("\n=== VALIDATING POLE COUNTS ===")
         
         # Load pole data
-        with open(self.output_dir / 'lawley-poles-extracted.json', 'r') as f:
-            pole_data = json.load(f)
+        pole_data = self.registry.records(POLES_OUTPUT)
         
         poles = pole_data['poles']
         stats = pole_data['statistics']
@@ -99,8 +110,7 @@ class ExtractionResultsValidator:
         print("\n=== VALIDATING DROP COUNTS ===")
         
         # Load drop data
-        with open(self.output_dir / 'lawley-drops-extracted.json', 'r') as f:
-            drop_data = json.load(f)
+        drop_data = self.registry.records(DROPS_OUTPUT)
         
         drops = drop_data['drops']
         
@@ -169,12 +179,10 @@ class ExtractionResultsValidator:
         print("\n=== VALIDATING RELATIONSHIPS ===")
         
         # Load validation report
-        with open(self.output_dir / 'relationship-validation-report.json', 'r') as f:
-            val_report = json.load(f)
+        val_report = self.registry.json(RELATIONSHIP_REPORT)
         
         # Load updated poles
-        with open(self.output_dir / 'poles-with-drops.json', 'r') as f:
-            updated_poles = json.load(f)
+        updated_poles = self.registry.records(POLES_WITH_DROPS_OUTPUT)
         
         poles = updated_poles['poles']
         
@@ -243,32 +251,44 @@ class ExtractionResultsValidator:
         """Validate reported file sizes"""
         print("\n=== VALIDATING FILE SIZES ===")
         
+        # Sizes were reported for the indented JSON outputs; record outputs
+        # written as NDJSON are sized but not compared against them
         files_to_check = [
-            ('lawley-poles-extracted.json', '1.5MB', 1.5 * 1024 * 1024),
-            ('lawley-poles-extracted.csv', '305KB', 305 * 1024),
-            ('lawley-drops-extracted.json', '9.1MB', 9.1 * 1024 * 1024),
-            ('lawley-drops-extracted.csv', '2.3MB', 2.3 * 1024 * 1024),
-            ('relationship-validation-report.json', '2.2KB', 2.2 * 1024),
-            ('poles-with-drops.json', '2.0MB', 2.0 * 1024 * 1024)
+            (POLES_OUTPUT, '1.5MB', 1.5 * 1024 * 1024),
+            (self.output_dir / 'lawley-poles-extracted.csv', '305KB', 305 * 1024),
+            (DROPS_OUTPUT, '9.1MB', 9.1 * 1024 * 1024),
+            (self.output_dir / 'lawley-drops-extracted.csv', '2.3MB', 2.3 * 1024 * 1024),
+            (RELATIONSHIP_REPORT, '2.2KB', 2.2 * 1024),
+            (POLES_WITH_DROPS_OUTPUT, '2.0MB', 2.0 * 1024 * 1024)
         ]
         
         file_validations = {}
         
-        for filename, reported_size, expected_bytes in files_to_check:
-            filepath = self.output_dir / filename
-            if filepath.exists():
-                actual_size = filepath.stat().st_size
-                variance = abs(actual_size - expected_bytes) / expected_bytes
-                
+        for filepath, reported_size, expected_bytes in files_to_check:
+            filename = filepath.name
+            if not filepath.exists():
+                print(f"✗ {filename}: not found")
+                continue
+            actual_size = filepath.stat().st_size
+            if filepath.suffix not in ('.json', '.csv'):
                 file_validations[filename] = {
-                    'reported_size': reported_size,
+                    'reported_size': f"{reported_size} (JSON layout)",
                     'actual_bytes': actual_size,
                     'actual_human': self._format_size(actual_size),
-                    'variance_percent': f"{variance * 100:.1f}%",
-                    'within_10_percent': variance <= 0.1
+                    'within_10_percent': None
                 }
-                
-                print(f"✓ {filename}: {self._format_size(actual_size)} (reported: {reported_size})")
+                print(f"✓ {filename}: {self._format_size(actual_size)} (reported {reported_size} was for the JSON output)")
+                continue
+            variance = abs(actual_size - expected_bytes) / expected_bytes
+            file_validations[filename] = {
+                'reported_size': reported_size,
+                'actual_bytes': actual_size,
+                'actual_human': self._format_size(actual_size),
+                'variance_percent': f"{variance * 100:.1f}%",
+                'within_10_percent': variance <= 0.1
+            }
+            
+            print(f"✓ {filename}: {self._format_size(actual_size)} (reported: {reported_size})")
         
         self.validations['file_sizes'] = file_validations
         
@@ -316,6 +336,7 @@ class ExtractionResultsValidator:
             'purpose': 'Verify all claims in Lawley extraction report against actual data',
             'validations': self.validations,
             'evidence': self.evidence,
+            'source_files': self.registry.evidence(INPUT_FILES),
             'summary': {
                 'total_checks': total,
                 'passed': passed,
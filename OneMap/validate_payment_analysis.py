@@ -5,16 +5,25 @@ antiHall Validation for Payment Analysis Reports
 Ensures all claims in our reports are backed by verifiable data
 """
 
-import csv
 import json
 from datetime import datetime
 from collections import defaultdict
 import math
+from onemap_lib.datasets import DatasetRegistry
+
+SOURCE_CSV = 'Lawley_Project_Louis.csv'
+CONFLICTS_REPORT = 'reports/2025-07-10_payment_conflicts_detailed.csv'
+AGENT_CONTACTS_REPORT = 'reports/2025-07-10_agent_contact_list.csv'
+FIRST_PERMISSIONS_REPORT = 'reports/2025-07-10_first_pole_permissions_complete.csv'
+
+# Files read by the validations (each loaded once through the registry)
+INPUTS = [SOURCE_CSV, CONFLICTS_REPORT, AGENT_CONTACTS_REPORT, FIRST_PERMISSIONS_REPORT]
 
 class PaymentAnalysisValidator:
-    def __init__(self):
+    def __init__(self, registry=None):
         self.validations = {}
         self.evidence = {}
+        self.registry = registry or DatasetRegistry()
         
     def validate_gps_distance_calculation(self):
         """Verify GPS distance calculations are accurate"""
@@ -51,15 +60,11 @@ class PaymentAnalysisValidator:
         
         # Read the detailed conflicts data
         pole_conflicts = defaultdict(set)
-        total_claims = 0
+        conflicts = self.registry.csv(CONFLICTS_REPORT)
+        total_claims = conflicts.rows
         
-        with open('reports/2025-07-10_payment_conflicts_detailed.csv', 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                pole_num = row['Pole Number']
-                agent = row['Agent Name']
-                pole_conflicts[pole_num].add(agent)
-                total_claims += 1
+        for pole_num, agent in zip(conflicts.column('Pole Number'), conflicts.column('Agent Name')):
+            pole_conflicts[pole_num].add(agent)
         
         # Count poles by number of agents
         multi_agent_poles = sum(1 for agents in pole_conflicts.values() if len(agents) > 1)
@@ -91,14 +96,15 @@ class PaymentAnalysisValidator:
         
         # Read agent summary
         agent_stats = {}
-        with open('reports/2025-07-10_agent_contact_list.csv', 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                if row['Agent Name']:
-                    agent_stats[row['Agent Name']] = {
-                        'conflicts': int(row['Number of Conflicts']),
-                        'contact': row['Contact Number']
-                    }
+        contacts = self.registry.csv(AGENT_CONTACTS_REPORT)
+        for agent, conflicts, contact in zip(contacts.column('Agent Name'),
+                                             contacts.column('Number of Conflicts', int),
+                                             contacts.column('Contact Number')):
+            if agent:
+                agent_stats[agent] = {
+                    'conflicts': conflicts,
+                    'contact': contact
+                }
         
         # Verify top agents
         top_agents = sorted(agent_stats.items(), key=lambda x: x[1]['conflicts'], reverse=True)[:5]
@@ -120,22 +126,16 @@ class PaymentAnalysisValidator:
         
         # Count original pole permissions
         original_permissions = set()
-        with open('Lawley_Project_Louis.csv', 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                if 'Pole Permission' in row.get('Flow Name Groups', ''):
-                    pole = row.get('Pole Number', '').strip()
-                    if pole:
-                        original_permissions.add(pole)
+        source = self.registry.csv(SOURCE_CSV)
+        for flow, pole in zip(source.column('Flow Name Groups'), source.column('Pole Number', str.strip)):
+            if 'Pole Permission' in flow and pole:
+                original_permissions.add(pole)
         
         # Count poles in first permissions report
         first_perms = set()
         try:
-            with open('reports/2025-07-10_first_pole_permissions_complete.csv', 'r', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    first_perms.add(row['Pole Number'])
-        except:
+            first_perms.update(self.registry.csv(FIRST_PERMISSIONS_REPORT).column('Pole Number'))
+        except OSError:
             pass
         
         self.validations['data_completeness'] = {
@@ -158,20 +158,16 @@ class PaymentAnalysisValidator:
         high_risk = []
         medium_risk = []
         
-        with open('reports/2025-07-10_payment_conflicts_detailed.csv', 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            poles_seen = set()
-            
-            for row in reader:
-                pole = row['Pole Number']
-                risk = row['Risk Level']
-                
-                if pole not in poles_seen:
-                    if risk == 'HIGH':
-                        high_risk.append(pole)
-                    elif risk == 'MEDIUM':
-                        medium_risk.append(pole)
-                    poles_seen.add(pole)
+        conflicts = self.registry.csv(CONFLICTS_REPORT)
+        poles_seen = set()
+        
+        for pole, risk in zip(conflicts.column('Pole Number'), conflicts.column('Risk Level')):
+            if pole not in poles_seen:
+                if risk == 'HIGH':
+                    high_risk.append(pole)
+                elif risk == 'MEDIUM':
+                    medium_risk.append(pole)
+                poles_seen.add(pole)
         
         self.validations['risk_assessment'] = {
             'high_risk_poles': len(high_risk),
@@ -197,14 +193,13 @@ class PaymentAnalysisValidator:
         agents_with_contacts = 0
         agents_without_contacts = 0
         
-        with open('reports/2025-07-10_agent_contact_list.csv', 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                if row['Agent Name']:
-                    if row['Contact Number'] and row['Contact Number'] != 'No contact':
-                        agents_with_contacts += 1
-                    else:
-                        agents_without_contacts += 1
+        contacts = self.registry.csv(AGENT_CONTACTS_REPORT)
+        for agent, contact in zip(contacts.column('Agent Name'), contacts.column('Contact Number')):
+            if agent:
+                if contact and contact != 'No contact':
+                    agents_with_contacts += 1
+                else:
+                    agents_without_contacts += 1
         
         self.validations['contact_information'] = {
             'agents_with_contacts': agents_with_contacts,
@@ -226,6 +221,7 @@ class PaymentAnalysisValidator:
             'report_type': 'Payment Analysis Validation',
             'validations_performed': self.validations,
             'evidence_samples': self.evidence,
+            'source_files': self.registry.evidence(INPUTS),
             'overall_status': 'VERIFIED',
             'key_findings': {
                 'total_poles_analyzed': 3749,
@@ -261,18 +257,24 @@ class PaymentAnalysisValidator:
             for pole, agents in list(self.evidence.get('sample_conflicts', {}).items())[:3]:
                 f.write(f"- **{pole}**: {', '.join(agents)}\n")
             
+            f.write("\n## Source Files\n\n")
+            for path, file_evidence in self.registry.evidence(INPUTS).items():
+                rows = f", {file_evidence['rows']:,} rows" if 'rows' in file_evidence else ''
+                f.write(f"- **{path}**: sha256 {file_evidence['sha256'][:16]}...{rows}\n")
+            
             f.write("\n## Conclusion\n\n")
             f.write("All analysis results are backed by verifiable data. No hallucinations detected.\n")
             f.write("The reports can be used confidently for payment verification decisions.\n")
         
         print("✓ Human-readable summary saved to reports/VALIDATION_SUMMARY.md")
 
-def main():
+def run_payment_validation(registry=None):
+    """Run every payment validation and write the validation reports"""
+    validator = PaymentAnalysisValidator(registry)
+    
     print("=== antiHall Payment Analysis Validation ===")
     print("Verifying all report claims against source data...\n")
     
-    validator = PaymentAnalysisValidator()
-    
     # Run all validations
     validator.validate_gps_distance_calculation()
     validator.validate_duplicate_counts()
@@ -283,6 +285,10 @@ def main():
     
     # Generate final report
     validator.generate_validation_report()
+    return validator
+
+def main():
+    run_payment_validation()
     
     print("\n=== VALIDATION COMPLETE ===")
     print("✓ All claims verified against source data")
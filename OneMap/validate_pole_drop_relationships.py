@@ -5,11 +5,17 @@ Date: 2025-01-16
 
 Purpose: Validate relationships between poles and drops
 Input: 
-  - output/lawley-poles-extracted.json
-  - output/lawley-drops-extracted.json
+  - output/lawley-poles-extracted.ndjson.gz (or .ndjson / .json)
+  - output/lawley-drops-extracted.ndjson.gz (or .ndjson / .json)
 Output:
   - output/relationship-validation-report.json
-  - output/poles-with-drops.json (updated pole data)
+  - output/poles-with-drops.ndjson.gz (updated pole data; .json with --json)
+
+Poles and drops are streamed: only pole IDs and each pole's connected drop
+IDs are held in memory.
+
+Usage:
+    python3 validate_pole_drop_relationships.py [--json | --format ndjson.gz|ndjson|json]
 
 Validations:
   - All drop pole references exist
@@ -18,50 +24,51 @@ Validations:
   - Update dropCount fields
 """
 
+import heapq
 import json
-import os
+import sys
 from datetime import datetime
 from pathlib import Path
 from collections import defaultdict
 
+from onemap_lib.records import DEFAULT_FORMAT, RecordFile, RecordWriter, find_output, output_format, output_path
+
 # Configuration
 OUTPUT_DIR = Path(__file__).parent / 'output'
-POLES_JSON = OUTPUT_DIR / 'lawley-poles-extracted.json'
-DROPS_JSON = OUTPUT_DIR / 'lawley-drops-extracted.json'
+POLES_STEM = OUTPUT_DIR / 'lawley-poles-extracted'
+DROPS_STEM = OUTPUT_DIR / 'lawley-drops-extracted'
 REPORT_JSON = OUTPUT_DIR / 'relationship-validation-report.json'
-UPDATED_POLES_JSON = OUTPUT_DIR / 'poles-with-drops.json'
+UPDATED_POLES_STEM = OUTPUT_DIR / 'poles-with-drops'
 
 # Constants
 MAX_DROPS_PER_POLE = 12
 
 
-def load_json_data(filepath):
-    """Load JSON data from file"""
-    if not os.path.exists(filepath):
+def load_records(stem, collection):
+    """Streaming reader for an extraction output in whichever format exists"""
+    filepath = find_output(stem)
+    if not filepath.exists():
         raise FileNotFoundError(f'File not found: {filepath}')
     
-    with open(filepath, 'r', encoding='utf-8') as f:
-        return json.load(f)
+    return RecordFile(filepath, collection)
 
 
-def validate_relationships():
+def validate_relationships(fmt=DEFAULT_FORMAT):
     """Main validation function"""
     print('Starting Pole-Drop Relationship Validation...')
     print(f'Date: {datetime.now().isoformat()}')
     
     # Load data
     print('\nLoading data files...')
-    poles_data = load_json_data(POLES_JSON)
-    drops_data = load_json_data(DROPS_JSON)
-    
-    poles = poles_data['poles']
-    drops = drops_data['drops']
+    poles = load_records(POLES_STEM, 'poles')
+    drops = load_records(DROPS_STEM, 'drops')
+    poles_header = poles.header
     
     print(f'Loaded {len(poles)} poles')
     print(f'Loaded {len(drops)} drops')
     
-    # Create pole lookup dictionary
-    pole_dict = {pole['poleId']: pole for pole in poles}
+    # Create pole lookup set
+    pole_ids = {pole['poleId'] for pole in poles}
     
     # Initialize validation report
     report = {
@@ -93,7 +100,7 @@ def validate_relationships():
         pole_ref = drop['poleReference']
         
         # Check if pole exists
-        if pole_ref in pole_dict:
+        if pole_ref in pole_ids:
             pole_drops[pole_ref].append(drop_id)
             report['statistics']['dropsWithValidPole'] += 1
         else:
@@ -107,49 +114,83 @@ def validate_relationships():
                 f'Drop {drop_id} references non-existent pole {pole_ref}'
             )
     
-    # Update pole data with connected drops
+    # Update pole data with connected drops, streaming each pole to the output
     print('\nUpdating pole data with connected drops...')
+    output_file = output_path(UPDATED_POLES_STEM, fmt)
     total_drops_assigned = 0
+    top_poles = []  # min-heap of the 10 poles with the most drops
+    pole_type_summary = defaultdict(lambda: {'count': 0, 'totalDrops': 0})
     
-    for pole in poles:
-        pole_id = pole['poleId']
-        connected_drops = pole_drops.get(pole_id, [])
-        
-        # Update pole with connected drops
-        pole['connectedDrops'] = connected_drops
-        pole['dropCount'] = len(connected_drops)
-        
-        # Update statistics
-        if connected_drops:
-            report['statistics']['polesWithDrops'] += 1
-            total_drops_assigned += len(connected_drops)
-        else:
-            report['statistics']['polesWithoutDrops'] += 1
-        
-        # Check capacity
-        drop_count = len(connected_drops)
-        if drop_count >= MAX_DROPS_PER_POLE:
-            if drop_count == MAX_DROPS_PER_POLE:
-                report['statistics']['polesAtCapacity'] += 1
-                report['warnings'].append(
-                    f'Pole {pole_id} is at capacity with {drop_count} drops'
-                )
+    with RecordWriter(output_file, 'poles', key='poleId') as updated_poles:
+        for position, pole in enumerate(poles):
+            pole_id = pole['poleId']
+            connected_drops = pole_drops.get(pole_id, [])
+            
+            # Update pole with connected drops
+            pole['connectedDrops'] = connected_drops
+            pole['dropCount'] = len(connected_drops)
+            updated_poles.write(pole)
+            
+            # Update statistics
+            if connected_drops:
+                report['statistics']['polesWithDrops'] += 1
+                total_drops_assigned += len(connected_drops)
             else:
-                report['statistics']['polesOverCapacity'] += 1
-                report['capacityIssues'].append({
-                    'poleId': pole_id,
-                    'dropCount': drop_count,
-                    'overCapacityBy': drop_count - MAX_DROPS_PER_POLE,
-                    'connectedDrops': connected_drops
-                })
-                report['errors'].append(
-                    f'Pole {pole_id} exceeds capacity with {drop_count} drops (max: {MAX_DROPS_PER_POLE})'
+                report['statistics']['polesWithoutDrops'] += 1
+            
+            # Check capacity
+            drop_count = len(connected_drops)
+            if drop_count >= MAX_DROPS_PER_POLE:
+                if drop_count == MAX_DROPS_PER_POLE:
+                    report['statistics']['polesAtCapacity'] += 1
+                    report['warnings'].append(
+                        f'Pole {pole_id} is at capacity with {drop_count} drops'
+                    )
+                else:
+                    report['statistics']['polesOverCapacity'] += 1
+                    report['capacityIssues'].append({
+                        'poleId': pole_id,
+                        'dropCount': drop_count,
+                        'overCapacityBy': drop_count - MAX_DROPS_PER_POLE,
+                        'connectedDrops': connected_drops
+                    })
+                    report['errors'].append(
+                        f'Pole {pole_id} exceeds capacity with {drop_count} drops (max: {MAX_DROPS_PER_POLE})'
+                    )
+            elif drop_count >= MAX_DROPS_PER_POLE - 2:
+                # Warning when approaching capacity
+                report['warnings'].append(
+                    f'Pole {pole_id} approaching capacity: {drop_count}/{MAX_DROPS_PER_POLE} drops'
                 )
-        elif drop_count >= MAX_DROPS_PER_POLE - 2:
-            # Warning when approaching capacity
-            report['warnings'].append(
-                f'Pole {pole_id} approaching capacity: {drop_count}/{MAX_DROPS_PER_POLE} drops'
-            )
+            
+            # Poles with the most drops; on ties the earlier pole ranks higher
+            entry = (drop_count, -position, {
+                'poleId': pole_id,
+                'dropCount': drop_count,
+                'poleType': pole.get('poleType', 'unknown'),
+                'status': pole.get('status', '')
+            })
+            if len(top_poles) < 10:
+                heapq.heappush(top_poles, entry)
+            elif entry[:2] > top_poles[0][:2]:
+                heapq.heapreplace(top_poles, entry)
+            
+            # Summary by pole type
+            pole_type = pole.get('poleType', 'unknown')
+            pole_type_summary[pole_type]['count'] += 1
+            pole_type_summary[pole_type]['totalDrops'] += drop_count
+        
+        updated_poles.header.update({
+            'extractionDate': poles_header['extractionDate'],
+            'updateDate': datetime.now().isoformat(),
+            'sourceFile': poles_header['sourceFile'],
+            'statistics': {
+                **poles_header['statistics'],
+                'polesWithDrops': report['statistics']['polesWithDrops'],
+                'polesWithoutDrops': report['statistics']['polesWithoutDrops'],
+                'totalDropsAssigned': total_drops_assigned
+            }
+        })
     
     # Calculate average drops per pole
     if report['statistics']['polesWithDrops'] > 0:
@@ -160,29 +201,9 @@ def validate_relationships():
     # Additional analysis
     print('\nPerforming additional analysis...')
     
-    # Find poles with the most drops
-    poles_by_drop_count = sorted(poles, key=lambda p: p['dropCount'], reverse=True)
-    top_10_poles = poles_by_drop_count[:10]
-    
     report['analysis'] = {
-        'topPolesbyDropCount': [
-            {
-                'poleId': p['poleId'],
-                'dropCount': p['dropCount'],
-                'poleType': p.get('poleType', 'unknown'),
-                'status': p.get('status', '')
-            }
-            for p in top_10_poles
-        ]
+        'topPolesbyDropCount': [summary for _, _, summary in sorted(top_poles, reverse=True)]
     }
-    
-    # Summary by pole type
-    pole_type_summary = defaultdict(lambda: {'count': 0, 'totalDrops': 0})
-    for pole in poles:
-        pole_type = pole.get('poleType', 'unknown')
-        pole_type_summary[pole_type]['count'] += 1
-        pole_type_summary[pole_type]['totalDrops'] += pole['dropCount']
-    
     report['analysis']['poleTypeSummary'] = dict(pole_type_summary)
     
     # Write validation report
@@ -191,24 +212,7 @@ def validate_relationships():
     
     print(f'\nValidation report written to: {REPORT_JSON}')
     
-    # Write updated poles data
-    updated_poles_data = {
-        'extractionDate': poles_data['extractionDate'],
-        'updateDate': datetime.now().isoformat(),
-        'sourceFile': poles_data['sourceFile'],
-        'statistics': {
-            **poles_data['statistics'],
-            'polesWithDrops': report['statistics']['polesWithDrops'],
-            'polesWithoutDrops': report['statistics']['polesWithoutDrops'],
-            'totalDropsAssigned': total_drops_assigned
-        },
-        'poles': poles
-    }
-    
-    with open(UPDATED_POLES_JSON, 'w', encoding='utf-8') as f:
-        json.dump(updated_poles_data, f, indent=2, ensure_ascii=False)
-    
-    print(f'Updated poles data written to: {UPDATED_POLES_JSON}')
+    print(f'Updated poles data written to: {output_file}')
     
     # Print summary
     print('\n=== VALIDATION SUMMARY ===')
@@ -244,15 +248,15 @@ def validate_relationships():
 if __name__ == '__main__':
     try:
         # First check if input files exist
-        if not os.path.exists(POLES_JSON):
+        if not find_output(POLES_STEM).exists():
             print(f'Error: Poles data not found. Please run extract_lawley_poles.py first.')
             exit(1)
         
-        if not os.path.exists(DROPS_JSON):
+        if not find_output(DROPS_STEM).exists():
             print(f'Error: Drops data not found. Please run extract_lawley_drops.py first.')
             exit(1)
         
-        validate_relationships()
+        validate_relationships(output_format(sys.argv[1:]))
     except Exception as e:
         print(f'Error: {e}')
         exit(1)
\ No newline at end of file
@@ -4,6 +4,7 @@ Simple FastAPI server for Neon+Gemini integration
 Works with FibreFlow Angular service
 """
 import os
+import sys
 import time
 import logging
 import threading
@@ -20,6 +21,9 @@ from typing import List, Dict, Any, Optional
 from contextlib import asynccontextmanager
 import asyncio
 
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+from routing import QueryRouter, LOOKUP
+
 # Load environment variables
 load_dotenv('.env.local')
 
@@ -29,7 +33,7 @@ logger = logging.getLogger(__name__)
 
 # Global state for "always on" functionality
 start_time = time.time()
-db_pool = None
+db_router = None
 keep_alive_task = None
 health_status = {
     "database_connected": False,
@@ -41,25 +45,19 @@ health_status = {
 
 async def startup_event():
     """Initialize connection pool and start keep-alive tasks"""
-    global db_pool, keep_alive_task, health_status
+    global db_router, keep_alive_task, health_status
     
     logger.info("🚀 Starting FibreFlow Neon+Gemini Agent")
     
-    # Initialize database connection pool
-    connection_string = os.getenv('NEON_CONNECTION_STRING')
-    pool_size = int(os.getenv('CONNECTION_POOL_SIZE', '10'))
-    
-    if connection_string:
+    # Initialize per-workload connection pools (lookup / analytics)
+    if os.getenv('NEON_CONNECTION_STRING'):
         try:
-            # Create threaded connection pool
-            db_pool = psycopg2.pool.ThreadedConnectionPool(
-                1, pool_size,  # min/max connections
-                connection_string,
-                connect_timeout=10
-            )
+            db_router = QueryRouter.from_env()
             health_status["database_connected"] = True
-            health_status["connection_pool_status"] = f"active_{pool_size}"
-            logger.info(f"✅ Database connection pool created (size: {pool_size})")
+            health_status["connection_pool_status"] = "active_" + "_".join(
+                f"{workload}{info['max_connections']}" for workload, info in db_router.status().items()
+            )
+            logger.info(f"✅ Database connection pools created: {db_router.status()}")
         except Exception as e:
             logger.error(f"❌ Failed to create database pool: {e}")
             health_status["connection_pool_status"] = f"error: {str(e)}"
@@ -86,7 +84,7 @@ async def startup_event():
 
 async def shutdown_event():
     """Cleanup resources"""
-    global db_pool, keep_alive_task
+    global db_router, keep_alive_task
     
     logger.info("🛑 Shutting down FibreFlow Neon+Gemini Agent")
     
@@ -98,10 +96,10 @@ async def shutdown_event():
         except asyncio.CancelledError:
             pass
     
-    # Close database pool
-    if db_pool:
-        db_pool.closeall()
-        logger.info("✅ Database connection pool closed")
+    # Close database pools
+    if db_router:
+        db_router.closeall()
+        logger.info("✅ Database connection pools closed")
 
 async def keep_alive_loop():
     """Background task to keep connections alive and monitor health"""
@@ -113,22 +111,16 @@ async def keep_alive_loop():
             health_status["uptime"] = int(time.time() - start_time)
             health_status["last_health_check"] = time.time()
             
-            # Test database connection
-            if db_pool:
-                conn = None
+            # Test database connections
+            if db_router:
                 try:
-                    conn = db_pool.getconn()
-                    cursor = conn.cursor()
-                    cursor.execute("SELECT 1")
-                    cursor.close()
+                    # Off the event loop: a ping waits for a free slot in each pool
+                    await asyncio.to_thread(db_router.ping)
                     health_status["database_connected"] = True
                     logger.debug("🟢 Database keep-alive successful")
                 except Exception as e:
                     logger.warning(f"🟡 Database keep-alive failed: {e}")
                     health_status["database_connected"] = False
-                finally:
-                    if conn:
-                        db_pool.putconn(conn)
             
             # Wait 30 seconds before next check
             await asyncio.sleep(30)
@@ -195,18 +187,12 @@ class HealthResponse(BaseModel):
     uptime: int
 
 # Database connection helper with pool
-def get_db_connection():
-    """Get database connection from pool"""
-    global db_pool
-    if not db_pool:
+def get_db_router() -> QueryRouter:
+    """Get the workload-aware connection router"""
+    global db_router
+    if not db_router:
         raise Exception("Database connection pool not available")
-    return db_pool.getconn()
-
-def return_db_connection(conn):
-    """Return connection to pool"""
-    global db_pool
-    if db_pool and conn:
-        db_pool.putconn(conn)
+    return db_router
 
 # Database schema information for SQL generation
 DATABASE_SCHEMA = """
@@ -282,35 +268,23 @@ def execute_safe_query(query: str) -> List[Dict[str, Any]]:
         if keyword in query_upper:
             raise Exception(f"Dangerous keyword '{keyword}' not allowed")
     
-    conn = None
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute(query)
-        
-        # Get column names
-        columns = [desc[0] for desc in cursor.description]
-        
-        # Fetch results
-        rows = cursor.fetchall()
-        
-        # Convert to list of dictionaries
-        results = []
-        for row in rows:
-            result_dict = {}
-            for i, value in enumerate(row):
-                # Handle different data types
-                if hasattr(value, 'isoformat'):  # datetime objects
-                    result_dict[columns[i]] = value.isoformat()
-                else:
-                    result_dict[columns[i]] = value
-            results.append(result_dict)
-        
-        cursor.close()
-        return results
-    finally:
-        if conn:
-            return_db_connection(conn)
+    # Cheap lookups and heavy aggregates run on separate pools
+    workload, columns, rows = get_db_router().execute(query)
+    logger.info(f"Query routed to {workload} pool")
+    
+    # Convert to list of dictionaries
+    results = []
+    for row in rows:
+        result_dict = {}
+        for i, value in enumerate(row):
+            # Handle different data types
+            if hasattr(value, 'isoformat'):  # datetime objects
+                result_dict[columns[i]] = value.isoformat()
+            else:
+                result_dict[columns[i]] = value
+        results.append(result_dict)
+    
+    return results
 
 @app.get("/health", response_model=HealthResponse)
 async def health_check():
@@ -338,25 +312,17 @@ async def detailed_health_check():
     
     # Test database pool if available
     pool_info = {}
-    if db_pool:
+    if db_router:
         try:
             # Get pool statistics (simplified)
             pool_info = {
                 "status": "active",
-                "pool_size": f"{db_pool.minconn}-{db_pool.maxconn}",
+                "pools": db_router.status(),
                 "connection_test": "passed"
             }
             # Quick connection test
-            conn = None
-            try:
-                conn = db_pool.getconn()
-                cursor = conn.cursor()
-                cursor.execute("SELECT 1")
-                cursor.close()
-                pool_info["last_test"] = time.time()
-            finally:
-                if conn:
-                    db_pool.putconn(conn)
+            await asyncio.to_thread(db_router.ping)
+            pool_info["last_test"] = time.time()
         except Exception as e:
             pool_info = {
                 "status": "error",
@@ -373,7 +339,8 @@ async def detailed_health_check():
         "server_info": {
             "version": "2.0.0",
             "keep_alive_enabled": os.getenv('KEEP_ALIVE', 'false').lower() == 'true',
-            "pool_size": int(os.getenv('CONNECTION_POOL_SIZE', '10'))
+            "pool_size": int(os.getenv('CONNECTION_POOL_SIZE', '10')),
+            "analytics_pool_size": int(os.getenv('ANALYTICS_POOL_SIZE', '3'))
         }
     }
 
@@ -418,7 +385,9 @@ async def process_query(request: QueryRequest):
         
         # Step 2: Execute the SQL query
         try:
-            results = execute_safe_query(sql_query)
+            # Pool waits and the query itself run in a worker thread, so a slow
+            # analytics query does not hold up lookups on the event loop
+            results = await asyncio.to_thread(execute_safe_query, sql_query)
             
             # Step 3: Generate human-friendly response
             results_summary = f"Found {len(results)} results"
@@ -507,56 +476,8 @@ async def database_info():
             "pool_status": health_status.get("connection_pool_status", "unknown")
         }
     
-    conn = None
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # Get table information
-        cursor.execute("""
-            SELECT 
-                table_name,
-                pg_size_pretty(pg_total_relation_size(table_schema||'.'||table_name)) as size
-            FROM information_schema.tables 
-            WHERE table_schema = 'public' 
-            ORDER BY pg_total_relation_size(table_schema||'.'||table_name) DESC
-        """)
-        tables = cursor.fetchall()
-        
-        # Get row counts for key tables
-        table_stats = {}
-        key_tables = ['status_changes', 'current_pole_statuses', 'status_history']
-        for table_name in key_tables:
-            try:
-                cursor.execute(f"SELECT COUNT(*) FROM {table_name}")
-                count = cursor.fetchone()[0]
-                table_stats[table_name] = count
-            except:
-                pass  # Table might not exist
-        
-        # Get database version
-        cursor.execute("SELECT version()")
-        db_version = cursor.fetchone()[0]
-        
-        cursor.close()
-        
-        return {
-            "connection_status": "connected",
-            "database_version": db_version.split(' ')[1],  # Extract version number
-            "tables": [{"name": name, "size": size} for name, size in tables],
-            "table_statistics": table_stats,
-            "total_tables": len(tables),
-            "llm_model": "gemini-1.5-pro",
-            "schema_available": True,
-            "connection_pool": health_status.get("connection_pool_status", "unknown"),
-            "supported_queries": [
-                "Pole status information",
-                "Agent assignments", 
-                "Status change history",
-                "Project progress tracking"
-            ]
-        }
-        
+        return await asyncio.to_thread(_lookup_database_info)
     except Exception as e:
         return {
             "connection_status": "error", 
@@ -564,9 +485,60 @@ async def database_info():
             "llm_model": "gemini-1.5-pro",
             "pool_status": health_status.get("connection_pool_status", "unknown")
         }
-    finally:
-        if conn:
-            return_db_connection(conn)
+
+def _lookup_database_info() -> dict:
+    """Borrow a lookup connection and collect the database info (blocking)"""
+    with get_db_router().connection(LOOKUP) as conn:
+        return _collect_database_info(conn)
+
+def _collect_database_info(conn) -> dict:
+    """Gather table sizes, row counts and server version"""
+    cursor = conn.cursor()
+    # Get table information
+    cursor.execute("""
+        SELECT 
+            table_name,
+            pg_size_pretty(pg_total_relation_size(table_schema||'.'||table_name)) as size
+        FROM information_schema.tables 
+        WHERE table_schema = 'public' 
+        ORDER BY pg_total_relation_size(table_schema||'.'||table_name) DESC
+    """)
+    tables = cursor.fetchall()
+    
+    # Get row counts for key tables
+    table_stats = {}
+    key_tables = ['status_changes', 'current_pole_statuses', 'status_history']
+    for table_name in key_tables:
+        try:
+            cursor.execute(f"SELECT COUNT(*) FROM {table_name}")
+            count = cursor.fetchone()[0]
+            table_stats[table_name] = count
+        except:
+            pass  # Table might not exist
+    
+    # Get database version
+    cursor.execute("SELECT version()")
+    db_version = cursor.fetchone()[0]
+    
+    cursor.close()
+    
+    return {
+        "connection_status": "connected",
+        "database_version": db_version.split(' ')[1],  # Extract version number
+        "tables": [{"name": name, "size": size} for name, size in tables],
+        "table_statistics": table_stats,
+        "total_tables": len(tables),
+        "llm_model": "gemini-1.5-pro",
+        "schema_available": True,
+        "connection_pool": health_status.get("connection_pool_status", "unknown"),
+        "supported_queries": [
+            "Pole status information",
+            "Agent assignments", 
+            "Status change history",
+            "Project progress tracking"
+        ]
+    }
+
 
 @app.get("/agent/stats")
 async def agent_stats():
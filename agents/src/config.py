@@ -3,12 +3,12 @@ Configuration management for FibreFlow Neon Query Agent
 """
 import os
 from typing import List, Optional
-from pydantic_settings import BaseSettings
 from pydantic import field_validator
+from routing import RoutingSettings
 
 
-class Settings(BaseSettings):
-    """Application settings with validation"""
+class Settings(RoutingSettings):
+    """Application settings with validation (workload routing settings are inherited)"""
     
     # API Settings
     api_host: str = "0.0.0.0"
@@ -49,7 +49,6 @@ class Settings(BaseSettings):
     ]
     max_query_results: int = 100
     query_timeout: int = 30
-    enable_sandbox_branching: bool = True
     
     # FibreFlow Integration
     fibreflow_base_url: str = "https://fibreflow-73daf.web.app"
@@ -96,6 +95,17 @@ def get_database_config() -> dict:
     }
 
 
+def get_pool_config(workload: str) -> dict:
+    """Get SQLAlchemy engine configuration for a workload class"""
+    pool = settings.pool_configs()[workload]
+    return {
+        "uri": pool.connection_string,
+        "pool_size": pool.max_connections,
+        "pool_timeout": pool.acquire_timeout,
+        "statement_timeout_ms": pool.statement_timeout_ms
+    }
+
+
 def get_llm_config() -> dict:
     """Get LLM configuration"""
     return {
@@ -2,15 +2,40 @@
 Database connection and management for FibreFlow Neon Query Agent
 """
 import logging
-from typing import Optional, List
+from typing import Optional, List, Dict
 from langchain_community.utilities import SQLDatabase
 from sqlalchemy import create_engine, text
 from sqlalchemy.engine import Engine
-from config import settings, get_database_config
+from config import settings, get_database_config, get_pool_config
+from routing import QueryClassifier, LOOKUP, ANALYTICS, WORKLOAD_CLASSES
 
 logger = logging.getLogger(__name__)
 
 
+class RoutedSQLDatabase(SQLDatabase):
+    """SQLDatabase whose queries run on the pool matching their workload class
+    
+    Built on the lookup engine, which also serves schema inspection; queries
+    classified as analytics are run by a second SQLDatabase on the analytics
+    engine, created on first use.
+    """
+    
+    def __init__(self, connection: "NeonConnection", **kwargs):
+        super().__init__(connection.get_engine(LOOKUP), **kwargs)
+        self._connection = connection
+        self._options = kwargs
+        self._analytics: Optional[SQLDatabase] = None
+    
+    def run(self, command, *args, **kwargs):
+        workload = self._connection.classify_query(command)
+        logger.info(f"Query routed to {workload} pool: {command[:100]}...")
+        if workload != ANALYTICS:
+            return super().run(command, *args, **kwargs)
+        if self._analytics is None:
+            self._analytics = SQLDatabase(self._connection.get_engine(ANALYTICS), **self._options)
+        return self._analytics.run(command, *args, **kwargs)
+
+
 class NeonConnection:
     """Manages connection to Neon Postgres database"""
     
@@ -18,7 +43,8 @@ class NeonConnection:
         self.connection_string = settings.neon_connection_string
         self.whitelisted_tables = settings.whitelisted_tables
         self._db: Optional[SQLDatabase] = None
-        self._engine: Optional[Engine] = None
+        self._engines: Dict[str, Engine] = {}
+        self._classifier = QueryClassifier(self._explain, settings.analytics_cost_threshold)
     
     def get_database(self) -> SQLDatabase:
         """Get LangChain SQLDatabase instance with table restrictions"""
@@ -27,8 +53,9 @@ class NeonConnection:
                 logger.info("Connecting to Neon database...")
                 config = get_database_config()
                 
-                self._db = SQLDatabase.from_uri(
-                    config["uri"],
+                # Agent queries are routed by workload class (see RoutedSQLDatabase)
+                self._db = RoutedSQLDatabase(
+                    self,
                     include_tables=config["include_tables"],
                     sample_rows_in_table_info=config["sample_rows_in_table_info"]
                 )
@@ -41,17 +68,41 @@ class NeonConnection:
         
         return self._db
     
-    def get_engine(self) -> Engine:
-        """Get SQLAlchemy engine for direct database operations"""
-        if self._engine is None:
-            self._engine = create_engine(
-                self.connection_string,
+    def get_engine(self, workload: str = LOOKUP) -> Engine:
+        """Get SQLAlchemy engine for direct database operations
+        
+        Each workload class gets its own bounded pool and statement timeout
+        so heavy aggregates cannot starve point lookups.
+        """
+        if workload not in WORKLOAD_CLASSES:
+            raise ValueError(f"Unknown workload class: {workload}")
+        
+        if workload not in self._engines:
+            config = get_pool_config(workload)
+            self._engines[workload] = create_engine(
+                config["uri"],
+                pool_size=config["pool_size"],
+                max_overflow=0,
+                pool_timeout=config["pool_timeout"],
                 pool_pre_ping=True,
                 pool_recycle=3600,
-                connect_args={"sslmode": "require"}
+                connect_args={
+                    "sslmode": "require",
+                    "options": f"-c statement_timeout={config['statement_timeout_ms']}"
+                }
             )
+            logger.info(f"Created {workload} engine (pool size {config['pool_size']})")
         
-        return self._engine
+        return self._engines[workload]
+    
+    def _explain(self, query: str):
+        """Return the planner estimate for a query as EXPLAIN JSON"""
+        with self.get_engine(LOOKUP).connect() as conn:
+            return conn.execute(text(f"EXPLAIN (FORMAT JSON) {query}")).scalar()
+    
+    def classify_query(self, query: str) -> str:
+        """Classify a validated query as a lookup or analytics workload"""
+        return self._classifier.classify(query)
     
     def test_connection(self) -> bool:
         """Test database connection"""
@@ -122,9 +173,9 @@ class NeonConnection:
     
     def close(self):
         """Close database connections"""
-        if self._engine:
-            self._engine.dispose()
-            self._engine = None
+        for engine in self._engines.values():
+            engine.dispose()
+        self._engines = {}
         self._db = None
         logger.info("Database connections closed")
 
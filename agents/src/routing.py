@@ -0,0 +1,289 @@
+"""
+Workload-aware connection routing for FibreFlow Neon Query Agent
+
+Validated SELECT queries are classified as cheap point lookups or heavy
+aggregates using the planner's cost estimate, and each class is served from
+its own bounded connection pool (optionally on a different endpoint such as a
+read replica or a Neon branch) with its own statement and acquire timeouts.
+This keeps a handful of long analyst queries from starving the pole tracker.
+"""
+import re
+import json
+import logging
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from pydantic_settings import BaseSettings
+
+logger = logging.getLogger(__name__)
+
+LOOKUP = "lookup"
+ANALYTICS = "analytics"
+WORKLOAD_CLASSES = (LOOKUP, ANALYTICS)
+
+# Planner cost above which a query is treated as an analytics workload
+DEFAULT_COST_THRESHOLD = 10000.0
+
+# Fallback used when EXPLAIN is unavailable
+AGGREGATE_PATTERN = re.compile(
+    r'\bGROUP\s+BY\b|\bCOUNT\s*\(|\bSUM\s*\(|\bAVG\s*\(|\bDISTINCT\b|\bOVER\s*\(',
+    re.IGNORECASE
+)
+
+
+class PoolTimeoutError(Exception):
+    """Raised when no connection in a workload pool becomes free in time"""
+
+
+class WorkloadPoolConfig:
+    """Connection settings for one workload class"""
+
+    def __init__(self,
+                 connection_string: str,
+                 max_connections: int = 5,
+                 statement_timeout_ms: int = 5000,
+                 acquire_timeout: float = 2.0,
+                 connect_timeout: int = 10):
+        self.connection_string = connection_string
+        self.max_connections = max_connections
+        self.statement_timeout_ms = statement_timeout_ms
+        self.acquire_timeout = acquire_timeout
+        self.connect_timeout = connect_timeout
+
+    def describe(self) -> Dict[str, Any]:
+        """Pool settings without credentials, for health endpoints"""
+        return {
+            "max_connections": self.max_connections,
+            "statement_timeout_ms": self.statement_timeout_ms,
+            "acquire_timeout": self.acquire_timeout,
+        }
+
+
+class RoutingSettings(BaseSettings):
+    """
+    Workload routing settings, read from the environment or .env.local
+
+    simple_server.py uses these directly; config.Settings extends them for
+    the LangChain agent, so both read the same variable names.
+    """
+
+    neon_connection_string: Optional[str] = None
+    # Heavy aggregates go here when set and enable_sandbox_branching is on
+    analytics_connection_string: Optional[str] = None  # Read replica or Neon branch
+    enable_sandbox_branching: bool = True
+    analytics_cost_threshold: float = DEFAULT_COST_THRESHOLD
+    connection_pool_size: int = 10  # Lookup pool
+    lookup_statement_timeout_ms: int = 5000
+    lookup_acquire_timeout: float = 2.0
+    analytics_pool_size: int = 3
+    analytics_statement_timeout_ms: int = 60000
+    analytics_acquire_timeout: float = 30.0
+
+    model_config = {
+        "env_file": ".env.local",
+        "case_sensitive": False,
+        "extra": "ignore"
+    }
+
+    def pool_configs(self) -> Dict[str, WorkloadPoolConfig]:
+        """Pool settings for each workload class"""
+        if not self.neon_connection_string:
+            raise ValueError("NEON_CONNECTION_STRING is not set")
+
+        analytics_uri = self.neon_connection_string
+        if self.enable_sandbox_branching and self.analytics_connection_string:
+            analytics_uri = self.analytics_connection_string
+
+        return {
+            LOOKUP: WorkloadPoolConfig(
+                self.neon_connection_string,
+                max_connections=self.connection_pool_size,
+                statement_timeout_ms=self.lookup_statement_timeout_ms,
+                acquire_timeout=self.lookup_acquire_timeout
+            ),
+            ANALYTICS: WorkloadPoolConfig(
+                analytics_uri,
+                max_connections=self.analytics_pool_size,
+                statement_timeout_ms=self.analytics_statement_timeout_ms,
+                acquire_timeout=self.analytics_acquire_timeout
+            ),
+        }
+
+
+def estimate_plan_cost(plan_json: Any) -> Tuple[float, float]:
+    """
+    Extract (total_cost, plan_rows) from EXPLAIN (FORMAT JSON) output
+
+    psycopg2 returns the JSON column already decoded; other drivers may hand
+    back the raw string, so both are accepted.
+    """
+    if isinstance(plan_json, str):
+        plan_json = json.loads(plan_json)
+    if isinstance(plan_json, list):
+        plan_json = plan_json[0]
+    plan = plan_json.get("Plan", {})
+    return float(plan.get("Total Cost", 0.0)), float(plan.get("Plan Rows", 0.0))
+
+
+def classify_by_text(query: str) -> str:
+    """Heuristic classification used when no plan estimate is available"""
+    return ANALYTICS if AGGREGATE_PATTERN.search(query) else LOOKUP
+
+
+class QueryClassifier:
+    """
+    Classifies queries by planner cost estimate
+
+    Classifications are cached per normalised query text because the Angular
+    pole tracker sends the same handful of lookups over and over.
+    """
+
+    def __init__(self,
+                 explain: Callable[[str], Any],
+                 cost_threshold: float = DEFAULT_COST_THRESHOLD,
+                 cache_size: int = 512):
+        self.explain = explain
+        self.cost_threshold = cost_threshold
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def classify(self, query: str) -> str:
+        key = " ".join(query.split()).rstrip(';')
+
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+
+        try:
+            total_cost, plan_rows = estimate_plan_cost(self.explain(key))
+            workload = ANALYTICS if total_cost >= self.cost_threshold else LOOKUP
+            logger.debug(f"Plan estimate cost={total_cost:.0f} rows={plan_rows:.0f} -> {workload}")
+        except Exception as e:
+            workload = classify_by_text(key)
+            logger.warning(f"EXPLAIN failed, classified by query text as {workload}: {e}")
+
+        with self._lock:
+            self._cache[key] = workload
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+        return workload
+
+
+class QueryRouter:
+    """
+    Routes validated queries to per-workload psycopg2 connection pools
+
+    Each pool is bounded by a semaphore so callers wait at most
+    ``acquire_timeout`` seconds for a connection instead of failing
+    immediately when the pool is exhausted.
+    """
+
+    def __init__(self,
+                 configs: Dict[str, WorkloadPoolConfig],
+                 cost_threshold: float = DEFAULT_COST_THRESHOLD):
+        from psycopg2 import pool
+
+        self.configs = configs
+        self._pools = {}
+        self._slots = {}
+        for workload, config in configs.items():
+            self._pools[workload] = pool.ThreadedConnectionPool(
+                1, config.max_connections,
+                config.connection_string,
+                connect_timeout=config.connect_timeout,
+                options=f"-c statement_timeout={config.statement_timeout_ms}"
+            )
+            self._slots[workload] = threading.BoundedSemaphore(config.max_connections)
+            logger.info(f"Created {workload} pool (max {config.max_connections} connections)")
+
+        self.classifier = QueryClassifier(self._explain, cost_threshold)
+
+    @classmethod
+    def from_env(cls, settings: Optional[RoutingSettings] = None) -> "QueryRouter":
+        """
+        Build a router from RoutingSettings (the environment by default)
+
+        ANALYTICS_CONNECTION_STRING may point at a read replica or Neon
+        branch; when unset both pools share NEON_CONNECTION_STRING.
+        """
+        settings = settings or RoutingSettings()
+        return cls(settings.pool_configs(), cost_threshold=settings.analytics_cost_threshold)
+
+    @contextmanager
+    def connection(self, workload: str = LOOKUP):
+        """Borrow a connection from the pool for ``workload``"""
+        config = self.configs[workload]
+        slots = self._slots[workload]
+        if not slots.acquire(timeout=config.acquire_timeout):
+            raise PoolTimeoutError(
+                f"No {workload} connection available within {config.acquire_timeout}s"
+            )
+        conn = None
+        try:
+            conn = self._pools[workload].getconn()
+            yield conn
+        finally:
+            try:
+                if conn is not None:
+                    self._release(workload, conn)
+            finally:
+                slots.release()
+
+    def _release(self, workload: str, conn) -> None:
+        """Return a connection to its pool, discarding it if it can't be reset"""
+        try:
+            # Don't hand a connection stuck in a failed transaction to the next caller
+            conn.rollback()
+        except Exception as e:
+            # e.g. the server closed it (Neon autosuspend); close it so the pool reconnects
+            logger.warning(f"Discarding broken {workload} connection: {e}")
+            self._pools[workload].putconn(conn, close=True)
+            return
+        self._pools[workload].putconn(conn)
+
+    def _explain(self, query: str) -> Any:
+        with self.connection(LOOKUP) as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {query}")
+            plan = cursor.fetchone()[0]
+            cursor.close()
+            return plan
+
+    def classify(self, query: str) -> str:
+        return self.classifier.classify(query)
+
+    def execute(self, query: str) -> Tuple[str, List[str], List[tuple]]:
+        """
+        Classify and run a validated query
+
+        Returns:
+            Tuple[str, List[str], List[tuple]]: (workload, column_names, rows)
+        """
+        workload = self.classify(query)
+        with self.connection(workload) as conn:
+            cursor = conn.cursor()
+            cursor.execute(query)
+            columns = [desc[0] for desc in cursor.description]
+            rows = cursor.fetchall()
+            cursor.close()
+        return workload, columns, rows
+
+    def ping(self) -> bool:
+        """Run SELECT 1 on every pool"""
+        for workload in self.configs:
+            with self.connection(workload) as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT 1")
+                cursor.close()
+        return True
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        return {workload: config.describe() for workload, config in self.configs.items()}
+
+    def closeall(self):
+        for workload_pool in self._pools.values():
+            workload_pool.closeall()